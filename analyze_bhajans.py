@@ -10,43 +10,46 @@ import re
 from datetime import datetime
 from typing import List, Dict, Set
 
-# Existing tag structure
+from transliterate import search_form
+
+# Existing tag structure. Keywords are matched on search_form() of the
+# text, so one Latin spelling also finds the Kannada/Devanagari one.
 EXISTING_TAGS = {
     'deity': {
-        2: {'name': 'Shiva', 'keywords': ['shiva', 'ಶಿವ', 'rudra', 'ರುದ್ರ', 'shankar', 'ಶಂಕರ', 'maheshwara']},
-        3: {'name': 'Vishnu', 'keywords': ['vishnu', 'ವಿಷ್ಣು', 'narayana', 'ನಾರಾಯಣ', 'hari', 'ಹರಿ']},
-        4: {'name': 'Devi', 'keywords': ['devi', 'ದೇವಿ', 'sharade', 'ಶಾರದೆ', 'saraswati', 'ಸರಸ್ವತಿ', 'lakshmi', 'ಲಕ್ಷ್ಮಿ', 'parvati', 'ಪಾರ್ವತಿ', 'durga', 'ದುರ್ಗಾ']},
-        5: {'name': 'Ganesha', 'keywords': ['ganesha', 'ಗಣೇಶ', 'ganapati', 'ಗಣಪತಿ', 'vinayaka', 'ವಿನಾಯಕ']},
-        6: {'name': 'Hanuman', 'keywords': ['hanuman', 'ಹನುಮಾನ್', 'anjaneya', 'ಆಂಜನೇಯ', 'maruti', 'ಮಾರುತಿ', 'pavana', 'ಪವನ', 'vayu putra', 'ವಾಯುಪುತ್ರ']},
-        7: {'name': 'Krishna', 'keywords': ['krishna', 'ಕೃಷ್ಣ', 'gopala', 'ಗೋಪಾಲ', 'govinda', 'ಗೋವಿಂದ', 'madhava', 'ಮಾಧವ']},
-        8: {'name': 'Rama', 'keywords': ['rama', 'ರಾಮ', 'raghuvara', 'ರಘುವರ', 'raghu', 'ರಘು', 'sita', 'ಸೀತಾ']},
-        146: {'name': 'Narasimha', 'keywords': ['narasimha', 'ನರಸಿಂಹ', 'nrusimha', 'ugra', 'ಉಗ್ರ']},
+        2: {'name': 'Shiva', 'keywords': ['shiva', 'rudra', 'shankar', 'maheshwara']},
+        3: {'name': 'Vishnu', 'keywords': ['vishnu', 'narayana', 'hari']},
+        4: {'name': 'Devi', 'keywords': ['devi', 'sharade', 'saraswati', 'lakshmi', 'parvati', 'durga']},
+        5: {'name': 'Ganesha', 'keywords': ['ganesha', 'ganapati', 'vinayaka']},
+        6: {'name': 'Hanuman', 'keywords': ['hanuman', 'anjaneya', 'maruti', 'pavana', 'vayu putra']},
+        7: {'name': 'Krishna', 'keywords': ['krishna', 'gopala', 'govinda', 'madhava']},
+        8: {'name': 'Rama', 'keywords': ['rama', 'raghuvara', 'raghu', 'sita']},
+        146: {'name': 'Narasimha', 'keywords': ['narasimha', 'nrusimha', 'ugra']},
     },
     'type': {
-        9: {'name': 'Bhajan', 'keywords': ['bhajan', 'keertane', 'pada', 'ಪದ']},
-        10: {'name': 'Stotra', 'keywords': ['stotra', 'stuti', 'ಸ್ತುತಿ', 'ಸ್ತೋತ್ರ', 'ashtaka', 'ashtak']},
-        11: {'name': 'Aarti', 'keywords': ['aarti', 'arati', 'ಆರತಿ']},
-        12: {'name': 'Chalisa', 'keywords': ['chalisa', 'ಚಾಲೀಸಾ']},
-        13: {'name': 'Gurustuti', 'keywords': ['guru', 'ಗುರು', 'bindu madhava', 'ಬಿಂದು ಮಾಧವ']},
-        14: {'name': 'Mantra', 'keywords': ['mantra', 'ಮಂತ್ರ', 'namavali', 'ashtottara', 'sahasranama']},
+        9: {'name': 'Bhajan', 'keywords': ['bhajan', 'keertane', 'pada']},
+        10: {'name': 'Stotra', 'keywords': ['stotra', 'stuti', 'ashtaka', 'ashtak']},
+        11: {'name': 'Aarti', 'keywords': ['aarti', 'arati']},
+        12: {'name': 'Chalisa', 'keywords': ['chalisa']},
+        13: {'name': 'Gurustuti', 'keywords': ['guru', 'bindu madhava']},
+        14: {'name': 'Mantra', 'keywords': ['mantra', 'namavali', 'ashtottara', 'sahasranama']},
     },
     'theme': {
         18: {'name': 'Kannada', 'detect': 'script'},  # Detect by Kannada script
         20: {'name': 'Sanskrit', 'detect': 'script'},  # Detect by Devanagari/transliteration
-        21: {'name': 'Chants', 'keywords': ['om', 'ॐ', 'ಓಂ', 'namah', 'ನಮಃ', 'svaha', 'ಸ್ವಾಹಾ']},
-        22: {'name': 'Namasmarane', 'keywords': ['nama', 'ನಾಮ', 'namavali', 'ನಾಮಾವಲಿ']},
-        23: {'name': 'Mangala', 'keywords': ['mangala', 'ಮಂಗಳ', 'shubha', 'ಶುಭ']},
-        19: {'name': 'Tatva pada', 'keywords': ['tatva', 'ತತ್ವ', 'jnana', 'ಜ್ಞಾನ', 'advaita', 'ಅದ್ವೈತ']},
+        21: {'name': 'Chants', 'keywords': ['om', 'namah', 'svaha']},
+        22: {'name': 'Namasmarane', 'keywords': ['nama', 'namavali']},
+        23: {'name': 'Mangala', 'keywords': ['mangala', 'shubha']},
+        19: {'name': 'Tatva pada', 'keywords': ['tatva', 'jnana', 'advaita']},
     },
     'composer': {
-        15: {'name': 'Purandara Dasa', 'keywords': ['purandara', 'ಪುರಂದರ']},
-        16: {'name': 'Belaguru', 'keywords': ['belaguru', 'ಬೆಲಗೂರು', 'belaguuru']},
-        17: {'name': 'Daasapada', 'keywords': ['dasa', 'ದಾಸ', 'vittala', 'ವಿಠಲ']},
+        15: {'name': 'Purandara Dasa', 'keywords': ['purandara']},
+        16: {'name': 'Belaguru', 'keywords': ['belaguru']},
+        17: {'name': 'Daasapada', 'keywords': ['dasa', 'vittala']},
     },
     'occasion': {
-        24: {'name': 'Morning', 'keywords': ['pratha', 'ಪ್ರಾತಃ', 'suprabhat', 'ಸುಪ್ರಭಾತ', 'suprabhata']},
-        26: {'name': 'Festival', 'keywords': ['utsava', 'ಉತ್ಸವ', 'festival', 'habba', 'ಹಬ್ಬ']},
-        27: {'name': 'Bindu Madhava', 'keywords': ['bindu madhava', 'ಬಿಂದು ಮಾಧವ']},
+        24: {'name': 'Morning', 'keywords': ['pratha', 'suprabhata']},
+        26: {'name': 'Festival', 'keywords': ['utsava', 'festival', 'habba']},
+        27: {'name': 'Bindu Madhava', 'keywords': ['bindu madhava']},
     }
 }
 
@@ -65,6 +68,7 @@ def detect_language(text: str) -> str:
 def analyze_bhajan(bhajan_id: int, title: str, lyrics: str) -> Dict:
     """Analyze a single bhajan and return tag associations"""
     combined_text = f"{title.lower()} {lyrics.lower()}"
+    search_text = search_form(combined_text)
     tags = set()
     analysis = {
         'id': bhajan_id,
@@ -76,7 +80,7 @@ def analyze_bhajan(bhajan_id: int, title: str, lyrics: str) -> Dict:
     # 1. DETECT DEITY (Priority 1)
     for tag_id, info in EXISTING_TAGS['deity'].items():
         for keyword in info['keywords']:
-            if keyword.lower() in combined_text:
+            if search_form(keyword) in search_text:
                 tags.add(tag_id)
                 analysis['reasoning'].append(f"Deity: {info['name']} (found '{keyword}')")
                 break
@@ -85,7 +89,7 @@ def analyze_bhajan(bhajan_id: int, title: str, lyrics: str) -> Dict:
     type_found = False
     for tag_id, info in EXISTING_TAGS['type'].items():
         for keyword in info['keywords']:
-            if keyword.lower() in combined_text:
+            if search_form(keyword) in search_text:
                 tags.add(tag_id)
                 analysis['reasoning'].append(f"Type: {info['name']} (found '{keyword}')")
                 type_found = True
@@ -113,7 +117,7 @@ def analyze_bhajan(bhajan_id: int, title: str, lyrics: str) -> Dict:
             continue
         if 'keywords' in info:
             for keyword in info['keywords']:
-                if keyword.lower() in combined_text:
+                if search_form(keyword) in search_text:
                     tags.add(tag_id)
                     analysis['reasoning'].append(f"Theme: {info['name']} (found '{keyword}')")
                     break
@@ -121,7 +125,7 @@ def analyze_bhajan(bhajan_id: int, title: str, lyrics: str) -> Dict:
     # 5. DETECT COMPOSER (Priority 5)
     for tag_id, info in EXISTING_TAGS['composer'].items():
         for keyword in info['keywords']:
-            if keyword.lower() in combined_text:
+            if search_form(keyword) in search_text:
                 tags.add(tag_id)
                 analysis['reasoning'].append(f"Composer: {info['name']} (found '{keyword}')")
                 break
@@ -129,7 +133,7 @@ def analyze_bhajan(bhajan_id: int, title: str, lyrics: str) -> Dict:
     # 6. DETECT OCCASION (Priority 6)
     for tag_id, info in EXISTING_TAGS['occasion'].items():
         for keyword in info['keywords']:
-            if keyword.lower() in combined_text:
+            if search_form(keyword) in search_text:
                 tags.add(tag_id)
                 analysis['reasoning'].append(f"Occasion: {info['name']} (found '{keyword}')")
                 break
@@ -0,0 +1,202 @@
+"""
+Fingerprinted (content-hashed) static assets
+
+scripts/fingerprint_static.py copies every script, stylesheet and image to
+a name carrying a hash of its content (app.js -> app.3f2a9c1b.js) and
+records the mapping in static/asset-manifest.json. A fingerprinted file
+never changes, so it is sent with a year-long immutable Cache-Control and
+a repeat visit makes no revalidation request for it.
+
+Pages (index.html, admin_tags.html) and the service worker keep their
+URLs. AssetManifest rewrites their asset references to the fingerprinted
+names when serving them, and they are sent with `no-cache` so a new
+release is picked up on the next visit (a 304 when nothing changed). The
+service worker's `__ASSET_VERSION__` placeholder becomes the manifest's
+hash, which names its static cache and makes the browser install the new
+worker whenever an asset changes.
+
+Without a manifest (a checkout that has not run the script) files are
+served as they are and the ?v= query strings do the cache busting.
+"""
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import re
+from email.utils import parsedate
+from typing import Dict, Optional
+
+from starlette.datastructures import Headers
+from starlette.responses import Response
+from starlette.staticfiles import NotModifiedResponse
+
+from compression import (DEFAULT_MINIMUM_SIZE, PrecompressedStaticFiles, brotli, choose_encoding,
+                         static_file_response)
+
+MANIFEST_NAME = "asset-manifest.json"
+# Assets that get fingerprinted copies
+FINGERPRINT_EXTENSIONS = (".js", ".css", ".png", ".jpg", ".jpeg", ".gif", ".svg", ".webp", ".ico")
+# Assets whose references to other assets are rewritten inside the copy
+REFERENCING_EXTENSIONS = (".js", ".css")
+# Served under a fixed URL: the browser checks it for updates by that URL
+UNFINGERPRINTED = ("service-worker.js",)
+HASH_LENGTH = 8
+FINGERPRINTED = re.compile(r"\.[0-9a-f]{%d}\.\w+$" % HASH_LENGTH)
+VERSION_PLACEHOLDER = "__ASSET_VERSION__"
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+
+
+def content_hash(data: bytes) -> str:
+    """Short hex digest used in fingerprinted names"""
+    return hashlib.sha256(data).hexdigest()[:HASH_LENGTH]
+
+
+def fingerprinted_name(name: str, digest: str) -> str:
+    """saints/three-gurus.jpg -> saints/three-gurus.<digest>.jpg"""
+    root, ext = os.path.splitext(name)
+    return f"{root}.{digest}{ext}"
+
+
+def is_fingerprinted(path: str) -> bool:
+    """Whether a file name carries a content hash (and can be cached forever)"""
+    return FINGERPRINTED.search(path) is not None
+
+
+def reference_pattern(names) -> Optional[re.Pattern]:
+    """
+    Regex matching absolute references to any of `names` in HTML, JS or CSS
+
+    A reference is a quoted or url()-wrapped path such as "/app.js?v=1008";
+    the ?v= query string is matched too, since the fingerprint replaces it.
+    """
+    if not names:
+        return None
+    alternatives = "|".join(re.escape(name) for name in sorted(names, key=len, reverse=True))
+    return re.compile(r"""(?<=["'(])/(%s)(?:\?v=[\w.-]*)?(?=["')])""" % alternatives)
+
+
+def rewrite_references(text: str, manifest: Dict[str, str], pattern: Optional[re.Pattern] = None) -> str:
+    """Point every asset reference in `text` at its fingerprinted name"""
+    pattern = pattern or reference_pattern(manifest)
+    if pattern is None:
+        return text
+    return pattern.sub(lambda match: "/" + manifest[match.group(1)], text)
+
+
+def not_modified(response_headers: Headers, request_headers: Headers) -> bool:
+    """Whether a conditional request can be answered with 304 (as StaticFiles does)"""
+    if_none_match = request_headers.get("if-none-match")
+    if if_none_match and if_none_match == response_headers.get("etag"):
+        return True
+    if_modified_since = request_headers.get("if-modified-since")
+    last_modified = response_headers.get("last-modified")
+    if if_modified_since and last_modified:
+        since, modified = parsedate(if_modified_since), parsedate(last_modified)
+        return since is not None and modified is not None and since >= modified
+    return False
+
+
+def static_asset_response(path: str, request_headers: Headers, media_type: Optional[str] = None) -> Response:
+    """
+    static_file_response with the Cache-Control of its kind of file
+
+    Fingerprinted files are immutable; anything else keeps the browser's
+    default heuristics. Conditional requests are answered with 304.
+    """
+    response = static_file_response(path, request_headers.get("accept-encoding"), media_type)
+    if is_fingerprinted(path):
+        response.headers["Cache-Control"] = IMMUTABLE
+    if not_modified(response.headers, request_headers):
+        return NotModifiedResponse(response.headers)
+    return response
+
+
+class AssetStaticFiles(PrecompressedStaticFiles):
+    """The /static mount: precompressed variants plus immutable caching of fingerprinted files"""
+
+    def file_response(self, full_path, stat_result, scope, status_code: int = 200):
+        response = super().file_response(full_path, stat_result, scope, status_code)
+        if is_fingerprinted(os.fspath(full_path)):
+            response.headers["Cache-Control"] = IMMUTABLE
+        return response
+
+
+class AssetManifest:
+    """
+    static/asset-manifest.json and the pages rewritten from it
+
+    The manifest is re-read when its file changes, so running the build
+    script does not need a restart. Rewritten pages are cached (with their
+    compressed bodies) until the page or the manifest changes.
+    """
+
+    def __init__(self, static_dir: str):
+        self.path = os.path.join(static_dir, MANIFEST_NAME)
+        self.assets: Dict[str, str] = {}
+        self.version: Optional[str] = None
+        self._pattern: Optional[re.Pattern] = None
+        self._mtime: Optional[float] = None
+        self._pages: Dict[str, tuple] = {}  # path -> (page mtime, manifest version, {encoding: (body, etag)})
+
+    def refresh(self):
+        """Load the manifest if it changed on disk (or forget it if it is gone)"""
+        try:
+            mtime = os.stat(self.path).st_mtime
+        except OSError:
+            mtime = None
+        if mtime == self._mtime:
+            return
+        self._mtime = mtime
+        self.assets, self.version, self._pattern = {}, None, None
+        self._pages.clear()
+        if mtime is None:
+            return
+        with open(self.path, "rb") as f:
+            data = f.read()
+        self.assets = json.loads(data)
+        self.version = content_hash(data)
+        self._pattern = reference_pattern(self.assets)
+
+    def rewrites(self, path: str) -> bool:
+        """Whether a file is served rewritten: pages and the service worker, once there is a manifest"""
+        self.refresh()
+        return bool(self.assets) and (path.endswith(".html") or os.path.basename(path) in UNFINGERPRINTED)
+
+    def render(self, path: str) -> bytes:
+        """A page with its asset references (and the version placeholder) rewritten"""
+        with open(path, encoding="utf-8") as f:
+            text = f.read()
+        text = rewrite_references(text, self.assets, self._pattern)
+        return text.replace(VERSION_PLACEHOLDER, self.version).encode("utf-8")
+
+    def _variants(self, path: str) -> dict:
+        mtime = os.stat(path).st_mtime
+        cached = self._pages.get(path)
+        if cached and cached[0] == mtime and cached[1] == self.version:
+            return cached[2]
+        body = self.render(path)
+        etag = content_hash(body)
+        variants = {None: (body, f'"{etag}"')}
+        if len(body) >= DEFAULT_MINIMUM_SIZE:
+            variants["gzip"] = (gzip.compress(body, compresslevel=9, mtime=0), f'"{etag}-gzip"')
+            if brotli is not None:
+                variants["br"] = (brotli.compress(body, quality=11), f'"{etag}-br"')
+        self._pages[path] = (mtime, self.version, variants)
+        return variants
+
+    def response(self, path: str, request_headers: Headers, media_type: Optional[str] = None) -> Response:
+        """The rewritten page, compressed if the client accepts it, or a 304"""
+        variants = self._variants(path)
+        encoding = choose_encoding(request_headers.get("accept-encoding"),
+                                   [encoding for encoding in ("br", "gzip") if encoding in variants])
+        body, etag = variants[encoding]
+        headers = {"Cache-Control": REVALIDATE, "ETag": etag, "Vary": "Accept-Encoding"}
+        if encoding:
+            headers["Content-Encoding"] = encoding
+        if request_headers.get("if-none-match") == etag:
+            return Response(status_code=304, headers=headers)
+        media_type = media_type or mimetypes.guess_type(path)[0] or "text/plain"
+        return Response(body, media_type=media_type, headers=headers)
@@ -11,10 +11,14 @@ Feature flag: USE_TAG_TAXONOMY environment variable
 """
 import os
 import json
-from typing import List, Union
+import logging
+from typing import Dict, Iterable, List, Optional, Union
 from sqlalchemy.orm import Session
 from sqlalchemy import text
 
+logger = logging.getLogger(__name__)
+
+
 def _use_tag_taxonomy() -> bool:
     """Check feature flag - allows dynamic testing"""
     return os.environ.get("USE_TAG_TAXONOMY", "true").lower() == "true"
@@ -80,6 +84,10 @@ def dual_write_tags(
         source: Tag source ('manual', 'ai', 'migration', 'auto')
         confidence: Confidence score for AI-assigned tags (0.0-1.0)
     
+    Returns:
+        Tag ids now in bhajan_tags for the bhajan, or None if the
+        taxonomy table was left unchanged (feature off or no known tags)
+    
     Logic:
         1. Clear existing bhajan_tags entries (for updates)
         2. For each tag:
@@ -98,15 +106,16 @@ def dual_write_tags(
     tag_names = []
     tag_ids = []
     
-    import logging
-    logger = logging.getLogger(__name__)
-    logger.info(f"dual_write_tags called with tags: {tags} (types: {[type(t).__name__ for t in tags]})")
+    debug = logger.isEnabledFor(logging.DEBUG)
+    if debug:
+        logger.debug("dual_write_tags called with tags: %s (types: %s)", tags, [type(t).__name__ for t in tags])
     
     for tag in tags:
         if isinstance(tag, str):
             tag_name = tag.lower().strip()
             tag_names.append(tag_name)
-            logger.info(f"  String tag: '{tag_name}'")
+            if debug:
+                logger.debug("  String tag: '%s'", tag_name)
             
             # Look up tag_id if taxonomy enabled
             if _use_tag_taxonomy():
@@ -116,16 +125,18 @@ def dual_write_tags(
         
         elif isinstance(tag, int):
             tag_ids.append(tag)
-            logger.info(f"  Int tag ID: {tag}")
+            if debug:
+                logger.debug("  Int tag ID: %s", tag)
             
             # Convert to name for JSON
             tag_name = get_tag_name_by_id(session, tag)
-            logger.info(f"    -> Resolved to name: {tag_name}")
+            if debug:
+                logger.debug("    -> Resolved to name: %s", tag_name)
             if tag_name:
                 tag_names.append(tag_name)
     
-    logger.info(f"  Final tag_names: {tag_names}")
-    logger.info(f"  Final tag_ids: {tag_ids}")
+    if debug:
+        logger.debug("  Final tag_names: %s, tag_ids: %s", tag_names, tag_ids)
     
     # Write to old JSON field (always, for backward compat)
     bhajan.set_tags(tag_names)
@@ -155,6 +166,10 @@ def dual_write_tags(
             )
     
     session.commit()
+    
+    if _use_tag_taxonomy() and tag_ids:
+        return list(dict.fromkeys(tag_ids))
+    return None
 
 
 def read_bhajan_tags(session: Session, bhajan_id: int) -> List[str]:
@@ -199,6 +214,68 @@ def read_bhajan_tags(session: Session, bhajan_id: int) -> List[str]:
     return []
 
 
+def read_tags_for_bhajans(
+    session: Session,
+    bhajan_ids: Iterable[int],
+    json_tags: Optional[Dict[int, Optional[str]]] = None,
+    chunk_size: int = 500
+) -> Dict[int, List[str]]:
+    """
+    Batch version of read_bhajan_tags() for list responses.
+    
+    Same preference order (taxonomy tags, else JSON field) in one query
+    per chunk of IDs instead of one or two queries per bhajan.
+    
+    Args:
+        session: Database session
+        bhajan_ids: Bhajan IDs
+        json_tags: {bhajan_id: tags JSON string} already loaded by the
+            caller, used for the fallback (avoids re-reading bhajans)
+        chunk_size: IDs per IN (...) query (SQLite variable limit)
+    
+    Returns:
+        {bhajan_id: [tag names]} for every requested ID
+    """
+    from models import Bhajan
+    
+    bhajan_ids = list(bhajan_ids)
+    tags_by_id: Dict[int, List[str]] = {bhajan_id: [] for bhajan_id in bhajan_ids}
+    
+    if _use_tag_taxonomy():
+        for i in range(0, len(bhajan_ids), chunk_size):
+            chunk = bhajan_ids[i:i + chunk_size]
+            params = {f"b{n}": bhajan_id for n, bhajan_id in enumerate(chunk)}
+            result = session.execute(
+                text(f"""
+                    SELECT bt.bhajan_id, t.name
+                    FROM bhajan_tags bt
+                    JOIN tag_taxonomy t ON bt.tag_id = t.id
+                    WHERE bt.bhajan_id IN ({", ".join(":" + key for key in params)})
+                    ORDER BY t.name
+                """),
+                params
+            )
+            for bhajan_id, name in result:
+                tags_by_id[bhajan_id].append(name)
+    
+    missing = [bhajan_id for bhajan_id, tags in tags_by_id.items() if not tags]
+    if missing:
+        if json_tags is None:
+            json_tags = {}
+            for i in range(0, len(missing), chunk_size):
+                json_tags.update(
+                    session.query(Bhajan.id, Bhajan.tags)
+                    .filter(Bhajan.id.in_(missing[i:i + chunk_size])).all()
+                )
+        for bhajan_id in missing:
+            try:
+                tags_by_id[bhajan_id] = json.loads(json_tags.get(bhajan_id) or "[]")
+            except (TypeError, ValueError):
+                tags_by_id[bhajan_id] = []
+    
+    return tags_by_id
+
+
 def get_bhajan_with_unified_tags(session: Session, bhajan_id: int) -> dict | None:
     """
     Get bhajan with tags from preferred source.
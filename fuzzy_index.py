@@ -0,0 +1,236 @@
+"""
+Typo-tolerant lookup over bhajan titles and tag names
+
+TrigramIndex keeps, in memory, the distinct words of every indexed
+document (in transliterate.search_form(), so scripts and spelling variants
+are already folded) and a character-trigram -> words map. A query word is
+compared only with vocabulary words sharing a trigram, so lookups scale
+with the vocabulary (distinct words), not with the number of bhajans.
+
+Documents are keyed ("bhajan", id) for titles and ("tag", id) for a tag's
+name, translations and synonyms. The index is loaded from the database on
+first use and then updated by the write endpoints.
+"""
+import threading
+from collections import Counter
+from typing import Callable, Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+from transliterate import search_form
+
+Key = Tuple[str, int]
+
+# Jaccard similarity of trigram sets (pg_trgm's default threshold)
+SIMILARITY_THRESHOLD = 0.3
+# Words shorter than this only match exactly; their trigrams are too few
+MIN_FUZZY_WORD = 4
+
+
+def trigrams(word: str) -> FrozenSet[str]:
+    """Padded character trigrams of one word ("ram" -> "  r", " ra", "ram", "am ")"""
+    padded = f"  {word} "
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+def similarity(a: str, b: str) -> float:
+    """Trigram Jaccard similarity of two words (0..1)"""
+    grams_a, grams_b = trigrams(a), trigrams(b)
+    shared = len(grams_a & grams_b)
+    return shared / (len(grams_a) + len(grams_b) - shared)
+
+
+def read_tag_texts(conn, tag_id: Optional[int] = None) -> Dict[int, Tuple[str, str, List[str]]]:
+    """
+    Searchable texts of every tag (or of one tag)
+
+    Args:
+        conn: sqlite3 connection
+        tag_id: Only read this tag
+
+    Returns:
+        {tag_id: (name, category, [translations and synonyms])}
+    """
+    where, params = ("WHERE id = ?", (tag_id,)) if tag_id is not None else ("", ())
+    tags = {
+        row[0]: (row[1], row[2], [])
+        for row in conn.execute(f"SELECT id, name, category FROM tag_taxonomy {where}", params)
+    }
+    where = "WHERE tag_id = ?" if tag_id is not None else ""
+    for alias_tag_id, text in conn.execute(
+        f"SELECT tag_id, translation FROM tag_translations {where} "
+        f"UNION ALL SELECT tag_id, synonym FROM tag_synonyms {where}",
+        params * 2
+    ):
+        if alias_tag_id in tags and text:
+            tags[alias_tag_id][2].append(text)
+    return tags
+
+
+class TrigramIndex:
+    """
+    In-memory word/trigram index with incremental updates
+
+    Thread-safe. Call ensure_loaded() before searching; add()/remove()
+    keep it current afterwards.
+    """
+
+    def __init__(self, threshold: float = SIMILARITY_THRESHOLD):
+        self.threshold = threshold
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._doc_words: Dict[Key, Set[str]] = {}
+        self._word_docs: Dict[str, Set[Key]] = {}
+        self._gram_words: Dict[str, Set[str]] = {}
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    def __len__(self) -> int:
+        return len(self._doc_words)
+
+    def vocabulary_size(self) -> int:
+        return len(self._word_docs)
+
+    def add(self, key: Key, forms: Iterable[str]):
+        """
+        Index (or re-index) a document
+
+        Args:
+            key: ("bhajan", id) or ("tag", id)
+            forms: Texts already in search_form()
+        """
+        words = {word for form in forms if form for word in form.split()}
+        with self._lock:
+            self._remove(key)
+            if not words:
+                return
+            self._doc_words[key] = words
+            for word in words:
+                docs = self._word_docs.get(word)
+                if docs is None:
+                    docs = self._word_docs[word] = set()
+                    for gram in trigrams(word):
+                        self._gram_words.setdefault(gram, set()).add(word)
+                docs.add(key)
+
+    def add_text(self, key: Key, texts: Iterable[Optional[str]]):
+        """Index a document from raw texts in any script"""
+        self.add(key, [search_form(text) for text in texts if text])
+
+    def remove(self, key: Key):
+        """Drop a document from the index (no-op if absent)"""
+        with self._lock:
+            self._remove(key)
+
+    def _remove(self, key: Key):
+        for word in self._doc_words.pop(key, ()):
+            docs = self._word_docs[word]
+            docs.discard(key)
+            if not docs:
+                del self._word_docs[word]
+                for gram in trigrams(word):
+                    words = self._gram_words[gram]
+                    words.discard(word)
+                    if not words:
+                        del self._gram_words[gram]
+
+    def load(self, conn):
+        """
+        (Re)build from the database: live bhajan titles and all tags
+
+        Args:
+            conn: sqlite3 connection
+        """
+        tag_texts = read_tag_texts(conn)
+
+        titles = conn.execute(
+            "SELECT id, title_roman, title FROM bhajans WHERE deleted_at IS NULL"
+        ).fetchall()
+
+        with self._lock:
+            self._doc_words.clear()
+            self._word_docs.clear()
+            self._gram_words.clear()
+            for bhajan_id, title_roman, title in titles:
+                self.add(("bhajan", bhajan_id), [title_roman if title_roman is not None else search_form(title)])
+            for tag_id, (name, _, aliases) in tag_texts.items():
+                self.add_text(("tag", tag_id), [name] + aliases)
+            self._loaded = True
+
+    def ensure_loaded(self, connect: Callable):
+        """Load on first use; connect() returns a sqlite3 connection"""
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            conn = connect()
+            try:
+                self.load(conn)
+            finally:
+                conn.close()
+
+    def refresh_tag(self, conn, tag_id: int):
+        """Re-read one tag's name, translations and synonyms"""
+        if not self._loaded:
+            return  # load() will read it
+        texts = read_tag_texts(conn, tag_id).get(tag_id)
+        if texts is None:
+            self.remove(("tag", tag_id))
+            return
+        name, _, aliases = texts
+        self.add_text(("tag", tag_id), [name] + aliases)
+
+    def similar_words(self, word: str) -> Dict[str, float]:
+        """Vocabulary words similar to `word`, with their similarity"""
+        if len(word) < MIN_FUZZY_WORD:
+            return {word: 1.0} if word in self._word_docs else {}
+
+        grams = trigrams(word)
+        shared = Counter()
+        for gram in grams:
+            shared.update(self._gram_words.get(gram, ()))
+
+        matches = {}
+        for candidate, count in shared.items():
+            score = count / (len(grams) + len(trigrams(candidate)) - count)
+            if score >= self.threshold:
+                matches[candidate] = score
+        return matches
+
+    def search(self, query: str, limit: int = 100, kind: Optional[str] = None) -> List[Tuple[Key, float]]:
+        """
+        Documents whose words approximately match every query word
+
+        Args:
+            query: Raw query in any script
+            limit: Maximum documents to return
+            kind: Only return keys of this kind ("bhajan" or "tag")
+
+        Returns:
+            [(key, score)] best first; score is the mean best-word
+            similarity over the query words (1.0 = all words exact)
+        """
+        words = search_form(query).split()
+        if not words:
+            return []
+
+        with self._lock:
+            totals: Optional[Dict[Key, float]] = None
+            for word in words:
+                best: Dict[Key, float] = {}
+                for match, score in self.similar_words(word).items():
+                    for key in self._word_docs[match]:
+                        if kind and key[0] != kind:
+                            continue
+                        if score > best.get(key, 0.0):
+                            best[key] = score
+                if totals is None:
+                    totals = best
+                else:
+                    totals = {key: totals[key] + score for key, score in best.items() if key in totals}
+                if not totals:
+                    return []
+
+        ranked = sorted(totals.items(), key=lambda item: (-item[1], item[0]))
+        return [(key, total / len(words)) for key, total in ranked[:limit]]
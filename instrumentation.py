@@ -0,0 +1,287 @@
+"""
+Query count and SQL timing instrumentation
+
+Every sqlite3 connection the app opens - the SQLAlchemy engine and direct
+connections from models.get_connection() - is an InstrumentedConnection.
+Its cursors report statements, SQL time and rows fetched to the QueryStats
+of the current request, which QueryTimingMiddleware creates per HTTP
+request and publishes as:
+- Server-Timing / X-Query-Count response headers
+- an access log line on the "instrumentation" logger, with the stats as
+  extra={"request_stats": ...} (sampled, see logging_config)
+- the QueryLog behind GET /api/debug/queries (when settings.debug is on)
+
+Outside a request nothing is recorded unless track_queries() is active.
+"""
+import time
+import sqlite3
+import logging
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+from starlette.datastructures import MutableHeaders
+
+logger = logging.getLogger(__name__)
+
+# QueryStats for the request (or track_queries block) in progress
+_current_stats: ContextVar[Optional["QueryStats"]] = ContextVar("query_stats", default=None)
+
+
+class QueryStats:
+    """SQL activity of one request"""
+    __slots__ = ("query_count", "sql_time", "rows", "slowest_statement", "slowest_time")
+
+    def __init__(self):
+        self.query_count = 0
+        self.sql_time = 0.0
+        self.rows = 0
+        self.slowest_statement = None
+        self.slowest_time = 0.0
+
+    def observe(self, statement: str, elapsed: float, statement_total: float):
+        """Add SQL time; statement_total is the statement's time so far"""
+        self.sql_time += elapsed
+        if statement_total > self.slowest_time:
+            self.slowest_time = statement_total
+            self.slowest_statement = statement
+
+    def to_dict(self) -> Dict:
+        return {
+            "query_count": self.query_count,
+            "sql_ms": round(self.sql_time * 1000, 2),
+            "rows": self.rows,
+            "slowest_ms": round(self.slowest_time * 1000, 2),
+            "slowest_statement": " ".join(self.slowest_statement.split())[:300]
+            if self.slowest_statement else None
+        }
+
+
+class InstrumentedCursor(sqlite3.Cursor):
+    """Cursor that reports statements, time and fetched rows to QueryStats"""
+
+    _statement = None
+    _statement_time = 0.0
+
+    def _run(self, method, statement, *args):
+        stats = _current_stats.get()
+        if stats is None:
+            return method(statement, *args)
+
+        start = time.perf_counter()
+        try:
+            return method(statement, *args)
+        finally:
+            elapsed = time.perf_counter() - start
+            self._statement = statement
+            self._statement_time = elapsed
+            stats.query_count += 1
+            stats.observe(statement, elapsed, elapsed)
+
+    def _fetched(self, start: float, rows: int):
+        stats = _current_stats.get()
+        if stats is None:
+            return
+        elapsed = time.perf_counter() - start
+        self._statement_time += elapsed
+        stats.rows += rows
+        stats.observe(self._statement, elapsed, self._statement_time)
+
+    def execute(self, sql, parameters=()):
+        return self._run(super().execute, sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self._run(super().executemany, sql, seq_of_parameters)
+
+    def executescript(self, sql_script):
+        return self._run(super().executescript, sql_script)
+
+    def fetchone(self):
+        start = time.perf_counter()
+        row = super().fetchone()
+        self._fetched(start, 0 if row is None else 1)
+        return row
+
+    def fetchmany(self, size=None):
+        start = time.perf_counter()
+        rows = super().fetchmany(self.arraysize if size is None else size)
+        self._fetched(start, len(rows))
+        return rows
+
+    def fetchall(self):
+        start = time.perf_counter()
+        rows = super().fetchall()
+        self._fetched(start, len(rows))
+        return rows
+
+    def __next__(self):
+        start = time.perf_counter()
+        row = super().__next__()
+        self._fetched(start, 1)
+        return row
+
+
+class InstrumentedConnection(sqlite3.Connection):
+    """
+    sqlite3 connection whose cursors are InstrumentedCursor
+
+    Pass as sqlite3.connect(..., factory=InstrumentedConnection); the
+    execute* shortcuts are routed through cursor() so they are counted too.
+    """
+
+    def cursor(self, factory=InstrumentedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def executescript(self, sql_script):
+        return self.cursor().executescript(sql_script)
+
+
+@contextmanager
+def track_queries():
+    """
+    Record SQL activity outside the middleware (tests, scripts)
+
+    Usage:
+        with track_queries() as stats:
+            ...
+        assert stats.query_count <= 3
+    """
+    stats = QueryStats()
+    token = _current_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_stats.reset(token)
+
+
+class QueryLog:
+    """Recent requests plus per-route aggregates for the debug endpoint"""
+
+    def __init__(self, maxlen: int = 200):
+        self.recent = deque(maxlen=maxlen)
+        self.routes: Dict[str, Dict] = {}
+
+    def record(self, entry: Dict):
+        self.recent.append(entry)
+
+        route = self.routes.setdefault(entry["route"], {
+            "requests": 0, "queries": 0, "max_queries": 0, "sql_ms": 0.0, "max_sql_ms": 0.0
+        })
+        route["requests"] += 1
+        route["queries"] += entry["query_count"]
+        route["max_queries"] = max(route["max_queries"], entry["query_count"])
+        route["sql_ms"] = round(route["sql_ms"] + entry["sql_ms"], 2)
+        route["max_sql_ms"] = max(route["max_sql_ms"], entry["sql_ms"])
+
+    def snapshot(self) -> Dict:
+        return {
+            "recent": list(self.recent),
+            "routes": {
+                path: dict(agg, avg_queries=round(agg["queries"] / agg["requests"], 2))
+                for path, agg in sorted(self.routes.items())
+            }
+        }
+
+
+def route_template(scope) -> str:
+    """
+    Route path template (e.g. /api/bhajans/{bhajan_id}) for a request scope
+
+    Requests served by a mount (/static) are reported as the mount prefix
+    plus {path:path}; anything else unmatched as "<unmatched>", so labels
+    never contain raw paths.
+    """
+    route = scope.get("route")
+    if route is not None:
+        return getattr(route, "path", "<unmatched>")
+    if "endpoint" in scope and scope.get("root_path"):
+        return scope["root_path"] + "/{path:path}"
+    return "<unmatched>"
+
+
+class QueryTimingMiddleware:
+    """
+    Pure ASGI middleware collecting QueryStats per HTTP request
+
+    Adds Server-Timing (db + app durations) and X-Query-Count headers,
+    feeds the QueryLog (and, if given, the per-route SQL histograms of
+    metrics.PortalMetrics) and logs an access line: WARNING when slow,
+    otherwise INFO when the sampler picks it (DEBUG without a sampler).
+    """
+
+    def __init__(self, app, query_log: QueryLog, slow_request_ms: float = 500.0,
+                 metrics=None, sampler=None):
+        self.app = app
+        self.query_log = query_log
+        self.slow_request_ms = slow_request_ms
+        self.metrics = metrics
+        self.sampler = sampler
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats()
+        token = _current_stats.set(stats)
+        start = time.perf_counter()
+        status = {"code": 500}
+        path = scope["path"]  # Mounts rewrite scope["path"]
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+                app_ms = (time.perf_counter() - start) * 1000
+                headers = MutableHeaders(scope=message)
+                headers.append(
+                    "Server-Timing",
+                    f'db;dur={stats.sql_time * 1000:.2f};desc="{stats.query_count} queries", '
+                    f'app;dur={app_ms:.2f}'
+                )
+                headers.append("X-Query-Count", str(stats.query_count))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current_stats.reset(token)
+            duration_ms = round((time.perf_counter() - start) * 1000, 2)
+            route = route_template(scope)
+            entry = {
+                "method": scope["method"],
+                "route": route,
+                "path": path,
+                "status": status["code"],
+                "duration_ms": duration_ms,
+                **stats.to_dict()
+            }
+            self.query_log.record(entry)
+            if self.metrics is not None:
+                self.metrics.observe_sql(route, stats.query_count, stats.sql_time)
+
+            self._log(entry)
+
+    def _log(self, entry: Dict):
+        if entry["duration_ms"] >= self.slow_request_ms:
+            level = logging.WARNING
+        elif self.sampler is None:
+            level = logging.DEBUG
+        elif self.sampler.should_log(entry["route"], entry["status"]):
+            level = logging.INFO
+        else:
+            return
+
+        if logger.isEnabledFor(level):
+            logger.log(
+                level, "%s %s %s %.1fms %d queries",
+                entry["method"], entry["path"], entry["status"],
+                entry["duration_ms"], entry["query_count"],
+                extra={"request_stats": entry}
+            )
@@ -0,0 +1,171 @@
+"""
+Logging pipeline for the portal
+
+Request threads only put records on a queue (RecordQueueHandler); a
+QueueListener thread does the formatting and disk I/O:
+- logs/portal_app.log: one JSON object per line, rotated by size
+- console: the human-readable format the portal always used
+
+Per-request access lines come from instrumentation.QueryTimingMiddleware
+and are sampled per route by RequestLogSampler: errors and slow requests
+are always logged, successful ones at the configured rate.
+"""
+import os
+import copy
+import json
+import queue
+import atexit
+import logging
+import threading
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Dict, Optional
+
+CONSOLE_FORMAT = '[%(asctime)s] %(levelname)s - %(message)s'
+
+# Standard LogRecord attributes; anything else was passed via extra=
+_RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+_lock = threading.Lock()
+_listener: Optional[QueueListener] = None
+_queue: Optional[queue.Queue] = None
+_handler: Optional[QueueHandler] = None
+
+
+class JsonFormatter(logging.Formatter):
+    """Format records as single-line JSON, merging extra= fields"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class RecordQueueHandler(QueueHandler):
+    """
+    QueueHandler that enqueues the record unformatted
+
+    The default prepare() formats the record on the calling thread and
+    drops exc_info, so the listener's JsonFormatter never saw tracebacks.
+    The queue stays in-process, so the copy can keep exc_info; only the
+    message is resolved now, in case its args change before the listener
+    runs.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        return record
+
+
+class RequestLogSampler:
+    """
+    Decide which per-request access lines to log
+
+    Successful requests are logged at `default_rate` (0..1) unless the
+    route template has its own rate. Sampling is deterministic: a route at
+    0.25 logs exactly every 4th success. Errors (status >= 400) and slow
+    requests are always logged.
+    """
+
+    def __init__(self, default_rate: float = 1.0, route_rates: Optional[Dict[str, float]] = None):
+        self.default_rate = default_rate
+        self.route_rates = dict(route_rates or {})
+        self._credit: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_spec(cls, default_rate: float, spec: str) -> "RequestLogSampler":
+        """
+        Build from a spec like "/health=0,/api/bhajans=0.1"
+        """
+        route_rates = {}
+        for item in filter(None, (part.strip() for part in spec.split(","))):
+            route, _, rate = item.rpartition("=")
+            route_rates[route.strip()] = float(rate)
+        return cls(default_rate, route_rates)
+
+    def should_log(self, route: str, status: int, slow: bool = False) -> bool:
+        if status >= 400 or slow:
+            return True
+
+        rate = self.route_rates.get(route, self.default_rate)
+        if rate >= 1:
+            return True
+        if rate <= 0:
+            return False
+
+        with self._lock:
+            credit = self._credit.get(route, 1.0 - rate) + rate
+            if credit >= 1.0:
+                self._credit[route] = credit - 1.0
+                return True
+            self._credit[route] = credit
+            return False
+
+
+def configure_logging(settings) -> QueueListener:
+    """
+    Route root logging through a queue to rotating JSON file + console
+
+    Runs once per process; later calls return the running listener.
+    """
+    global _listener, _queue, _handler
+
+    with _lock:
+        if _listener is not None:
+            return _listener
+
+        os.makedirs(settings.log_dir, exist_ok=True)
+
+        file_handler = RotatingFileHandler(
+            os.path.join(settings.log_dir, "portal_app.log"),
+            maxBytes=settings.log_max_bytes,
+            backupCount=settings.log_backup_count,
+            encoding="utf-8"
+        )
+        file_handler.setFormatter(JsonFormatter())
+
+        console_handler = logging.StreamHandler()
+        console_handler.setFormatter(logging.Formatter(CONSOLE_FORMAT))
+
+        _queue = queue.Queue(-1)
+        root = logging.getLogger()
+        root.setLevel(getattr(logging, settings.log_level, logging.INFO))
+        _handler = RecordQueueHandler(_queue)
+        root.addHandler(_handler)
+
+        _listener = QueueListener(_queue, file_handler, console_handler, respect_handler_level=True)
+        _listener.start()
+        atexit.register(shutdown_logging)
+
+        return _listener
+
+
+def shutdown_logging():
+    """Flush queued records and stop the listener thread (idempotent)"""
+    global _listener, _handler
+
+    with _lock:
+        if _handler is not None:
+            logging.getLogger().removeHandler(_handler)
+            _handler = None
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+
+
+def log_queue_depth() -> int:
+    """Records waiting for the listener thread (0 before configure_logging)"""
+    return _queue.qsize() if _queue is not None else 0
@@ -1,123 +1,107 @@
 """
 Belaguru Bhajan Portal - FastAPI Backend
+
+Importing this module is cheap: it defines routes and builds the default
+app with create_app(). Logging, directories and the database schema are
+set up by the lifespan handler (or lazily by get_db) once per worker.
 """
 import os
+import re
 import json
+import hashlib
+import sqlite3
 import logging
+import threading
+from contextlib import asynccontextmanager
 from datetime import datetime
-from fastapi import FastAPI, HTTPException, File, UploadFile, Form, Depends
-from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi import FastAPI, APIRouter, HTTPException, File, UploadFile, Form, Depends, Query, Request
+from fastapi.responses import FileResponse, JSONResponse, Response
+from starlette.exceptions import HTTPException as StarletteHTTPException
 from sqlalchemy.orm import Session
 from sqlalchemy import or_, desc
-from pydantic import BaseModel
-from typing import List, Optional
-from models import Bhajan, init_db, get_db, get_database_path
-from dual_write import dual_write_tags, read_bhajan_tags, get_bhajan_with_unified_tags
-
-# Configure comprehensive logging
-LOG_DIR = "./logs"
-os.makedirs(LOG_DIR, exist_ok=True)
-
-logging.basicConfig(
-    level=logging.INFO,
-    format='[%(asctime)s] %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler(f'{LOG_DIR}/portal_app.log'),
-        logging.StreamHandler()
-    ]
+from pydantic import BaseModel, Field
+from typing import Dict, List, Literal, Optional, Tuple, Union
+from models import Bhajan, BhajanNeighbor, ensure_db, get_db, get_connection, get_engine, get_database_path, configure_database, SCHEMA_VERSION
+from dual_write import dual_write_tags, read_bhajan_tags, read_tags_for_bhajans, get_bhajan_with_unified_tags
+from settings import Settings
+from previews import highlight_fragments, make_preview
+from transliterate import lyric_lines_form, search_form
+from fuzzy_index import TrigramIndex
+from suggest import MAX_SUGGESTIONS, SuggestIndex
+from ranking import (
+    MATCH_FUZZY_MAX, MATCH_LYRICS, MATCH_LYRICS_ROMAN, MATCH_TITLE, MATCH_TITLE_ROMAN,
+    TAG_NAME, TAG_SYNONYM, TAG_TRANSLATION, ScoringWeights, SearchCache, SearchSignals,
+    normalize_query, rank
 )
+from related import TOP_K as RELATED_K
+import near_duplicates
+from popularity import EVENTS as POPULARITY_EVENTS, PopularityCounter
+from playlists import PlaylistCache
+from sync import MAX_PAGE_SIZE as SYNC_MAX_PAGE_SIZE, PAGE_SIZE as SYNC_PAGE_SIZE, SyncTokenError
+from sync import parse_token as parse_sync_token, read_changes, read_tags as read_sync_tags
+from tag_bitmaps import TagBitmapIndex, from_bitmap
+from tag_query import Node as TagQueryNode, TagQueryError, resolve_terms
+from tag_query import evaluate as evaluate_tag_query, parse_all as parse_tag_query
+from instrumentation import QueryLog, QueryTimingMiddleware
+from assets import AssetManifest, AssetStaticFiles, static_asset_response
+from compression import CompressionMiddleware
+from logging_config import RequestLogSampler, configure_logging, log_queue_depth
+from metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, MetricsMiddleware, PortalMetrics
+
 logger = logging.getLogger(__name__)
 
-logger.info("=" * 60)
-logger.info("🧡 BELAGURU BHAJAN PORTAL STARTING")
-logger.info("=" * 60)
+# API routes; static file routes live on static_router so they can be
+# registered after the /static mount in create_app()
+router = APIRouter()
+debug_router = APIRouter()
+static_router = APIRouter()
 
-# Initialize FastAPI
-app = FastAPI(title="Belaguru Bhajan Portal")
+_startup_lock = threading.Lock()
 
-logger.info("FastAPI app initialized")
+# /api/search: most typo-tolerant (trigram) candidates considered
+FUZZY_SEARCH_LIMIT = 100
 
-# Get absolute path to static directory
-STATIC_DIR = os.path.abspath("static")
-logger.info(f"Static directory: {STATIC_DIR}")
-logger.info(f"Static directory exists: {os.path.exists(STATIC_DIR)}")
 
+def startup(settings: Settings):
+    """Worker startup: logging, directories and database schema check"""
+    with _startup_lock:
+        configure_logging(settings)
+        
+        logger.info("=" * 60)
+        logger.info("🧡 BELAGURU BHAJAN PORTAL STARTING")
+        logger.info("=" * 60)
+        
+        os.makedirs(settings.static_dir, exist_ok=True)
+        os.makedirs(settings.audio_dir, exist_ok=True)
+        logger.info(f"Static directory: {os.path.abspath(settings.static_dir)}")
+        
+        # Initialize database (no-op when the stored schema version is current)
+        try:
+            ensure_db()
+            logger.info(f"Database schema v{SCHEMA_VERSION} ready: {get_database_path()}")
+        except Exception as e:
+            logger.error(f"Database initialization failed: {e}", exc_info=True)
+            raise
 
-# Global exception handler
-from fastapi.exceptions import RequestValidationError
-from starlette.exceptions import HTTPException as StarletteHTTPException
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    startup(app.state.settings)
+    app.state.popularity.start(get_connection)
+    yield
+    app.state.popularity.stop(get_connection)
 
 
-@app.exception_handler(Exception)
 async def general_exception_handler(request, exc):
     logger.error(f"Unhandled exception: {exc}", exc_info=True)
     raise HTTPException(status_code=500, detail=str(exc))
 
 
-@app.exception_handler(StarletteHTTPException)
 async def http_exception_handler(request, exc):
     logger.warning(f"HTTP Exception {exc.status_code}: {exc.detail}")
     return JSONResponse({"error": exc.detail}, status_code=exc.status_code)
 
 
-logger.info("Exception handlers registered")
-
-# Ensure directories exist
-os.makedirs("./data", exist_ok=True)
-os.makedirs("./static", exist_ok=True)
-
-logger.info("Directories verified")
-
-# Initialize database
-try:
-    init_db()
-    logger.info("Database initialized successfully")
-    
-    # Run schema migration
-    import sqlite3
-    db_path = "./data/portal.db"
-    try:
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-        
-        # Get current columns
-        cursor.execute("PRAGMA table_info(bhajans)")
-        columns = {row[1]: row[2] for row in cursor.fetchall()}
-        
-        # Add missing columns
-        migrations = {
-            "tags": "TEXT",
-            "uploader_name": "TEXT",
-            "created_at": "DATETIME",
-            "updated_at": "DATETIME",
-            "deleted_at": "DATETIME"
-        }
-        
-        for col_name, col_type in migrations.items():
-            if col_name not in columns:
-                cursor.execute(f"ALTER TABLE bhajans ADD COLUMN {col_name} {col_type}")
-                logger.info(f"Added column: {col_name}")
-        
-        # Migrate data
-        if "manual_tags" in columns and "tags" in columns:
-            cursor.execute("UPDATE bhajans SET tags = COALESCE(manual_tags, '') WHERE tags = '' OR tags IS NULL")
-        
-        cursor.execute("UPDATE bhajans SET uploader_name = 'Unknown' WHERE uploader_name = '' OR uploader_name IS NULL")
-        cursor.execute("UPDATE bhajans SET created_at = DATETIME('now') WHERE created_at IS NULL")
-        cursor.execute("UPDATE bhajans SET updated_at = DATETIME('now') WHERE updated_at IS NULL")
-        
-        conn.commit()
-        conn.close()
-        logger.info("Database schema migration completed")
-    except Exception as e:
-        logger.warning(f"Schema migration skipped (might already be migrated): {e}")
-        
-except Exception as e:
-    logger.error(f"Database initialization failed: {e}", exc_info=True)
-    raise
-
-
 # Pydantic models for API
 class BhajanCreate(BaseModel):
     title: str
@@ -134,6 +118,7 @@ class BhajanResponse(BaseModel):
     uploader_name: str
     youtube_url: Optional[str] = None
     mp3_file: Optional[str] = None
+    preview: Optional[str] = None
     created_at: str
     updated_at: str
     
@@ -141,6 +126,24 @@ class BhajanResponse(BaseModel):
         from_attributes = True
 
 
+class BhajanSummary(BaseModel):
+    """List item without lyrics (?fields=summary)"""
+    id: int
+    title: str
+    preview: Optional[str] = None
+    tags: List[str]
+    uploader_name: str
+    youtube_url: Optional[str] = None
+    mp3_file: Optional[str] = None
+    created_at: str
+    updated_at: str
+
+
+def _isoformat(value) -> Optional[str]:
+    """ORM datetimes -> ISO strings; raw sqlite values are already strings"""
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
 class TagCreate(BaseModel):
     name: str
     category: str
@@ -157,109 +160,220 @@ class TagUpdate(BaseModel):
     synonyms: Optional[List[str]] = None
 
 
+class RelatedBhajan(BaseModel):
+    id: int
+    title: str
+    preview: Optional[str] = None
+    tags: List[str]
+    youtube_url: Optional[str] = None
+    mp3_file: Optional[str] = None
+    score: float
+
+
+class SyncTag(BaseModel):
+    id: int
+    name: str
+    category: str
+    level: int
+    parent_id: Optional[int] = None
+    translations: Dict[str, str]
+    synonyms: List[str]
+
+
+class SyncResponse(BaseModel):
+    """Changes since a sync token (see sync.py)"""
+    token: str
+    more: bool
+    reset: bool
+    bhajans: List[BhajanResponse]
+    deleted_bhajans: List[int]
+    tags: List[SyncTag]
+    deleted_tags: List[int]
+
+
+class PlaylistBhajan(BaseModel):
+    id: int
+    title: str
+    preview: Optional[str] = None
+    tags: List[str]
+    youtube_url: Optional[str] = None
+    mp3_file: Optional[str] = None
+
+
+class PlaylistResponse(BaseModel):
+    name: str
+    query: str
+    bhajans: List[PlaylistBhajan]
+
+
+class PlaylistInfo(BaseModel):
+    name: str
+    query: str
+
+
+class DuplicateMatch(BaseModel):
+    id: int
+    title: str
+    similarity: float
+
+
+class BhajanCreated(BhajanResponse):
+    """Created bhajan plus existing bhajans whose lyrics nearly duplicate it"""
+    duplicates: List[DuplicateMatch] = []
+
+
+class BeaconEvent(BaseModel):
+    bhajan_id: int = Field(ge=1)  # Bit index into TagBitmapIndex.live
+    event: Literal[POPULARITY_EVENTS]
+
+
+class FacetCount(BaseModel):
+    id: int
+    name: str
+    count: int
+
+
+class FacetedBhajans(BaseModel):
+    """List response with ?facets=true"""
+    results: List[Union[BhajanResponse, BhajanSummary]]
+    facets: Dict[str, List[FacetCount]]
+
+
+# In-memory search indexes (app.state), kept current by the write endpoints;
+# cached search results are dropped on every write
+
+def _index_bhajan(request: Request, bhajan: Bhajan, tag_ids: Optional[List[int]] = None):
+    """Re-index a created/updated bhajan (tag_ids: result of dual_write_tags)"""
+    request.app.state.search_cache.clear()
+    request.app.state.fuzzy_index.add(("bhajan", bhajan.id), [bhajan.title_roman])
+    request.app.state.suggest_index.add_bhajan(bhajan.id, bhajan.title, bhajan.title_roman, tag_ids)
+    request.app.state.tag_bitmaps.add_bhajan(bhajan.id, tag_ids)
+    request.app.state.playlists.bhajan_changed(bhajan.id)
+
+
+def _unindex_bhajan(request: Request, bhajan_id: int):
+    request.app.state.search_cache.clear()
+    request.app.state.fuzzy_index.remove(("bhajan", bhajan_id))
+    request.app.state.suggest_index.remove_bhajan(bhajan_id)
+    request.app.state.tag_bitmaps.remove_bhajan(bhajan_id)
+    request.app.state.playlists.bhajan_changed(bhajan_id)
+
+
+def _index_tag(request: Request, conn, tag_id: int):
+    """Re-read a created/updated tag's name, translations and synonyms"""
+    request.app.state.search_cache.clear()
+    request.app.state.fuzzy_index.refresh_tag(conn, tag_id)
+    request.app.state.suggest_index.refresh_tag(conn, tag_id)
+    request.app.state.tag_bitmaps.refresh_tag(conn, tag_id)
+    request.app.state.playlists.tags_changed()
+
+
+def _unindex_tag(request: Request, tag_id: int):
+    request.app.state.search_cache.clear()
+    request.app.state.fuzzy_index.remove(("tag", tag_id))
+    request.app.state.suggest_index.remove_tag(tag_id)
+    request.app.state.tag_bitmaps.remove_tag(tag_id)
+    request.app.state.playlists.tags_changed()
+
+
+def _sign_lyrics(bhajan_id: int, lyrics_roman: str) -> List[Dict]:
+    """Store a bhajan's lyric signature; returns its near-duplicates (near_duplicates.find)"""
+    signature = near_duplicates.signature(lyrics_roman)
+    conn = get_connection()
+    try:
+        duplicates = near_duplicates.find(conn, signature, exclude=bhajan_id)
+        with conn:
+            near_duplicates.store(conn, bhajan_id, signature)
+    finally:
+        conn.close()
+    return duplicates
+
+
+def _facet_counts(request: Request, bhajans: List) -> Dict[str, List[Dict]]:
+    """Tag counts per category over a list of result dicts"""
+    index = request.app.state.tag_bitmaps
+    index.ensure_loaded(get_connection)
+    return index.facets(b["id"] for b in bhajans)
+
+
 # API Endpoints
 
-@app.get("/api/bhajans", response_model=List[BhajanResponse])
+@router.get("/api/bhajans", response_model=Union[List[Union[BhajanResponse, BhajanSummary]], FacetedBhajans])
 def get_bhajans(
+    request: Request,
     search: Optional[str] = None,
-    tag: Optional[List[str]] = None,
+    tag: Optional[List[str]] = Query(None),
+    fields: Optional[str] = None,
+    facets: bool = False,
+    sort: Literal["newest", "popular"] = "newest",
     db: Session = Depends(get_db)
 ):
     """Get all bhajans with optional search/filter (excludes deleted)
     
     Enhanced tag filtering:
-    - Supports multiple tags (AND logic)
-    - Resolves synonyms to canonical tags
+    - Boolean tag queries: deity:(hanuman OR rama) AND type:stotra AND NOT day:saturday
+    - Supports multiple tags (repeated params are ANDed)
+    - Resolves synonyms and translations to canonical tags
     - Includes hierarchical search (child tags)
     
     Args:
         search: Search in title/lyrics
-        tag: Tag name(s) to filter by (can be repeated: ?tag=Hanuman&tag=Stotra)
+        tag: Tag name(s) or tag queries to filter by (can be repeated: ?tag=Hanuman&tag=Stotra)
+        fields: "summary" returns the stored preview instead of full lyrics
+        facets: Return {"results": [...], "facets": {category: [{id, name, count}]}}
+            with tag counts for the matching bhajans
+        sort: "newest" (default) or "popular" (most viewed, then most played)
     """
-    import sqlite3
-    import json as json_lib
-    
     try:
-        logger.info(f"GET /api/bhajans - search={search}, tag={tag}")
+        tag_query = parse_tag_query(tag) if tag else None
+    except TagQueryError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid tag query: {e}")
+    
+    bhajans = _list_bhajans(request, search, tag_query, fields == "summary", db)
+    if sort == "popular":
+        popularity = request.app.state.popularity
+        popularity.ensure_loaded(get_connection)
+        keys = popularity.sort_keys(b["id"] for b in bhajans)
+        bhajans.sort(key=lambda b: keys[b["id"]])  # stable: ties stay newest first
+    if facets:
+        return {"results": bhajans, "facets": _facet_counts(request, bhajans)}
+    return bhajans
+
+
+def _list_bhajans(request: Request, search: Optional[str], tag_query: Optional[TagQueryNode],
+                  summary: bool, db: Session):
+    """Bhajan dicts for get_bhajans, newest first"""
+    try:
+        logger.debug("GET /api/bhajans - search=%s, tag=%s", search, tag_query)
         
         # If tag filtering requested, use taxonomy search
-        if tag:
-            conn = sqlite3.connect(get_database_path())
+        if tag_query is not None:
+            conn = get_connection()
             conn.row_factory = sqlite3.Row
             cursor = conn.cursor()
             
-            # Resolve tag names to IDs (with synonym resolution and hierarchy)
-            def resolve_tag_name(tag_name):
-                """Resolve tag name to canonical tag ID (handles synonyms)"""
-                # Try direct match
-                cursor.execute("SELECT id FROM tag_taxonomy WHERE name = ?", (tag_name,))
-                row = cursor.fetchone()
-                if row:
-                    return row["id"]
-                
-                # Try synonym match
-                cursor.execute("SELECT tag_id FROM tag_synonyms WHERE synonym = ?", (tag_name,))
-                row = cursor.fetchone()
-                if row:
-                    return row["tag_id"]
-                
-                return None
-            
-            def get_descendant_ids(tid):
-                """Get all descendant tag IDs recursively"""
-                descendants = [tid]
-                cursor.execute("SELECT id FROM tag_taxonomy WHERE parent_id = ?", (tid,))
-                children = cursor.fetchall()
-                for child in children:
-                    descendants.extend(get_descendant_ids(child["id"]))
-                return descendants
-            
-            # Resolve all tag names to tag ID sets (including descendants)
-            tag_id_sets = []
-            for tag_name in tag:
-                tag_id = resolve_tag_name(tag_name)
-                if tag_id:
-                    tag_id_sets.append(set(get_descendant_ids(tag_id)))
-            
-            if not tag_id_sets:
-                # No valid tags found
-                conn.close()
-                return []
-            
-            # Find bhajans that match ALL tag sets (AND logic)
-            # First tag set
-            placeholders = ",".join("?" * len(tag_id_sets[0]))
-            query = f"""
-                SELECT DISTINCT bhajan_id FROM bhajan_tags
-                WHERE tag_id IN ({placeholders})
-            """
-            cursor.execute(query, list(tag_id_sets[0]))
-            matching_bhajan_ids = {row["bhajan_id"] for row in cursor.fetchall()}
-            
-            # Intersect with other tag sets
-            for tag_id_set in tag_id_sets[1:]:
-                placeholders = ",".join("?" * len(tag_id_set))
-                query = f"""
-                    SELECT DISTINCT bhajan_id FROM bhajan_tags
-                    WHERE tag_id IN ({placeholders})
-                """
-                cursor.execute(query, list(tag_id_set))
-                matching_bhajan_ids &= {row["bhajan_id"] for row in cursor.fetchall()}
+            # Resolve tag names (synonyms, translations) to IDs, then
+            # evaluate the query over the rolled-up tag bitmaps
+            index = request.app.state.tag_bitmaps
+            index.ensure_loaded(get_connection)
+            resolved = resolve_terms(conn, tag_query)
+            matching_bhajan_ids = from_bitmap(evaluate_tag_query(tag_query, index, resolved))
             
             if not matching_bhajan_ids:
                 conn.close()
                 return []
             
-            # Get bhajan details
-            placeholders = ",".join("?" * len(matching_bhajan_ids))
+            # Get bhajan details (ids as one JSON array: a broad query can
+            # match more ids than SQLite allows bound parameters)
             query_sql = f"""
-                SELECT id, title, lyrics, tags, uploader_name, youtube_url, created_at, updated_at
+                SELECT id, title, {"" if summary else "lyrics, "}preview, tags, uploader_name,
+                       youtube_url, mp3_file, created_at, updated_at
                 FROM bhajans
-                WHERE id IN ({placeholders})
+                WHERE id IN (SELECT value FROM json_each(?))
                   AND deleted_at IS NULL
             """
             
-            params = list(matching_bhajan_ids)
+            params = [json.dumps(matching_bhajan_ids)]
             
             if search:
                 search_pattern = f"%{search}%"
@@ -272,19 +386,12 @@ def get_bhajans(
             
             bhajans = []
             for row in cursor.fetchall():
-                bhajans.append({
-                    "id": row["id"],
-                    "title": row["title"],
-                    "lyrics": row["lyrics"],
-                    "tags": json_lib.loads(row["tags"]) if row["tags"] else [],
-                    "uploader_name": row["uploader_name"],
-                    "youtube_url": row["youtube_url"],
-                    "created_at": row["created_at"],
-                    "updated_at": row["updated_at"]
-                })
+                bhajan = dict(row)
+                bhajan["tags"] = json.loads(row["tags"]) if row["tags"] else []
+                bhajans.append(bhajan)
             
             conn.close()
-            logger.info(f"Returning {len(bhajans)} bhajans")
+            logger.debug("Returning %d bhajans", len(bhajans))
             return bhajans
         
         # No tag filter - use ORM query
@@ -301,8 +408,26 @@ def get_bhajans(
         
         query = query.order_by(desc(Bhajan.created_at))
         
+        if summary:
+            rows = query.with_entities(
+                Bhajan.id, Bhajan.title, Bhajan.preview, Bhajan.tags, Bhajan.uploader_name,
+                Bhajan.youtube_url, Bhajan.mp3_file, Bhajan.created_at, Bhajan.updated_at
+            ).all()
+            logger.debug("Returning %d bhajan summaries", len(rows))
+            
+            tags_by_id = read_tags_for_bhajans(db, [r.id for r in rows], {r.id: r.tags for r in rows})
+            return [
+                {
+                    **row._asdict(),
+                    "tags": tags_by_id[row.id],
+                    "created_at": _isoformat(row.created_at),
+                    "updated_at": _isoformat(row.updated_at)
+                }
+                for row in rows
+            ]
+        
         bhajans = query.all()
-        logger.info(f"Returning {len(bhajans)} bhajans")
+        logger.debug("Returning %d bhajans", len(bhajans))
         
         # Return with unified tags (prefers taxonomy)
         return [get_bhajan_with_unified_tags(db, b.id) for b in bhajans]
@@ -312,7 +437,7 @@ def get_bhajans(
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.get("/api/bhajans/{bhajan_id}", response_model=BhajanResponse)
+@router.get("/api/bhajans/{bhajan_id}", response_model=BhajanResponse)
 def get_bhajan(bhajan_id: int, db: Session = Depends(get_db)):
     """Get single bhajan by ID (excludes deleted)"""
     bhajan = db.query(Bhajan).filter(
@@ -327,8 +452,151 @@ def get_bhajan(bhajan_id: int, db: Session = Depends(get_db)):
     return get_bhajan_with_unified_tags(db, bhajan_id)
 
 
-@app.post("/api/bhajans", response_model=BhajanResponse)
+@router.get("/api/bhajans/{bhajan_id}/related", response_model=List[RelatedBhajan])
+def get_related_bhajans(bhajan_id: int, limit: int = Query(RELATED_K, ge=1, le=RELATED_K),
+                        db: Session = Depends(get_db)):
+    """Most similar bhajans by tags and lyrics, best first
+    
+    Served from bhajan_neighbors (precomputed by scripts/build_related.py);
+    bhajans added since the last run have no neighbours yet.
+    
+    Args:
+        limit: Maximum related bhajans
+    """
+    rows = db.query(
+        Bhajan.id, Bhajan.title, Bhajan.preview, Bhajan.tags, Bhajan.youtube_url, Bhajan.mp3_file,
+        BhajanNeighbor.score
+    ).join(BhajanNeighbor, BhajanNeighbor.neighbor_id == Bhajan.id).filter(
+        BhajanNeighbor.bhajan_id == bhajan_id,
+        Bhajan.deleted_at == None
+    ).order_by(BhajanNeighbor.rank).limit(limit).all()
+    
+    if not rows and not db.query(Bhajan.id).filter(Bhajan.id == bhajan_id, Bhajan.deleted_at == None).first():
+        raise HTTPException(status_code=404, detail="Bhajan not found")
+    
+    tags_by_id = read_tags_for_bhajans(db, [r.id for r in rows], {r.id: r.tags for r in rows})
+    return [{**row._asdict(), "tags": tags_by_id[row.id]} for row in rows]
+
+
+@router.get("/api/sync", response_model=SyncResponse)
+def sync_changes(
+    since: Optional[str] = None,
+    limit: int = Query(SYNC_PAGE_SIZE, ge=1, le=SYNC_MAX_PAGE_SIZE),
+    db: Session = Depends(get_db)
+):
+    """Bhajans and tags changed since a sync token, for offline clients
+    
+    Omit `since` for a full sync. Store the returned token and pass it as
+    `since` next time; while `more` is true, fetch again straight away.
+    `reset` means the token was not recognised and this is a full sync:
+    drop the local copy first.
+    
+    Args:
+        since: Token from the previous response
+        limit: Most changes per page
+    """
+    try:
+        since_seq = parse_sync_token(since)
+    except SyncTokenError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    conn = get_connection()
+    try:
+        changes = read_changes(conn, since_seq, limit)
+        tags = read_sync_tags(conn, changes.tag_ids)
+    finally:
+        conn.close()
+    
+    rows = []
+    if changes.bhajan_ids:
+        rows = db.query(
+            Bhajan.id, Bhajan.title, Bhajan.lyrics, Bhajan.preview, Bhajan.tags, Bhajan.uploader_name,
+            Bhajan.youtube_url, Bhajan.mp3_file, Bhajan.created_at, Bhajan.updated_at
+        ).filter(Bhajan.id.in_(changes.bhajan_ids), Bhajan.deleted_at == None).all()
+    tags_by_id = read_tags_for_bhajans(db, [r.id for r in rows], {r.id: r.tags for r in rows})
+    by_id = {
+        row.id: {
+            **row._asdict(),
+            "tags": tags_by_id[row.id],
+            "created_at": _isoformat(row.created_at),
+            "updated_at": _isoformat(row.updated_at)
+        }
+        for row in rows
+    }
+    
+    # Deleted between reading the log and the rows: report as deleted
+    gone = [bhajan_id for bhajan_id in changes.bhajan_ids if bhajan_id not in by_id]
+    return {
+        "token": str(changes.token),
+        "more": changes.more,
+        "reset": changes.reset,
+        "bhajans": [by_id[bhajan_id] for bhajan_id in changes.bhajan_ids if bhajan_id in by_id],
+        "deleted_bhajans": changes.deleted_bhajan_ids + gone,
+        "tags": tags,
+        "deleted_tags": changes.deleted_tag_ids
+    }
+
+
+# Browsers and proxies may reuse a playlist this long before revalidating
+# with If-None-Match
+PLAYLIST_MAX_AGE = 300
+
+
+@router.get("/api/playlists", response_model=List[PlaylistInfo])
+def list_playlists(request: Request):
+    """Playlist names (weekdays and occasions) and the tag query behind each"""
+    playlists = request.app.state.playlists
+    return [{"name": name, "query": query} for name, query in playlists.schedules.items()]
+
+
+@router.get("/api/playlists/{day}", response_model=PlaylistResponse)
+def get_playlist(request: Request, day: str, db: Session = Depends(get_db)):
+    """Playlist for a weekday ("today" for the server's weekday) or occasion
+    
+    Most viewed and played first. Served from a precomputed, pre-rendered
+    cache (playlists.PlaylistCache) with an ETag; a matching If-None-Match
+    gets 304.
+    """
+    playlists = request.app.state.playlists
+    name = playlists.resolve_name(day)
+    if name is None:
+        raise HTTPException(status_code=404, detail=f"Unknown playlist '{day}'")
+    
+    playlist = playlists.get(name, get_connection)
+    if playlist.body is None:
+        rows = db.query(
+            Bhajan.id, Bhajan.title, Bhajan.preview, Bhajan.tags, Bhajan.youtube_url, Bhajan.mp3_file
+        ).filter(Bhajan.id.in_(playlist.ids), Bhajan.deleted_at == None).all()
+        tags_by_id = read_tags_for_bhajans(db, [r.id for r in rows], {r.id: r.tags for r in rows})
+        by_id = {row.id: {**row._asdict(), "tags": tags_by_id[row.id]} for row in rows}
+        body = PlaylistResponse(
+            name=playlist.name, query=playlist.query,
+            bhajans=[by_id[bhajan_id] for bhajan_id in playlist.ids if bhajan_id in by_id]
+        ).model_dump_json().encode()
+        playlist.etag = f'"{hashlib.blake2b(body, digest_size=8).hexdigest()}"'
+        playlist.body = body
+    
+    headers = {"ETag": playlist.etag, "Cache-Control": f"public, max-age={PLAYLIST_MAX_AGE}"}
+    if request.headers.get("if-none-match") == playlist.etag:
+        return Response(status_code=304, headers=headers)
+    return Response(content=playlist.body, media_type="application/json", headers=headers)
+
+
+@router.post("/api/bhajans/duplicates", response_model=List[DuplicateMatch])
+def find_duplicate_bhajans(lyrics: str = Form(...)):
+    """Live bhajans whose lyrics nearly duplicate the given lyrics (pre-upload check)"""
+    cleaned_lyrics = "\n".join(line.lstrip() for line in lyrics.split("\n"))
+    signature = near_duplicates.signature(lyric_lines_form(cleaned_lyrics))
+    conn = get_connection()
+    try:
+        return near_duplicates.find(conn, signature)
+    finally:
+        conn.close()
+
+
+@router.post("/api/bhajans", response_model=BhajanCreated)
 def create_bhajan(
+    request: Request,
     title: str = Form(...),
     lyrics: str = Form(...),
     tags: str = Form(""),
@@ -337,13 +605,17 @@ def create_bhajan(
     mp3_file: UploadFile = File(None),
     db: Session = Depends(get_db)
 ):
-    """Create new bhajan with optional MP3 upload"""
+    """Create new bhajan with optional MP3 upload
+
+    Near-duplicate lyrics do not block the upload; they are listed in the
+    response's "duplicates" for the client to show.
+    """
     try:
         logger.info(f"POST /api/bhajans - title={title[:50]}, uploader={uploader_name}, tags={tags}")
         
         # Parse tags
         tag_list = [t.strip() for t in tags.split(",") if t.strip()]
-        logger.info(f"Parsed {len(tag_list)} tags: {tag_list}")
+        logger.debug("Parsed %d tags: %s", len(tag_list), tag_list)
         
         # Validate input
         if not title or len(title) < 3:
@@ -357,7 +629,7 @@ def create_bhajan(
         # Handle MP3 file upload
         mp3_filename = None
         if mp3_file and mp3_file.filename:
-            logger.info(f"Processing MP3 upload: {mp3_file.filename}")
+            logger.debug("Processing MP3 upload: %s", mp3_file.filename)
             
             # Validate file extension
             if not mp3_file.filename.lower().endswith('.mp3'):
@@ -372,19 +644,19 @@ def create_bhajan(
                 raise HTTPException(status_code=400, detail=f"File too large ({file_size / 1024 / 1024:.2f}MB). Maximum size is 5MB")
             
             # Generate unique filename
-            import re
             timestamp = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
             sanitized_title = re.sub(r'[^\w\s-]', '', title).strip().replace(' ', '_')[:50]
             mp3_filename = f"{timestamp}_{sanitized_title}.mp3"
             
             # Save file
-            audio_dir = "./static/audio"
+            audio_dir = request.app.state.settings.audio_dir
             os.makedirs(audio_dir, exist_ok=True)
             file_path = os.path.join(audio_dir, mp3_filename)
             
             try:
                 with open(file_path, "wb") as f:
                     f.write(file_content)
+                request.app.state.metrics.uploaded("mp3", file_size)
                 logger.info(f"✅ MP3 saved: {file_path} ({file_size / 1024:.2f}KB)")
             except Exception as e:
                 logger.error(f"Failed to save MP3: {e}")
@@ -392,7 +664,7 @@ def create_bhajan(
         
         # Clean lyrics
         cleaned_lyrics = "\n".join(line.lstrip() for line in lyrics.split("\n"))
-        logger.info(f"Cleaned lyrics: {len(cleaned_lyrics)} chars")
+        logger.debug("Cleaned lyrics: %d chars", len(cleaned_lyrics))
         
         # Create bhajan
         bhajan = Bhajan(
@@ -400,22 +672,29 @@ def create_bhajan(
             lyrics=cleaned_lyrics,
             uploader_name=uploader_name,
             youtube_url=youtube_url.strip() if youtube_url else None,
-            mp3_file=mp3_filename
+            mp3_file=mp3_filename,
+            preview=make_preview(cleaned_lyrics),
+            title_roman=search_form(title),
+            lyrics_roman=lyric_lines_form(cleaned_lyrics)
         )
         
-        logger.info(f"Creating bhajan in database...")
+        logger.debug("Creating bhajan in database...")
         db.add(bhajan)
         db.commit()
         db.refresh(bhajan)
         
         # Dual-write tags (to both JSON field and taxonomy table)
-        logger.info(f"Writing {len(tag_list)} tags using dual-write strategy...")
-        dual_write_tags(db, bhajan.id, tag_list, source="manual")
+        logger.debug("Writing %d tags using dual-write strategy...", len(tag_list))
+        tag_ids = dual_write_tags(db, bhajan.id, tag_list, source="manual")
+        _index_bhajan(request, bhajan, tag_ids)
+        duplicates = _sign_lyrics(bhajan.id, bhajan.lyrics_roman)
         
         logger.info(f"✅ Bhajan created with ID {bhajan.id}")
+        if duplicates:
+            logger.warning(f"Bhajan {bhajan.id} nearly duplicates {[d['id'] for d in duplicates]}")
         
         # Return with unified tags
-        return get_bhajan_with_unified_tags(db, bhajan.id)
+        return {**get_bhajan_with_unified_tags(db, bhajan.id), "duplicates": duplicates}
     
     except HTTPException:
         raise
@@ -425,8 +704,9 @@ def create_bhajan(
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.put("/api/bhajans/{bhajan_id}", response_model=BhajanResponse)
+@router.put("/api/bhajans/{bhajan_id}", response_model=BhajanResponse)
 def update_bhajan(
+    request: Request,
     bhajan_id: int,
     title: Optional[str] = Form(None),
     lyrics: Optional[str] = Form(None),
@@ -448,11 +728,16 @@ def update_bhajan(
     # Update title if provided
     if title and len(title) >= 3:
         bhajan.title = title
+        bhajan.title_roman = search_form(title)
 
     # Update lyrics if provided
+    lyrics_changed = False
     if lyrics and len(lyrics) >= 20:
         cleaned_lyrics = "\n".join(line.lstrip() for line in lyrics.split("\n"))
         bhajan.lyrics = cleaned_lyrics
+        bhajan.preview = make_preview(cleaned_lyrics)
+        bhajan.lyrics_roman = lyric_lines_form(cleaned_lyrics)
+        lyrics_changed = True
 
     # Update tags using dual-write strategy
     # Convert numeric strings to integers (tag IDs), keep strings as tag names
@@ -464,9 +749,10 @@ def update_bhajan(
                 tag_list.append(int(t))
             else:
                 tag_list.append(t)
+    tag_ids = None
     if tag_list:
-        logger.info(f"Updating tags for bhajan {bhajan_id}: {tag_list}")
-        dual_write_tags(db, bhajan.id, tag_list, source="manual")
+        logger.debug("Updating tags for bhajan %s: %s", bhajan_id, tag_list)
+        tag_ids = dual_write_tags(db, bhajan.id, tag_list, source="manual")
 
     # Update uploader name if provided
     if uploader_name:
@@ -478,7 +764,7 @@ def update_bhajan(
 
     # Handle MP3 file upload
     if mp3_file and mp3_file.filename:
-        logger.info(f"Processing MP3 upload for bhajan {bhajan_id}: {mp3_file.filename}")
+        logger.debug("Processing MP3 upload for bhajan %s: %s", bhajan_id, mp3_file.filename)
         
         # Validate file extension
         if not mp3_file.filename.lower().endswith('.mp3'):
@@ -494,7 +780,7 @@ def update_bhajan(
         
         # Delete old MP3 if exists
         if bhajan.mp3_file:
-            old_path = os.path.join("./static/audio", bhajan.mp3_file)
+            old_path = os.path.join(request.app.state.settings.audio_dir, bhajan.mp3_file)
             if os.path.exists(old_path):
                 try:
                     os.remove(old_path)
@@ -503,19 +789,19 @@ def update_bhajan(
                     logger.warning(f"Could not delete old MP3: {e}")
         
         # Generate unique filename
-        import re
         timestamp = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
         sanitized_title = re.sub(r'[^\w\s-]', '', bhajan.title).strip().replace(' ', '_')[:50]
         mp3_filename = f"{timestamp}_{sanitized_title}.mp3"
         
         # Save file
-        audio_dir = "./static/audio"
+        audio_dir = request.app.state.settings.audio_dir
         os.makedirs(audio_dir, exist_ok=True)
         file_path = os.path.join(audio_dir, mp3_filename)
         
         try:
             with open(file_path, "wb") as f:
                 f.write(file_content)
+            request.app.state.metrics.uploaded("mp3", file_size)
             bhajan.mp3_file = mp3_filename
             logger.info(f"✅ MP3 saved: {file_path} ({file_size / 1024:.2f}KB)")
         except Exception as e:
@@ -525,13 +811,16 @@ def update_bhajan(
     bhajan.updated_at = datetime.utcnow()
     db.commit()
     db.refresh(bhajan)
+    _index_bhajan(request, bhajan, tag_ids)
+    if lyrics_changed:
+        _sign_lyrics(bhajan.id, bhajan.lyrics_roman)
 
     # Return with unified tags
     return get_bhajan_with_unified_tags(db, bhajan.id)
 
 
-@app.delete("/api/bhajans/{bhajan_id}")
-def delete_bhajan(bhajan_id: int, db: Session = Depends(get_db)):
+@router.delete("/api/bhajans/{bhajan_id}")
+def delete_bhajan(request: Request, bhajan_id: int, db: Session = Depends(get_db)):
     """Soft delete bhajan (marks as deleted, doesn't remove)"""
     bhajan = db.query(Bhajan).filter(
         Bhajan.id == bhajan_id,
@@ -542,15 +831,17 @@ def delete_bhajan(bhajan_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Bhajan not found")
     
     # Soft delete: just set deleted_at timestamp
-    from datetime import datetime
     bhajan.deleted_at = datetime.utcnow()
+    # Its related list goes too (lists naming it filter it out on read)
+    db.query(BhajanNeighbor).filter(BhajanNeighbor.bhajan_id == bhajan_id).delete()
     
     db.commit()
+    _unindex_bhajan(request, bhajan_id)
     
     return {"status": "deleted", "id": bhajan_id}
 
 
-@app.get("/api/tags")
+@router.get("/api/tags")
 def get_all_tags(
     category: Optional[str] = None,
     parent_id: Optional[int] = None,
@@ -565,9 +856,7 @@ def get_all_tags(
     Returns:
         List of tags with structure: [{id, name, category, level, parent_id, translations}]
     """
-    import sqlite3
-    
-    conn = sqlite3.connect(get_database_path())
+    conn = get_connection()
     conn.row_factory = sqlite3.Row
     cursor = conn.cursor()
     
@@ -611,7 +900,7 @@ def get_all_tags(
     return tags
 
 
-@app.get("/api/tags/tree")
+@router.get("/api/tags/tree")
 def get_tags_tree(db: Session = Depends(get_db)):
     """Get hierarchical tag tree structure
     
@@ -633,9 +922,7 @@ def get_tags_tree(db: Session = Depends(get_db)):
         }
     }
     """
-    import sqlite3
-    
-    conn = sqlite3.connect(get_database_path())
+    conn = get_connection()
     conn.row_factory = sqlite3.Row
     cursor = conn.cursor()
     
@@ -677,7 +964,7 @@ def get_tags_tree(db: Session = Depends(get_db)):
     return tree
 
 
-@app.get("/api/tags/counts")
+@router.get("/api/tags/counts")
 def get_tag_counts(db: Session = Depends(get_db)):
     """Get all tags with their usage counts"""
     try:
@@ -704,7 +991,7 @@ def get_tag_counts(db: Session = Depends(get_db)):
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.get("/api/tags/{tag_id}")
+@router.get("/api/tags/{tag_id}")
 def get_tag_details(tag_id: int, db: Session = Depends(get_db)):
     """Get detailed information about a specific tag
     
@@ -717,9 +1004,7 @@ def get_tag_details(tag_id: int, db: Session = Depends(get_db)):
             parent: {parent tag details}
         }
     """
-    import sqlite3
-    
-    conn = sqlite3.connect(get_database_path())
+    conn = get_connection()
     conn.row_factory = sqlite3.Row
     cursor = conn.cursor()
     
@@ -767,7 +1052,7 @@ def get_tag_details(tag_id: int, db: Session = Depends(get_db)):
     return result
 
 
-@app.get("/api/tags/{tag_id}/bhajans")
+@router.get("/api/tags/{tag_id}/bhajans")
 def get_bhajans_by_tag_id(
     tag_id: int,
     page: int = 1,
@@ -783,9 +1068,7 @@ def get_bhajans_by_tag_id(
         page: Page number (default 1)
         per_page: Results per page (default 50)
     """
-    import sqlite3
-    
-    conn = sqlite3.connect(get_database_path())
+    conn = get_connection()
     conn.row_factory = sqlite3.Row
     cursor = conn.cursor()
     
@@ -835,13 +1118,13 @@ def get_bhajans_by_tag_id(
     return bhajans
 
 
-@app.get("/api/stats")
+@router.get("/api/stats")
 def get_stats(db: Session = Depends(get_db)):
     """Get portal statistics"""
     try:
-        logger.info("GET /api/stats")
+        logger.debug("GET /api/stats")
         total_bhajans = db.query(Bhajan).filter(Bhajan.deleted_at == None).count()
-        logger.info(f"Stats: {total_bhajans} bhajans")
+        logger.debug("Stats: %d bhajans", total_bhajans)
         
         return {
             "total_bhajans": total_bhajans,
@@ -853,38 +1136,64 @@ def get_stats(db: Session = Depends(get_db)):
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.get("/api/search")
-def enhanced_search(q: str, db: Session = Depends(get_db)):
+@router.get("/api/search")
+def enhanced_search(
+    request: Request,
+    q: str,
+    fields: Optional[str] = None,
+    facets: bool = False,
+    db: Session = Depends(get_db)
+):
     """Enhanced search across bhajans, tags, translations, and synonyms
     
     Searches in:
     - Bhajan titles
     - Bhajan lyrics
+    - Transliterated titles and lyric lines (any script matches any other)
     - Tag names
     - Tag translations (all languages)
     - Tag synonyms
+    - Approximate (typo-tolerant) title words and tag names
     
-    Returns matching bhajans with relevance indication
+    Returns matching bhajans ranked by "relevance" (see ranking.py: match
+    source, BM25, tag matches weighted by tag confidence, popularity) with
+    "highlights": match-centred lyric fragments with [start, end] offsets
+    of the query. The ranking (ids, relevance and highlights) is cached
+    per normalized query; result rows are read per request.
     
     Args:
         q: Search query
+        fields: "summary" omits full lyrics (preview + highlights only)
+        facets: Return {"results": [...], "facets": {...}} as /api/bhajans does
     """
-    import sqlite3
-    import json as json_lib
-    
     if not q or len(q.strip()) < 2:
-        return []
+        return {"results": [], "facets": {}} if facets else []
     
-    query = q.strip()
+    query = normalize_query(q)
+    cache = request.app.state.search_cache
+    ranked = cache.get(query)
+    request.app.state.metrics.cache_lookup("search", ranked is not None)
+    if ranked is None:
+        ranked = _ranked_search(request, query)
+        cache.put(query, ranked)
+    bhajans = _search_results(ranked, summary=fields == "summary")
     
-    conn = sqlite3.connect(get_database_path())
+    if facets:
+        return JSONResponse({"results": bhajans, "facets": _facet_counts(request, bhajans)})
+    # Values are already JSON types; skip jsonable_encoder's per-value walk
+    return JSONResponse(bhajans)
+
+
+def _ranked_search(request: Request, query: str) -> List[Tuple[int, float, List]]:
+    """Gather ranking signals for a normalized query; (bhajan id, relevance, highlights), best first"""
+    weights = request.app.state.search_weights
+    signals = SearchSignals()
+    
+    conn = get_connection()
     conn.row_factory = sqlite3.Row
     cursor = conn.cursor()
     
-    # Track bhajan IDs with match source for relevance
-    bhajan_matches = {}  # {bhajan_id: relevance_score}
-    
-    # 1. Search in bhajan titles (highest relevance = 100)
+    # 1. Search in bhajan titles
     search_pattern = f"%{query}%"
     cursor.execute("""
         SELECT id FROM bhajans
@@ -892,111 +1201,156 @@ def enhanced_search(q: str, db: Session = Depends(get_db)):
     """, (search_pattern,))
     
     for row in cursor.fetchall():
-        bhajan_matches[row["id"]] = max(bhajan_matches.get(row["id"], 0), 100)
+        signals.add_match(row["id"], MATCH_TITLE)
     
-    # 2. Search in bhajan lyrics (relevance = 80)
+    # 2. Search in bhajan lyrics (highlighted while the lyrics are at hand)
     cursor.execute("""
-        SELECT id FROM bhajans
+        SELECT id, lyrics FROM bhajans
         WHERE lyrics LIKE ? AND deleted_at IS NULL
     """, (search_pattern,))
     
+    highlights = {}
     for row in cursor.fetchall():
-        bhajan_matches[row["id"]] = max(bhajan_matches.get(row["id"], 0), 80)
-    
-    # 3. Search in tag names (relevance = 90)
-    cursor.execute("""
-        SELECT id FROM tag_taxonomy
-        WHERE name LIKE ?
-    """, (search_pattern,))
-    
-    tag_ids = [row["id"] for row in cursor.fetchall()]
-    
-    if tag_ids:
-        # Get bhajans with these tags
-        placeholders = ",".join("?" * len(tag_ids))
-        cursor.execute(f"""
-            SELECT DISTINCT bhajan_id FROM bhajan_tags
-            WHERE tag_id IN ({placeholders})
-        """, tag_ids)
+        signals.lyric_matches.add(row["id"])
+        signals.add_match(row["id"], MATCH_LYRICS)
+        highlights[row["id"]] = highlight_fragments(row["lyrics"], query, width=80, max_fragments=1)
+    
+    # 2b. Full-text search of transliterated titles/lyrics, so a query in
+    # any script matches text in any other, scored with BM25. Matches
+    # start at a word: "ram" finds "ramadut" but not "parama".
+    roman_query = search_form(query)
+    if len(roman_query) >= 2:
+        cursor.execute("""
+            SELECT b.id, b.title_roman, -bm25(bhajans_fts, ?, ?) AS score
+            FROM bhajans_fts JOIN bhajans b ON b.id = bhajans_fts.rowid
+            WHERE bhajans_fts MATCH ? AND b.deleted_at IS NULL
+        """, (weights.title_field, weights.lyrics_field, f'"{roman_query}"*'))
         
         for row in cursor.fetchall():
-            bhajan_matches[row["bhajan_id"]] = max(bhajan_matches.get(row["bhajan_id"], 0), 90)
-    
-    # 4. Search in tag translations (relevance = 85)
-    cursor.execute("""
-        SELECT tag_id FROM tag_translations
-        WHERE translation LIKE ?
-    """, (search_pattern,))
-    
-    tag_ids_trans = [row["tag_id"] for row in cursor.fetchall()]
-    
-    if tag_ids_trans:
-        placeholders = ",".join("?" * len(tag_ids_trans))
+            in_title = f" {roman_query}" in f" {row['title_roman'] or ''}"
+            signals.add_match(row["id"], MATCH_TITLE_ROMAN if in_title else MATCH_LYRICS_ROMAN)
+            signals.add_bm25(row["id"], row["score"])
+    
+    # 3-5. Search in tag names, translations and synonyms; bhajans score
+    # by tag source times the tag's confidence on the bhajan
+    tag_sources = [
+        ("SELECT id AS tag_id FROM tag_taxonomy WHERE name LIKE ?", TAG_NAME),
+        ("SELECT tag_id FROM tag_translations WHERE translation LIKE ?", TAG_TRANSLATION),
+        ("SELECT tag_id FROM tag_synonyms WHERE synonym LIKE ?", TAG_SYNONYM),
+    ]
+    for tag_sql, tag_score in tag_sources:
+        cursor.execute(tag_sql, (search_pattern,))
+        tag_ids = [row["tag_id"] for row in cursor.fetchall()]
+        if not tag_ids:
+            continue
+        
+        placeholders = ",".join("?" * len(tag_ids))
         cursor.execute(f"""
-            SELECT DISTINCT bhajan_id FROM bhajan_tags
+            SELECT bhajan_id, confidence FROM bhajan_tags
             WHERE tag_id IN ({placeholders})
-        """, tag_ids_trans)
+        """, tag_ids)
         
         for row in cursor.fetchall():
-            bhajan_matches[row["bhajan_id"]] = max(bhajan_matches.get(row["bhajan_id"], 0), 85)
-    
-    # 5. Search in tag synonyms (relevance = 75)
-    cursor.execute("""
-        SELECT tag_id FROM tag_synonyms
-        WHERE synonym LIKE ?
-    """, (search_pattern,))
-    
-    tag_ids_syn = [row["tag_id"] for row in cursor.fetchall()]
+            signals.add_tag(row["bhajan_id"], tag_score, row["confidence"])
+    
+    # 6. Typo-tolerant matches on title words and tag names/translations/
+    # synonyms (scaled by trigram similarity)
+    fuzzy_index = request.app.state.fuzzy_index
+    fuzzy_index.ensure_loaded(get_connection)
+    fuzzy_tags = {}
+    for (kind, doc_id), score in fuzzy_index.search(query, limit=FUZZY_SEARCH_LIMIT):
+        if kind == "bhajan":
+            signals.add_match(doc_id, MATCH_FUZZY_MAX * score)
+        else:
+            fuzzy_tags[doc_id] = MATCH_FUZZY_MAX * score
     
-    if tag_ids_syn:
-        placeholders = ",".join("?" * len(tag_ids_syn))
+    if fuzzy_tags:
+        placeholders = ",".join("?" * len(fuzzy_tags))
         cursor.execute(f"""
-            SELECT DISTINCT bhajan_id FROM bhajan_tags
+            SELECT bhajan_id, tag_id, confidence FROM bhajan_tags
             WHERE tag_id IN ({placeholders})
-        """, tag_ids_syn)
+        """, list(fuzzy_tags))
         
         for row in cursor.fetchall():
-            bhajan_matches[row["bhajan_id"]] = max(bhajan_matches.get(row["bhajan_id"], 0), 75)
+            signals.add_tag(row["bhajan_id"], fuzzy_tags[row["tag_id"]], row["confidence"])
     
-    if not bhajan_matches:
-        conn.close()
+    conn.close()
+    if not signals:
         return []
     
-    # Get full bhajan details, sorted by relevance
-    sorted_bhajan_ids = sorted(bhajan_matches.keys(), key=lambda x: bhajan_matches[x], reverse=True)
+    popularity = request.app.state.popularity
+    popularity.ensure_loaded(get_connection)
+    return [
+        (bhajan_id, relevance, highlights.get(bhajan_id, []))
+        for bhajan_id, relevance in rank(signals, weights, popularity.views(signals.ids()))
+    ]
+
+
+def _search_results(ranked: List[Tuple[int, float, List]], summary: bool) -> List[Dict]:
+    """Bhajan dicts for a ranking, in its order (soft-deleted bhajans skipped)"""
+    if not ranked:
+        return []
     
-    placeholders = ",".join("?" * len(sorted_bhajan_ids))
-    cursor.execute(f"""
-        SELECT id, title, lyrics, tags, uploader_name, youtube_url, created_at, updated_at
+    lyrics = "" if summary else " lyrics,"
+    conn = get_connection()
+    conn.row_factory = sqlite3.Row
+    rows = conn.execute(f"""
+        SELECT id, title,{lyrics} preview, tags, uploader_name, youtube_url, mp3_file,
+               created_at, updated_at
         FROM bhajans
-        WHERE id IN ({placeholders})
+        WHERE id IN (SELECT value FROM json_each(?))
           AND deleted_at IS NULL
-    """, sorted_bhajan_ids)
+    """, (json.dumps([bhajan_id for bhajan_id, _, _ in ranked]),)).fetchall()
+    conn.close()
     
+    rows_dict = {row["id"]: row for row in rows}
     bhajans = []
-    rows_dict = {row["id"]: row for row in cursor.fetchall()}
-    
-    # Return in relevance order
-    for bhajan_id in sorted_bhajan_ids:
-        if bhajan_id in rows_dict:
-            row = rows_dict[bhajan_id]
-            bhajans.append({
-                "id": row["id"],
-                "title": row["title"],
-                "lyrics": row["lyrics"],
-                "tags": json_lib.loads(row["tags"]) if row["tags"] else [],
-                "uploader_name": row["uploader_name"],
-                "youtube_url": row["youtube_url"],
-                "created_at": row["created_at"],
-                "updated_at": row["updated_at"],
-                "relevance": bhajan_matches[bhajan_id]
-            })
-    
-    conn.close()
+    for bhajan_id, relevance, highlights in ranked:
+        row = rows_dict.get(bhajan_id)
+        if row is not None:
+            bhajan = dict(row)
+            bhajan["tags"] = json.loads(row["tags"]) if row["tags"] else []
+            bhajan["relevance"] = relevance
+            bhajan["highlights"] = highlights
+            bhajans.append(bhajan)
     return bhajans
 
 
-@app.get("/health")
+@router.post("/api/beacon", status_code=204)
+def beacon(request: Request, beacon_event: BeaconEvent):
+    """Record that a bhajan was viewed or played
+    
+    Meant for navigator.sendBeacon(). Only counts in memory; counts reach
+    bhajan_stats in batches (popularity.PopularityCounter).
+    """
+    index = request.app.state.tag_bitmaps
+    index.ensure_loaded(get_connection)
+    if not (index.live >> beacon_event.bhajan_id) & 1:
+        raise HTTPException(status_code=404, detail="Bhajan not found")
+    
+    popularity = request.app.state.popularity
+    popularity.record(beacon_event.bhajan_id, beacon_event.event)
+    request.app.state.metrics.popularity_events.inc(event=beacon_event.event)
+    return Response(status_code=204)
+
+
+@router.get("/api/suggest")
+def suggest(request: Request, q: str = "", limit: int = Query(10, ge=1, le=MAX_SUGGESTIONS)):
+    """Search-as-you-type suggestions: bhajan titles and tags
+    
+    Words of titles, tag names, translations and synonyms are matched by
+    prefix in any script ("hanu", "ಹನು"); tags rank by usage count.
+    
+    Args:
+        q: Partial search input
+        limit: Maximum suggestions
+    """
+    index = request.app.state.suggest_index
+    index.ensure_loaded(get_connection)
+    return JSONResponse(index.suggest(q, limit))
+
+
+@router.get("/health")
 def health_check():
     """Health check endpoint for monitoring"""
     try:
@@ -1010,12 +1364,10 @@ def health_check():
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.post("/api/tags")
-def create_tag(tag: TagCreate, db: Session = Depends(get_db)):
+@router.post("/api/tags")
+def create_tag(request: Request, tag: TagCreate, db: Session = Depends(get_db)):
     """Create a new tag in the taxonomy"""
-    import sqlite3
-    
-    conn = sqlite3.connect(get_database_path())
+    conn = get_connection()
     cursor = conn.cursor()
     
     try:
@@ -1058,6 +1410,7 @@ def create_tag(tag: TagCreate, db: Session = Depends(get_db)):
             )
         
         conn.commit()
+        _index_tag(request, conn, tag_id)
         conn.close()
         
         logger.info(f"Created tag: {tag.name} (id={tag_id})")
@@ -1073,12 +1426,10 @@ def create_tag(tag: TagCreate, db: Session = Depends(get_db)):
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.put("/api/tags/{tag_id}")
-def update_tag(tag_id: int, tag: TagUpdate, db: Session = Depends(get_db)):
+@router.put("/api/tags/{tag_id}")
+def update_tag(request: Request, tag_id: int, tag: TagUpdate, db: Session = Depends(get_db)):
     """Update an existing tag"""
-    import sqlite3
-    
-    conn = sqlite3.connect(get_database_path())
+    conn = get_connection()
     cursor = conn.cursor()
     
     try:
@@ -1144,6 +1495,7 @@ def update_tag(tag_id: int, tag: TagUpdate, db: Session = Depends(get_db)):
                 )
         
         conn.commit()
+        _index_tag(request, conn, tag_id)
         conn.close()
         
         logger.info(f"Updated tag id={tag_id}")
@@ -1159,12 +1511,10 @@ def update_tag(tag_id: int, tag: TagUpdate, db: Session = Depends(get_db)):
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.delete("/api/tags/{tag_id}")
-def delete_tag(tag_id: int, db: Session = Depends(get_db)):
+@router.delete("/api/tags/{tag_id}")
+def delete_tag(request: Request, tag_id: int, db: Session = Depends(get_db)):
     """Delete a tag (only if not used by any bhajans)"""
-    import sqlite3
-    
-    conn = sqlite3.connect(get_database_path())
+    conn = get_connection()
     cursor = conn.cursor()
     
     try:
@@ -1204,6 +1554,7 @@ def delete_tag(tag_id: int, db: Session = Depends(get_db)):
         
         conn.commit()
         conn.close()
+        _unindex_tag(request, tag_id)
         
         logger.info(f"Deleted tag: {tag_name} (id={tag_id})")
         return {"message": f"Tag '{tag_name}' deleted successfully"}
@@ -1218,46 +1569,122 @@ def delete_tag(tag_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=500, detail=str(e))
 
 
-app.mount("/static", StaticFiles(directory="static"), name="static")
+@router.get("/metrics")
+def prometheus_metrics(request: Request):
+    """Prometheus text exposition of request, SQL, pool, cache and upload metrics"""
+    return Response(request.app.state.metrics.render(), media_type=METRICS_CONTENT_TYPE)
+
+
+@debug_router.get("/api/debug/queries")
+def debug_queries(request: Request):
+    """Recent requests and per-route SQL stats (only with settings.debug)"""
+    return request.app.state.query_log.snapshot()
 
 
 # Admin routes
-@app.get("/admin/tags", response_class=FileResponse)
-def serve_admin_tags():
+@static_router.get("/admin/tags", response_class=FileResponse)
+def serve_admin_tags(request: Request):
     """Serve admin tag management page"""
-    template_path = os.path.join("templates", "admin_tags.html")
-    logger.info(f"[ADMIN TAGS] Serving from: {template_path}")
+    template_path = os.path.join(request.app.state.settings.templates_dir, "admin_tags.html")
+    logger.debug("[ADMIN TAGS] Serving from: %s", template_path)
     if not os.path.exists(template_path):
         logger.error(f"[ADMIN TAGS] FILE NOT FOUND: {template_path}")
         raise HTTPException(status_code=404, detail="Admin page not found")
-    return FileResponse(template_path)
+    return page_response(request, template_path)
+
+
+def page_response(request: Request, path: str, media_type: Optional[str] = None):
+    """A page or static file, with asset references rewritten to fingerprinted names (see assets.py)"""
+    manifest = request.app.state.assets
+    if manifest.rewrites(path):
+        return manifest.response(path, request.headers, media_type)
+    return static_asset_response(path, request.headers, media_type)
 
 
 # Serve static files
-@app.get("/", response_class=FileResponse)
-def serve_index():
+@static_router.get("/", response_class=FileResponse)
+def serve_index(request: Request):
     """Serve index.html"""
-    index_path = os.path.join(STATIC_DIR, "index.html")
-    logger.info(f"[ROOT REQUEST] Serving index from: {index_path}")
-    logger.info(f"[ROOT REQUEST] File exists: {os.path.exists(index_path)}")
+    index_path = os.path.join(request.app.state.static_dir, "index.html")
+    logger.debug("[ROOT REQUEST] Serving index from: %s", index_path)
     if not os.path.exists(index_path):
         logger.error(f"[ROOT REQUEST] FILE NOT FOUND: {index_path}")
         raise HTTPException(status_code=404, detail="index.html not found")
-    return FileResponse(index_path)
+    return page_response(request, index_path)
 
 
-@app.get("/{path:path}")
-def serve_static(path: str):
-    """Serve static files"""
-    file_path = os.path.join(STATIC_DIR, path)
+@static_router.get("/{path:path}")
+def serve_static(request: Request, path: str):
+    """Serve static files (precompressed variants when accepted, immutable when fingerprinted)"""
+    static_dir = request.app.state.static_dir
+    file_path = os.path.join(static_dir, path)
     
     if os.path.exists(file_path) and os.path.isfile(file_path):
-        return FileResponse(file_path)
+        return page_response(request, file_path)
     
     # Return index.html for SPA routing
-    logger.info(f"Path not found: {file_path}, serving index.html instead")
-    index_path = os.path.join(STATIC_DIR, "index.html")
-    return FileResponse(index_path, media_type="text/html")
+    logger.debug("Path not found: %s, serving index.html instead", file_path)
+    index_path = os.path.join(static_dir, "index.html")
+    return page_response(request, index_path, media_type="text/html")
+
+
+def create_app(settings: Optional[Settings] = None) -> FastAPI:
+    """
+    Build the FastAPI app for the given settings.
+
+    Only wires routes and points the database layer at settings.database_path;
+    nothing touches disk until the lifespan handler (or first get_db) runs.
+    """
+    settings = settings or Settings.from_env()
+    configure_database(settings.database_path, settings.database_url)
+    
+    app = FastAPI(title="Belaguru Bhajan Portal", lifespan=lifespan)
+    app.state.settings = settings
+    app.state.static_dir = os.path.abspath(settings.static_dir)
+    app.state.assets = AssetManifest(app.state.static_dir)
+    
+    app.add_exception_handler(Exception, general_exception_handler)
+    app.add_exception_handler(StarletteHTTPException, http_exception_handler)
+    
+    app.state.query_log = QueryLog()
+    app.state.fuzzy_index = TrigramIndex()
+    app.state.suggest_index = SuggestIndex()
+    app.state.tag_bitmaps = TagBitmapIndex()
+    app.state.search_weights = ScoringWeights.from_spec(settings.search_weights)
+    app.state.search_cache = SearchCache(settings.search_cache_ttl, settings.search_cache_size)
+    app.state.popularity = PopularityCounter(settings.popularity_flush_seconds, settings.popularity_max_pending)
+    app.state.playlists = PlaylistCache(app.state.tag_bitmaps, app.state.popularity,
+                                        settings.playlist_ttl, settings.playlist_length)
+    app.state.metrics = PortalMetrics()
+    app.state.metrics.watch_pool(get_engine)
+    app.state.metrics.register_queue("logging", log_queue_depth)
+    app.state.metrics.register_queue("popularity", app.state.popularity.pending)
+    # Innermost: timing and metrics see the compressed response
+    app.add_middleware(CompressionMiddleware, minimum_size=settings.compress_min_size)
+    app.add_middleware(
+        QueryTimingMiddleware,
+        query_log=app.state.query_log,
+        slow_request_ms=settings.slow_request_ms,
+        metrics=app.state.metrics,
+        sampler=RequestLogSampler.from_spec(settings.log_sample_rate, settings.log_sample_routes)
+    )
+    # Added last so it is outermost and times the whole request
+    app.add_middleware(MetricsMiddleware, metrics=app.state.metrics)
+    
+    app.include_router(router)
+    if settings.debug:
+        app.include_router(debug_router)
+    app.mount(
+        "/static",
+        AssetStaticFiles(directory=app.state.static_dir, check_dir=False),
+        name="static"
+    )
+    app.include_router(static_router)
+    
+    return app
+
+
+app = create_app()
 
 
 if __name__ == "__main__":
@@ -1265,6 +1692,8 @@ if __name__ == "__main__":
     import signal
     import sys
     
+    configure_logging(app.state.settings)
+    
     logger.info("=" * 60)
     logger.info("Server starting on http://0.0.0.0:8000")
     logger.info("Public IP: http://34.93.110.163:8000")
@@ -1286,7 +1715,7 @@ if __name__ == "__main__":
             host="0.0.0.0",
             port=port,
             log_level="info",
-            access_log=True,
+            access_log=False,  # QueryTimingMiddleware logs (sampled) requests
             server_header=False,
             lifespan="on",
         )
@@ -0,0 +1,344 @@
+"""
+Prometheus-style metrics for the portal
+
+A small in-process registry (no client library dependency) rendered in the
+Prometheus text exposition format by GET /metrics:
+- Request counters/latency histograms per route template (MetricsMiddleware)
+- In-flight requests
+- SQL statements and SQL time per route (fed by QueryTimingMiddleware)
+- SQLAlchemy pool usage, read at scrape time
+- Cache lookups per cache and upload bytes (recorded by the code doing them)
+- Queue depths, registered as callbacks by whoever owns a queue
+
+Recording is a dict lookup and an addition under a per-metric lock, so it
+stays on in production; anything expensive is computed only when scraped.
+"""
+import time
+import threading
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Tuple
+
+from instrumentation import route_template
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Request latency buckets (seconds)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# SQL statements per request
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 25, 50, 100, 250, 1000)
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Iterable[str], values: Iterable) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    """Base for metric families keyed by a tuple of label values"""
+    type_name = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple, object] = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict) -> Tuple:
+        return tuple(labels[name] for name in self.labelnames)
+
+    def header(self) -> List[str]:
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type_name}"
+        ]
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [
+            f"{self.name}{_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in items
+        ]
+
+    def render(self) -> List[str]:
+        return self.header() + self.samples()
+
+
+class Counter(_Metric):
+    """Monotonically increasing value"""
+    type_name = "counter"
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+
+class Gauge(_Metric):
+    """
+    Value that goes up and down
+
+    Either set directly (set/inc/dec) or backed by a callback evaluated at
+    scrape time via set_function().
+    """
+    type_name = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._functions: Dict[Tuple, Callable[[], float]] = {}
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1.0, **labels):
+        self.inc(-amount, **labels)
+
+    def set_function(self, function: Callable[[], float], **labels):
+        with self._lock:
+            self._functions[self._key(labels)] = function
+
+    def value(self, **labels) -> float:
+        key = self._key(labels)
+        if key in self._functions:
+            return self._functions[key]()
+        return self._values.get(key, 0)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            values = dict(self._values)
+            functions = dict(self._functions)
+        for key, function in functions.items():
+            try:
+                values[key] = function()
+            except Exception:
+                # A broken collector must not break the scrape
+                continue
+        return [
+            f"{self.name}{_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in sorted(values.items())
+        ]
+
+
+class Histogram(_Metric):
+    """Cumulative-bucket histogram with _bucket, _sum and _count series"""
+    type_name = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # Per-bucket counts (last slot is +Inf), sum, count
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = sorted((key, (list(s[0]), s[1], s[2])) for key, s in self._values.items())
+
+        lines = []
+        names = self.labelnames + ("le",)
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                lines.append(
+                    f"{self.name}_bucket{_labels(names, key + (_format_value(bound),))} {cumulative}"
+                )
+            labels = _labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(round(total, 6))}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """Ordered collection of metric families"""
+
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (),
+                  buckets: Tuple[float, ...] = LATENCY_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+class PortalMetrics:
+    """
+    The portal's metric families
+
+    One instance per app (app.state.metrics), so tests and benchmarks get
+    isolated counters.
+    """
+
+    def __init__(self):
+        self.registry = MetricsRegistry()
+        r = self.registry
+
+        self.start_time = r.gauge("process_start_time_seconds", "Start time of the process since unix epoch")
+        self.start_time.set(time.time())
+
+        self.requests = r.counter(
+            "http_requests_total", "HTTP requests by route template and status",
+            ("method", "route", "status")
+        )
+        self.latency = r.histogram(
+            "http_request_duration_seconds", "HTTP request latency by route template",
+            ("method", "route")
+        )
+        self.in_flight = r.gauge("http_requests_in_flight", "HTTP requests currently being served")
+
+        self.db_queries = r.histogram(
+            "db_queries_per_request", "SQL statements per HTTP request",
+            ("route",), buckets=QUERY_COUNT_BUCKETS
+        )
+        self.db_time = r.histogram(
+            "db_query_duration_seconds", "SQL time per HTTP request", ("route",)
+        )
+        self.db_pool = r.gauge(
+            "db_pool_connections", "SQLAlchemy pool connections by state", ("state",)
+        )
+
+        self.cache_lookups = r.counter(
+            "cache_lookups_total", "Cache lookups by cache and result (hit/miss)",
+            ("cache", "result")
+        )
+        self.cache_hit_ratio = r.gauge(
+            "cache_hit_ratio", "Hits / lookups since start, per cache", ("cache",)
+        )
+        self._ratio_caches = set()
+
+        self.uploads = r.counter("upload_files_total", "Uploaded files by kind", ("kind",))
+        self.upload_bytes = r.counter("upload_bytes_total", "Uploaded bytes by kind", ("kind",))
+        self.popularity_events = r.counter(
+            "popularity_events_total", "View/play beacon events by event", ("event",)
+        )
+
+        self.queue_depth = r.gauge(
+            "background_queue_depth", "Items waiting in background queues", ("queue",)
+        )
+
+    def observe_request(self, method: str, route: str, status: int, duration: float):
+        self.requests.inc(method=method, route=route, status=str(status))
+        self.latency.observe(duration, method=method, route=route)
+
+    def observe_sql(self, route: str, query_count: int, sql_time: float):
+        self.db_queries.observe(query_count, route=route)
+        self.db_time.observe(sql_time, route=route)
+
+    def cache_lookup(self, cache: str, hit: bool):
+        """Record one lookup in a named cache"""
+        self.cache_lookups.inc(cache=cache, result="hit" if hit else "miss")
+        if cache not in self._ratio_caches:
+            self._ratio_caches.add(cache)
+            self.cache_hit_ratio.set_function(lambda: self._hit_ratio(cache), cache=cache)
+
+    def _hit_ratio(self, cache: str) -> float:
+        hits = self.cache_lookups.value(cache=cache, result="hit")
+        total = hits + self.cache_lookups.value(cache=cache, result="miss")
+        return hits / total if total else 0.0
+
+    def uploaded(self, kind: str, size: int):
+        """Record an uploaded file of `size` bytes"""
+        self.uploads.inc(kind=kind)
+        self.upload_bytes.inc(size, kind=kind)
+
+    def register_queue(self, name: str, depth: Callable[[], int]):
+        """Expose a background queue's depth (callback evaluated at scrape time)"""
+        self.queue_depth.set_function(depth, queue=name)
+
+    def watch_pool(self, get_engine: Callable[[], object]):
+        """Expose SQLAlchemy pool usage of the engine returned by get_engine()"""
+        def pool_stat(attribute: str) -> Callable[[], float]:
+            def read():
+                stat = getattr(get_engine().pool, attribute, None)
+                return stat() if stat else 0
+            return read
+
+        for state, attribute in (("size", "size"), ("checked_out", "checkedout"),
+                                 ("checked_in", "checkedin"), ("overflow", "overflow")):
+            self.db_pool.set_function(pool_stat(attribute), state=state)
+
+    def render(self) -> str:
+        return self.registry.render()
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware recording per-route request metrics
+
+    Routes are labelled by template (/api/bhajans/{bhajan_id}) so label
+    cardinality stays bounded.
+    """
+
+    def __init__(self, app, metrics: PortalMetrics):
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = {"code": 500}
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        self.metrics.in_flight.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            self.metrics.in_flight.dec()
+            self.metrics.observe_request(
+                scope["method"], route_template(scope), status["code"],
+                time.perf_counter() - start
+            )
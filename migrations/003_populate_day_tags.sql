@@ -0,0 +1,96 @@
+-- ============================================================================
+-- Belaguru Bhajans Tag Taxonomy Data Population - Migration 003
+-- ============================================================================
+--
+-- Adds the tags named by the day and occasion playlists (playlists.SCHEDULES):
+-- 1. Days of the week (category 'day') with Kannada translations and synonyms
+-- 2. Deities of the day missing from 002 (Surya, Lakshmi→Devi)
+-- 3. Thursday's Gurustuti type and Bindu Madhava occasion
+--
+-- Databases that already have some of these tags (created by the former
+-- add_day_tags.py) keep them: every insert skips existing rows.
+-- ============================================================================
+
+-- Enable foreign keys
+PRAGMA foreign_keys = ON;
+
+-- ============================================================================
+-- 1. DAYS OF THE WEEK
+-- ============================================================================
+
+INSERT OR IGNORE INTO tag_taxonomy (name, parent_id, category, level) VALUES
+('Monday', NULL, 'day', 0),
+('Tuesday', NULL, 'day', 0),
+('Wednesday', NULL, 'day', 0),
+('Thursday', NULL, 'day', 0),
+('Friday', NULL, 'day', 0),
+('Saturday', NULL, 'day', 0),
+('Sunday', NULL, 'day', 0);
+
+-- ============================================================================
+-- 2. DEITIES OF THE DAY
+-- ============================================================================
+
+-- Surya (Sunday)
+INSERT OR IGNORE INTO tag_taxonomy (name, parent_id, category, level) VALUES
+('Surya', (SELECT id FROM tag_taxonomy WHERE name = 'Deity'), 'deity', 1);
+
+-- Lakshmi (child of Devi, Friday)
+INSERT OR IGNORE INTO tag_taxonomy (name, parent_id, category, level) VALUES
+('Lakshmi', (SELECT id FROM tag_taxonomy WHERE name = 'Devi'), 'deity', 2);
+
+-- ============================================================================
+-- 3. THURSDAY (Guru)
+-- ============================================================================
+
+INSERT OR IGNORE INTO tag_taxonomy (name, parent_id, category, level) VALUES
+('Gurustuti', NULL, 'type', 0),
+('Bindu Madhava', NULL, 'occasion', 0);
+
+-- ============================================================================
+-- 4. TRANSLATIONS (Kannada for days, Kannada + Hindi for deities)
+-- ============================================================================
+
+WITH translations(name, language, translation) AS (VALUES
+    ('Monday', 'kn', 'ಸೋಮವಾರ'),
+    ('Tuesday', 'kn', 'ಮಂಗಳವಾರ'),
+    ('Wednesday', 'kn', 'ಬುಧವಾರ'),
+    ('Thursday', 'kn', 'ಗುರುವಾರ'),
+    ('Friday', 'kn', 'ಶುಕ್ರವಾರ'),
+    ('Saturday', 'kn', 'ಶನಿವಾರ'),
+    ('Sunday', 'kn', 'ರವಿವಾರ'),
+    ('Surya', 'kn', 'ಸೂರ್ಯ'),
+    ('Surya', 'hi', 'सूर्य'),
+    ('Lakshmi', 'kn', 'ಲಕ್ಷ್ಮಿ'),
+    ('Lakshmi', 'hi', 'लक्ष्मी')
+)
+INSERT INTO tag_translations (tag_id, language, translation)
+SELECT t.id, tr.language, tr.translation
+FROM translations tr JOIN tag_taxonomy t ON t.name = tr.name
+WHERE NOT EXISTS (
+    SELECT 1 FROM tag_translations existing
+    WHERE existing.tag_id = t.id AND existing.language = tr.language
+);
+
+-- ============================================================================
+-- 5. SYNONYMS (Kannada day names in Latin script)
+-- ============================================================================
+
+INSERT OR IGNORE INTO tag_synonyms (tag_id, synonym) VALUES
+((SELECT id FROM tag_taxonomy WHERE name = 'Monday'), 'somavara'),
+((SELECT id FROM tag_taxonomy WHERE name = 'Tuesday'), 'mangalavara'),
+((SELECT id FROM tag_taxonomy WHERE name = 'Wednesday'), 'budhavara'),
+((SELECT id FROM tag_taxonomy WHERE name = 'Thursday'), 'guruvara'),
+((SELECT id FROM tag_taxonomy WHERE name = 'Friday'), 'shukravara'),
+((SELECT id FROM tag_taxonomy WHERE name = 'Saturday'), 'shanivara'),
+((SELECT id FROM tag_taxonomy WHERE name = 'Sunday'), 'ravivara'),
+((SELECT id FROM tag_taxonomy WHERE name = 'Surya'), 'surya'),
+((SELECT id FROM tag_taxonomy WHERE name = 'Lakshmi'), 'lakshmi');
+
+-- ============================================================================
+-- ROLLBACK SECTION (Run this to undo migration)
+-- ============================================================================
+--
+-- DELETE FROM tag_taxonomy WHERE name IN ('Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday', 'Surya', 'Lakshmi', 'Gurustuti', 'Bindu Madhava');
+--
+-- ============================================================================
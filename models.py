@@ -3,13 +3,13 @@ Database models for Belaguru Bhajan Portal
 """
 import json
 import os
+import sqlite3
+import threading
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, Text, DateTime, Float, ForeignKey, create_engine
+from sqlalchemy import DDL, BigInteger, Boolean, Column, Integer, LargeBinary, String, Text, DateTime, Float, ForeignKey, UniqueConstraint, create_engine, event
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, relationship
-
-# Ensure data directory exists
-os.makedirs("./data", exist_ok=True)
+from instrumentation import InstrumentedConnection
 
 Base = declarative_base()
 
@@ -98,6 +98,9 @@ class Bhajan(Base):
     deleted_at = Column(DateTime, default=None)  # Soft delete timestamp
     youtube_url = Column(String(500), default=None, nullable=True)  # YouTube video URL
     mp3_file = Column(Text, nullable=True)  # MP3 audio file path
+    preview = Column(Text, nullable=True)  # previews.make_preview(lyrics), set on write
+    title_roman = Column(Text, nullable=True)  # transliterate.search_form(title), set on write
+    lyrics_roman = Column(Text, nullable=True)  # transliterate.lyric_lines_form(lyrics), set on write
     
     # Relationship to taxonomy tags
     taxonomy_tags = relationship("BhajanTag", back_populates="bhajan")
@@ -142,36 +145,277 @@ class Bhajan(Base):
             "uploader_name": self.uploader_name,
             "youtube_url": self.youtube_url,
             "mp3_file": self.mp3_file,  # Now works correctly with full column mapping
+            "preview": self.preview,
             "created_at": self.created_at.isoformat() if self.created_at else None,
             "updated_at": self.updated_at.isoformat() if self.updated_at else None
         }
 
 
-# Database setup - configurable via environment variable
+class BhajanStats(Base):
+    """Aggregated view/play counts, written in batches by popularity.PopularityCounter"""
+    __tablename__ = "bhajan_stats"
+    
+    bhajan_id = Column(Integer, ForeignKey("bhajans.id", ondelete="CASCADE"), primary_key=True)
+    views = Column(Integer, nullable=False, default=0)
+    plays = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+
+class BhajanNeighbor(Base):
+    """Precomputed related bhajans (related.py), rank 0 = most similar"""
+    __tablename__ = "bhajan_neighbors"
+    
+    bhajan_id = Column(Integer, ForeignKey("bhajans.id", ondelete="CASCADE"), primary_key=True)
+    rank = Column(Integer, primary_key=True)
+    neighbor_id = Column(Integer, ForeignKey("bhajans.id", ondelete="CASCADE"), nullable=False, index=True)
+    score = Column(Float, nullable=False)
+    computed_at = Column(String(32), nullable=False)
+
+
+class RelatedRun(Base):
+    """When related.py last rebuilt or refreshed bhajan_neighbors (one row, id 1)"""
+    __tablename__ = "related_runs"
+    
+    id = Column(Integer, primary_key=True)
+    ran_at = Column(String(32), nullable=False)
+
+
+class BhajanMinhash(Base):
+    """MinHash signature of a bhajan's lyrics (near_duplicates.py)"""
+    __tablename__ = "bhajan_minhash"
+    
+    bhajan_id = Column(Integer, ForeignKey("bhajans.id", ondelete="CASCADE"), primary_key=True)
+    signature = Column(LargeBinary, nullable=False)
+
+
+class BhajanLsh(Base):
+    """LSH band buckets of bhajan_minhash signatures, probed by (band, bucket)"""
+    __tablename__ = "bhajan_lsh"
+    
+    band = Column(Integer, primary_key=True)
+    bucket = Column(BigInteger, primary_key=True)
+    bhajan_id = Column(Integer, ForeignKey("bhajans.id", ondelete="CASCADE"), primary_key=True, index=True)
+
+
+class SyncLog(Base):
+    """
+    Latest change per bhajan/tag for /api/sync, filled by triggers (SYNC_LOG_DDL)
+
+    One row per entity: each change replaces it with a new, ever-increasing
+    seq (AUTOINCREMENT, so seqs are never reused), so the log never grows
+    beyond the number of bhajans and tags.
+    """
+    __tablename__ = "sync_log"
+    __table_args__ = (UniqueConstraint("entity", "entity_id"), {"sqlite_autoincrement": True})
+    
+    seq = Column(Integer, primary_key=True)
+    entity = Column(String(10), nullable=False)  # "bhajan" or "tag"
+    entity_id = Column(Integer, nullable=False)
+    deleted = Column(Boolean, nullable=False, default=False)
+
+
+# Full-text index over the transliterated title/lyrics for BM25 ranking in
+# /api/search (external content: rows live in bhajans, triggers keep the
+# index in sync). Created with the bhajans table; upgrade_schema() adds it
+# to older databases.
+BHAJANS_FTS_DDL = (
+    """CREATE VIRTUAL TABLE IF NOT EXISTS bhajans_fts USING fts5(
+        title_roman, lyrics_roman, content='bhajans', content_rowid='id', prefix='2 3'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS bhajans_fts_insert AFTER INSERT ON bhajans BEGIN
+        INSERT INTO bhajans_fts (rowid, title_roman, lyrics_roman)
+        VALUES (new.id, new.title_roman, new.lyrics_roman);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS bhajans_fts_delete AFTER DELETE ON bhajans BEGIN
+        INSERT INTO bhajans_fts (bhajans_fts, rowid, title_roman, lyrics_roman)
+        VALUES ('delete', old.id, old.title_roman, old.lyrics_roman);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS bhajans_fts_update AFTER UPDATE OF title_roman, lyrics_roman ON bhajans BEGIN
+        INSERT INTO bhajans_fts (bhajans_fts, rowid, title_roman, lyrics_roman)
+        VALUES ('delete', old.id, old.title_roman, old.lyrics_roman);
+        INSERT INTO bhajans_fts (rowid, title_roman, lyrics_roman)
+        VALUES (new.id, new.title_roman, new.lyrics_roman);
+    END""",
+)
+
+for _statement in BHAJANS_FTS_DDL:
+    event.listen(Bhajan.__table__, "after_create", DDL(_statement))
+
+
+def _log_change(entity: str, entity_id: str, deleted: str = "0") -> str:
+    return f"INSERT OR REPLACE INTO sync_log (entity, entity_id, deleted) VALUES ('{entity}', {entity_id}, {deleted});"
+
+
+# Triggers recording every bhajan/tag change in sync_log, whoever writes
+# (API, scripts, migrations). Tag memberships, translations and synonyms
+# count as changes of their bhajan/tag; a renamed tag changes the tag
+# names of its bhajans. Created after all tables (they span several);
+# upgrade_schema() adds them to older databases.
+SYNC_LOG_DDL = (
+    f"""CREATE TRIGGER IF NOT EXISTS sync_bhajan_insert AFTER INSERT ON bhajans BEGIN
+        {_log_change("bhajan", "new.id", "new.deleted_at IS NOT NULL")}
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS sync_bhajan_update AFTER UPDATE ON bhajans BEGIN
+        {_log_change("bhajan", "new.id", "new.deleted_at IS NOT NULL")}
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS sync_bhajan_delete AFTER DELETE ON bhajans BEGIN
+        {_log_change("bhajan", "old.id", "1")}
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS sync_bhajan_tags_insert AFTER INSERT ON bhajan_tags BEGIN
+        {_log_change("bhajan", "new.bhajan_id", "COALESCE((SELECT deleted_at IS NOT NULL FROM bhajans WHERE id = new.bhajan_id), 1)")}
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS sync_bhajan_tags_delete AFTER DELETE ON bhajan_tags BEGIN
+        {_log_change("bhajan", "old.bhajan_id", "COALESCE((SELECT deleted_at IS NOT NULL FROM bhajans WHERE id = old.bhajan_id), 1)")}
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS sync_tag_insert AFTER INSERT ON tag_taxonomy BEGIN
+        {_log_change("tag", "new.id")}
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS sync_tag_update AFTER UPDATE ON tag_taxonomy BEGIN
+        {_log_change("tag", "new.id")}
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS sync_tag_rename AFTER UPDATE OF name ON tag_taxonomy BEGIN
+        INSERT OR REPLACE INTO sync_log (entity, entity_id, deleted)
+        SELECT 'bhajan', bt.bhajan_id, b.deleted_at IS NOT NULL FROM bhajan_tags bt
+        JOIN bhajans b ON b.id = bt.bhajan_id WHERE bt.tag_id = new.id;
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS sync_tag_delete AFTER DELETE ON tag_taxonomy BEGIN
+        {_log_change("tag", "old.id", "1")}
+    END""",
+    *(
+        f"""CREATE TRIGGER IF NOT EXISTS sync_{table}_{op} AFTER {op.upper()} ON {table} BEGIN
+            {_log_change("tag", f"{row}.tag_id", f"{row}.tag_id NOT IN (SELECT id FROM tag_taxonomy)")}
+        END"""
+        for table in ("tag_translations", "tag_synonyms")
+        for op, row in (("insert", "new"), ("delete", "old"), ("update", "new"))
+    ),
+)
+
+for _statement in SYNC_LOG_DDL:
+    event.listen(Base.metadata, "after_create", DDL(_statement))
+
+
+# Database setup - configurable via environment variable or configure_database()
 DATABASE_PATH = os.environ.get("DATABASE_PATH", "./data/portal.db")
 DATABASE_URL = os.environ.get("DATABASE_URL", f"sqlite:///{DATABASE_PATH}")
 
-engine = create_engine(
-    DATABASE_URL,
-    connect_args={"check_same_thread": False}
-)
+
+def create_db_engine(database_url: str):
+    """Create an engine whose connections report to instrumentation"""
+    return create_engine(
+        database_url,
+        connect_args={"check_same_thread": False, "factory": InstrumentedConnection}
+    )
+
+
+engine = create_db_engine(DATABASE_URL)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Bump when a change here needs existing databases upgraded; the upgrade
+# itself lives in scripts/run_migrations.py (upgrade_schema)
+SCHEMA_VERSION = 9  # 2: bhajans.preview, 3: bhajans.title_roman/lyrics_roman, 4: bhajans_fts, 5: bhajan_stats, 6: bhajan_neighbors, 7: bhajan_minhash/bhajan_lsh, 8: sync_log, 9: related_runs
+
+# init_db() runs at most once per process (per configured database)
+_db_ready = False
+_db_lock = threading.Lock()
+
+
+def configure_database(database_path: str, database_url: str | None = None):
+    """
+    Point the engine and SessionLocal at another database.
+
+    Used by main.create_app() so an app can be built for any database
+    without reimporting this module. No connection is opened here.
+    """
+    global DATABASE_PATH, DATABASE_URL, engine, _db_ready
+    
+    database_url = database_url or f"sqlite:///{database_path}"
+    if database_path == DATABASE_PATH and database_url == DATABASE_URL:
+        return
+    
+    with _db_lock:
+        engine.dispose()
+        DATABASE_PATH = database_path
+        DATABASE_URL = database_url
+        engine = create_db_engine(DATABASE_URL)
+        SessionLocal.configure(bind=engine)
+        _db_ready = False
+
 
 def get_database_path() -> str:
     """Get current database file path (for direct sqlite3 connections)"""
     return DATABASE_PATH
 
 
-def init_db():
-    """Initialize database"""
+def get_engine():
+    """Current SQLAlchemy engine (replaced by configure_database)"""
+    return engine
+
+
+def get_connection() -> sqlite3.Connection:
+    """Open a direct sqlite3 connection to the current database (instrumented, schema ensured)"""
+    ensure_db()
+    return sqlite3.connect(DATABASE_PATH, factory=InstrumentedConnection)
+
+
+def get_schema_version() -> int:
+    """Get schema version stamped in the database (PRAGMA user_version)"""
+    with engine.connect() as conn:
+        return conn.exec_driver_sql("PRAGMA user_version").scalar() or 0
+
+
+def init_db() -> bool:
+    """
+    Initialize database
+
+    Returns immediately when the stored schema version is current, so worker
+    boots and test imports never scan the bhajans table. Otherwise creates
+    missing tables and hands the upgrade to scripts/run_migrations.py.
+
+    Returns:
+        True if the schema was upgraded, False if it was already current
+    """
+    db_dir = os.path.dirname(DATABASE_PATH)
+    if db_dir:
+        os.makedirs(db_dir, exist_ok=True)
+    
+    if get_schema_version() >= SCHEMA_VERSION:
+        return False
+    
     Base.metadata.create_all(bind=engine)
+    
+    from scripts.run_migrations import upgrade_schema
+    upgrade_schema(get_database_path(), SCHEMA_VERSION)
     print("✓ Database initialized")
+    return True
+
+
+def ensure_db() -> bool:
+    """
+    Run init_db() once per process for the configured database.
+
+    Called from the app lifespan and lazily from get_db() and
+    get_connection(), so apps driven without a lifespan (e.g. TestClient
+    used outside a with-block) still get a ready schema, whether a route
+    uses a session or a direct connection. Returns True if this call did
+    the initialization.
+    """
+    global _db_ready
+    
+    if _db_ready:
+        return False
+    
+    with _db_lock:
+        if _db_ready:
+            return False
+        init_db()
+        _db_ready = True
+        return True
 
 
 def get_db():
     """Get database session"""
+    ensure_db()
     db = SessionLocal()
     try:
         yield db
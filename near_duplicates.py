@@ -0,0 +1,236 @@
+"""
+Near-duplicate lyric detection with MinHash signatures and LSH banding
+
+Each bhajan gets a NUM_HASHES-value MinHash signature over 3-word
+shingles of its transliterated lyrics (bhajans.lyrics_roman), so a
+Kannada re-upload of a romanized bhajan matches too. Signatures use
+one-permutation hashing: every shingle is hashed once and lands in one of
+NUM_HASHES bins (min kept per bin); empty bins borrow from the next
+non-empty bin (rotation densification). The share of equal positions in
+two signatures estimates the Jaccard similarity of their shingle sets.
+
+The signature is cut into BANDS bands of ROWS values; bhajans sharing any
+whole band are candidates (with 16 x 4, pairs at 0.8 similarity collide
+with probability > 0.999, pairs at 0.3 rarely do). Bands live in
+bhajan_lsh keyed by (band, bucket), so checking a new upload is BANDS
+index probes plus scoring the few candidates, whatever the catalogue
+size.
+
+Signatures are written by create/update (store()); find() powers the
+duplicate warning on upload, report() the batch dedupe report
+(scripts/dedupe_report.py).
+"""
+import hashlib
+import json
+import re
+from array import array
+from typing import Dict, List, Optional, Sequence, Tuple
+
+NUM_HASHES = 64
+BANDS = 16
+ROWS = NUM_HASHES // BANDS
+SHINGLE_WORDS = 3
+# Estimated similarity at which bhajans count as near-duplicates
+DUPLICATE_THRESHOLD = 0.8
+
+_WORD = re.compile(r"[a-z0-9]+")
+_EMPTY = 0xFFFFFFFF
+_DENSIFY_OFFSET = 0x9E3779B1
+
+Signature = Tuple[int, ...]
+
+
+def shingles(text: str) -> set:
+    """3-word shingles of normalized (transliterated) text"""
+    words = _WORD.findall(text or "")
+    if len(words) < SHINGLE_WORDS:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + SHINGLE_WORDS]) for i in range(len(words) - SHINGLE_WORDS + 1)}
+
+
+def signature(lyrics_roman: str) -> Optional[Signature]:
+    """
+    MinHash signature of transliterated lyrics
+
+    Args:
+        lyrics_roman: transliterate.lyric_lines_form() of the lyrics
+
+    Returns:
+        NUM_HASHES 32-bit values, or None for lyrics without words
+    """
+    bins = [_EMPTY] * NUM_HASHES
+    for shingle in shingles(lyrics_roman):
+        value = int.from_bytes(hashlib.blake2b(shingle.encode(), digest_size=8).digest(), "big")
+        slot = value % NUM_HASHES
+        value = (value >> 32) & 0xFFFFFFFF
+        if value < bins[slot]:
+            bins[slot] = value
+    if all(value == _EMPTY for value in bins):
+        return None
+
+    # Densify: an empty bin takes the next non-empty bin's value, offset by
+    # the distance so borrowed values differ from the originals
+    filled = list(bins)
+    for slot in range(NUM_HASHES):
+        if filled[slot] == _EMPTY:
+            distance = 1
+            while filled[(slot + distance) % NUM_HASHES] == _EMPTY:
+                distance += 1
+            bins[slot] = (filled[(slot + distance) % NUM_HASHES] + distance * _DENSIFY_OFFSET) & 0xFFFFFFFF
+    return tuple(bins)
+
+
+def similarity(a: Sequence[int], b: Sequence[int]) -> float:
+    """Estimated Jaccard similarity of two signatures"""
+    return sum(x == y for x, y in zip(a, b)) / NUM_HASHES
+
+
+def band_keys(sig: Signature) -> List[Tuple[int, int]]:
+    """(band, bucket) per LSH band"""
+    keys = []
+    for band in range(BANDS):
+        chunk = array("I", sig[band * ROWS:(band + 1) * ROWS]).tobytes()
+        bucket = int.from_bytes(hashlib.blake2b(chunk, digest_size=8).digest(), "big", signed=True)
+        keys.append((band, bucket))
+    return keys
+
+
+def _pack(sig: Signature) -> bytes:
+    return array("I", sig).tobytes()
+
+
+def _unpack(blob: bytes) -> Signature:
+    return tuple(array("I", blob))
+
+
+# Storage
+
+def store(conn, bhajan_id: int, sig: Optional[Signature]):
+    """Replace a bhajan's signature and LSH buckets (caller commits)"""
+    conn.execute("DELETE FROM bhajan_lsh WHERE bhajan_id = ?", (bhajan_id,))
+    if sig is None:
+        conn.execute("DELETE FROM bhajan_minhash WHERE bhajan_id = ?", (bhajan_id,))
+        return
+    conn.execute(
+        "INSERT OR REPLACE INTO bhajan_minhash (bhajan_id, signature) VALUES (?, ?)",
+        (bhajan_id, _pack(sig))
+    )
+    conn.executemany(
+        "INSERT INTO bhajan_lsh (band, bucket, bhajan_id) VALUES (?, ?, ?)",
+        [(band, bucket, bhajan_id) for band, bucket in band_keys(sig)]
+    )
+
+
+def find(conn, sig: Optional[Signature], exclude: Optional[int] = None,
+         threshold: float = DUPLICATE_THRESHOLD) -> List[Dict]:
+    """
+    Live bhajans whose lyrics nearly duplicate a signature
+
+    Args:
+        conn: sqlite3 connection
+        sig: signature() of the new lyrics
+        exclude: Bhajan id to skip (the bhajan being checked)
+        threshold: Minimum estimated similarity
+
+    Returns:
+        [{"id", "title", "similarity"}], most similar first
+    """
+    if sig is None:
+        return []
+    rows = conn.execute("""
+        SELECT DISTINCT b.id, b.title, m.signature
+        FROM bhajan_lsh l
+        JOIN bhajan_minhash m ON m.bhajan_id = l.bhajan_id
+        JOIN bhajans b ON b.id = l.bhajan_id
+        WHERE (l.band, l.bucket) IN (SELECT value ->> 0, value ->> 1 FROM json_each(?))
+          AND b.deleted_at IS NULL
+    """, (json.dumps(band_keys(sig)),)).fetchall()
+
+    matches = []
+    for bhajan_id, title, blob in rows:
+        if bhajan_id == exclude:
+            continue
+        score = similarity(sig, _unpack(blob))
+        if score >= threshold:
+            matches.append({"id": bhajan_id, "title": title, "similarity": round(score, 2)})
+    matches.sort(key=lambda match: (-match["similarity"], match["id"]))
+    return matches
+
+
+def backfill(conn) -> int:
+    """
+    Compute signatures for bhajans that have none (caller commits)
+
+    Returns:
+        Number of bhajans signed
+    """
+    rows = conn.execute("""
+        SELECT id, lyrics_roman FROM bhajans
+        WHERE id NOT IN (SELECT bhajan_id FROM bhajan_minhash)
+    """).fetchall()
+    signed = 0
+    for bhajan_id, lyrics_roman in rows:
+        sig = signature(lyrics_roman)
+        if sig is not None:
+            store(conn, bhajan_id, sig)
+            signed += 1
+    return signed
+
+
+def report(conn, threshold: float = DUPLICATE_THRESHOLD) -> List[List[Dict]]:
+    """
+    Groups of live near-duplicate bhajans
+
+    Candidate pairs come from shared LSH buckets only (no all-pairs
+    comparison); pairs at or above threshold are merged into groups.
+
+    Returns:
+        Groups (oldest bhajan first) of {"id", "title", "similarity"},
+        where similarity is to the group's first bhajan; largest groups first
+    """
+    live = {
+        bhajan_id: (title, _unpack(blob))
+        for bhajan_id, title, blob in conn.execute("""
+            SELECT b.id, b.title, m.signature FROM bhajan_minhash m
+            JOIN bhajans b ON b.id = m.bhajan_id
+            WHERE b.deleted_at IS NULL
+        """)
+    }
+
+    parent = {}
+
+    def root(bhajan_id):
+        while parent.get(bhajan_id, bhajan_id) != bhajan_id:
+            bhajan_id = parent[bhajan_id]
+        return bhajan_id
+
+    bucket_members: Dict[Tuple[int, int], List[int]] = {}
+    for band, bucket, bhajan_id in conn.execute("SELECT band, bucket, bhajan_id FROM bhajan_lsh ORDER BY band, bucket"):
+        if bhajan_id in live:
+            bucket_members.setdefault((band, bucket), []).append(bhajan_id)
+
+    checked = set()
+    for members in bucket_members.values():
+        for i, a in enumerate(members):
+            for b in members[i + 1:]:
+                pair = (a, b) if a < b else (b, a)
+                if pair in checked:
+                    continue
+                checked.add(pair)
+                if similarity(live[a][1], live[b][1]) >= threshold:
+                    parent[max(root(a), root(b))] = min(root(a), root(b))
+
+    groups: Dict[int, List[int]] = {}
+    for bhajan_id in parent:
+        groups.setdefault(root(bhajan_id), []).append(bhajan_id)
+
+    result = []
+    for first, members in groups.items():
+        ids = sorted(set(members) | {first})
+        result.append([
+            {"id": bhajan_id, "title": live[bhajan_id][0],
+             "similarity": round(similarity(live[first][1], live[bhajan_id][1]), 2)}
+            for bhajan_id in ids
+        ])
+    result.sort(key=lambda group: (-len(group), group[0]["id"]))
+    return result
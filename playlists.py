@@ -0,0 +1,158 @@
+"""
+Daily and occasion playlists for /api/playlists/{day}
+
+Each schedule names the bhajans suited to a weekday or occasion as a tag
+query (tag_query.py) over tag names, so the mapping follows the taxonomy
+instead of hard-coded tag ids: a Rama bhajan is in Saturday's playlist
+through its Vishnu ancestor, and new child tags need no code change.
+A deity whose descendants keep a weekday of their own is matched exactly
+(=deity:shiva), so Hanuman bhajans are not in Monday's playlist. Bhajans
+tagged with the day itself (category "day") always qualify. The day tags
+and the deities of the day come from migrations/003_populate_day_tags.sql.
+
+PlaylistCache evaluates a schedule over the TagBitmapIndex bitmaps on
+first request, orders it most viewed/played first (newest first on ties),
+keeps the first `length` bhajans and caches the result, rendered response
+included, until it expires (`ttl`, so popularity changes show up) or its
+bhajans change:
+
+- bhajan_changed(): a bhajan write only moves that bhajan, so every cached
+  schedule is re-evaluated in memory (no database access) and the bhajan
+  is moved in or out of the ranked members; the rendered response is only
+  dropped when the listed bhajans changed
+- tags_changed(): renamed, added or removed tags can change what a name
+  resolves to, so everything is dropped
+"""
+import bisect
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from tag_bitmaps import TagBitmapIndex, from_bitmap
+from tag_query import Node, Term, evaluate, parse, resolve_terms
+
+DAYS = ("monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday")
+
+# Schedule name -> tag query. Weekdays follow the deity of the day
+SCHEDULES = {
+    "monday": "day:monday OR =deity:shiva",
+    "tuesday": "day:tuesday OR deity:(hanuman OR ganesha)",
+    "wednesday": "day:wednesday OR deity:krishna",
+    "thursday": 'day:thursday OR gurustuti OR "bindu madhava"',
+    "friday": "day:friday OR deity:(devi OR lakshmi)",
+    "saturday": "day:saturday OR deity:(vishnu OR hanuman)",
+    "sunday": "day:sunday OR deity:surya",
+    "morning": "occasion:morning",
+    "evening": "occasion:evening",
+    "festival": "occasion:festival",
+}
+
+
+@dataclass
+class Playlist:
+    """One schedule's current members; body/etag are filled in by the endpoint"""
+    name: str
+    query: str
+    ids: List[int]
+    bitmap: int
+    expires: float
+    resolved: Dict[Term, Set[int]] = field(repr=False)
+    # Every member as (popularity sort key, -bhajan id), ascending; ids is the head
+    ranking: List[Tuple[tuple, int]] = field(repr=False, default_factory=list)
+    keys: Dict[int, tuple] = field(repr=False, default_factory=dict)
+    body: Optional[bytes] = field(default=None, repr=False)
+    etag: Optional[str] = None
+
+
+class PlaylistCache:
+    """
+    Precomputed playlists per schedule
+
+    Thread-safe. get() builds on first use; bhajan_changed() and
+    tags_changed() keep cached playlists current after writes.
+    """
+
+    def __init__(self, index: TagBitmapIndex, popularity, ttl: float = 3600.0, length: int = 30,
+                 schedules: Optional[Dict[str, str]] = None):
+        self.index = index
+        self.popularity = popularity
+        self.ttl = ttl
+        self.length = length
+        self.schedules = dict(SCHEDULES if schedules is None else schedules)
+        # Parsed up front so a malformed schedule fails at startup
+        self._nodes: Dict[str, Node] = {name: parse(query) for name, query in self.schedules.items()}
+        self._entries: Dict[str, Playlist] = {}
+        self._lock = threading.Lock()
+
+    def resolve_name(self, day: str, today: Optional[date] = None) -> Optional[str]:
+        """Schedule name for a path segment ("today" is the server's weekday); None if unknown"""
+        name = day.strip().lower()
+        if name == "today":
+            name = DAYS[(today or date.today()).weekday()]
+        return name if name in self._nodes else None
+
+    def get(self, name: str, connect: Callable) -> Playlist:
+        """
+        A schedule's playlist, built if absent or expired
+
+        Args:
+            name: Schedule name (see resolve_name)
+            connect: Returns a sqlite3 connection (term resolution, first load)
+
+        Returns:
+            Cached Playlist
+        """
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is not None and entry.expires > time.monotonic():
+                return entry
+
+        self.index.ensure_loaded(connect)
+        self.popularity.ensure_loaded(connect)
+        node = self._nodes[name]
+        conn = connect()
+        try:
+            resolved = resolve_terms(conn, node)
+        finally:
+            conn.close()
+
+        with self._lock:
+            entry = self._build(name, resolved, time.monotonic() + self.ttl)
+            self._entries[name] = entry
+            return entry
+
+    def _build(self, name: str, resolved: Dict[Term, Set[int]], expires: float) -> Playlist:
+        bitmap = evaluate(self._nodes[name], self.index, resolved)
+        members = from_bitmap(bitmap)
+        keys = self.popularity.sort_keys(members)
+        ranking = sorted((keys[bhajan_id], -bhajan_id) for bhajan_id in members)
+        return self._entry(name, resolved, bitmap, ranking, keys, expires)
+
+    def _entry(self, name, resolved, bitmap, ranking, keys, expires) -> Playlist:
+        ids = [-negated for _, negated in ranking[:self.length]]
+        return Playlist(name, str(self._nodes[name]), ids, bitmap, expires, resolved, ranking, keys)
+
+    def bhajan_changed(self, bhajan_id: int):
+        """Refresh cached playlists after a bhajan was created, updated or deleted (index already updated)"""
+        with self._lock:
+            for name, entry in list(self._entries.items()):
+                bitmap = evaluate(self._nodes[name], self.index, entry.resolved)
+                was_member = (entry.bitmap >> bhajan_id) & 1
+                is_member = (bitmap >> bhajan_id) & 1
+                if was_member == is_member and bhajan_id not in entry.ids:
+                    continue  # not listed before or after
+                # Copies: readers may still hold the old entry
+                ranking, keys = list(entry.ranking), dict(entry.keys)
+                if was_member:
+                    del ranking[bisect.bisect_left(ranking, (keys.pop(bhajan_id), -bhajan_id))]
+                if is_member:
+                    keys[bhajan_id] = self.popularity.sort_keys([bhajan_id])[bhajan_id]
+                    bisect.insort(ranking, (keys[bhajan_id], -bhajan_id))
+                self._entries[name] = self._entry(name, entry.resolved, bitmap, ranking, keys, entry.expires)
+
+    def tags_changed(self):
+        """Drop everything after a tag was created, updated or deleted"""
+        with self._lock:
+            self._entries.clear()
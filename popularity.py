@@ -0,0 +1,203 @@
+"""
+View and play counts with write-behind aggregation
+
+POST /api/beacon only increments an in-memory counter (record()); a
+background thread flushes the pending increments to bhajan_stats in one
+batched upsert every flush_interval seconds, or early once max_pending
+bhajans have pending events. Request threads never write to SQLite.
+
+Counts served to ranking and ?sort=popular are the flushed totals plus
+whatever is still pending, so a view counts immediately. Events still
+pending when the process dies without a shutdown are lost, which is the
+trade for not writing per hit.
+"""
+import json
+import logging
+import threading
+from typing import Callable, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+EVENTS = ("view", "play")
+
+_UPSERT_SQL = """
+    INSERT INTO bhajan_stats (bhajan_id, views, plays, updated_at)
+    SELECT id, ?, ?, datetime('now') FROM bhajans WHERE id = ?
+    ON CONFLICT (bhajan_id) DO UPDATE SET
+        views = views + excluded.views,
+        plays = plays + excluded.plays,
+        updated_at = excluded.updated_at
+"""
+
+
+class PopularityCounter:
+    """
+    Per-bhajan view/play counts, buffered in memory and flushed in batches
+
+    Thread-safe. Load lazily with ensure_loaded(); start() runs the flush
+    thread (from the app lifespan) and stop() flushes what is left.
+    """
+
+    def __init__(self, flush_interval: float = 10.0, max_pending: int = 1000):
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self._totals: Dict[int, List[int]] = {}  # flushed [views, plays]
+        self._pending: Dict[int, List[int]] = {}
+        self._flushing: Dict[int, List[int]] = {}  # being written by flush()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._loaded = False
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def ensure_loaded(self, get_connection: Callable):
+        if self._loaded:
+            return
+        with self._flush_lock:
+            if self._loaded:
+                return
+            conn = get_connection()
+            try:
+                totals = {
+                    bhajan_id: [views, plays]
+                    for bhajan_id, views, plays in conn.execute("SELECT bhajan_id, views, plays FROM bhajan_stats")
+                }
+            finally:
+                conn.close()
+            with self._lock:
+                self._totals = totals
+                self._loaded = True
+
+    # Recording
+
+    def record(self, bhajan_id: int, event: str):
+        """Count one view or play (no I/O)"""
+        column = EVENTS.index(event)
+        with self._lock:
+            self._pending.setdefault(bhajan_id, [0, 0])[column] += 1
+            full = len(self._pending) >= self.max_pending
+        if full:
+            self._wake.set()
+
+    def pending(self) -> int:
+        """Bhajans with events not yet written"""
+        return len(self._pending)
+
+    def flush(self, conn) -> int:
+        """
+        Write pending increments in one transaction
+
+        Increments for bhajans that no longer exist are dropped. On failure
+        the increments go back to the pending buffer for the next flush.
+
+        Args:
+            conn: sqlite3 connection
+
+        Returns:
+            Number of bhajans flushed
+        """
+        with self._flush_lock:
+            with self._lock:
+                self._flushing, self._pending = self._pending, {}
+            batch = self._flushing
+            if not batch:
+                return 0
+            try:
+                with conn:
+                    conn.executemany(_UPSERT_SQL, [(views, plays, bhajan_id) for bhajan_id, (views, plays) in batch.items()])
+                rows = conn.execute(
+                    "SELECT bhajan_id, views, plays FROM bhajan_stats WHERE bhajan_id IN (SELECT value FROM json_each(?))",
+                    (json.dumps(list(batch)),)
+                ).fetchall()
+            except Exception:
+                with self._lock:
+                    for bhajan_id, (views, plays) in batch.items():
+                        counts = self._pending.setdefault(bhajan_id, [0, 0])
+                        counts[0] += views
+                        counts[1] += plays
+                    self._flushing = {}
+                raise
+            with self._lock:
+                for bhajan_id, views, plays in rows:
+                    self._totals[bhajan_id] = [views, plays]
+                self._flushing = {}
+            return len(batch)
+
+    # Background flushing
+
+    def start(self, get_connection: Callable):
+        """Start the flush thread (no-op if running)"""
+        if self._thread is not None:
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(
+            target=self._run, args=(get_connection,), name="popularity-flush", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, get_connection: Callable):
+        """Stop the flush thread and write what is still pending"""
+        if self._thread is not None:
+            self._stopping.set()
+            self._wake.set()
+            self._thread.join()
+            self._thread = None
+        self._flush_with(get_connection)
+
+    def _run(self, get_connection: Callable):
+        while not self._stopping.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            if self._stopping.is_set():
+                break
+            try:
+                self._flush_with(get_connection)
+            except Exception as e:
+                logger.warning(f"Popularity flush failed, will retry: {e}")
+
+    def _flush_with(self, get_connection: Callable):
+        if not self._pending:
+            return
+        conn = get_connection()
+        try:
+            flushed = self.flush(conn)
+        finally:
+            conn.close()
+        logger.debug("Flushed popularity counts for %d bhajans", flushed)
+
+    # Reading
+
+    def counts(self, bhajan_id: int) -> Dict[str, int]:
+        """{"views": n, "plays": n} including unflushed events"""
+        with self._lock:
+            views, plays = self._counts(bhajan_id)
+        return {"views": views, "plays": plays}
+
+    def _counts(self, bhajan_id: int):
+        views = plays = 0
+        for source in (self._totals, self._flushing, self._pending):
+            counts = source.get(bhajan_id)
+            if counts:
+                views += counts[0]
+                plays += counts[1]
+        return views, plays
+
+    def views(self, bhajan_ids: Iterable[int]) -> Dict[int, int]:
+        """View counts for the given bhajans (omits bhajans never viewed)"""
+        with self._lock:
+            result = {}
+            for bhajan_id in bhajan_ids:
+                views, _ = self._counts(bhajan_id)
+                if views:
+                    result[bhajan_id] = views
+            return result
+
+    def sort_keys(self, bhajan_ids: Iterable[int]) -> Dict[int, tuple]:
+        """Sort keys putting the most viewed first, then the most played"""
+        with self._lock:
+            result = {}
+            for bhajan_id in bhajan_ids:
+                views, plays = self._counts(bhajan_id)
+                result[bhajan_id] = (-views, -plays)
+            return result
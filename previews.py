@@ -0,0 +1,140 @@
+"""
+Lyric previews and search highlight fragments
+
+- make_preview(): normalized first lines of a bhajan, stored in
+  bhajans.preview at write time so list responses can skip the lyrics
+- highlight_fragments(): short match-centred excerpts with highlight
+  offsets, computed only for the rows a search returns
+
+Offsets are character offsets into the fragment text, so clients can wrap
+them in <mark> after escaping the text themselves.
+"""
+import re
+import unicodedata
+from typing import Dict, List, Tuple
+
+PREVIEW_MAX_CHARS = 100  # ~2 card lines; Kannada is ~3 bytes/char
+LINE_SEPARATOR = " / "
+ELLIPSIS = "…"
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_line(line: str) -> str:
+    """NFC-normalize and collapse whitespace in one lyric line"""
+    return _WHITESPACE.sub(" ", unicodedata.normalize("NFC", line)).strip()
+
+
+def _cut(text: str, limit: int) -> str:
+    """Cut text to at most `limit` chars (+ ellipsis), preferring a word boundary"""
+    if len(text) <= limit:
+        return text
+    cut = text[:limit]
+    space = cut.rfind(" ")
+    if space > limit // 2:
+        cut = cut[:space]
+    return cut.rstrip(" /") + ELLIPSIS
+
+
+def make_preview(lyrics: str, max_chars: int = PREVIEW_MAX_CHARS) -> str:
+    """
+    Build the stored preview: first non-empty lyric lines joined with " / "
+
+    Args:
+        lyrics: Full lyrics
+        max_chars: Maximum preview length (excluding the ellipsis)
+
+    Returns:
+        Preview text ("" for empty lyrics)
+    """
+    parts = []
+    length = 0
+    for line in (lyrics or "").splitlines():
+        line = normalize_line(line)
+        if not line:
+            continue
+        parts.append(line)
+        length += len(line) + len(LINE_SEPARATOR)
+        if length > max_chars:
+            break
+
+    return _cut(LINE_SEPARATOR.join(parts), max_chars)
+
+
+def find_matches(text: str, query: str) -> List[Tuple[int, int]]:
+    """Case-insensitive (start, end) offsets of query in text"""
+    query = query.strip()
+    if not query or not text:
+        return []
+    return [m.span() for m in re.finditer(re.escape(query), text, re.IGNORECASE)]
+
+
+def highlight_fragments(text: str, query: str, width: int = 120,
+                        max_fragments: int = 2) -> List[Dict]:
+    """
+    Match-centred excerpts of text for a search query
+
+    Args:
+        text: Text that matched (usually lyrics)
+        query: Search query
+        width: Approximate fragment length in characters
+        max_fragments: Maximum fragments to return
+
+    Returns:
+        List of {"text": str, "highlights": [[start, end], ...]} with offsets
+        relative to the fragment text
+    """
+    matches = find_matches(text, query)
+    fragments = []
+    covered_until = -1
+
+    for start, end in matches:
+        if start < covered_until:
+            continue
+        if len(fragments) >= max_fragments:
+            break
+
+        # Centre the window on the match, then snap inwards to whitespace
+        pad = max(0, (width - (end - start)) // 2)
+        window_start = max(0, start - pad)
+        window_end = min(len(text), end + pad)
+        if window_start > 0:
+            space = _WHITESPACE.search(text, window_start, start)
+            if space:
+                window_start = space.end()
+        if window_end < len(text):
+            spaces = list(_WHITESPACE.finditer(text, end, window_end))
+            if spaces:
+                window_end = spaces[-1].start()
+
+        raw = text[window_start:window_end]
+        prefix = ELLIPSIS if window_start > 0 else ""
+        suffix = ELLIPSIS if window_end < len(text) else ""
+
+        # Collapse newlines/whitespace while keeping offsets aligned
+        fragment = []
+        mapping = []  # raw index -> fragment index
+        previous_space = False
+        for ch in raw:
+            mapping.append(len(prefix) + len(fragment))
+            if ch.isspace():
+                if not previous_space:
+                    fragment.append(" ")
+                previous_space = True
+            else:
+                fragment.append(ch)
+                previous_space = False
+        mapping.append(len(prefix) + len(fragment))
+
+        highlights = [
+            [mapping[s - window_start], mapping[e - window_start]]
+            for s, e in matches
+            if s >= window_start and e <= window_end
+        ]
+        fragments.append({
+            "text": prefix + "".join(fragment) + suffix,
+            "highlights": highlights
+        })
+        covered_until = window_end
+
+    return fragments
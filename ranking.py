@@ -0,0 +1,177 @@
+"""
+Relevance ranking and result caching for /api/search
+
+Search collects, per candidate bhajan, the signals below (SearchSignals)
+and rank() combines them under ScoringWeights:
+
+- match: best text match source (title 1.0, transliterated title 0.95,
+  lyrics 0.8, transliterated lyric line 0.7, typo-tolerant up to 0.6)
+- bm25: FTS5 BM25 over the transliterated title and lyrics (term
+  frequency, term rarity, field length), scaled to the best hit
+- tag: best matching tag source (name 0.9, translation 0.85, synonym
+  0.75, typo-tolerant up to 0.6) times bhajan_tags.confidence
+- popularity: log-scaled view count, scaled to the most viewed candidate
+
+relevance = 100 * weighted sum, so a plain title match with no other
+signal scores 100.
+
+SearchCache keeps each normalized query's ranking for a TTL as compact
+(bhajan id, relevance, highlights) tuples, not result rows: a broad query
+holds ids and short lyric fragments rather than full lyrics. The write
+endpoints clear it.
+"""
+import math
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, fields
+from typing import Dict, Hashable, List, Mapping, Optional, Tuple
+
+# Match source scores (0..1)
+MATCH_TITLE = 1.0
+MATCH_TITLE_ROMAN = 0.95
+MATCH_LYRICS = 0.8
+MATCH_LYRICS_ROMAN = 0.7
+MATCH_FUZZY_MAX = 0.6
+TAG_NAME = 0.9
+TAG_TRANSLATION = 0.85
+TAG_SYNONYM = 0.75
+
+
+@dataclass
+class ScoringWeights:
+    """Weights of the ranking signals and of the BM25 fields"""
+    match: float = 1.0
+    bm25: float = 0.3
+    tag: float = 1.0
+    popularity: float = 0.2
+    title_field: float = 4.0  # bm25() column weights
+    lyrics_field: float = 1.0
+
+    @classmethod
+    def from_spec(cls, spec: str) -> "ScoringWeights":
+        """
+        Build from a spec like "bm25=0.5,popularity=0" (unset weights keep
+        their defaults)
+
+        Raises:
+            ValueError: Unknown weight name or non-numeric value
+        """
+        names = {field.name for field in fields(cls)}
+        weights = {}
+        for item in filter(None, (part.strip() for part in spec.split(","))):
+            name, _, value = item.partition("=")
+            name = name.strip()
+            if name not in names:
+                raise ValueError(f"Unknown search weight {name!r} (expected one of {sorted(names)})")
+            weights[name] = float(value)
+        return cls(**weights)
+
+
+class SearchSignals:
+    """Per-bhajan ranking signals gathered by one search"""
+
+    def __init__(self):
+        self.match: Dict[int, float] = {}
+        self.tag: Dict[int, float] = {}
+        self.bm25: Dict[int, float] = {}
+        self.lyric_matches = set()  # ids whose raw lyrics contain the query
+
+    def __bool__(self) -> bool:
+        return bool(self.match or self.tag)
+
+    def add_match(self, bhajan_id: int, score: float):
+        if score > self.match.get(bhajan_id, 0.0):
+            self.match[bhajan_id] = score
+
+    def add_tag(self, bhajan_id: int, score: float, confidence: Optional[float] = 1.0):
+        score *= 1.0 if confidence is None else confidence
+        if score > self.tag.get(bhajan_id, 0.0):
+            self.tag[bhajan_id] = score
+
+    def add_bm25(self, bhajan_id: int, score: float):
+        """score: BM25 as a positive number (FTS5 bm25() negated)"""
+        self.bm25[bhajan_id] = score
+
+    def ids(self) -> set:
+        return set(self.match) | set(self.tag)
+
+
+def rank(signals: SearchSignals, weights: ScoringWeights,
+         popularity: Optional[Mapping[int, int]] = None) -> List[Tuple[int, float]]:
+    """
+    Order candidates by weighted relevance
+
+    Args:
+        signals: Signals gathered for the query
+        weights: Signal weights
+        popularity: View counts by bhajan id (missing = 0)
+
+    Returns:
+        [(bhajan_id, relevance)] best first; ties go to the older bhajan
+    """
+    popularity = popularity or {}
+    best_bm25 = max(signals.bm25.values(), default=0.0)
+    best_views = max((popularity.get(i, 0) for i in signals.ids()), default=0)
+
+    ranked = []
+    for bhajan_id in signals.ids():
+        score = weights.match * signals.match.get(bhajan_id, 0.0)
+        score += weights.tag * signals.tag.get(bhajan_id, 0.0)
+        if best_bm25 > 0:
+            score += weights.bm25 * signals.bm25.get(bhajan_id, 0.0) / best_bm25
+        if best_views > 0:
+            score += weights.popularity * math.log1p(popularity.get(bhajan_id, 0)) / math.log1p(best_views)
+        ranked.append((bhajan_id, round(100 * score, 1)))
+
+    ranked.sort(key=lambda item: (-item[1], item[0]))
+    return ranked
+
+
+def normalize_query(query: str) -> str:
+    """Cache key form of a query: case-folded, single-spaced"""
+    return " ".join(query.lower().split())
+
+
+class SearchCache:
+    """
+    LRU cache of ranked results with a per-entry TTL
+
+    Thread-safe. Entries expire `ttl` seconds after being stored; clear()
+    drops everything (called after writes).
+    """
+
+    def __init__(self, ttl: float = 60.0, max_entries: int = 256):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, Tuple[float, object]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable):
+        """Cached value, or None if absent or expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def put(self, key: Hashable, value):
+        if self.ttl <= 0 or self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
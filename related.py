@@ -0,0 +1,312 @@
+"""
+Related bhajans: precomputed top-k neighbours per bhajan
+
+Similarity of two bhajans is
+
+    TAG_WEIGHT * weighted Jaccard(tag vectors) + LYRICS_WEIGHT * cosine(lyric vectors)
+
+- tag vector: each bhajan_tags tag weighted by its confidence, plus its
+  ancestors at ANCESTOR_DECAY per level (root categories skipped), all
+  scaled by the tag's idf so near-universal tags count for little
+- lyric vector: TF-IDF over words of the transliterated lyrics
+  (bhajans.lyrics_roman, so Kannada and Latin copies of a line match),
+  L2-normalized
+
+Vectors are sparse dicts. Candidates come from inverted postings: a
+bhajan's CANDIDATE_FEATURES highest-weighted tags and words are looked up
+(skipping features of more than MAX_POSTING bhajans, which cannot
+separate them), partial dot products accumulate per candidate, and only
+the MAX_CANDIDATES best are scored exactly. Work per bhajan is bounded
+regardless of catalogue size.
+
+scripts/build_related.py writes the result to bhajan_neighbors (rebuild()
+or refresh() for bhajans changed since the last run), and
+/api/bhajans/{id}/related reads one bhajan's rows by primary key.
+"""
+import json
+import math
+import re
+from collections import Counter, defaultdict
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+# Neighbours stored per bhajan
+TOP_K = 10
+TAG_WEIGHT = 0.5
+LYRICS_WEIGHT = 0.5
+ANCESTOR_DECAY = 0.5
+# Neighbours scoring below this are not stored
+MIN_SCORE = 0.05
+# Candidate search: features looked up per bhajan, longest posting used,
+# candidates scored exactly
+CANDIDATE_FEATURES = 12
+MAX_POSTING = 500
+MAX_CANDIDATES = 100
+
+_WORD = re.compile(r"[a-z]{3,}")
+
+Vector = Dict[object, float]
+
+
+def _normalize(vector: Vector) -> Vector:
+    norm = math.sqrt(sum(w * w for w in vector.values()))
+    return {key: w / norm for key, w in vector.items()} if norm else {}
+
+
+def weighted_jaccard(a: Vector, b: Vector) -> float:
+    if not a or not b:
+        return 0.0
+    if len(a) > len(b):
+        a, b = b, a
+    shared = sum(min(w, b[key]) for key, w in a.items() if key in b)
+    total = sum(a.values()) + sum(b.values()) - shared
+    return shared / total if total else 0.0
+
+
+def cosine(a: Vector, b: Vector) -> float:
+    """Dot product of L2-normalized vectors"""
+    if len(a) > len(b):
+        a, b = b, a
+    return sum(w * b[key] for key, w in a.items() if key in b)
+
+
+class SimilarityModel:
+    """Tag and lyric vectors of every live bhajan, with inverted postings"""
+
+    def __init__(self, tag_vectors: Dict[int, Vector], lyric_vectors: Dict[int, Vector]):
+        self.tag_vectors = tag_vectors
+        self.lyric_vectors = lyric_vectors
+        self.ids = sorted(set(tag_vectors) | set(lyric_vectors))
+        self._tag_totals = {bhajan_id: sum(vector.values()) for bhajan_id, vector in tag_vectors.items()}
+
+        # Candidate search runs on one combined, L2-normalized vector per bhajan
+        self._features: Dict[int, List[Tuple[object, float]]] = {}
+        self._postings: Dict[object, List[Tuple[int, float]]] = defaultdict(list)
+        for bhajan_id in self.ids:
+            tags = _normalize(tag_vectors.get(bhajan_id, {}))
+            lyrics = lyric_vectors.get(bhajan_id, {})
+            combined = [(key, TAG_WEIGHT * w) for key, w in tags.items()]
+            combined += [(key, LYRICS_WEIGHT * w) for key, w in lyrics.items()]
+            for key, weight in combined:
+                self._postings[key].append((bhajan_id, weight))
+            combined.sort(key=lambda item: -item[1])
+            self._features[bhajan_id] = combined
+
+    @classmethod
+    def load(cls, conn) -> "SimilarityModel":
+        """Build vectors from the database (live bhajans only)"""
+        live = {}
+        for bhajan_id, lyrics_roman in conn.execute(
+            "SELECT id, lyrics_roman FROM bhajans WHERE deleted_at IS NULL"
+        ):
+            live[bhajan_id] = lyrics_roman or ""
+
+        parents = {}
+        roots = set()
+        for tag_id, parent_id, category in conn.execute("SELECT id, parent_id, category FROM tag_taxonomy"):
+            parents[tag_id] = parent_id
+            if category == "root":
+                roots.add(tag_id)
+
+        raw_tags: Dict[int, Dict[int, float]] = defaultdict(dict)
+        for bhajan_id, tag_id, confidence in conn.execute(
+            "SELECT bhajan_id, tag_id, confidence FROM bhajan_tags"
+        ):
+            if bhajan_id not in live:
+                continue
+            weight = 1.0 if confidence is None else confidence
+            depth = 0
+            seen = set()
+            while tag_id is not None and tag_id not in seen:
+                seen.add(tag_id)
+                if tag_id not in roots:
+                    decayed = weight * ANCESTOR_DECAY ** depth
+                    if decayed > raw_tags[bhajan_id].get(tag_id, 0.0):
+                        raw_tags[bhajan_id][tag_id] = decayed
+                tag_id = parents.get(tag_id)
+                depth += 1
+
+        return cls(_idf_weighted(raw_tags, len(live)), _tfidf(live))
+
+    def candidates(self, bhajan_id: int) -> List[int]:
+        """Bhajans sharing its most distinctive tags or words, best partial match first"""
+        partial: Dict[int, float] = defaultdict(float)
+        used = 0
+        for key, weight in self._features.get(bhajan_id, ()):
+            posting = self._postings[key]
+            if len(posting) > MAX_POSTING:
+                continue
+            for other, other_weight in posting:
+                partial[other] += weight * other_weight
+            used += 1
+            if used == CANDIDATE_FEATURES:
+                break
+        partial.pop(bhajan_id, None)
+        return sorted(partial, key=lambda other: (-partial[other], other))[:MAX_CANDIDATES]
+
+    def similarity(self, a: int, b: int) -> float:
+        tags = 0.0
+        tags_a, tags_b = self.tag_vectors.get(a), self.tag_vectors.get(b)
+        if tags_a and tags_b:
+            if len(tags_a) > len(tags_b):
+                tags_a, tags_b = tags_b, tags_a
+            shared = sum(min(w, tags_b[key]) for key, w in tags_a.items() if key in tags_b)
+            tags = shared / (self._tag_totals[a] + self._tag_totals[b] - shared)
+        lyrics = cosine(self.lyric_vectors.get(a, {}), self.lyric_vectors.get(b, {}))
+        return TAG_WEIGHT * tags + LYRICS_WEIGHT * lyrics
+
+    def scores(self, bhajan_id: int) -> Dict[int, float]:
+        """Similarity to every candidate scoring at least MIN_SCORE"""
+        scores = {}
+        for other in self.candidates(bhajan_id):
+            score = self.similarity(bhajan_id, other)
+            if score >= MIN_SCORE:
+                scores[other] = score
+        return scores
+
+    def neighbors(self, bhajan_id: int, k: int = TOP_K) -> List[Tuple[int, float]]:
+        """Top-k [(neighbor_id, score)], best first; ties go to the older bhajan"""
+        return _top(self.scores(bhajan_id), k)
+
+
+def _top(scores: Dict[int, float], k: int) -> List[Tuple[int, float]]:
+    return sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:k]
+
+
+def _idf_weighted(raw: Dict[int, Dict[int, float]], total: int) -> Dict[int, Vector]:
+    df = Counter(tag_id for tags in raw.values() for tag_id in tags)
+    return {
+        bhajan_id: {("tag", t): w * math.log(1 + total / df[t]) for t, w in tags.items()}
+        for bhajan_id, tags in raw.items()
+    }
+
+
+def _tfidf(lyrics: Dict[int, str]) -> Dict[int, Vector]:
+    counts = {bhajan_id: Counter(_WORD.findall(text)) for bhajan_id, text in lyrics.items()}
+    df = Counter(word for words in counts.values() for word in words)
+    total = len(lyrics)
+    vectors = {}
+    for bhajan_id, words in counts.items():
+        vector = {
+            word: (1 + math.log(count)) * math.log(total / df[word])
+            for word, count in words.items() if df[word] < total
+        }
+        vector = _normalize(vector)
+        if vector:
+            vectors[bhajan_id] = vector
+    return vectors
+
+
+# Storage
+
+def _write(conn, neighbors: Dict[int, List[Tuple[int, float]]], computed_at: str):
+    conn.execute(
+        "DELETE FROM bhajan_neighbors WHERE bhajan_id IN (SELECT value FROM json_each(?))",
+        (json.dumps(list(neighbors)),)
+    )
+    conn.executemany(
+        "INSERT INTO bhajan_neighbors (bhajan_id, rank, neighbor_id, score, computed_at) VALUES (?, ?, ?, ?, ?)",
+        [
+            (bhajan_id, rank, neighbor_id, round(score, 4), computed_at)
+            for bhajan_id, ranked in neighbors.items()
+            for rank, (neighbor_id, score) in enumerate(ranked)
+        ]
+    )
+
+
+def _record_run(conn, ran_at: str):
+    # Stored even when no list changed, so the next refresh starts from this run
+    conn.execute("INSERT OR REPLACE INTO related_runs (id, ran_at) VALUES (1, ?)", (ran_at,))
+
+
+def rebuild(conn, k: int = TOP_K) -> int:
+    """
+    Recompute every bhajan's neighbours
+
+    Args:
+        conn: sqlite3 connection
+        k: Neighbours per bhajan
+
+    Returns:
+        Number of bhajans processed
+    """
+    computed_at = datetime.utcnow().isoformat(sep=" ")
+    model = SimilarityModel.load(conn)
+    neighbors = {bhajan_id: model.neighbors(bhajan_id, k) for bhajan_id in model.ids}
+    with conn:
+        conn.execute("DELETE FROM bhajan_neighbors")
+        _write(conn, neighbors, computed_at)
+        _record_run(conn, computed_at)
+    return len(neighbors)
+
+
+def changed_since(conn, since: str) -> Set[int]:
+    """Bhajans created, updated or deleted after `since` (a stored timestamp)"""
+    return {
+        row[0] for row in conn.execute(
+            "SELECT id FROM bhajans WHERE created_at > ?1 OR updated_at > ?1 OR deleted_at > ?1", (since,)
+        )
+    }
+
+
+def last_computed(conn) -> Optional[str]:
+    """When the last rebuild() or refresh() started (None if never), the cursor for changed_since()"""
+    row = conn.execute("SELECT ran_at FROM related_runs WHERE id = 1").fetchone()
+    return row[0] if row else None
+
+
+def refresh(conn, changed: Iterable[int], k: int = TOP_K) -> int:
+    """
+    Update neighbour lists after some bhajans changed
+
+    Recomputes the changed bhajans' lists and the list of every bhajan
+    that listed a changed bhajan or that a changed bhajan now outscores.
+    Corpus statistics (idf) drift slowly; run rebuild() now and then.
+
+    Args:
+        conn: sqlite3 connection
+        changed: Created, updated or deleted bhajan ids
+        k: Neighbours per bhajan
+
+    Returns:
+        Number of bhajans whose lists were rewritten
+    """
+    changed = set(changed)
+    computed_at = datetime.utcnow().isoformat(sep=" ")
+    if not changed:
+        with conn:
+            _record_run(conn, computed_at)
+        return 0
+    model = SimilarityModel.load(conn)
+    live = set(model.ids)
+
+    stored: Dict[int, List[float]] = defaultdict(list)
+    affected = set()
+    for bhajan_id, neighbor_id, score in conn.execute(
+        "SELECT bhajan_id, neighbor_id, score FROM bhajan_neighbors"
+    ):
+        stored[bhajan_id].append(score)
+        if neighbor_id in changed:
+            affected.add(bhajan_id)
+
+    neighbors = {}
+    for bhajan_id in changed:
+        if bhajan_id not in live:
+            neighbors[bhajan_id] = []
+            continue
+        scores = model.scores(bhajan_id)
+        neighbors[bhajan_id] = _top(scores, k)
+        for other, score in scores.items():
+            if len(stored[other]) < k or score > min(stored[other]):
+                affected.add(other)
+
+    for bhajan_id in affected - changed:
+        if bhajan_id in live:
+            neighbors[bhajan_id] = model.neighbors(bhajan_id, k)
+        else:
+            neighbors[bhajan_id] = []
+
+    with conn:
+        _write(conn, neighbors, computed_at)
+        _record_run(conn, computed_at)
+    return len(neighbors)
@@ -4,62 +4,65 @@ Auto-Tagger for Belaguru Bhajans
 Detects deities, types, and languages with confidence scoring
 Target: >85% precision on deity/type detection
 """
+import os
 import re
-import unicodedata
+import sys
+from functools import lru_cache
 from typing import Dict, List, Optional, Tuple
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from transliterate import search_form
 
-# Deity keyword mappings (case-insensitive)
+
+# Deity keyword mappings, matched on transliterate.search_form() of the
+# text: one Latin spelling per name also covers its Kannada/Devanagari
+# spelling and common variants (maaruti, hanumān, ಮಾರುತಿ)
 DEITY_KEYWORDS = {
     "Hanuman": [
-        "hanuman", "anjaneya", "maruti", "pavansuta", "pavana", 
+        "hanuman", "anjaneya", "maruti", "pavansuta", "pavana",
         "mahaavira", "bajrangbali", "bajrang", "kesari", "anjani",
-        "hanumān", "हनुमान", "ಹನುಮಾನ", "ಆಂಜನೇಯ", "anjana",
-        "maaruti", "veeramalla", "hanuma", "ಮಾರುತಿ"
+        "anjana", "veeramalla", "hanuma"
     ],
     "Krishna": [
         "krishna", "govinda", "gopala", "madhava", "keshava",
         "hari", "murari", "gopal", "giridhari", "vasudeva",
-        "कृष्ण", "ಕೃಷ್ಣ", "bindu madhava"
+        "bindu madhava"
     ],
     "Rama": [
         "rama", "raghava", "raghu", "raghupati", "raghunatha",
-        "ayodhya", "dasharatha", "kosala", "राम", "ರಾಮ"
+        "ayodhya", "dasharatha", "kosala"
     ],
     "Shiva": [
         "shiva", "shankara", "mahadeva", "sambho", "shambho",
         "rudra", "neelakantha", "nataraja", "shambhu", "mahesh",
-        "शिव", "ಶಿವ", "gangadhara", "gangādhara", "chandrashekhar",
-        "umashankara", "sadashiva", "linga", "lingam", "parashiva",
-        "shivāya", "jagadeeshana", "jagadeesha", "शंकर", "ಶಂಕರ",
-        "bhayahara", "sumanohara", "shivane", "ಶಿವನೇ", "ಸದಾಶಿವ",
-        "jagadeesh", "ಜಗದೀಶ", "sadaashivana", "ಸದಾಶಿವನಾ",
-        "ಪರಶಿವ", "parashiva", "jagadeesha", "ಜಗದೀಶನಾ"
+        "gangadhara", "chandrashekhar", "umashankara", "sadashiva",
+        "linga", "lingam", "parashiva", "shivaya", "jagadeeshana",
+        "jagadeesha", "bhayahara", "sumanohara", "shivane", "jagadeesh",
+        "sadaashivana"
     ],
     "Vishnu": [
         "vishnu", "narayana", "hari", "venkateshwara", "venkatesha",
-        "narasimha", "varaaha", "vamana", "balaji", "विष्णु", "ವಿಷ್ಣು"
+        "narasimha", "varaaha", "vamana", "balaji"
     ],
     "Ganesha": [
         "ganesha", "ganapati", "vinayaka", "vighneshwara", "vighnaharta",
-        "gajanana", "lambodara", "ekadanta", "gananatha", "gananaatha",
-        "गणेश", "ಗಣೇಶ", "गणपति", "ಗಣಪತಿ"
+        "gajanana", "lambodara", "ekadanta", "gananatha"
     ],
     "Devi": [
         "devi", "durga", "lakshmi", "saraswati", "parvati",
         "kali", "amba", "ambika", "jagadamba", "sharade",
-        "chamundi", "mahalakshmi", "देवी", "ದೇವಿ", "शारदे", "ಶಾರದೆ"
+        "chamundi", "mahalakshmi"
     ]
 }
 
-# Type keyword mappings (case-insensitive)
+# Type keyword mappings (matched like DEITY_KEYWORDS)
 TYPE_KEYWORDS = {
-    "Chalisa": ["chalisa", "चालीसा"],
-    "Stotra": ["stotra", "stotram", "स्तोत्र", "स्तोत्रं"],
-    "Aarti": ["aarti", "aarati", "arti", "आरती", "आरति"],
-    "Bhajan": ["bhajan", "भजन"],
-    "Kirtan": ["kirtan", "keertan", "कीर्तन"],
-    "Mantra": ["mantra", "मंत्र"]
+    "Chalisa": ["chalisa"],
+    "Stotra": ["stotra", "stotram"],
+    "Aarti": ["aarti", "aarati", "arti", "arati"],
+    "Bhajan": ["bhajan"],
+    "Kirtan": ["kirtan", "keertan"],
+    "Mantra": ["mantra"]
 }
 
 # Unicode ranges for language detection
@@ -68,18 +71,17 @@ DEVANAGARI_RANGE = (0x0900, 0x097F)
 
 
 def normalize_text(text: str) -> str:
-    """Normalize text for matching (lowercase, strip, NFD)"""
+    """Normalize text for matching (script-independent search form)"""
     if not text:
         return ""
     
-    # Normalize unicode
-    text = unicodedata.normalize('NFD', text)
-    # Lowercase
-    text = text.lower()
-    # Remove extra whitespace
-    text = ' '.join(text.split())
-    
-    return text
+    return search_form(text)
+
+
+@lru_cache(maxsize=None)
+def keyword_pattern(keyword: str) -> "re.Pattern":
+    """Word-boundary pattern for a keyword's search form"""
+    return re.compile(r'\b' + re.escape(search_form(keyword)) + r'\b')
 
 
 def count_script_chars(text: str, char_range: Tuple[int, int]) -> int:
@@ -152,8 +154,7 @@ def detect_deities(title: str, lyrics: str) -> List[str]:
         # Check if any keyword matches
         for keyword in keywords:
             # Use word boundary matching
-            pattern = r'\b' + re.escape(keyword) + r'\b'
-            if re.search(pattern, combined_text):
+            if keyword_pattern(keyword).search(combined_text):
                 detected.append(deity)
                 break  # Found this deity, move to next
     
@@ -174,8 +175,7 @@ def detect_types(title: str) -> List[str]:
     
     for bhajan_type, keywords in TYPE_KEYWORDS.items():
         for keyword in keywords:
-            pattern = r'\b' + re.escape(keyword) + r'\b'
-            if re.search(pattern, norm_title):
+            if keyword_pattern(keyword).search(norm_title):
                 detected.append(bhajan_type)
                 break  # Found this type, move to next
     
@@ -219,9 +219,9 @@ def calculate_confidence(
     lyrics_count = 0
     
     for keyword in keywords:
-        pattern = r'\b' + re.escape(keyword) + r'\b'
-        title_count += len(re.findall(pattern, norm_title))
-        lyrics_count += len(re.findall(pattern, norm_lyrics))
+        pattern = keyword_pattern(keyword)
+        title_count += len(pattern.findall(norm_title))
+        lyrics_count += len(pattern.findall(norm_lyrics))
     
     # Base confidence
     confidence = 0.0
@@ -255,7 +255,7 @@ def calculate_confidence(
         for other_deity, other_keywords in DEITY_KEYWORDS.items():
             if other_deity != tag:
                 other_lyrics_count = sum(
-                    len(re.findall(r'\b' + re.escape(kw) + r'\b', norm_lyrics))
+                    len(keyword_pattern(kw).findall(norm_lyrics))
                     for kw in other_keywords
                 )
                 # If other deity appears >3 times in lyrics, reduce confidence
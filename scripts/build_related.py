@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Compute related bhajans into bhajan_neighbors (see related.py)
+
+By default only bhajans created, updated or deleted since the last run are
+refreshed (a full rebuild on the first run); --full recomputes
+everything and also picks up drift in tag/word frequencies. Intended for
+cron: incremental every few minutes, --full nightly.
+
+Usage:
+    python scripts/build_related.py                 # Incremental refresh
+    python scripts/build_related.py --full          # Rebuild all neighbours
+    python scripts/build_related.py --since "2026-10-01 00:00:00"
+"""
+
+import os
+import sys
+import time
+import sqlite3
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import related
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description='Compute related bhajans')
+    parser.add_argument('--db', default=os.environ.get("DATABASE_PATH", "data/portal.db"), help='Database path')
+    parser.add_argument('--full', action='store_true', help='Recompute every bhajan')
+    parser.add_argument('--since', help='Refresh bhajans changed after this timestamp')
+    parser.add_argument('-k', type=int, default=related.TOP_K, help=f'Neighbours per bhajan (default: {related.TOP_K})')
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(args.db, timeout=30)
+    start = time.perf_counter()
+    try:
+        since = args.since or related.last_computed(conn)
+        if args.full or since is None:
+            count = related.rebuild(conn, args.k)
+            print(f"✓ Rebuilt neighbours for {count} bhajans in {time.perf_counter() - start:.1f}s")
+        else:
+            changed = related.changed_since(conn, since)
+            count = related.refresh(conn, changed, args.k)
+            print(f"✓ {len(changed)} bhajans changed since {since}; "
+                  f"rewrote {count} neighbour lists in {time.perf_counter() - start:.1f}s")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
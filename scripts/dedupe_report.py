@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Report groups of near-duplicate bhajans (see near_duplicates.py)
+
+Pairs are found through shared LSH buckets, so the report stays fast on
+large catalogues. Bhajans without a signature yet (e.g. imported straight
+into the database) are signed first. Nothing is deleted: review the groups
+and soft-delete the extras through the API.
+
+Usage:
+    python scripts/dedupe_report.py                     # Print groups
+    python scripts/dedupe_report.py --threshold 0.9     # Stricter matching
+    python scripts/dedupe_report.py --csv dupes.csv     # Also write a CSV
+"""
+
+import os
+import sys
+import csv
+import time
+import sqlite3
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import near_duplicates
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description='Report near-duplicate bhajans')
+    parser.add_argument('--db', default=os.environ.get("DATABASE_PATH", "data/portal.db"), help='Database path')
+    parser.add_argument('--threshold', type=float, default=near_duplicates.DUPLICATE_THRESHOLD,
+                        help=f'Minimum estimated similarity (default: {near_duplicates.DUPLICATE_THRESHOLD})')
+    parser.add_argument('--csv', help='Write groups to this CSV file')
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(args.db, timeout=30)
+    start = time.perf_counter()
+    try:
+        with conn:
+            signed = near_duplicates.backfill(conn)
+        if signed:
+            print(f"Signed {signed} bhajans without a signature")
+        groups = near_duplicates.report(conn, args.threshold)
+    finally:
+        conn.close()
+
+    for number, group in enumerate(groups, 1):
+        print(f"\nGroup {number} ({len(group)} bhajans)")
+        for bhajan in group:
+            print(f"  {bhajan['id']:>6}  {bhajan['similarity']:.2f}  {bhajan['title']}")
+
+    if args.csv:
+        with open(args.csv, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(['group', 'bhajan_id', 'title', 'similarity'])
+            for number, group in enumerate(groups, 1):
+                for bhajan in group:
+                    writer.writerow([number, bhajan['id'], bhajan['title'], bhajan['similarity']])
+
+    duplicates = sum(len(group) - 1 for group in groups)
+    print(f"\n✓ {len(groups)} groups, {duplicates} likely duplicates in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
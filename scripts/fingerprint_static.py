@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Write content-hashed copies of the static assets (see assets.py)
+
+Every script, stylesheet and image under the static directory gets a copy
+named after a hash of its content (app.js -> app.3f2a9c1b.js), and
+asset-manifest.json maps each original to its copy. References to other
+assets inside scripts and stylesheets are rewritten in the copy before it
+is hashed, so a changed image also changes the hash of the script that
+shows it. The server rewrites index.html, templates/*.html and the
+service worker from the manifest, and sends the copies with a year-long
+immutable Cache-Control.
+
+Copies whose content is unchanged are left alone (their precompressed
+variants stay valid); copies of an older version are removed. Run it
+before scripts/precompress_static.py (start.sh does).
+
+Usage:
+    python scripts/fingerprint_static.py                # static/
+    python scripts/fingerprint_static.py --dry-run      # Show the manifest only
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import assets
+
+
+def find_assets(directory: str) -> list:
+    """Originals to fingerprint, as paths relative to the directory ("saints/three-gurus.jpg")"""
+    names = []
+    for root, _, files in os.walk(directory):
+        for name in files:
+            path = os.path.relpath(os.path.join(root, name), directory).replace(os.sep, "/")
+            if (name.endswith(assets.FINGERPRINT_EXTENSIONS) and name not in assets.UNFINGERPRINTED
+                    and not assets.is_fingerprinted(name)):
+                names.append(path)
+    return sorted(names)
+
+
+def build_manifest(directory: str) -> dict:
+    """
+    Fingerprint every asset (without writing anything)
+
+    Returns:
+        {original: (fingerprinted name, content of the copy)}
+    """
+    names = find_assets(directory)
+    pattern = assets.reference_pattern(names)
+    built = {}
+
+    def fingerprint(name, visiting):
+        if name in built:
+            return built[name][0]
+        with open(os.path.join(directory, name), "rb") as f:
+            data = f.read()
+        if name.endswith(assets.REFERENCING_EXTENSIONS):
+            text = data.decode("utf-8")
+            # Referenced assets first, so their hashes are in this copy; a cycle keeps the original URL
+            references = {}
+            for match in pattern.finditer(text):
+                referenced = match.group(1)
+                if referenced != name and referenced not in visiting:
+                    references[referenced] = fingerprint(referenced, visiting | {name})
+            data = assets.rewrite_references(text, references).encode("utf-8") if references else data
+        built[name] = (assets.fingerprinted_name(name, assets.content_hash(data)), data)
+        return built[name][0]
+
+    for name in names:
+        fingerprint(name, frozenset())
+    return built
+
+
+def fingerprint_static(directory: str) -> dict:
+    """Write the copies and the manifest; returns {"assets", "written", "removed"}"""
+    built = build_manifest(directory)
+    totals = {"assets": len(built), "written": 0, "removed": 0}
+
+    for name, (copy, data) in built.items():
+        path = os.path.join(directory, copy)
+        if os.path.exists(path):
+            continue  # same name, same content
+        with open(path, "wb") as f:
+            f.write(data)
+        totals["written"] += 1
+
+    current = {copy for copy, _ in built.values()}
+    for root, _, files in os.walk(directory):
+        for name in files:
+            copy = os.path.relpath(os.path.join(root, name), directory).replace(os.sep, "/")
+            match = assets.FINGERPRINTED.search(copy)
+            # Only copies of a known asset: foo.<hash>.js with foo.js in the manifest
+            if match and copy not in current and copy[:match.start()] + os.path.splitext(copy)[1] in built:
+                os.remove(os.path.join(root, name))
+                totals["removed"] += 1
+
+    manifest = {name: copy for name, (copy, _) in sorted(built.items())}
+    manifest_path = os.path.join(directory, assets.MANIFEST_NAME)
+    tmp_path = manifest_path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f, indent=2)
+        f.write("\n")
+    os.replace(tmp_path, manifest_path)  # the server never reads half a manifest
+    return totals
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description='Fingerprint static assets')
+    parser.add_argument('directory', nargs='?', default=os.environ.get("STATIC_DIR", "static"),
+                        help='Static directory (default: static)')
+    parser.add_argument('--dry-run', action='store_true', help='Print the manifest without writing files')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    if args.dry_run:
+        for name, (copy, _) in sorted(build_manifest(args.directory).items()):
+            print(f"  {name} -> {copy}")
+        return
+    totals = fingerprint_static(args.directory)
+    print(f"✓ {args.directory}: {totals['assets']} assets, {totals['written']} new copies, "
+          f"{totals['removed']} old copies removed")
+    print(f"✓ Done in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
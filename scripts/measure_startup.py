@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Cold-start measurement for the portal
+
+Measures, each in a fresh interpreter:
+- import_main_ms: `python -X importtime -c "import main"` cumulative time
+- app_startup_ms: create_app() + lifespan startup against an empty database
+- test_collection_ms: `pytest --collect-only` wall time (test-suite cold start)
+
+Results can be compared with a stored baseline so import-time regressions
+(e.g. work creeping back into module scope) fail loudly.
+
+Usage:
+    python scripts/measure_startup.py                       # Print report
+    python scripts/measure_startup.py --check               # Compare with baseline
+    python scripts/measure_startup.py --update-baseline     # Store new baseline
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import statistics
+import subprocess
+from typing import Dict, List
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_BASELINE = os.path.join(PROJECT_ROOT, "tests", "benchmarks", "startup_baseline.json")
+
+APP_STARTUP_SNIPPET = """
+import time
+start = time.perf_counter()
+from fastapi.testclient import TestClient
+from main import create_app
+from settings import Settings
+app = create_app(Settings(database_path={db_path!r}, log_dir={log_dir!r}))
+with TestClient(app):
+    pass
+print((time.perf_counter() - start) * 1000)
+"""
+
+
+def _isolated_env(tmp_dir: str) -> Dict[str, str]:
+    """Environment pointing the app at a throwaway database and log dir"""
+    env = dict(os.environ)
+    env["DATABASE_PATH"] = os.path.join(tmp_dir, "startup.db")
+    env.pop("DATABASE_URL", None)
+    env["LOG_DIR"] = os.path.join(tmp_dir, "logs")
+    return env
+
+
+def parse_importtime(stderr: str) -> List[Dict]:
+    """
+    Parse `python -X importtime` output
+
+    Returns:
+        List of {module, self_us, cumulative_us} in import order
+    """
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        _, self_us, cumulative_us, module = [p.strip() for p in line.replace("import time:", "|", 1).split("|")]
+        entries.append({
+            "module": module,
+            "self_us": int(self_us),
+            "cumulative_us": int(cumulative_us)
+        })
+    return entries
+
+
+def measure_import(module: str = "main", runs: int = 3) -> Dict:
+    """Measure cold import time of a module (median over runs)"""
+    samples = []
+    top = []
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        env = _isolated_env(tmp_dir)
+        for _ in range(runs):
+            proc = subprocess.run(
+                [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                cwd=PROJECT_ROOT, env=env, capture_output=True, text=True, check=True
+            )
+            entries = parse_importtime(proc.stderr)
+            total = next(e for e in reversed(entries) if e["module"] == module)
+            samples.append(total["cumulative_us"] / 1000)
+            top = sorted(entries, key=lambda e: e["self_us"], reverse=True)[:10]
+
+        touched_db = os.path.exists(env["DATABASE_PATH"])
+        touched_logs = os.path.exists(env["LOG_DIR"])
+
+    return {
+        "import_main_ms": round(statistics.median(samples), 1),
+        "import_touches_database": touched_db,
+        "import_touches_logs": touched_logs,
+        "slowest_imports": [
+            {"module": e["module"], "self_ms": round(e["self_us"] / 1000, 1)}
+            for e in top
+        ]
+    }
+
+
+def measure_app_startup(runs: int = 3) -> Dict:
+    """Measure create_app() + lifespan startup in a fresh interpreter"""
+    samples = []
+
+    for _ in range(runs):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            env = _isolated_env(tmp_dir)
+            code = APP_STARTUP_SNIPPET.format(
+                db_path=env["DATABASE_PATH"], log_dir=env["LOG_DIR"]
+            )
+            proc = subprocess.run(
+                [sys.executable, "-c", code],
+                cwd=PROJECT_ROOT, env=env, capture_output=True, text=True, check=True
+            )
+            samples.append(float(proc.stdout.strip().splitlines()[-1]))
+
+    return {"app_startup_ms": round(statistics.median(samples), 1)}
+
+
+def measure_test_collection() -> Dict:
+    """Measure pytest collection wall time (the suite's cold start)"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        start = time.perf_counter()
+        subprocess.run(
+            [sys.executable, "-m", "pytest", "--collect-only", "-q",
+             "-p", "no:cacheprovider", "tests", "--ignore=tests/e2e"],
+            cwd=PROJECT_ROOT, env=_isolated_env(tmp_dir), capture_output=True, text=True
+        )
+        elapsed = (time.perf_counter() - start) * 1000
+
+    return {"test_collection_ms": round(elapsed, 1)}
+
+
+def measure_all(runs: int = 3) -> Dict:
+    """Run every startup measurement"""
+    results = {}
+    results.update(measure_import(runs=runs))
+    results.update(measure_app_startup(runs=runs))
+    results.update(measure_test_collection())
+    return results
+
+
+def compare_with_baseline(results: Dict, baseline: Dict, tolerance: float = 0.5) -> List[str]:
+    """
+    Compare timings with a baseline
+
+    Args:
+        results: Output of measure_all()
+        baseline: Stored baseline (same keys)
+        tolerance: Allowed relative slowdown (0.5 = 50% slower)
+
+    Returns:
+        List of regression messages (empty if within budget)
+    """
+    regressions = []
+
+    for key, value in baseline.items():
+        if key.endswith("_ms") and key in results:
+            budget = value * (1 + tolerance)
+            if results[key] > budget:
+                regressions.append(
+                    f"{key}: {results[key]:.1f}ms > {budget:.1f}ms (baseline {value:.1f}ms)"
+                )
+        elif key.startswith("import_touches_") and results.get(key) and not value:
+            regressions.append(f"{key}: importing main touched disk")
+
+    return regressions
+
+
+def main():
+    """Main CLI entry point"""
+    parser = argparse.ArgumentParser(description='Measure portal cold-start time')
+    parser.add_argument('--runs', type=int, default=3, help='Runs per measurement (default: 3)')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='Baseline JSON file')
+    parser.add_argument('--check', action='store_true', help='Fail if slower than baseline')
+    parser.add_argument('--tolerance', type=float, default=0.5, help='Allowed slowdown (default: 0.5)')
+    parser.add_argument('--update-baseline', action='store_true', help='Write results as new baseline')
+    args = parser.parse_args()
+
+    results = measure_all(runs=args.runs)
+
+    print("\n⏱️  Cold Start")
+    print("=" * 60)
+    print(f"  import main:        {results['import_main_ms']:.1f}ms")
+    print(f"  app startup:        {results['app_startup_ms']:.1f}ms")
+    print(f"  test collection:    {results['test_collection_ms']:.1f}ms")
+    print(f"  import touches DB:  {results['import_touches_database']}")
+    print(f"  import touches logs:{results['import_touches_logs']}")
+    print("\n  Slowest imports (self):")
+    for entry in results["slowest_imports"]:
+        print(f"    {entry['self_ms']:8.1f}ms  {entry['module']}")
+    print("=" * 60)
+
+    if args.update_baseline:
+        baseline = {k: v for k, v in results.items() if k != "slowest_imports"}
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, "w") as f:
+            json.dump(baseline, f, indent=2)
+            f.write("\n")
+        print(f"✅ Baseline written: {args.baseline}")
+
+    if args.check:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare_with_baseline(results, baseline, args.tolerance)
+        if regressions:
+            print("❌ Startup regressions:")
+            for message in regressions:
+                print(f"  • {message}")
+            sys.exit(1)
+        print("✅ Within baseline")
+
+
+if __name__ == '__main__':
+    main()
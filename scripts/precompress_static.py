@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Write precompressed .gz/.br variants of the static files (see compression.py)
+
+The server sends a variant instead of the original when the client accepts
+its encoding and the variant is at least as new as the original, so run
+this after every deploy (start.sh does). .br files need the optional brotli
+package; without it only .gz files are written. Variants whose original is
+gone are removed.
+
+Usage:
+    python scripts/precompress_static.py                    # static/ and templates/
+    python scripts/precompress_static.py --min-size 4096    # Skip smaller files
+"""
+
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import compression
+
+
+def precompress(directory: str, min_size: int) -> dict:
+    """Compress every text file under a directory; returns {"files", "variants", "removed", "saved"}"""
+    totals = {"files": 0, "variants": 0, "removed": 0, "saved": 0}
+    suffixes = tuple(suffix for _, suffix in compression.STATIC_ENCODINGS)
+    for root, _, names in os.walk(directory):
+        for name in names:
+            path = os.path.join(root, name)
+            if name.endswith(suffixes):
+                if not os.path.exists(path[:-len(os.path.splitext(name)[1])]):
+                    os.remove(path)
+                    totals["removed"] += 1
+                continue
+            if not name.endswith(compression.STATIC_EXTENSIONS):
+                continue
+            written = compression.compress_file(path, min_size)
+            if written:
+                totals["files"] += 1
+                totals["variants"] += len(written)
+                smallest = min(os.path.getsize(path + suffix)
+                               for encoding, suffix in compression.STATIC_ENCODINGS if encoding in written)
+                totals["saved"] += os.path.getsize(path) - smallest
+    return totals
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description='Precompress static files')
+    parser.add_argument('directories', nargs='*', default=[os.environ.get("STATIC_DIR", "static"),
+                                                           os.environ.get("TEMPLATES_DIR", "templates")],
+                        help='Directories to compress (default: static and templates)')
+    parser.add_argument('--min-size', type=int, default=compression.DEFAULT_MINIMUM_SIZE,
+                        help=f'Skip files smaller than this many bytes (default: {compression.DEFAULT_MINIMUM_SIZE})')
+    args = parser.parse_args()
+
+    if compression.brotli is None:
+        print("⚠️  brotli not installed: writing .gz only (pip install brotli)")
+
+    start = time.perf_counter()
+    for directory in args.directories:
+        totals = precompress(directory, args.min_size)
+        print(f"✓ {directory}: {totals['files']} files, {totals['variants']} variants, "
+              f"{totals['saved'] / 1024:.0f} KB saved, {totals['removed']} stale variants removed")
+    print(f"✓ Done in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
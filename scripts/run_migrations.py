@@ -10,8 +10,13 @@ Safely runs SQL migrations with:
 - Rollback support
 - Transaction per migration (atomic)
 
+Also owns the in-place upgrade of older databases (legacy bhajans
+columns, derived columns such as bhajans.preview + backfill), stamped
+with PRAGMA user_version so application startup can skip it once the
+schema is current.
+
 Usage:
-    python scripts/run_migrations.py                    # Run pending migrations
+    python scripts/run_migrations.py                    # Upgrade schema + run pending migrations
     python scripts/run_migrations.py --dry-run          # Show what would run
     python scripts/run_migrations.py --status           # Show migration status
     python scripts/run_migrations.py --rollback 001_*.sql  # Rollback a migration
@@ -366,6 +371,208 @@ class MigrationRunner:
         return backup_path
 
 
+# Schema Upgrade
+
+# Columns added to bhajans after the first deployments. Databases created
+# by models.py already have them; older ones get them via ALTER TABLE.
+LEGACY_BHAJAN_COLUMNS = {
+    "tags": "TEXT",
+    "uploader_name": "TEXT",
+    "created_at": "DATETIME",
+    "updated_at": "DATETIME",
+    "deleted_at": "DATETIME"
+}
+
+# Columns computed from other columns at write time (schema v2+)
+DERIVED_BHAJAN_COLUMNS = {
+    "preview": "TEXT",
+    "title_roman": "TEXT",
+    "lyrics_roman": "TEXT"
+}
+
+
+def create_model_tables(conn: sqlite3.Connection, *table_names: str):
+    """
+    Create models.py tables (and their indexes) that a database lacks
+
+    The DDL is compiled from the SQLAlchemy models, so an upgraded
+    database gets the same tables as one built by create_all().
+    """
+    from sqlalchemy.dialects import sqlite
+    from sqlalchemy.schema import CreateIndex, CreateTable
+    from models import Base
+    
+    dialect = sqlite.dialect()
+    for table_name in table_names:
+        table = Base.metadata.tables[table_name]
+        conn.execute(str(CreateTable(table, if_not_exists=True).compile(dialect=dialect)))
+        for index in table.indexes:
+            conn.execute(str(CreateIndex(index, if_not_exists=True).compile(dialect=dialect)))
+
+
+def get_schema_version(db_path: str) -> int:
+    """Read the schema version stamped in the database (PRAGMA user_version)"""
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute("PRAGMA user_version").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def upgrade_schema(db_path: str, target_version: int) -> Dict:
+    """
+    Upgrade an older database to the current schema version
+
+    Runs each version's step once, in order, from the stored version up to
+    target_version: legacy bhajans columns (1), bhajans.preview (2), the
+    transliterated columns (3), the bhajans_fts index (4), bhajan_stats (5),
+    bhajan_neighbors (6), the near-duplicate signature tables and their
+    backfill (7), the sync_log change log (8) and related_runs (9). Each
+    step creates the tables it needs and stamps its version in PRAGMA
+    user_version, so a stamped database has every table of that version
+    and a later bump runs only the new steps, never repeating a backfill.
+    The version is re-checked under a write lock, so several workers
+    booting at once upgrade the database only once.
+
+    Args:
+        db_path: Path to SQLite database
+        target_version: Schema version to stamp (models.SCHEMA_VERSION)
+
+    Returns:
+        Dictionary with from_version, to_version and added_columns
+    """
+    conn = sqlite3.connect(db_path, timeout=30, isolation_level=None)
+    
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        if version >= target_version:
+            conn.execute("ROLLBACK")
+            return {
+                'success': True,
+                'from_version': version,
+                'to_version': version,
+                'added_columns': []
+            }
+        
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(bhajans)")}
+        added_columns = []
+        
+        def needs(step_version: int) -> bool:
+            return version < step_version <= target_version
+        
+        def stamp(step_version: int):
+            conn.execute(f"PRAGMA user_version = {int(step_version)}")
+        
+        def add_columns(new_columns: Dict[str, str]):
+            for col_name, col_type in new_columns.items():
+                if col_name not in columns:
+                    conn.execute(f"ALTER TABLE bhajans ADD COLUMN {col_name} {col_type}")
+                    columns.add(col_name)
+                    added_columns.append(col_name)
+        
+        if needs(1):
+            if not columns:
+                # Nothing to upgrade: start from the current bhajans table
+                create_model_tables(conn, "bhajans")
+                columns = {row[1] for row in conn.execute("PRAGMA table_info(bhajans)")}
+            add_columns(LEGACY_BHAJAN_COLUMNS)
+            if "manual_tags" in columns:
+                conn.execute("UPDATE bhajans SET tags = COALESCE(manual_tags, '') WHERE tags = '' OR tags IS NULL")
+            conn.execute("UPDATE bhajans SET uploader_name = 'Unknown' WHERE uploader_name = '' OR uploader_name IS NULL")
+            conn.execute("UPDATE bhajans SET created_at = DATETIME('now') WHERE created_at IS NULL")
+            conn.execute("UPDATE bhajans SET updated_at = DATETIME('now') WHERE updated_at IS NULL")
+            stamp(1)
+        
+        if needs(2):
+            add_columns({"preview": DERIVED_BHAJAN_COLUMNS["preview"]})
+            from previews import make_preview
+            rows = conn.execute("SELECT id, lyrics FROM bhajans WHERE preview IS NULL").fetchall()
+            conn.executemany(
+                "UPDATE bhajans SET preview = ? WHERE id = ?",
+                [(make_preview(lyrics), bhajan_id) for bhajan_id, lyrics in rows]
+            )
+            stamp(2)
+        
+        if needs(3):
+            add_columns({col_name: DERIVED_BHAJAN_COLUMNS[col_name] for col_name in ("title_roman", "lyrics_roman")})
+            from transliterate import lyric_lines_form, search_form
+            rows = conn.execute(
+                "SELECT id, title, lyrics FROM bhajans WHERE title_roman IS NULL OR lyrics_roman IS NULL"
+            ).fetchall()
+            conn.executemany(
+                "UPDATE bhajans SET title_roman = ?, lyrics_roman = ? WHERE id = ?",
+                [(search_form(title), lyric_lines_form(lyrics), bhajan_id) for bhajan_id, title, lyrics in rows]
+            )
+            stamp(3)
+        
+        if needs(4):
+            # Full-text index over the backfilled transliterations
+            from models import BHAJANS_FTS_DDL
+            for statement in BHAJANS_FTS_DDL:
+                conn.execute(statement)
+            conn.execute("INSERT INTO bhajans_fts (bhajans_fts) VALUES ('rebuild')")
+            stamp(4)
+        
+        if needs(5):
+            # View/play counts (popularity.PopularityCounter)
+            create_model_tables(conn, "bhajan_stats")
+            stamp(5)
+        
+        if needs(6):
+            # Related bhajans (related.py), filled by scripts/build_related.py
+            create_model_tables(conn, "bhajan_neighbors")
+            stamp(6)
+        
+        if needs(7):
+            # Near-duplicate signatures of the lyrics (near_duplicates.py)
+            create_model_tables(conn, "bhajan_minhash", "bhajan_lsh")
+            import near_duplicates
+            near_duplicates.backfill(conn)
+            stamp(7)
+        
+        if needs(8):
+            # Change log for /api/sync: the log and the tag tables its
+            # triggers span, the triggers, then every existing bhajan and
+            # tag as changed once
+            create_model_tables(conn, "tag_taxonomy", "tag_translations", "tag_synonyms", "bhajan_tags", "sync_log")
+            from models import SYNC_LOG_DDL
+            for statement in SYNC_LOG_DDL:
+                conn.execute(statement)
+            conn.execute("""INSERT OR IGNORE INTO sync_log (entity, entity_id, deleted)
+                            SELECT 'bhajan', id, deleted_at IS NOT NULL FROM bhajans ORDER BY id""")
+            conn.execute("""INSERT OR IGNORE INTO sync_log (entity, entity_id, deleted)
+                            SELECT 'tag', id, 0 FROM tag_taxonomy ORDER BY id""")
+            stamp(8)
+        
+        if needs(9):
+            # Explicit cursor for incremental related refreshes, starting
+            # from the newest neighbour list already computed
+            create_model_tables(conn, "related_runs")
+            conn.execute("""INSERT OR IGNORE INTO related_runs (id, ran_at)
+                            SELECT 1, MAX(computed_at) FROM bhajan_neighbors HAVING MAX(computed_at) IS NOT NULL""")
+            stamp(9)
+        
+        to_version = conn.execute("PRAGMA user_version").fetchone()[0]
+        conn.execute("COMMIT")
+        
+        return {
+            'success': True,
+            'from_version': version,
+            'to_version': to_version,
+            'added_columns': added_columns
+        }
+    
+    except Exception:
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
+        raise
+    
+    finally:
+        conn.close()
+
+
 # Helper Functions
 
 def calculate_checksum(file_path: str) -> str:
@@ -502,10 +709,15 @@ def main():
     # Initialize runner
     runner = MigrationRunner(args.db, args.migrations_dir)
     
+    # Target schema version lives with the models
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from models import SCHEMA_VERSION
+    
     # Handle --status
     if args.status:
         status = runner.get_status()
         print_status(status)
+        print(f"Schema version: {get_schema_version(args.db)} (current: {SCHEMA_VERSION})")
         return
     
     # Handle --rollback
@@ -534,6 +746,16 @@ def main():
         print("\n🚀 Running Migrations")
         print("=" * 60)
     
+    if args.dry_run:
+        if get_schema_version(args.db) < SCHEMA_VERSION:
+            print(f"\nWould upgrade schema to version {SCHEMA_VERSION}")
+    else:
+        upgrade = upgrade_schema(args.db, SCHEMA_VERSION)
+        if upgrade['from_version'] != upgrade['to_version']:
+            print(f"\n✅ Schema upgraded: v{upgrade['from_version']} → v{upgrade['to_version']}")
+            for col_name in upgrade['added_columns']:
+                print(f"  • Added column: {col_name}")
+    
     result = runner.run_migrations(dry_run=args.dry_run)
     
     if args.dry_run:
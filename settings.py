@@ -0,0 +1,70 @@
+"""
+Application settings for Belaguru Bhajan Portal
+
+Settings are plain values read from the environment once, so create_app()
+can be handed an explicit configuration (tests, scripts) without
+reimporting modules. The database settings are not per-app:
+create_app() passes them to models.configure_database(), which rebinds
+the process-wide models.engine and SessionLocal, so one process serves
+one database at a time.
+"""
+import os
+from dataclasses import dataclass
+
+
+@dataclass
+class Settings:
+    """Runtime configuration passed to main.create_app()"""
+    database_path: str = "./data/portal.db"
+    database_url: str | None = None  # Defaults to sqlite:///{database_path}
+    static_dir: str = "static"
+    templates_dir: str = "templates"
+    audio_dir: str = "./static/audio"
+    log_dir: str = "./logs"
+    log_level: str = "INFO"
+    log_max_bytes: int = 10 * 1024 * 1024  # Rotate portal_app.log at this size
+    log_backup_count: int = 5
+    log_sample_rate: float = 0.1  # Share of successful requests logged
+    log_sample_routes: str = "/health=0,/metrics=0"  # Per-route rates, "route=rate,..."
+    debug: bool = False  # Enables /api/debug/* endpoints
+    slow_request_ms: float = 500.0  # Requests slower than this log a WARNING
+    search_weights: str = ""  # ranking.ScoringWeights overrides, "name=weight,..."
+    search_cache_ttl: float = 60.0  # Seconds a ranked /api/search result is reused (0 = off)
+    search_cache_size: int = 256  # Cached /api/search queries
+    popularity_flush_seconds: float = 10.0  # Write-behind interval for view/play counts
+    popularity_max_pending: int = 1000  # Bhajans with unflushed events that force an early flush
+    playlist_ttl: float = 3600.0  # Seconds before a cached playlist is re-ordered by popularity
+    playlist_length: int = 30  # Bhajans per /api/playlists/{day} playlist
+    compress_min_size: int = 1024  # JSON responses at least this large are gzip/brotli compressed
+
+    def __post_init__(self):
+        if not self.database_url:
+            self.database_url = f"sqlite:///{self.database_path}"
+
+    @classmethod
+    def from_env(cls) -> "Settings":
+        """Build settings from environment variables"""
+        database_path = os.environ.get("DATABASE_PATH", "./data/portal.db")
+        return cls(
+            database_path=database_path,
+            database_url=os.environ.get("DATABASE_URL"),
+            static_dir=os.environ.get("STATIC_DIR", "static"),
+            templates_dir=os.environ.get("TEMPLATES_DIR", "templates"),
+            audio_dir=os.environ.get("AUDIO_DIR", "./static/audio"),
+            log_dir=os.environ.get("LOG_DIR", "./logs"),
+            log_level=os.environ.get("LOG_LEVEL", "INFO").upper(),
+            log_max_bytes=int(os.environ.get("LOG_MAX_BYTES", 10 * 1024 * 1024)),
+            log_backup_count=int(os.environ.get("LOG_BACKUP_COUNT", "5")),
+            log_sample_rate=float(os.environ.get("LOG_SAMPLE_RATE", "0.1")),
+            log_sample_routes=os.environ.get("LOG_SAMPLE_ROUTES", "/health=0,/metrics=0"),
+            debug=os.environ.get("PORTAL_DEBUG", "false").lower() == "true",
+            slow_request_ms=float(os.environ.get("SLOW_REQUEST_MS", "500")),
+            search_weights=os.environ.get("SEARCH_WEIGHTS", ""),
+            search_cache_ttl=float(os.environ.get("SEARCH_CACHE_TTL", "60")),
+            search_cache_size=int(os.environ.get("SEARCH_CACHE_SIZE", "256")),
+            popularity_flush_seconds=float(os.environ.get("POPULARITY_FLUSH_SECONDS", "10")),
+            popularity_max_pending=int(os.environ.get("POPULARITY_MAX_PENDING", "1000")),
+            playlist_ttl=float(os.environ.get("PLAYLIST_TTL", "3600")),
+            playlist_length=int(os.environ.get("PLAYLIST_LENGTH", "30")),
+            compress_min_size=int(os.environ.get("COMPRESS_MIN_SIZE", "1024")),
+        )
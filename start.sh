@@ -24,6 +24,14 @@ pip install -q -r requirements.txt
 echo "📊 Initializing database..."
 python3 -c "from models import init_db; init_db()" 2>/dev/null
 
+# Content-hashed copies of the assets (before precompressing, so they get variants too)
+echo "🔖 Fingerprinting static assets..."
+python3 scripts/fingerprint_static.py
+
+# Precompressed .gz/.br variants of the static files
+echo "🗜️  Precompressing static files..."
+python3 scripts/precompress_static.py
+
 # Start server
 echo ""
 echo "✅ Server starting on http://localhost:8000"
@@ -11,7 +11,6 @@ class BelaGuruApp {
         this.bhajans = [];
         this.filteredBhajans = [];
         this.allTags = [];
-        this.tagTaxonomy = [];
         this.tagsByCategory = {};
         this.showAllTags = false;
         this.tagSearchQuery = "";
@@ -19,12 +18,19 @@ class BelaGuruApp {
         this.searchQuery = "";
         this.appContainer = document.getElementById("app");
         this.searchTimeout = null;
+        this.searchHighlights = null; // {bhajanId: [{text, highlights}]} from /api/search
+        this.searchMatches = null; // Set of bhajan ids from the offline search index
         this.mobileTagsOpen = false; // Track mobile tags section state
         this.expandedCategories = {}; // Track which categories are expanded
         // Tag input state for upload/edit forms
         this._selectedTags = [];
         this._tagDropdownVisible = false;
         this.isLoading = true; // Track loading state
+        this.resultsList = null; // VirtualList over #bhajans-grid
+        this._filterMemo = new Map(); // "search\0tag" -> filtered bhajans
+        // IndexedDB copy of the catalogue (offline-store.js); null = network only
+        this.store = typeof CatalogueStore !== "undefined" && CatalogueStore.isSupported()
+            ? new CatalogueStore() : null;
 
         this.init();
     }
@@ -33,7 +39,7 @@ class BelaGuruApp {
         this.showLoadingSpinner();
         try {
             await this.loadBhajans();
-            await this.loadTags();
+            this.loadTags();
             await this.loadTagTree();
             this.loadFontSizePreference();
             this.initURLListener();
@@ -87,85 +93,75 @@ class BelaGuruApp {
     }
 
     async loadBhajans() {
+        if (this.store) {
+            try {
+                await this.loadBhajansFromStore();
+                return;
+            } catch (error) {
+                console.error("Offline store unavailable, loading from network:", error);
+                this.store = null;
+            }
+        }
         try {
-            const response = await fetch("/api/bhajans");
-            this.bhajans = await response.json();
+            // Summaries carry a stored preview instead of full lyrics;
+            // lyrics are fetched when a bhajan is opened (ensureLyrics).
+            // Facets are the per-category tag counts for the sidebar.
+            const response = await fetch("/api/bhajans?fields=summary&facets=true");
+            const data = await response.json();
+            this.bhajans = data.results;
+            this.tagsByCategory = data.facets;
             this.applyFilters(); // Refresh filtered list after reload
         } catch (error) {
             console.error("Error loading bhajans:", error);
         }
     }
 
-    async loadTags() {
-        try {
-            // Load tag taxonomy (for categories) - this is the proper endpoint
-            const taxonomyResponse = await fetch("/api/tags");
-            this.tagTaxonomy = await taxonomyResponse.json();
-            
-            // Load tag counts - this will work once we fix the route
-            try {
-                const response = await fetch("/api/bhajans");
-                const bhajans = await response.json();
-                
-                // Calculate counts from bhajans
-                const tagCounts = {};
-                bhajans.forEach(bhajan => {
-                    if (bhajan.tags && Array.isArray(bhajan.tags)) {
-                        bhajan.tags.forEach(tag => {
-                            tagCounts[tag] = (tagCounts[tag] || 0) + 1;
-                        });
-                    }
-                });
-                
-                this.allTags = Object.entries(tagCounts)
-                    .map(([tag, count]) => ({ tag, count }))
-                    .sort((a, b) => b.count - a.count);
-            } catch (e) {
-                console.error("Error calculating tag counts:", e);
-                this.allTags = [];
-            }
-            
-            // Organize tags by category
-            this.tagsByCategory = this.organizeTagsByCategory();
-        } catch (error) {
-            console.error("Error loading tags:", error);
-            this.tagTaxonomy = [];
-            this.allTags = [];
-            this.tagsByCategory = {};
+    async loadBhajansFromStore() {
+        // A stored copy renders straight away and syncs in the background;
+        // the first visit waits for the full sync
+        await this.store.open();
+        if (await this.store.load()) {
+            this.showStoredCatalogue();
+            this.store.sync()
+                .then(changed => changed && this.refreshCatalogue())
+                .catch(error => console.warn("Sync failed, showing the offline copy:", error));
+        } else {
+            await this.store.sync();
+            this.showStoredCatalogue();
         }
     }
-    
-    organizeTagsByCategory() {
-        const categories = {};
-        
-        if (!this.tagTaxonomy || !Array.isArray(this.tagTaxonomy)) {
-            return categories;
+
+    showStoredCatalogue() {
+        this.bhajans = this.store.list();
+        this.tagsByCategory = this.store.facets(this.bhajans);
+        this.applyFilters();
+    }
+
+    refreshCatalogue() {
+        // Background sync brought changes: update the list in place
+        this.showStoredCatalogue();
+        this.loadTags();
+        if (this.currentPage === "home") {
+            this.renderResults();
+            this.renderSearchStatus();
         }
-        
-        // Group tags by category
-        this.tagTaxonomy.forEach(tag => {
-            const category = tag.category || 'other';
-            if (!categories[category]) {
-                categories[category] = [];
-            }
-            
-            // Find count for this tag
-            const tagCount = this.allTags.find(t => t.tag === tag.name);
-            if (tagCount && tagCount.count > 0) {
-                categories[category].push({
-                    name: tag.name,
-                    count: tagCount.count,
-                    id: tag.id
+    }
+
+    loadTags() {
+        // Tag names with counts (including tags outside the taxonomy),
+        // for the tag picker and autocomplete
+        const tagCounts = {};
+        this.bhajans.forEach(bhajan => {
+            if (bhajan.tags && Array.isArray(bhajan.tags)) {
+                bhajan.tags.forEach(tag => {
+                    tagCounts[tag] = (tagCounts[tag] || 0) + 1;
                 });
             }
         });
         
-        // Sort tags within each category by count
-        Object.keys(categories).forEach(cat => {
-            categories[cat].sort((a, b) => b.count - a.count);
-        });
-        
-        return categories;
+        this.allTags = Object.entries(tagCounts)
+            .map(([tag, count]) => ({ tag, count }))
+            .sort((a, b) => b.count - a.count);
     }
 
     /**
@@ -243,14 +239,110 @@ class BelaGuruApp {
         if (this.searchTimeout) {
             clearTimeout(this.searchTimeout);
         }
+        if (this.suggestTimeout) {
+            clearTimeout(this.suggestTimeout);
+        }
+        this.suggestTimeout = setTimeout(() => this.loadSuggestions(this.searchQuery), 100);
 
-        this.searchTimeout = setTimeout(() => {
+        this.searchTimeout = setTimeout(async () => {
+            await Promise.all([
+                this.loadSearchHighlights(this.searchQuery),
+                this.loadSearchMatches(this.searchQuery)
+            ]);
             this.applyFilters();
             this.renderResults();
             this.renderSearchStatus(); // NEW: Show search results feedback
         }, 300);
     }
 
+    async loadSuggestions(query) {
+        // Titles and tags from the server's prefix index, shown as a datalist
+        const list = document.getElementById("search-suggestions");
+        if (!list) return;
+        if (!query.trim()) {
+            list.innerHTML = "";
+            return;
+        }
+        try {
+            const response = await fetch(`/api/suggest?q=${encodeURIComponent(query)}&limit=8`);
+            const suggestions = await response.json();
+            if (query !== this.searchQuery) return; // A newer keystroke is in flight
+            list.innerHTML = suggestions
+                .map(s => `<option value="${this.escapeHtml(s.text)}"></option>`)
+                .join("");
+        } catch (error) {
+            console.error("Error loading suggestions:", error);
+        }
+    }
+
+    async loadSearchHighlights(query) {
+        // Lyrics aren't loaded client-side, so lyric matches come from the server
+        this.searchHighlights = null;
+        if (query.length < 2) return;
+        try {
+            const response = await fetch(`/api/search?q=${encodeURIComponent(query)}&fields=summary`);
+            const results = await response.json();
+            if (query !== this.searchQuery) return; // A newer search is in flight
+            this.searchHighlights = {};
+            results.forEach(result => {
+                this.searchHighlights[result.id] = result.highlights || [];
+            });
+        } catch (error) {
+            console.error("Error loading search highlights:", error);
+        }
+    }
+
+    async loadSearchMatches(query) {
+        // Title, lyric and tag matches from the offline index (search-worker.js);
+        // they work without the network
+        this.searchMatches = null;
+        if (!this.store || !query.trim()) return;
+        const matches = await this.store.search(query);
+        if (query !== this.searchQuery) return; // A newer search is in flight
+        this.searchMatches = matches;
+    }
+
+    async ensureLyrics(bhajanId) {
+        const bhajan = this.bhajans.find(b => b.id === bhajanId);
+        if (!bhajan || bhajan.lyrics !== undefined) return bhajan;
+        if (this.store) {
+            const lyrics = await this.store.lyrics(bhajanId);
+            if (lyrics !== undefined) {
+                bhajan.lyrics = lyrics;
+                return bhajan;
+            }
+        }
+        const response = await fetch(`/api/bhajans/${bhajanId}`);
+        if (!response.ok) return null;
+        Object.assign(bhajan, await response.json());
+        return bhajan;
+    }
+
+    escapeHtml(text) {
+        return String(text)
+            .replace(/&/g, "&amp;")
+            .replace(/</g, "&lt;")
+            .replace(/>/g, "&gt;")
+            .replace(/"/g, "&quot;");
+    }
+
+    renderSnippet(bhajan) {
+        // First highlight fragment for the active search, else the stored preview
+        const fragment = this.searchQuery && this.searchHighlights &&
+            (this.searchHighlights[bhajan.id] || [])[0];
+        if (!fragment) {
+            return this.escapeHtml(bhajan.preview || (bhajan.lyrics || "").substring(0, 150));
+        }
+        let html = "";
+        let cursor = 0;
+        fragment.highlights.forEach(([start, end]) => {
+            html += this.escapeHtml(fragment.text.slice(cursor, start));
+            html += `<mark>${this.escapeHtml(fragment.text.slice(start, end))}</mark>`;
+            cursor = end;
+        });
+        return html + this.escapeHtml(fragment.text.slice(cursor));
+    }
+
     filterByTag(tag) {
         this.selectedTag = this.selectedTag === tag ? null : tag;
         this.applyFilters();
@@ -293,10 +385,36 @@ class BelaGuruApp {
     }
 
     applyFilters() {
-        this.filteredBhajans = this.bhajans.filter(bhajan => {
+        // Memoized per (search, tag) until the catalogue or the search
+        // matches change, so toggling a tag back is free
+        if (this._filterSource !== this.bhajans || this._filterHighlights !== this.searchHighlights ||
+            this._filterMatches !== this.searchMatches) {
+            this._filterMemo.clear();
+            this._filterSource = this.bhajans;
+            this._filterHighlights = this.searchHighlights;
+            this._filterMatches = this.searchMatches;
+        }
+        const key = `${this.searchQuery}\0${this.selectedTag || ""}`;
+        let results = this._filterMemo.get(key);
+        if (!results) {
+            results = this.computeFilters();
+            if (this._filterMemo.size >= 50) {
+                this._filterMemo.delete(this._filterMemo.keys().next().value);
+            }
+            this._filterMemo.set(key, results);
+        }
+        this.filteredBhajans = results;
+    }
+
+    computeFilters() {
+        if (this.store) {
+            return this.store.filter(this.searchQuery, this.selectedTag, this.searchHighlights, this.searchMatches);
+        }
+        return this.bhajans.filter(bhajan => {
             const matchesSearch = !this.searchQuery ||
                 bhajan.title.toLowerCase().includes(this.searchQuery) ||
-                bhajan.lyrics.toLowerCase().includes(this.searchQuery);
+                (bhajan.preview || "").toLowerCase().includes(this.searchQuery) ||
+                Boolean(this.searchHighlights && this.searchHighlights[bhajan.id]);
 
             const matchesTag = !this.selectedTag ||
                 bhajan.tags.includes(this.selectedTag);
@@ -390,48 +508,67 @@ class BelaGuruApp {
         const gridContainer = document.getElementById('bhajans-grid');
         if (!gridContainer) return;
 
-        const gridHTML = `
-            ${this.filteredBhajans.length > 0 ? `
-                ${this.filteredBhajans.map(bhajan => `
-                    <div class="card cursor-pointer transform hover:scale-105 transition-transform"
-                         onclick="app.setPage('bhajan', ${bhajan.id})">
-                        <div class="flex items-start justify-between gap-4">
-                            <div class="flex-1 min-w-0">
-                                <h3 class="font-bold text-lg hanuman-text truncate">
-                                    ${bhajan.title}
-                                </h3>
-                                <p class="text-gray-600 text-sm mt-1">
-                                    By <span class="font-semibold">${bhajan.uploader_name}</span> •
-                                    <time>${new Date(bhajan.created_at).toLocaleDateString()}</time>
-                                </p>
-                                <p class="text-gray-700 text-sm mt-3 line-clamp-2">
-                                    ${bhajan.lyrics.substring(0, 150)}...
-                                </p>
-                                <div class="flex flex-wrap gap-2 mt-3">
-                                    ${bhajan.tags.map(tag => `
-                                        <span class="inline-block bg-orange-100 text-orange-700 px-2 py-1 rounded text-xs font-medium">
-                                            ${tag}
-                                        </span>
-                                    `).join('')}
-                                </div>
-                            </div>
-                            <div class="text-2xl flex-shrink-0">🙏</div>
-                        </div>
+        // renderHome() replaces the grid element; bind a list to the new one
+        if (!this.resultsList || this.resultsList.container !== gridContainer) {
+            if (this.resultsList) this.resultsList.destroy();
+            this.resultsList = new VirtualList(gridContainer, {
+                createRow: () => this.createBhajanCard(),
+                updateRow: (card, bhajan) => this.updateBhajanCard(card, bhajan),
+                getKey: bhajan => bhajan.id,
+                emptyHTML: `
+                    <div class="card text-center py-12">
+                        <p class="text-gray-500 text-lg">
+                            No bhajans found. Be the first to upload! 🎵
+                        </p>
+                        <button onclick="app.setPage('upload')" class="btn-primary mt-4">
+                            Upload Bhajan
+                        </button>
                     </div>
-                `).join('')}
-            ` : `
-                <div class="card text-center py-12">
-                    <p class="text-gray-500 text-lg">
-                        No bhajans found. Be the first to upload! 🎵
+                `
+            });
+            gridContainer.addEventListener('click', event => {
+                const card = event.target.closest('[data-bhajan-id]');
+                if (card) this.setPage('bhajan', Number(card.dataset.bhajanId));
+            });
+        }
+        this.resultsList.setItems(this.filteredBhajans);
+    }
+
+    createBhajanCard() {
+        // Built once per recycled row; updateBhajanCard fills it in
+        const card = document.createElement('div');
+        card.className = 'card cursor-pointer transform hover:scale-105 transition-transform';
+        card.innerHTML = `
+            <div class="flex items-start justify-between gap-4">
+                <div class="flex-1 min-w-0">
+                    <h3 class="font-bold text-lg hanuman-text truncate" data-field="title"></h3>
+                    <p class="text-gray-600 text-sm mt-1">
+                        By <span class="font-semibold" data-field="uploader"></span> •
+                        <time data-field="date"></time>
                     </p>
-                    <button onclick="app.setPage('upload')" class="btn-primary mt-4">
-                        Upload Bhajan
-                    </button>
+                    <p class="text-gray-700 text-sm mt-3 line-clamp-2" data-field="snippet"></p>
+                    <div class="flex flex-wrap gap-2 mt-3" data-field="tags"></div>
                 </div>
-            `}
+                <div class="text-2xl flex-shrink-0">🙏</div>
+            </div>
         `;
-
-        gridContainer.innerHTML = gridHTML;
+        card._fields = {};
+        card.querySelectorAll('[data-field]').forEach(el => { card._fields[el.dataset.field] = el; });
+        return card;
+    }
+
+    updateBhajanCard(card, bhajan) {
+        const fields = card._fields;
+        card.dataset.bhajanId = bhajan.id;
+        fields.title.textContent = bhajan.title;
+        fields.uploader.textContent = bhajan.uploader_name;
+        fields.date.textContent = new Date(bhajan.created_at).toLocaleDateString();
+        fields.snippet.innerHTML = this.renderSnippet(bhajan);
+        fields.tags.innerHTML = bhajan.tags.map(tag => `
+            <span class="inline-block bg-orange-100 text-orange-700 px-2 py-1 rounded text-xs font-medium">
+                ${this.escapeHtml(tag)}
+            </span>
+        `).join('');
     }
 
     setPage(page) {
@@ -553,6 +690,31 @@ class BelaGuruApp {
         `).join('');
     }
 
+    renderTagSearchResults(tags, onclickExtra = "") {
+        if (tags.length === 0) {
+            return `
+                <div class="text-center py-8 text-gray-500">
+                    <p class="text-sm">No tags found</p>
+                    ${this.tagSearchQuery ? `<p class="text-xs mt-1">Try different keywords</p>` : ''}
+                </div>
+            `;
+        }
+
+        return tags.map(tagObj => `
+            <button
+                onclick="app.filterByTag('${tagObj.tag}');${onclickExtra}"
+                class="w-full text-left px-3 py-2 rounded-lg text-sm transition-all flex items-center justify-between ${
+                    this.selectedTag === tagObj.tag
+                        ? 'bg-orange-100 hanuman-accent font-semibold'
+                        : 'hover:bg-orange-50 text-gray-700'
+                }"
+            >
+                <span>${tagObj.tag}</span>
+                <span class="text-xs ${this.selectedTag === tagObj.tag ? 'text-orange-600' : 'text-gray-500'}">(${tagObj.count})</span>
+            </button>
+        `).join('');
+    }
+
     // ===== TAG AUTOCOMPLETE COMPONENT =====
 
     /**
@@ -1037,6 +1199,15 @@ class BelaGuruApp {
         if (mobileTagsSection) {
             this.mobileTagsOpen = !mobileTagsSection.classList.contains('hidden');
         }
+
+        // Tag lists shared by the desktop sidebar and the mobile panel
+        const hasSparseTags = this.allTags.some(t => t.count < 5);
+        const showTagResults = this.tagSearchQuery || Object.keys(this.tagsByCategory).length === 0;
+        const popularTags = showTagResults ? "" : this.renderPopularTags();
+        const categoryTags = showTagResults ? "" : this.renderTagsByCategory();
+        const matchingTags = showTagResults ? this.allTags
+            .filter(t => (this.showAllTags || t.count >= 5) &&
+                (!this.tagSearchQuery || t.tag.toLowerCase().includes(this.tagSearchQuery))) : [];
         
         const html = `
             <div class="min-h-screen bg-orange-50">
@@ -1079,9 +1250,12 @@ class BelaGuruApp {
                             type="text"
                             placeholder="🔍 Search bhajans by title or lyrics..."
                             value="${this.searchQuery}"
+                            list="search-suggestions"
+                            autocomplete="off"
                             oninput="app.searchBhajans(this.value)"
                             class="w-full px-4 py-2 border border-orange-200 rounded-lg focus:border-hanuman-orange focus:outline-none focus:ring-2 focus:ring-orange-300"
                         >
+                        <datalist id="search-suggestions"></datalist>
                     </div>
                 </div>
 
@@ -1108,7 +1282,7 @@ class BelaGuruApp {
                     <div id="mobile-tags-section" class="hidden lg:hidden mb-4 card">
                         <div class="flex items-center justify-between mb-4">
                             <h3 class="font-bold text-lg hanuman-accent">📑 Tags</h3>
-                            ${this.allTags.filter(t => t.count < 5).length > 0 ? `
+                            ${hasSparseTags ? `
                                 <button onclick="app.toggleShowAllTags()" class="text-xs text-blue-600 hover:underline">
                                     ${this.showAllTags ? 'Hide sparse' : 'Show all'}
                                 </button>
@@ -1132,49 +1306,22 @@ class BelaGuruApp {
                             ` : ""}
                         </div>
                         <div class="overflow-y-auto" style="max-height: calc(60vh - 80px);">
-                            ${!this.tagSearchQuery && Object.keys(this.tagsByCategory).length > 0 ? `
+                            ${!showTagResults ? `
                                 <!-- Popular Tags -->
                                 <div class="mb-4">
                                     <h4 class="text-xs font-semibold text-gray-600 mb-2">⭐ POPULAR</h4>
                                     <div class="flex flex-wrap gap-2">
-                                        ${this.renderPopularTags().replace(/onclick="app\.filterByTag/g, 'onclick="app.filterByTag').replace(/">/g, '"); document.getElementById(\'mobile-tags-section\').classList.add(\'hidden\'); app.mobileTagsOpen = false;">')}
+                                        ${popularTags.replace(/onclick="app\.filterByTag/g, 'onclick="app.filterByTag').replace(/">/g, '"); document.getElementById(\'mobile-tags-section\').classList.add(\'hidden\'); app.mobileTagsOpen = false;">')}
                                     </div>
                                 </div>
                                 <div class="border-t border-gray-200 my-3"></div>
                                 <!-- By Category -->
                                 <h4 class="text-xs font-semibold text-gray-600 mb-2">📂 BY CATEGORY</h4>
-                                ${this.renderTagsByCategory().replace(/onclick="app\.filterByTag/g, 'onclick="app.filterByTag').replace(/"\)/g, '"); document.getElementById(\'mobile-tags-section\').classList.add(\'hidden\'); app.mobileTagsOpen = false;"')}
+                                ${categoryTags.replace(/onclick="app\.filterByTag/g, 'onclick="app.filterByTag').replace(/"\)/g, '"); document.getElementById(\'mobile-tags-section\').classList.add(\'hidden\'); app.mobileTagsOpen = false;"')}
                             ` : `
                                 <!-- Search Results -->
                                 <div class="space-y-1">
-                                    ${(() => {
-                                        const filteredTags = this.allTags
-                                            .filter(t => this.showAllTags || t.count >= 5)
-                                            .filter(t => !this.tagSearchQuery || t.tag.toLowerCase().includes(this.tagSearchQuery));
-                                        
-                                        if (filteredTags.length === 0) {
-                                            return `
-                                                <div class="text-center py-8 text-gray-500">
-                                                    <p class="text-sm">No tags found</p>
-                                                    ${this.tagSearchQuery ? `<p class="text-xs mt-1">Try different keywords</p>` : ''}
-                                                </div>
-                                            `;
-                                        }
-                                        
-                                        return filteredTags.map(tagObj => `
-                                            <button
-                                                onclick="app.filterByTag('${tagObj.tag}'); document.getElementById('mobile-tags-section').classList.add('hidden'); app.mobileTagsOpen = false;"
-                                                class="w-full text-left px-3 py-2 rounded-lg text-sm transition-all flex items-center justify-between ${
-                                                    this.selectedTag === tagObj.tag
-                                                        ? 'bg-orange-100 hanuman-accent font-semibold'
-                                                        : 'hover:bg-orange-50 text-gray-700'
-                                                }"
-                                            >
-                                                <span>${tagObj.tag}</span>
-                                                <span class="text-xs ${this.selectedTag === tagObj.tag ? 'text-orange-600' : 'text-gray-500'}">(${tagObj.count})</span>
-                                            </button>
-                                        `).join('');
-                                    })()}
+                                    ${this.renderTagSearchResults(matchingTags, " document.getElementById('mobile-tags-section').classList.add('hidden'); app.mobileTagsOpen = false;")}
                                 </div>
                             `}
                         </div>
@@ -1186,7 +1333,7 @@ class BelaGuruApp {
                             <div class="card sticky top-32">
                                 <div class="flex items-center justify-between mb-3">
                                     <h3 class="font-bold text-lg hanuman-accent">📑 Tags</h3>
-                                    ${this.allTags.filter(t => t.count < 5).length > 0 ? `
+                                    ${hasSparseTags ? `
                                         <button onclick="app.toggleShowAllTags()" class="text-xs text-blue-600 hover:underline">
                                             ${this.showAllTags ? 'Hide sparse' : 'Show all'}
                                         </button>
@@ -1210,49 +1357,22 @@ class BelaGuruApp {
                                     ` : ""}
                                 </div>
                                 <div class="overflow-y-auto" style="max-height: calc(100vh - 290px);">
-                                    ${!this.tagSearchQuery && Object.keys(this.tagsByCategory).length > 0 ? `
+                                    ${!showTagResults ? `
                                         <!-- Popular Tags -->
                                         <div class="mb-4">
                                             <h4 class="text-xs font-semibold text-gray-600 mb-2 px-2">⭐ POPULAR</h4>
                                             <div class="flex flex-wrap gap-2">
-                                                ${this.renderPopularTags()}
+                                                ${popularTags}
                                             </div>
                                         </div>
                                         <div class="border-t border-gray-200 my-3"></div>
                                         <!-- By Category -->
                                         <h4 class="text-xs font-semibold text-gray-600 mb-2 px-2">📂 BY CATEGORY</h4>
-                                        ${this.renderTagsByCategory()}
+                                        ${categoryTags}
                                     ` : `
                                         <!-- Search Results -->
                                         <div class="space-y-1">
-                                            ${(() => {
-                                                const filteredTags = this.allTags
-                                                    .filter(t => this.showAllTags || t.count >= 5)
-                                                    .filter(t => !this.tagSearchQuery || t.tag.toLowerCase().includes(this.tagSearchQuery));
-                                                
-                                                if (filteredTags.length === 0) {
-                                                    return `
-                                                        <div class="text-center py-8 text-gray-500">
-                                                            <p class="text-sm">No tags found</p>
-                                                            ${this.tagSearchQuery ? `<p class="text-xs mt-1">Try different keywords</p>` : ''}
-                                                        </div>
-                                                    `;
-                                                }
-                                                
-                                                return filteredTags.map(tagObj => `
-                                                    <button
-                                                        onclick="app.filterByTag('${tagObj.tag}')"
-                                                        class="w-full text-left px-3 py-2 rounded-lg text-sm transition-all flex items-center justify-between ${
-                                                            this.selectedTag === tagObj.tag
-                                                                ? 'bg-orange-100 hanuman-accent font-semibold'
-                                                                : 'hover:bg-orange-50 text-gray-700'
-                                                        }"
-                                                    >
-                                                        <span>${tagObj.tag}</span>
-                                                        <span class="text-xs ${this.selectedTag === tagObj.tag ? 'text-orange-600' : 'text-gray-500'}">(${tagObj.count})</span>
-                                                    </button>
-                                                `).join('');
-                                            })()}
+                                            ${this.renderTagSearchResults(matchingTags)}
                                         </div>
                                     `}
                                 </div>
@@ -1261,46 +1381,7 @@ class BelaGuruApp {
 
                         <!-- Bhajans Grid -->
                         <div class="lg:col-span-3" id="bhajans-grid-container">
-                            <div class="space-y-4" id="bhajans-grid">
-                                ${this.filteredBhajans.length > 0 ? `
-                                    ${this.filteredBhajans.map(bhajan => `
-                                        <div class="card cursor-pointer transform hover:scale-105 transition-transform"
-                                             onclick="app.setPage('bhajan', ${bhajan.id})">
-                                            <div class="flex items-start justify-between gap-4">
-                                                <div class="flex-1 min-w-0">
-                                                    <h3 class="font-bold text-lg hanuman-text truncate">
-                                                        ${bhajan.title}
-                                                    </h3>
-                                                    <p class="text-gray-600 text-sm mt-1">
-                                                        By <span class="font-semibold">${bhajan.uploader_name}</span> •
-                                                        <time>${new Date(bhajan.created_at).toLocaleDateString()}</time>
-                                                    </p>
-                                                    <p class="text-gray-700 text-sm mt-3 line-clamp-2">
-                                                        ${bhajan.lyrics.substring(0, 150)}...
-                                                    </p>
-                                                    <div class="flex flex-wrap gap-2 mt-3">
-                                                        ${bhajan.tags.map(tag => `
-                                                            <span class="inline-block bg-orange-100 text-orange-700 px-2 py-1 rounded text-xs font-medium">
-                                                                ${tag}
-                                                            </span>
-                                                        `).join('')}
-                                                    </div>
-                                                </div>
-                                                <div class="text-2xl flex-shrink-0">🙏</div>
-                                            </div>
-                                        </div>
-                                    `).join('')}
-                                ` : `
-                                    <div class="card text-center py-12">
-                                        <p class="text-gray-500 text-lg">
-                                            No bhajans found. Be the first to upload! 🎵
-                                        </p>
-                                        <button onclick="app.setPage('upload')" class="btn-primary mt-4">
-                                            Upload Bhajan
-                                        </button>
-                                    </div>
-                                `}
-                            </div>
+                            <div class="space-y-4" id="bhajans-grid"></div>
                         </div>
                     </div>
                 </div>
@@ -1308,6 +1389,7 @@ class BelaGuruApp {
         `;
 
         this.appContainer.innerHTML = html + this.renderFloatingMenu();
+        this.renderResults();
         this.renderSearchStatus(); // Initialize search status on load
         
         // Attach tag search event listeners using window.app reference
@@ -1416,7 +1498,10 @@ class BelaGuruApp {
                                 rows="12"
                                 required
                                 style="resize: vertical;"
+                                onchange="app.checkDuplicateLyrics(this.value)"
                             ></textarea>
+                            <!-- Near-duplicate warning (filled by checkDuplicateLyrics) -->
+                            <div id="duplicate-warning" class="text-sm mt-2" style="color: #b45309;"></div>
                         </div>
 
                         <div class="card">
@@ -1533,8 +1618,8 @@ class BelaGuruApp {
         });
     }
 
-    renderBhajanDetail(bhajanId) {
-        const bhajan = this.bhajans.find(b => b.id === bhajanId);
+    async renderBhajanDetail(bhajanId) {
+        const bhajan = await this.ensureLyrics(bhajanId);
 
         if (!bhajan) {
             this.setPage("home");
@@ -1610,11 +1695,83 @@ class BelaGuruApp {
 ${bhajan.lyrics.split('\n').map(line => line.trimStart()).join('\n')}
                         </div>
                     </div>
+
+                    <!-- Related bhajans (filled by loadRelated) -->
+                    <div id="related-bhajans"></div>
                 </div>
             </div>
         `;
 
         this.appContainer.innerHTML = html + this.renderShareButtons(bhajan) + this.renderFloatingMenu();
+
+        this.sendBeacon(bhajan.id, 'view');
+        this.loadRelated(bhajan.id);
+        const audio = this.appContainer.querySelector('.audio-player');
+        if (audio) {
+            audio.addEventListener('play', () => this.sendBeacon(bhajan.id, 'play'), { once: true });
+        }
+    }
+
+    async checkDuplicateLyrics(lyrics) {
+        // Warn (without blocking the upload) when the lyrics match an existing bhajan
+        const warning = document.getElementById('duplicate-warning');
+        if (!warning) return;
+        if (lyrics.trim().length < 20) {
+            warning.innerHTML = '';
+            return;
+        }
+        try {
+            const formData = new FormData();
+            formData.append('lyrics', lyrics);
+            const response = await fetch('/api/bhajans/duplicates', { method: 'POST', body: formData });
+            if (!response.ok) return;
+            const duplicates = await response.json();
+            warning.innerHTML = duplicates.length === 0 ? '' : `
+                ⚠️ These lyrics look like an existing bhajan:
+                ${duplicates.slice(0, 3).map(item => `
+                    <a href="#" onclick="event.preventDefault(); app.setPage('bhajan', ${item.id})">${this.escapeHtml(item.title)}</a>
+                    (${Math.round(item.similarity * 100)}% similar)
+                `).join(', ')}
+            `;
+        } catch (error) {
+            console.error("Error checking duplicate lyrics:", error);
+        }
+    }
+
+    async loadRelated(bhajanId) {
+        try {
+            const response = await fetch(`/api/bhajans/${bhajanId}/related?limit=5`);
+            if (!response.ok) return;
+            const related = await response.json();
+            const container = document.getElementById('related-bhajans');
+            if (!container || related.length === 0 || this._currentBhajan?.id !== bhajanId) return;
+
+            container.innerHTML = `
+                <div class="card mt-6">
+                    <h2 class="text-xl font-bold hanuman-text mb-3">Similar Bhajans</h2>
+                    ${related.map(item => `
+                        <div class="cursor-pointer py-2 border-b border-orange-100"
+                             onclick="app.setPage('bhajan', ${item.id})">
+                            <h3 class="font-semibold hanuman-text">${this.escapeHtml(item.title)}</h3>
+                            <p class="text-gray-600 text-sm line-clamp-2">${this.escapeHtml(item.preview || '')}</p>
+                        </div>
+                    `).join('')}
+                </div>
+            `;
+        } catch (error) {
+            console.error("Error loading related bhajans:", error);
+        }
+    }
+
+    sendBeacon(bhajanId, event) {
+        // Fire-and-forget view/play count; the server batches the writes
+        const body = JSON.stringify({ bhajan_id: bhajanId, event });
+        if (navigator.sendBeacon) {
+            navigator.sendBeacon('/api/beacon', new Blob([body], { type: 'application/json' }));
+        } else {
+            fetch('/api/beacon', { method: 'POST', headers: { 'Content-Type': 'application/json' }, body, keepalive: true })
+                .catch(() => {});
+        }
     }
 
     copyLyrics() {
@@ -1653,8 +1810,8 @@ ${bhajan.lyrics.split('\n').map(line => line.trimStart()).join('\n')}
         });
     }
 
-    editBhajan(bhajanId) {
-        const bhajan = this.bhajans.find(b => b.id === bhajanId);
+    async editBhajan(bhajanId) {
+        const bhajan = await this.ensureLyrics(bhajanId);
         if (!bhajan) return;
 
         // Convert tag names to tag IDs for the hierarchical selector
@@ -0,0 +1,296 @@
+/**
+ * Belaguru Bhajan Portal - Offline Catalogue Store
+ * Bhajans and the tag taxonomy kept in IndexedDB, updated from /api/sync
+ *
+ * The store holds the token of its last sync and asks the server only for
+ * what changed since (see sync.py), so a repeat visit renders from disk and
+ * downloads a few rows instead of the whole catalogue. Lyrics live in their
+ * own object store and are read when a bhajan is opened; the in-memory copy
+ * is the summaries plus the indexes behind list(), filter() and facets().
+ *
+ * Text search runs in search-worker.js: after every load or sync that
+ * changed something the worker (re)builds its word index for the new
+ * token, and search() asks it for the matching ids.
+ */
+
+class CatalogueStore {
+    static DB_NAME = "belaguru-catalogue";
+    static DB_VERSION = 2;
+    static SYNC_LIMIT = 500;
+
+    static isSupported() {
+        return typeof indexedDB !== "undefined";
+    }
+
+    constructor() {
+        this.db = null;
+        this.token = null;
+        this.bhajans = new Map();     // id -> summary (no lyrics)
+        this.tags = new Map();        // id -> {id, name, category, level, parent_id, translations, synonyms}
+        this.byTag = new Map();       // tag name -> Set of bhajan ids
+        this.searchText = new Map();  // id -> lowercased title + preview
+        this._sorted = null;          // list() cache, dropped on every change
+        this.worker = null;           // search-worker.js, once the catalogue is loaded
+        this.searchReady = false;     // worker has an index for the current token
+        this._queries = new Map();    // query id -> resolve
+        this._nextQuery = 0;
+    }
+
+    // ===== IndexedDB plumbing =====
+
+    open() {
+        return new Promise((resolve, reject) => {
+            const request = indexedDB.open(CatalogueStore.DB_NAME, CatalogueStore.DB_VERSION);
+            request.onupgradeneeded = event => {
+                const db = request.result;
+                if (event.oldVersion < 1) {
+                    db.createObjectStore("bhajans", { keyPath: "id" });
+                    db.createObjectStore("lyrics", { keyPath: "id" });
+                    db.createObjectStore("tags", { keyPath: "id" });
+                    db.createObjectStore("meta");
+                }
+                if (event.oldVersion < 2) {
+                    db.createObjectStore("search", { keyPath: "id" }); // search-worker.js index
+                }
+            };
+            request.onsuccess = () => {
+                this.db = request.result;
+                // Let a newer version of the page upgrade the database
+                this.db.onversionchange = () => this.db.close();
+                resolve(this);
+            };
+            request.onerror = () => reject(request.error);
+            request.onblocked = () => reject(new Error("Catalogue database is blocked by another tab"));
+        });
+    }
+
+    _request(request) {
+        return new Promise((resolve, reject) => {
+            request.onsuccess = () => resolve(request.result);
+            request.onerror = () => reject(request.error);
+        });
+    }
+
+    _done(tx) {
+        return new Promise((resolve, reject) => {
+            tx.oncomplete = () => resolve();
+            tx.onerror = () => reject(tx.error);
+            tx.onabort = () => reject(tx.error || new Error("Transaction aborted"));
+        });
+    }
+
+    /**
+     * Read the stored catalogue into memory
+     * @returns {Promise<number>} Bhajans on disk (0 before the first sync)
+     */
+    async load() {
+        const tx = this.db.transaction(["bhajans", "tags", "meta"], "readonly");
+        const [bhajans, tags, token] = await Promise.all([
+            this._request(tx.objectStore("bhajans").getAll()),
+            this._request(tx.objectStore("tags").getAll()),
+            this._request(tx.objectStore("meta").get("token"))
+        ]);
+        this._clearMemory();
+        tags.forEach(tag => this.tags.set(tag.id, tag));
+        bhajans.forEach(bhajan => this._indexBhajan(bhajan));
+        this.token = token || null;
+        if (this.token) this._buildSearchIndex();
+        return this.token ? this.bhajans.size : 0;
+    }
+
+    /**
+     * Fetch and apply every change since the stored token
+     * @returns {Promise<boolean>} Whether anything changed
+     */
+    async sync() {
+        let changed = false;
+        let more = true;
+        while (more) {
+            const params = new URLSearchParams({ limit: CatalogueStore.SYNC_LIMIT });
+            if (this.token) params.set("since", this.token);
+            const response = await fetch(`/api/sync?${params}`);
+            if (!response.ok) throw new Error(`Sync failed: HTTP ${response.status}`);
+            const page = await response.json();
+            await this._apply(page);
+            changed = changed || page.reset || page.bhajans.length > 0 || page.deleted_bhajans.length > 0 ||
+                page.tags.length > 0 || page.deleted_tags.length > 0;
+            more = page.more;
+        }
+        if (changed) this._buildSearchIndex();
+        return changed;
+    }
+
+    async _apply(page) {
+        // One transaction per page: the token never gets ahead of the rows
+        const tx = this.db.transaction(["bhajans", "lyrics", "tags", "meta"], "readwrite");
+        const bhajanStore = tx.objectStore("bhajans");
+        const lyricsStore = tx.objectStore("lyrics");
+        const tagStore = tx.objectStore("tags");
+        if (page.reset) {
+            bhajanStore.clear();
+            lyricsStore.clear();
+            tagStore.clear();
+        }
+        const summaries = page.bhajans.map(({ lyrics, ...summary }) => {
+            bhajanStore.put(summary);
+            lyricsStore.put({ id: summary.id, lyrics });
+            return summary;
+        });
+        page.deleted_bhajans.forEach(id => {
+            bhajanStore.delete(id);
+            lyricsStore.delete(id);
+        });
+        page.tags.forEach(tag => tagStore.put(tag));
+        page.deleted_tags.forEach(id => tagStore.delete(id));
+        tx.objectStore("meta").put(page.token, "token");
+        await this._done(tx);
+
+        if (page.reset) this._clearMemory();
+        summaries.forEach(summary => this._indexBhajan(summary));
+        page.deleted_bhajans.forEach(id => this._unindexBhajan(id));
+        page.tags.forEach(tag => this.tags.set(tag.id, tag));
+        page.deleted_tags.forEach(id => this.tags.delete(id));
+        this.token = page.token;
+    }
+
+    /**
+     * Stored lyrics of a bhajan
+     * @returns {Promise<string|undefined>} undefined if not stored
+     */
+    async lyrics(bhajanId) {
+        const tx = this.db.transaction("lyrics", "readonly");
+        const record = await this._request(tx.objectStore("lyrics").get(bhajanId));
+        return record ? record.lyrics : undefined;
+    }
+
+    // ===== Search worker =====
+
+    _buildSearchIndex() {
+        if (typeof Worker === "undefined") return;
+        if (!this.worker) {
+            this.worker = new Worker("/search-worker.js?v=1");
+            this.worker.onmessage = ({ data }) => {
+                if (data.type === "ready") {
+                    this.searchReady = data.version === this.token;
+                } else if (this._queries.has(data.id)) {
+                    this._queries.get(data.id)(data.type === "result" ? data.ids : null);
+                    this._queries.delete(data.id);
+                }
+            };
+            this.worker.onerror = error => {
+                console.warn("Search worker failed, searching titles only:", error.message);
+                this.worker.terminate();
+                this.worker = null;
+                this.searchReady = false;
+                this._queries.forEach(resolve => resolve(null));
+                this._queries.clear();
+            };
+        }
+        this.searchReady = false;
+        this.worker.postMessage({ type: "build", version: this.token });
+    }
+
+    /**
+     * Bhajans matching every word of a search, from the worker's index
+     * @returns {Promise<Set|null>} Ids, or null while no index is ready
+     */
+    search(text) {
+        if (!this.worker || !this.searchReady) return Promise.resolve(null);
+        const id = ++this._nextQuery;
+        return new Promise(resolve => {
+            this._queries.set(id, ids => resolve(ids && new Set(ids)));
+            this.worker.postMessage({ type: "query", id, text });
+        });
+    }
+
+    // ===== In-memory indexes =====
+
+    _clearMemory() {
+        this.bhajans.clear();
+        this.tags.clear();
+        this.byTag.clear();
+        this.searchText.clear();
+        this._sorted = null;
+    }
+
+    _indexBhajan(bhajan) {
+        this._unindexBhajan(bhajan.id);
+        this.bhajans.set(bhajan.id, bhajan);
+        (bhajan.tags || []).forEach(tag => {
+            if (!this.byTag.has(tag)) this.byTag.set(tag, new Set());
+            this.byTag.get(tag).add(bhajan.id);
+        });
+        this.searchText.set(bhajan.id, `${bhajan.title}\n${bhajan.preview || ""}`.toLowerCase());
+        this._sorted = null;
+    }
+
+    _unindexBhajan(bhajanId) {
+        const old = this.bhajans.get(bhajanId);
+        if (!old) return;
+        (old.tags || []).forEach(tag => {
+            const ids = this.byTag.get(tag);
+            if (!ids) return;
+            ids.delete(bhajanId);
+            if (ids.size === 0) this.byTag.delete(tag);
+        });
+        this.bhajans.delete(bhajanId);
+        this.searchText.delete(bhajanId);
+        this._sorted = null;
+    }
+
+    /** Every bhajan, newest first (the /api/bhajans order) */
+    list() {
+        if (!this._sorted) {
+            this._sorted = [...this.bhajans.values()].sort((a, b) =>
+                a.created_at < b.created_at ? 1 : a.created_at > b.created_at ? -1 : b.id - a.id
+            );
+        }
+        return this._sorted;
+    }
+
+    /**
+     * Bhajans matching a search and a tag, newest first
+     * @param {string} search - Lowercased search text ("" for any)
+     * @param {string|null} tag - Tag name the bhajan must carry
+     * @param {Object|null} include - {bhajanId: ...} also matching the search (server-side lyric hits)
+     * @param {Set|null} matches - search() result for the text; without it the
+     *     text is looked for in titles and previews
+     */
+    filter(search, tag, include = null, matches = null) {
+        const tagged = tag ? this.byTag.get(tag) : null;
+        if (tag && !tagged) return [];
+        const matchesSearch = matches
+            ? id => matches.has(id)
+            : id => this.searchText.get(id).includes(search);
+        return this.list().filter(bhajan =>
+            (!tagged || tagged.has(bhajan.id)) &&
+            (!search || matchesSearch(bhajan.id) || Boolean(include && include[bhajan.id]))
+        );
+    }
+
+    /**
+     * Taxonomy tag counts over some bhajans, as /api/bhajans?facets=true returns them
+     * @returns {Object} {category: [{id, name, count}]}, most used first
+     */
+    facets(bhajans) {
+        const all = bhajans.length === this.bhajans.size;
+        const ids = all ? null : new Set(bhajans.map(b => b.id));
+        const facets = {};
+        this.tags.forEach(tag => {
+            const members = this.byTag.get(tag.name);
+            if (!members) return;
+            let count = members.size;
+            if (!all) {
+                count = 0;
+                members.forEach(id => { if (ids.has(id)) count++; });
+            }
+            if (count === 0) return;
+            const category = tag.category || "other";
+            (facets[category] = facets[category] || []).push({ id: tag.id, name: tag.name, count });
+        });
+        Object.values(facets).forEach(counts => counts.sort((a, b) =>
+            b.count - a.count || a.name.toLowerCase().localeCompare(b.name.toLowerCase())
+        ));
+        return facets;
+    }
+}
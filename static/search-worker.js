@@ -0,0 +1,134 @@
+/**
+ * Belaguru Bhajan Portal - Search Worker
+ * Inverted index over the offline catalogue, built and queried off the UI thread
+ *
+ * Messages (see CatalogueStore in offline-store.js):
+ *   {type: "build", version}  -> {type: "ready", version}
+ *   {type: "query", id, text} -> {type: "result", id, ids}
+ *
+ * The index covers titles, lyrics and tag names, normalized (lowercase,
+ * Latin accents stripped) and split into words. It is saved in the
+ * catalogue database under the sync token it was built from, so a visit
+ * with no catalogue changes loads it instead of re-reading every lyric.
+ * Every query word matches as a prefix ("ram" finds "rama" and "ramana");
+ * all words must match. Results come back newest first.
+ */
+
+const DB_NAME = "belaguru-catalogue";
+
+// {id: "index", version, ids: Int32Array (newest first), tokens: sorted words, postings: [Int32Array of positions in ids]}
+let index = null;
+// Messages are handled one at a time, so a query waits for a build in progress
+let queue = Promise.resolve();
+
+self.onmessage = event => {
+    queue = queue.then(() => handle(event.data)).catch(error => {
+        console.error("[SearchWorker]", error);
+        self.postMessage({ type: "error", id: event.data.id, message: String(error) });
+    });
+};
+
+async function handle(message) {
+    if (message.type === "build") {
+        await build(message.version);
+        self.postMessage({ type: "ready", version: message.version });
+    } else if (message.type === "query") {
+        self.postMessage({ type: "result", id: message.id, ids: search(message.text) });
+    }
+}
+
+function normalize(text) {
+    return text.normalize("NFKD").replace(/[\u0300-\u036f]/g, "").toLowerCase();
+}
+
+function tokenize(text) {
+    // Marks are word characters: Kannada vowel signs stay inside their word
+    return normalize(text).match(/[\p{L}\p{M}\p{N}]+/gu) || [];
+}
+
+function request(req) {
+    return new Promise((resolve, reject) => {
+        req.onsuccess = () => resolve(req.result);
+        req.onerror = () => reject(req.error);
+    });
+}
+
+async function build(version) {
+    if (index && index.version === version) return;
+    // The page has opened (and upgraded) the database before asking for a build
+    const db = await request(indexedDB.open(DB_NAME));
+    try {
+        const stored = await request(db.transaction("search", "readonly").objectStore("search").get("index"));
+        if (stored && stored.version === version) {
+            index = stored;
+            return;
+        }
+
+        const tx = db.transaction(["bhajans", "lyrics"], "readonly");
+        const [bhajans, lyrics] = await Promise.all([
+            request(tx.objectStore("bhajans").getAll()),
+            request(tx.objectStore("lyrics").getAll())
+        ]);
+        const lyricsById = new Map(lyrics.map(record => [record.id, record.lyrics]));
+        bhajans.sort((a, b) => a.created_at < b.created_at ? 1 : a.created_at > b.created_at ? -1 : b.id - a.id);
+
+        const postings = new Map();
+        bhajans.forEach((bhajan, position) => {
+            const text = `${bhajan.title}\n${lyricsById.get(bhajan.id) || bhajan.preview || ""}\n${(bhajan.tags || []).join("\n")}`;
+            new Set(tokenize(text)).forEach(word => {
+                if (!postings.has(word)) postings.set(word, []);
+                postings.get(word).push(position);
+            });
+        });
+        const tokens = [...postings.keys()].sort();
+        index = {
+            id: "index",
+            version,
+            ids: Int32Array.from(bhajans, bhajan => bhajan.id),
+            tokens,
+            postings: tokens.map(token => Int32Array.from(postings.get(token)))
+        };
+
+        const write = db.transaction("search", "readwrite");
+        write.objectStore("search").put(index);
+        await new Promise((resolve, reject) => {
+            write.oncomplete = resolve;
+            write.onerror = () => reject(write.error);
+        });
+    } finally {
+        db.close();
+    }
+}
+
+function firstTokenFrom(word) {
+    let lo = 0;
+    let hi = index.tokens.length;
+    while (lo < hi) {
+        const mid = (lo + hi) >> 1;
+        if (index.tokens[mid] < word) lo = mid + 1;
+        else hi = mid;
+    }
+    return lo;
+}
+
+function search(text) {
+    const words = [...new Set(tokenize(text))].slice(0, 255); // hits counts fit a byte
+    if (!index || words.length === 0) return null;
+
+    const count = index.ids.length;
+    const hits = new Uint8Array(count);
+    words.forEach((word, w) => {
+        // hits[p] === w means position p matched every word so far
+        for (let t = firstTokenFrom(word); t < index.tokens.length && index.tokens[t].startsWith(word); t++) {
+            index.postings[t].forEach(position => {
+                if (hits[position] === w) hits[position] = w + 1;
+            });
+        }
+    });
+
+    const ids = [];
+    for (let position = 0; position < count; position++) {
+        if (hits[position] === words.length) ids.push(index.ids[position]);
+    }
+    return ids;
+}
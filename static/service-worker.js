@@ -1,25 +1,61 @@
 /**
  * Belaguru Bhajan Portal - Service Worker
  * Enables offline support and app-like experience
+ *
+ * Strategies by route:
+ * - Versioned assets (?v= or content-hashed names): cache first, precached
+ * - App shell and unversioned static files: stale-while-revalidate
+ * - Catalogue and taxonomy API (bhajans, tags, playlists): stale-while-revalidate,
+ *   at most MAX_API_ENTRIES responses
+ * - Audio (/static/audio/): cache first, least recently played evicted past
+ *   AUDIO_CACHE_BYTES
+ * - Everything else (search, suggest, sync, writes, admin): network only
+ *
+ * Only STATIC_CACHE carries the release version; the API and audio caches
+ * survive an update. The server fills in ASSET_VERSION (the hash of
+ * asset-manifest.json, see assets.py) and rewrites PRECACHE_URLS to the
+ * fingerprinted names, so any changed asset installs a new worker with a
+ * fresh static cache. Without a manifest the placeholder stays and the
+ * ?v= query strings version the assets.
  */
 
-const CACHE_NAME = 'belaguru-v1006';
-const urlsToCache = [
+const ASSET_VERSION = '__ASSET_VERSION__';
+const STATIC_CACHE = `belaguru-static-${ASSET_VERSION}`;
+const API_CACHE = 'belaguru-api-v1';
+const AUDIO_CACHE = 'belaguru-audio-v1';
+const CURRENT_CACHES = [STATIC_CACHE, API_CACHE, AUDIO_CACHE];
+
+const MAX_API_ENTRIES = 100;
+const AUDIO_CACHE_BYTES = 50 * 1024 * 1024;
+
+// Must match the script/link URLs in index.html (and the worker URL in offline-store.js)
+const PRECACHE_URLS = [
   '/',
-  '/index.html',
-  '/app.js',
-  '/style.css',
-  '/manifest.json'
+  '/offline-store.js?v=2',
+  '/search-worker.js?v=1',
+  '/virtual-list.js?v=1',
+  '/app.js?v=1008',
+  '/style.css?v=86',
+  '/manifest.json',
+  '/logo-hanuman.png'
+];
+
+// GET /api/... paths served stale-while-revalidate; search variants are not
+const API_ROUTES = [
+  /^\/api\/bhajans$/,
+  /^\/api\/bhajans\/\d+(\/related)?$/,
+  /^\/api\/tags(\/.*)?$/,
+  /^\/api\/playlists(\/[^/]+)?$/
 ];
 
 // Install event
 self.addEventListener('install', event => {
   console.log('[ServiceWorker] Installing...');
   event.waitUntil(
-    caches.open(CACHE_NAME)
+    caches.open(STATIC_CACHE)
       .then(cache => {
-        console.log('[ServiceWorker] Caching files');
-        return cache.addAll(urlsToCache);
+        console.log('[ServiceWorker] Precaching files');
+        return cache.addAll(PRECACHE_URLS);
       })
       .then(() => {
         console.log('[ServiceWorker] Install complete, skipping waiting');
@@ -35,7 +71,7 @@ self.addEventListener('activate', event => {
     caches.keys().then(cacheNames => {
       return Promise.all(
         cacheNames.map(cacheName => {
-          if (cacheName !== CACHE_NAME) {
+          if (!CURRENT_CACHES.includes(cacheName)) {
             console.log('[ServiceWorker] Removing old cache:', cacheName);
             return caches.delete(cacheName);
           }
@@ -50,38 +86,124 @@ self.addEventListener('activate', event => {
 
 // Fetch event
 self.addEventListener('fetch', event => {
-  // Skip cross-origin requests
-  if (!event.request.url.startsWith(self.location.origin)) {
+  const request = event.request;
+  const url = new URL(request.url);
+
+  // Cross-origin requests and writes go straight to the network
+  if (url.origin !== self.location.origin || request.method !== 'GET') {
     return;
   }
 
-  // Admin pages - always network (don't cache)
-  if (event.request.url.includes('/admin/')) {
-    event.respondWith(fetch(event.request));
+  if (url.pathname.startsWith('/admin/')) {
     return;
   }
 
-  // API requests - network first, fallback to cache
-  if (event.request.url.includes('/api/')) {
-    event.respondWith(
-      fetch(event.request)
-        .then(response => {
-          // Clone BEFORE using the response
-          const responseClone = response.clone();
-          caches.open(CACHE_NAME).then(cache => {
-            cache.put(event.request, responseClone);
-          });
-          return response;
-        })
-        .catch(() => caches.match(event.request))
-    );
+  if (url.pathname.startsWith('/static/audio/')) {
+    event.respondWith(audioFirst(request));
     return;
   }
 
-  // Static assets - cache first
-  event.respondWith(
-    caches.match(event.request)
-      .then(response => response || fetch(event.request))
-      .catch(() => caches.match('/index.html'))
-  );
+  if (url.pathname.startsWith('/api/')) {
+    const cacheable = API_ROUTES.some(route => route.test(url.pathname)) && !url.searchParams.has('search');
+    if (cacheable) {
+      event.respondWith(staleWhileRevalidate(request, API_CACHE, event, MAX_API_ENTRIES));
+    }
+    return;
+  }
+
+  if (isVersioned(url)) {
+    event.respondWith(cacheFirst(request, STATIC_CACHE));
+    return;
+  }
+
+  // App shell: SPA routes all render index.html
+  const shellRequest = request.mode === 'navigate' ? new Request('/') : request;
+  event.respondWith(staleWhileRevalidate(shellRequest, STATIC_CACHE, event));
 });
+
+function isVersioned(url) {
+  return url.searchParams.has('v') || /\.[0-9a-f]{8,}\.\w+$/.test(url.pathname);
+}
+
+function cacheFirst(request, cacheName) {
+  return caches.open(cacheName).then(cache =>
+    cache.match(request).then(cached => cached || fetch(request).then(response => {
+      if (response.ok) {
+        cache.put(request, response.clone());
+      }
+      return response;
+    }))
+  );
+}
+
+// Answer from the cache when possible and refresh it in the background
+function staleWhileRevalidate(request, cacheName, event, maxEntries) {
+  return caches.open(cacheName).then(cache =>
+    cache.match(request).then(cached => {
+      const update = fetch(request).then(response => {
+        if (response.ok) {
+          return cache.put(request, response.clone())
+            .then(() => maxEntries && trimEntries(cache, maxEntries))
+            .then(() => response);
+        }
+        return response;
+      });
+      if (cached) {
+        event.waitUntil(update.catch(() => {}));
+        return cached;
+      }
+      return update;
+    })
+  );
+}
+
+// Drop the oldest entries (keys() is in insertion order)
+function trimEntries(cache, maxEntries) {
+  return cache.keys().then(keys =>
+    Promise.all(keys.slice(0, Math.max(0, keys.length - maxEntries)).map(key => cache.delete(key)))
+  );
+}
+
+// Audio is cached whole on first play. A hit is re-put so insertion order
+// stays least recently played first, which is the eviction order
+function audioFirst(request) {
+  const key = new Request(request.url);
+  return caches.open(AUDIO_CACHE).then(cache =>
+    cache.match(key).then(cached => {
+      if (cached) {
+        cache.put(key, cached.clone());
+        return cached;
+      }
+      return fetch(request).then(response => {
+        // Partial (206) responses can't be replayed for other ranges
+        if (response.status === 200) {
+          cache.put(key, response.clone()).then(() => trimAudio(cache));
+        }
+        return response;
+      });
+    })
+  );
+}
+
+function trimAudio(cache) {
+  return cache.keys().then(keys =>
+    Promise.all(keys.map(key => cache.match(key).then(response => responseSize(response))))
+      .then(sizes => {
+        let total = sizes.reduce((sum, size) => sum + size, 0);
+        const evictions = [];
+        for (let i = 0; i < keys.length - 1 && total > AUDIO_CACHE_BYTES; i++) {
+          total -= sizes[i];
+          evictions.push(cache.delete(keys[i]));
+        }
+        return Promise.all(evictions);
+      })
+  );
+}
+
+function responseSize(response) {
+  const length = response && response.headers.get('Content-Length');
+  if (length) {
+    return Promise.resolve(Number(length));
+  }
+  return response ? response.clone().blob().then(blob => blob.size) : Promise.resolve(0);
+}
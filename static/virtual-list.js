@@ -0,0 +1,129 @@
+/**
+ * Belaguru Bhajan Portal - Virtual List
+ * Windowed rendering for long lists that scroll with the page
+ *
+ * Only the rows near the viewport are in the DOM; the rest are stood in
+ * for by the container's top/bottom padding. Row elements are recycled:
+ * scrolling or new items refill the existing elements through
+ * updateRow() instead of rebuilding markup. Row heights are measured as
+ * rows are shown and remembered by key, so filtering keeps them.
+ */
+
+class VirtualList {
+    /**
+     * @param {HTMLElement} container - Element whose children are the rows
+     * @param {Object} options
+     * @param {Function} options.createRow - () => new row element
+     * @param {Function} options.updateRow - (element, item) fills a row in
+     * @param {Function} options.getKey - item => stable key for its height
+     * @param {string} options.emptyHTML - Shown when there are no items
+     * @param {number} options.estimateHeight - Height (px) of rows not yet measured
+     * @param {number} options.overscan - Rows rendered beyond each edge of the viewport
+     * @param {number} options.minItems - Up to this many items every row is rendered
+     */
+    constructor(container, options) {
+        this.container = container;
+        this.createRow = options.createRow;
+        this.updateRow = options.updateRow;
+        this.getKey = options.getKey;
+        this.emptyHTML = options.emptyHTML || "";
+        this.estimateHeight = options.estimateHeight || 180;
+        this.overscan = options.overscan || 5;
+        this.minItems = options.minItems || 100;
+        this.items = [];
+        this.rows = [];
+        this.heights = new Map(); // key -> measured height (without the gap)
+        this.gap = null;          // margin between rows, read from the second row
+        this.range = [0, 0];
+        this.frame = null;
+
+        this.onScroll = () => {
+            if (this.frame === null) {
+                this.frame = requestAnimationFrame(() => {
+                    this.frame = null;
+                    this.render();
+                });
+            }
+        };
+        window.addEventListener("scroll", this.onScroll, { passive: true });
+        window.addEventListener("resize", this.onScroll);
+    }
+
+    destroy() {
+        window.removeEventListener("scroll", this.onScroll);
+        window.removeEventListener("resize", this.onScroll);
+        if (this.frame !== null) cancelAnimationFrame(this.frame);
+    }
+
+    setItems(items) {
+        this.items = items;
+        this.range = null; // force a refill even if the window didn't move
+        this.render();
+    }
+
+    _height(item) {
+        const height = this.heights.get(this.getKey(item));
+        return (height === undefined ? this.estimateHeight : height) + (this.gap || 0);
+    }
+
+    _window() {
+        const count = this.items.length;
+        if (count <= this.minItems) return [0, count];
+
+        const viewTop = Math.max(0, -this.container.getBoundingClientRect().top);
+        const viewBottom = viewTop + window.innerHeight;
+        let offset = 0;
+        let start = 0;
+        while (start < count && offset + this._height(this.items[start]) <= viewTop) {
+            offset += this._height(this.items[start++]);
+        }
+        let end = start;
+        while (end < count && offset < viewBottom) {
+            offset += this._height(this.items[end++]);
+        }
+        return [Math.max(0, start - this.overscan), Math.min(count, end + this.overscan)];
+    }
+
+    render() {
+        if (!this.container.isConnected) {
+            this.destroy();
+            return;
+        }
+        if (this.items.length === 0) {
+            this.rows = [];
+            this.container.style.paddingTop = "";
+            this.container.style.paddingBottom = "";
+            this.container.innerHTML = this.emptyHTML;
+            this.range = [0, 0];
+            return;
+        }
+
+        const [start, end] = this._window();
+        if (this.range && this.range[0] === start && this.range[1] === end) return;
+        this.range = [start, end];
+
+        if (this.rows.length === 0) this.container.innerHTML = "";
+        while (this.rows.length < end - start) {
+            const row = this.createRow();
+            this.rows.push(row);
+            this.container.appendChild(row);
+        }
+        while (this.rows.length > end - start) {
+            this.rows.pop().remove();
+        }
+        this.rows.forEach((row, i) => this.updateRow(row, this.items[start + i]));
+
+        // One layout pass for every measurement
+        if (this.gap === null && this.rows.length > 1) {
+            this.gap = parseFloat(getComputedStyle(this.rows[1]).marginTop) || 0;
+        }
+        this.rows.forEach((row, i) => this.heights.set(this.getKey(this.items[start + i]), row.offsetHeight));
+
+        let before = 0;
+        for (let i = 0; i < start; i++) before += this._height(this.items[i]);
+        let after = 0;
+        for (let i = end; i < this.items.length; i++) after += this._height(this.items[i]);
+        this.container.style.paddingTop = `${before}px`;
+        this.container.style.paddingBottom = `${after}px`;
+    }
+}
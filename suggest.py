@@ -0,0 +1,307 @@
+"""
+Search-as-you-type suggestions (/api/suggest)
+
+SuggestIndex keeps, in memory, a character trie over the words of bhajan
+titles and of tag names, translations and synonyms, all in
+transliterate.search_form() so any script or spelling prefixes the same
+words. Every trie node caches its best entries, so a one-word prefix is a
+walk down the trie plus a slice. A write merges the entry into the cached
+lists along its words' paths; a list is only recomputed (on the next
+lookup) when an entry it holds is removed or ranked lower.
+
+Tags are weighted by how many live bhajans use them; titles rank below
+any used tag. The index is loaded on first use and then updated by the
+write endpoints (titles, tag texts and bhajan -> tag membership).
+"""
+import bisect
+import heapq
+import threading
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from fuzzy_index import read_tag_texts
+from transliterate import search_form
+
+Key = Tuple[str, int]
+
+# Entries cached per trie node (and the most /api/suggest returns)
+MAX_SUGGESTIONS = 20
+
+
+@dataclass
+class Suggestion:
+    """One suggestible bhajan title or tag"""
+    kind: str  # "bhajan" or "tag"
+    id: int
+    text: str
+    category: Optional[str] = None
+    weight: int = 0
+
+    def to_dict(self) -> Dict:
+        entry = {"kind": self.kind, "id": self.id, "text": self.text}
+        if self.kind == "tag":
+            entry["category"] = self.category
+            entry["count"] = self.weight
+        return entry
+
+
+class _Node:
+    __slots__ = ("children", "keys", "top")
+
+    def __init__(self):
+        self.children: Dict[str, "_Node"] = {}
+        self.keys: Set[Key] = set()  # entries with a word ending here
+        self.top: Optional[List[Key]] = None  # cached best entries in this subtree
+
+
+class SuggestIndex:
+    """
+    Prefix trie of title/tag words with per-node top-entry caches
+
+    Thread-safe. Call ensure_loaded() before suggest(); the add/remove
+    methods keep it current afterwards.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._root = _Node()
+        self._entries: Dict[Key, Suggestion] = {}
+        self._entry_words: Dict[Key, Set[str]] = {}
+        self._word_keys: Dict[str, Set[Key]] = {}
+        self._bhajan_tags: Dict[int, Set[int]] = {}
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    # Trie maintenance
+
+    def _rank(self, key: Key) -> Tuple:
+        entry = self._entries[key]
+        return (-entry.weight, entry.kind != "tag", entry.text.lower(), key)
+
+    def _path(self, word: str) -> List[_Node]:
+        """Nodes from the root to where `word` ends, created as needed"""
+        node = self._root
+        path = [node]
+        for ch in word:
+            node = node.children.setdefault(ch, _Node())
+            path.append(node)
+        return path
+
+    def _promote(self, key: Key, path: List[_Node]):
+        """Merge an added (or better-ranked) entry into the cached lists along a path"""
+        for node in path:
+            if node.top is None:
+                continue
+            top = [other for other in node.top if other != key]
+            bisect.insort(top, key, key=self._rank)
+            node.top = top[:MAX_SUGGESTIONS]
+
+    def _demote(self, key: Key, path: List[_Node]):
+        """Drop the cached lists along a path that list a removed (or worse-ranked) entry"""
+        for node in path:
+            if node.top is not None and key in node.top:
+                node.top = None
+
+    def _put(self, key: Key, entry: Suggestion, forms: Iterable[str]):
+        self._drop(key)
+        words = {word for form in forms if form for word in form.split()}
+        self._entries[key] = entry
+        self._entry_words[key] = words
+        for word in words:
+            self._word_keys.setdefault(word, set()).add(key)
+            path = self._path(word)
+            path[-1].keys.add(key)
+            self._promote(key, path)
+
+    def _drop(self, key: Key):
+        if self._entries.pop(key, None) is None:
+            return
+        for word in self._entry_words.pop(key):
+            keys = self._word_keys[word]
+            keys.discard(key)
+            if not keys:
+                del self._word_keys[word]
+            # Empty nodes are left in place; they are cheap and get reused
+            path = self._path(word)
+            path[-1].keys.discard(key)
+            self._demote(key, path)
+
+    def _reweigh(self, tag_id: int, delta: int):
+        key = ("tag", tag_id)
+        entry = self._entries.get(key)
+        if entry is None:
+            return
+        entry.weight += delta
+        for word in self._entry_words[key]:
+            if delta > 0:
+                self._promote(key, self._path(word))
+            else:
+                self._demote(key, self._path(word))
+
+    def _top(self, node: _Node) -> List[Key]:
+        if node.top is None:
+            candidates = set(node.keys)
+            for child in node.children.values():
+                candidates.update(self._top(child))
+            node.top = heapq.nsmallest(MAX_SUGGESTIONS, candidates, key=self._rank)
+        return node.top
+
+    # Loading and incremental updates
+
+    def load(self, conn):
+        """
+        (Re)build from the database: live bhajan titles, all tags and
+        bhajan -> tag membership
+
+        Args:
+            conn: sqlite3 connection
+        """
+        titles = conn.execute(
+            "SELECT id, title, title_roman FROM bhajans WHERE deleted_at IS NULL"
+        ).fetchall()
+        memberships = conn.execute("""
+            SELECT bt.bhajan_id, bt.tag_id FROM bhajan_tags bt
+            JOIN bhajans b ON b.id = bt.bhajan_id
+            WHERE b.deleted_at IS NULL
+        """).fetchall()
+        tag_texts = read_tag_texts(conn)
+
+        with self._lock:
+            self._root = _Node()
+            self._entries.clear()
+            self._entry_words.clear()
+            self._word_keys.clear()
+            self._bhajan_tags.clear()
+
+            usage: Dict[int, int] = {}
+            for bhajan_id, tag_id in memberships:
+                if tag_id not in self._bhajan_tags.setdefault(bhajan_id, set()):
+                    self._bhajan_tags[bhajan_id].add(tag_id)
+                    usage[tag_id] = usage.get(tag_id, 0) + 1
+
+            for bhajan_id, title, title_roman in titles:
+                self._put(("bhajan", bhajan_id), Suggestion("bhajan", bhajan_id, title),
+                          [title_roman if title_roman is not None else search_form(title)])
+            for tag_id, (name, category, aliases) in tag_texts.items():
+                self._put(("tag", tag_id), Suggestion("tag", tag_id, name, category, usage.get(tag_id, 0)),
+                          [search_form(text) for text in [name] + aliases])
+            self._loaded = True
+
+    def ensure_loaded(self, connect: Callable):
+        """Load on first use; connect() returns a sqlite3 connection"""
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            conn = connect()
+            try:
+                self.load(conn)
+            finally:
+                conn.close()
+
+    def add_bhajan(self, bhajan_id: int, title: str, title_roman: Optional[str] = None,
+                   tag_ids: Optional[Iterable[int]] = None):
+        """
+        Index (or re-index) a bhajan title
+
+        Args:
+            bhajan_id: Bhajan id
+            title: Display title
+            title_roman: search_form(title) if already computed
+            tag_ids: The bhajan's tags, if they were (re)written
+        """
+        if not self._loaded:
+            return  # load() will read it
+        with self._lock:
+            self._put(("bhajan", bhajan_id), Suggestion("bhajan", bhajan_id, title),
+                      [title_roman if title_roman is not None else search_form(title)])
+            if tag_ids is not None:
+                self.set_bhajan_tags(bhajan_id, tag_ids)
+
+    def remove_bhajan(self, bhajan_id: int):
+        """Drop a (soft-deleted) bhajan and its tag usage"""
+        with self._lock:
+            self._drop(("bhajan", bhajan_id))
+            self.set_bhajan_tags(bhajan_id, ())
+
+    def set_bhajan_tags(self, bhajan_id: int, tag_ids: Iterable[int]):
+        """Replace a bhajan's tags, adjusting tag usage weights"""
+        new = set(tag_ids)
+        with self._lock:
+            old = self._bhajan_tags.pop(bhajan_id, set())
+            if new:
+                self._bhajan_tags[bhajan_id] = new
+            for tag_id in old - new:
+                self._reweigh(tag_id, -1)
+            for tag_id in new - old:
+                self._reweigh(tag_id, +1)
+
+    def refresh_tag(self, conn, tag_id: int):
+        """Re-read one tag's name, category, translations and synonyms"""
+        if not self._loaded:
+            return
+        texts = read_tag_texts(conn, tag_id).get(tag_id)
+        with self._lock:
+            if texts is None:
+                self._drop(("tag", tag_id))
+                return
+            name, category, aliases = texts
+            usage = sum(1 for tags in self._bhajan_tags.values() if tag_id in tags)
+            self._put(("tag", tag_id), Suggestion("tag", tag_id, name, category, usage),
+                      [search_form(text) for text in [name] + aliases])
+
+    def remove_tag(self, tag_id: int):
+        with self._lock:
+            self._drop(("tag", tag_id))
+
+    # Lookup
+
+    def suggest(self, query: str, limit: int = 10) -> List[Dict]:
+        """
+        Best entries whose words start with the query's words
+
+        The last query word is a prefix; earlier words must match whole
+        words of the same entry ("hanuman c" -> "Hanuman Chalisa").
+
+        Args:
+            query: Partial input in any script
+            limit: Maximum suggestions (capped at MAX_SUGGESTIONS)
+
+        Returns:
+            List of Suggestion.to_dict(), best first
+        """
+        words = search_form(query).split()
+        if not words:
+            return []
+        limit = min(limit, MAX_SUGGESTIONS)
+        *complete, prefix = words
+
+        with self._lock:
+            node = self._root
+            for ch in prefix:
+                node = node.children.get(ch)
+                if node is None:
+                    return []
+
+            if not complete:
+                keys = self._top(node)[:limit]
+            else:
+                candidates = None
+                for word in complete:
+                    matched = self._word_keys.get(word, set())
+                    candidates = matched if candidates is None else candidates & matched
+                    if not candidates:
+                        return []
+                keys = heapq.nsmallest(limit, (
+                    key for key in candidates
+                    if any(word.startswith(prefix) for word in self._entry_words[key])
+                ), key=self._rank)
+
+            return [self._entries[key].to_dict() for key in keys]
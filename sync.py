@@ -0,0 +1,114 @@
+"""
+Delta sync for offline clients (/api/sync)
+
+sync_log (models.SyncLog) holds one row per bhajan and tag carrying the
+seq of its latest change; triggers keep it current on every write, soft
+deletes included. A client stores the token of its last sync (the highest
+seq it has seen) and asks for the rows after it, getting only the bhajans
+and tags changed since plus the ids of deleted ones. Pages follow seq
+order, so an interrupted sync resumes from the last page's token.
+
+No token (or "0") is a full sync: live rows only, no tombstones. A token
+ahead of the log (the database was restored from a backup) also gets a
+full sync, flagged reset, and the client drops its copy first.
+"""
+import json
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+# Changes per page
+PAGE_SIZE = 500
+MAX_PAGE_SIZE = 2000
+
+
+class SyncTokenError(ValueError):
+    """Raised for a malformed sync token"""
+
+
+def parse_token(token: Optional[str]) -> int:
+    """Sync token -> seq (None/empty = 0)"""
+    if not token:
+        return 0
+    if not token.isdigit():
+        raise SyncTokenError(f"Invalid sync token {token!r}")
+    return int(token)
+
+
+@dataclass
+class ChangeSet:
+    """One page of changes after a token"""
+    token: int
+    more: bool = False
+    reset: bool = False
+    bhajan_ids: List[int] = field(default_factory=list)
+    deleted_bhajan_ids: List[int] = field(default_factory=list)
+    tag_ids: List[int] = field(default_factory=list)
+    deleted_tag_ids: List[int] = field(default_factory=list)
+
+
+def read_changes(conn, since: int, limit: int = PAGE_SIZE) -> ChangeSet:
+    """
+    Bhajans and tags changed after a seq, oldest change first
+
+    Args:
+        conn: sqlite3 connection
+        since: parse_token() of the client's token
+        limit: Most changes returned
+
+    Returns:
+        ChangeSet; its token is the seq to pass next time
+    """
+    latest = conn.execute("SELECT COALESCE(MAX(seq), 0) FROM sync_log").fetchone()[0]
+    reset = since > latest
+    if reset:
+        since = 0
+
+    rows = conn.execute(f"""
+        SELECT seq, entity, entity_id, deleted FROM sync_log
+        WHERE seq > ? {"AND NOT deleted" if since == 0 else ""}
+        ORDER BY seq LIMIT ?
+    """, (since, limit + 1)).fetchall()
+
+    changes = ChangeSet(token=since, more=len(rows) > limit, reset=reset)
+    for seq, entity, entity_id, deleted in rows[:limit]:
+        changes.token = seq
+        if entity == "bhajan":
+            (changes.deleted_bhajan_ids if deleted else changes.bhajan_ids).append(entity_id)
+        else:
+            (changes.deleted_tag_ids if deleted else changes.tag_ids).append(entity_id)
+    return changes
+
+
+def read_tags(conn, tag_ids: List[int]) -> List[Dict]:
+    """
+    Tags with translations and synonyms, in tag_ids order
+
+    Args:
+        conn: sqlite3 connection
+        tag_ids: Tag ids (missing ones are skipped)
+
+    Returns:
+        [{"id", "name", "category", "level", "parent_id", "translations", "synonyms"}]
+    """
+    if not tag_ids:
+        return []
+    ids = json.dumps(tag_ids)
+    tags = {
+        tag_id: {"id": tag_id, "name": name, "category": category, "level": level,
+                 "parent_id": parent_id, "translations": {}, "synonyms": []}
+        for tag_id, name, category, level, parent_id in conn.execute(
+            "SELECT id, name, category, level, parent_id FROM tag_taxonomy WHERE id IN (SELECT value FROM json_each(?))",
+            (ids,)
+        )
+    }
+    for tag_id, language, translation in conn.execute(
+        "SELECT tag_id, language, translation FROM tag_translations WHERE tag_id IN (SELECT value FROM json_each(?))",
+        (ids,)
+    ):
+        tags[tag_id]["translations"][language] = translation
+    for tag_id, synonym in conn.execute(
+        "SELECT tag_id, synonym FROM tag_synonyms WHERE tag_id IN (SELECT value FROM json_each(?)) ORDER BY synonym",
+        (ids,)
+    ):
+        tags[tag_id]["synonyms"].append(synonym)
+    return [tags[tag_id] for tag_id in tag_ids if tag_id in tags]
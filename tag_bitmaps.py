@@ -0,0 +1,261 @@
+"""
+Tag -> bhajan membership bitmaps
+
+TagBitmapIndex keeps, in memory, one bitset per tag with a bit set for
+every live bhajan tagged with it (bhajan_tags), the same rolled up over
+each tag's descendants, and the set of all live bhajans. Bitsets are
+plain Python ints (bit n = bhajan id n): AND/OR/NOT and popcount run in C
+over machine words, so tag filters of any size and facet counts over a
+result set cost microseconds per tag rather than a query per tag.
+
+The index is loaded from the database on first use and then updated by
+the write endpoints (tag writes, soft delete, tag edits).
+"""
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+
+def to_bitmap(ids: Iterable[int]) -> int:
+    """Bitset with bit n set for every id n"""
+    ids = list(ids)
+    if not ids:
+        return 0
+    bits = bytearray(max(ids) // 8 + 1)
+    for i in ids:
+        bits[i >> 3] |= 1 << (i & 7)
+    return int.from_bytes(bits, "little")
+
+
+def from_bitmap(bitmap: int) -> List[int]:
+    """Ids whose bits are set, ascending"""
+    ids = []
+    data = bitmap.to_bytes((bitmap.bit_length() + 7) // 8, "little")
+    for offset, byte in enumerate(data):
+        while byte:
+            low = byte & -byte
+            ids.append(offset * 8 + low.bit_length() - 1)
+            byte ^= low
+    return ids
+
+
+class TagBitmapIndex:
+    """
+    Per-tag bhajan bitsets with tag name/category metadata
+
+    Thread-safe. Call ensure_loaded() before reading; add_bhajan(),
+    remove_bhajan() and refresh_tag() keep it current afterwards.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._tags: Dict[int, Tuple[str, str]] = {}  # tag_id -> (name, category)
+        self._parents: Dict[int, Optional[int]] = {}
+        self._children: Dict[int, Set[int]] = {}
+        self._members: Dict[int, int] = {}  # tag_id -> bitmap of bhajan ids
+        self._rolled: Dict[int, int] = {}  # tag_id -> bitmap incl. descendants (cache)
+        self._bhajan_tags: Dict[int, Set[int]] = {}
+        self._live = 0
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    def load(self, conn):
+        """
+        (Re)build from the database: all tags, live bhajans and their
+        memberships
+
+        Args:
+            conn: sqlite3 connection
+        """
+        tags = conn.execute("SELECT id, name, category, parent_id FROM tag_taxonomy").fetchall()
+        live = [row[0] for row in conn.execute("SELECT id FROM bhajans WHERE deleted_at IS NULL")]
+        memberships = conn.execute("""
+            SELECT bt.bhajan_id, bt.tag_id FROM bhajan_tags bt
+            JOIN bhajans b ON b.id = bt.bhajan_id
+            WHERE b.deleted_at IS NULL
+        """).fetchall()
+
+        bhajan_tags: Dict[int, Set[int]] = {}
+        tag_bhajans: Dict[int, List[int]] = {}
+        for bhajan_id, tag_id in memberships:
+            bhajan_tags.setdefault(bhajan_id, set()).add(tag_id)
+            tag_bhajans.setdefault(tag_id, []).append(bhajan_id)
+
+        with self._lock:
+            self._tags = {tag_id: (name, category) for tag_id, name, category, _ in tags}
+            self._parents = {tag_id: parent_id for tag_id, _, _, parent_id in tags}
+            self._children = {}
+            for tag_id, parent_id in self._parents.items():
+                if parent_id is not None:
+                    self._children.setdefault(parent_id, set()).add(tag_id)
+            self._members = {tag_id: to_bitmap(ids) for tag_id, ids in tag_bhajans.items()}
+            self._rolled = {}
+            self._bhajan_tags = bhajan_tags
+            self._live = to_bitmap(live)
+            self._loaded = True
+
+    def ensure_loaded(self, connect: Callable):
+        """Load on first use; connect() returns a sqlite3 connection"""
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            conn = connect()
+            try:
+                self.load(conn)
+            finally:
+                conn.close()
+
+    def add_bhajan(self, bhajan_id: int, tag_ids: Optional[Iterable[int]] = None):
+        """
+        Mark a created/updated bhajan live
+
+        Args:
+            bhajan_id: Bhajan id
+            tag_ids: The bhajan's tags, if they were (re)written
+        """
+        if not self._loaded:
+            return  # load() will read it
+        with self._lock:
+            self._live |= 1 << bhajan_id
+            if tag_ids is not None:
+                self.set_bhajan_tags(bhajan_id, tag_ids)
+
+    def remove_bhajan(self, bhajan_id: int):
+        """Drop a (soft-deleted) bhajan from the live set and every tag"""
+        if not self._loaded:
+            return
+        with self._lock:
+            self._live &= ~(1 << bhajan_id)
+            self.set_bhajan_tags(bhajan_id, ())
+
+    def set_bhajan_tags(self, bhajan_id: int, tag_ids: Iterable[int]):
+        """Replace a bhajan's tags (as written by dual_write_tags)"""
+        if not self._loaded:
+            return
+        new = set(tag_ids)
+        bit = 1 << bhajan_id
+        with self._lock:
+            old = self._bhajan_tags.pop(bhajan_id, set())
+            if new:
+                self._bhajan_tags[bhajan_id] = new
+            for tag_id in old - new:
+                self._members[tag_id] = self._members.get(tag_id, 0) & ~bit
+                self._invalidate(tag_id)
+            for tag_id in new - old:
+                self._members[tag_id] = self._members.get(tag_id, 0) | bit
+                self._invalidate(tag_id)
+
+    def _invalidate(self, tag_id: Optional[int]):
+        """Drop the rolled-up bitmaps of a tag and its ancestors"""
+        while tag_id is not None:
+            self._rolled.pop(tag_id, None)
+            tag_id = self._parents.get(tag_id)
+
+    def refresh_tag(self, conn, tag_id: int):
+        """Re-read one tag's name, category and parent"""
+        if not self._loaded:
+            return
+        row = conn.execute(
+            "SELECT name, category, parent_id FROM tag_taxonomy WHERE id = ?", (tag_id,)
+        ).fetchone()
+        with self._lock:
+            if row is None:
+                self.remove_tag(tag_id)
+                return
+            self._tags[tag_id] = (row[0], row[1])
+            old_parent = self._parents.get(tag_id)
+            if tag_id not in self._parents or old_parent != row[2]:
+                self._invalidate(old_parent)
+                self._children.get(old_parent, set()).discard(tag_id)
+                self._parents[tag_id] = row[2]
+                if row[2] is not None:
+                    self._children.setdefault(row[2], set()).add(tag_id)
+                self._invalidate(tag_id)
+
+    def remove_tag(self, tag_id: int):
+        with self._lock:
+            parent_id = self._parents.pop(tag_id, None)
+            self._invalidate(parent_id)
+            self._children.get(parent_id, set()).discard(tag_id)
+            self._rolled.pop(tag_id, None)
+            self._tags.pop(tag_id, None)
+            self._members.pop(tag_id, None)
+
+    # Lookup
+
+    @property
+    def live(self) -> int:
+        """Bitmap of every live (not soft-deleted) bhajan"""
+        return self._live
+
+    def bhajans(self, tag_id: int) -> int:
+        """Bitmap of live bhajans tagged with tag_id itself"""
+        return self._members.get(tag_id, 0)
+
+    def tag(self, tag_id: int) -> int:
+        """Bitmap of live bhajans tagged with tag_id or any descendant"""
+        rolled = self._rolled.get(tag_id)
+        if rolled is None:
+            with self._lock:
+                rolled = self._members.get(tag_id, 0)
+                for child_id in self._children.get(tag_id, ()):
+                    rolled |= self.tag(child_id)
+                self._rolled[tag_id] = rolled
+        return rolled
+
+    def select(self, all_of: Iterable[int] = (), any_of: Iterable[int] = (),
+               none_of: Iterable[int] = ()) -> int:
+        """
+        Live bhajans matching a tag combination (descendants included)
+
+        Args:
+            all_of: Tags a bhajan must all have (AND)
+            any_of: Tags of which a bhajan needs at least one (OR; ignored if empty)
+            none_of: Tags a bhajan must not have (NOT)
+
+        Returns:
+            Bitmap of matching bhajan ids
+        """
+        result = self._live
+        for tag_id in all_of:
+            result &= self.tag(tag_id)
+        any_of = list(any_of)
+        if any_of:
+            union = 0
+            for tag_id in any_of:
+                union |= self.tag(tag_id)
+            result &= union
+        for tag_id in none_of:
+            result &= ~self.tag(tag_id)
+        return result
+
+    def facets(self, bhajan_ids: Iterable[int]) -> Dict[str, List[Dict]]:
+        """
+        Tag counts within a result set, grouped by tag category
+
+        Args:
+            bhajan_ids: Ids of the current results
+
+        Returns:
+            {category: [{"id", "name", "count"}]} for tags with count > 0,
+            most used first
+        """
+        results = to_bitmap(bhajan_ids)
+        facets: Dict[str, List[Dict]] = {}
+        if not results:
+            return facets
+        with self._lock:
+            for tag_id, members in self._members.items():
+                count = (members & results).bit_count()
+                if count and tag_id in self._tags:
+                    name, category = self._tags[tag_id]
+                    facets.setdefault(category or "other", []).append(
+                        {"id": tag_id, "name": name, "count": count}
+                    )
+        for counts in facets.values():
+            counts.sort(key=lambda c: (-c["count"], c["name"].lower()))
+        return facets
@@ -0,0 +1,325 @@
+"""
+Boolean tag queries for /api/bhajans?tag=
+
+    deity:(hanuman OR rama) AND type:stotra AND NOT day:saturday
+
+Grammar (operators are case-insensitive; NOT binds tightest, then AND,
+then OR):
+
+    expr    := and (OR and)*
+    and     := unary (AND unary)*
+    unary   := NOT unary | primary
+    primary := [=] [category:] ( "(" expr ")" | term )
+    term    := word+ | "quoted text"
+
+Consecutive words form one multi-word tag name ("sri rama"), so a plain
+tag name is also a valid query. A category prefix scopes every term
+inside it to tags of that tag_taxonomy.category. An "=" prefix makes the
+terms inside it exact: =deity:shiva matches bhajans tagged Shiva itself,
+not those of its descendants (Hanuman).
+
+parse() normalizes the expression (lowercase, flattened, deduplicated,
+double negation removed) and caches it by query text. Terms resolve to
+tag ids by name, synonym or translation in one query (resolve_terms), and
+evaluate() turns the tree into bitwise operations on TagBitmapIndex
+rolled-up bitmaps, so a tag also matches bhajans of its descendants
+(exact terms use the tag's own bitmap).
+"""
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Set, Tuple, Union
+
+from tag_bitmaps import TagBitmapIndex
+
+# Parsed queries kept by text
+PARSE_CACHE_SIZE = 512
+# Longest accepted query (characters)
+MAX_QUERY_LENGTH = 500
+
+_TOKEN = re.compile(r'\s*(?:(\()|(\))|(=)|"([^"]*)"|([^\s()":=]+):|([^\s()":=]+))')
+_OPERATORS = {"and", "or", "not"}
+
+
+class TagQueryError(ValueError):
+    """Raised for a malformed tag query"""
+
+
+@dataclass(frozen=True)
+class Term:
+    name: str
+    category: Optional[str] = None
+    # Only bhajans tagged with the tag itself, not with its descendants
+    exact: bool = False
+
+    def __str__(self):
+        text = f'"{self.name}"' if " " in self.name or self.name in _OPERATORS else self.name
+        text = f"{self.category}:{text}" if self.category else text
+        return f"={text}" if self.exact else text
+
+
+@dataclass(frozen=True)
+class Not:
+    child: "Node"
+
+    def __str__(self):
+        return f"NOT {_wrap(self.child)}"
+
+
+@dataclass(frozen=True)
+class And:
+    children: Tuple["Node", ...]
+
+    def __str__(self):
+        return " AND ".join(_wrap(child) for child in self.children)
+
+
+@dataclass(frozen=True)
+class Or:
+    children: Tuple["Node", ...]
+
+    def __str__(self):
+        return " OR ".join(_wrap(child) for child in self.children)
+
+
+Node = Union[Term, Not, And, Or]
+
+
+def _wrap(node: Node) -> str:
+    return f"({node})" if isinstance(node, (And, Or)) else str(node)
+
+
+# Parsing
+
+def _tokenize(text: str) -> List[Tuple[str, str]]:
+    """(kind, value) tokens: "(", ")", "=", "op", "category", "word", "quoted" """
+    tokens = []
+    position = 0
+    text = text.rstrip()
+    while position < len(text):
+        match = _TOKEN.match(text, position)
+        if not match or match.end() == position:
+            raise TagQueryError(f"Unexpected character at position {position}: {text[position:]!r}")
+        position = match.end()
+        opening, closing, exact, quoted, category, word = match.groups()
+        if opening:
+            tokens.append(("(", opening))
+        elif closing:
+            tokens.append((")", closing))
+        elif exact:
+            tokens.append(("=", exact))
+        elif quoted is not None:
+            tokens.append(("quoted", quoted))
+        elif category:
+            tokens.append(("category", category))
+        elif word.lower() in _OPERATORS:
+            tokens.append(("op", word.lower()))
+        else:
+            tokens.append(("word", word))
+    return tokens
+
+
+class _Parser:
+    def __init__(self, tokens: List[Tuple[str, str]]):
+        self.tokens = tokens
+        self.position = 0
+
+    def peek(self) -> Tuple[Optional[str], Optional[str]]:
+        if self.position < len(self.tokens):
+            return self.tokens[self.position]
+        return None, None
+
+    def take(self) -> Tuple[str, str]:
+        token = self.peek()
+        self.position += 1
+        return token
+
+    def expr(self, category: Optional[str], exact: bool) -> Node:
+        children = [self.conjunction(category, exact)]
+        while self.peek() == ("op", "or"):
+            self.take()
+            children.append(self.conjunction(category, exact))
+        return Or(tuple(children)) if len(children) > 1 else children[0]
+
+    def conjunction(self, category: Optional[str], exact: bool) -> Node:
+        children = [self.unary(category, exact)]
+        while self.peek() == ("op", "and"):
+            self.take()
+            children.append(self.unary(category, exact))
+        return And(tuple(children)) if len(children) > 1 else children[0]
+
+    def unary(self, category: Optional[str], exact: bool) -> Node:
+        if self.peek() == ("op", "not"):
+            self.take()
+            return Not(self.unary(category, exact))
+        return self.primary(category, exact)
+
+    def primary(self, category: Optional[str], exact: bool) -> Node:
+        kind, value = self.peek()
+        if kind == "=":
+            self.take()
+            exact = True
+            kind, value = self.peek()
+        if kind == "category":
+            self.take()
+            category = value
+            kind, value = self.peek()
+        if kind == "(":
+            self.take()
+            node = self.expr(category, exact)
+            if self.take()[0] != ")":
+                raise TagQueryError("Missing closing parenthesis")
+            return node
+        if kind == "quoted":
+            self.take()
+            return Term(value, category, exact)
+        if kind == "word":
+            words = []
+            while self.peek()[0] == "word":
+                words.append(self.take()[1])
+            return Term(" ".join(words), category, exact)
+        raise TagQueryError(f"Expected a tag name, got {value or 'end of query'!r}")
+
+
+def _normalize(node: Node) -> Node:
+    """Lowercase terms, flatten AND/OR, drop duplicates and double NOT"""
+    if isinstance(node, Term):
+        name = " ".join(node.name.lower().split())
+        if not name:
+            raise TagQueryError("Empty tag name")
+        return Term(name, node.category.lower() if node.category else None, node.exact)
+    if isinstance(node, Not):
+        child = _normalize(node.child)
+        return child.child if isinstance(child, Not) else Not(child)
+
+    kind = type(node)
+    children = set()
+    for child in node.children:
+        child = _normalize(child)
+        children.update(child.children if isinstance(child, kind) else (child,))
+    if len(children) == 1:
+        return children.pop()
+    return kind(tuple(sorted(children, key=_order)))
+
+
+def _order(node: Node) -> Tuple[int, str]:
+    """Canonical operand order: terms, then groups, then negations"""
+    rank = 0 if isinstance(node, Term) else 2 if isinstance(node, Not) else 1
+    return rank, str(node)
+
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def parse(text: str) -> Node:
+    """
+    Parse and normalize a tag query (cached by text)
+
+    Args:
+        text: Query such as 'deity:(hanuman OR rama) AND NOT day:saturday'
+
+    Returns:
+        Normalized expression tree; str() of it is the canonical query
+
+    Raises:
+        TagQueryError: Malformed query
+    """
+    if len(text) > MAX_QUERY_LENGTH:
+        raise TagQueryError(f"Tag query longer than {MAX_QUERY_LENGTH} characters")
+    parser = _Parser(_tokenize(text))
+    node = parser.expr(None, False)
+    if parser.peek()[0] is not None:
+        raise TagQueryError(f"Unexpected {parser.peek()[1]!r}")
+    return _normalize(node)
+
+
+def parse_all(texts: Iterable[str]) -> Node:
+    """Parse repeated ?tag= values; they are ANDed"""
+    nodes = [parse(text) for text in texts]
+    if not nodes:
+        raise TagQueryError("Empty tag query")
+    return _normalize(And(tuple(nodes))) if len(nodes) > 1 else nodes[0]
+
+
+# Resolution and evaluation
+
+def terms(node: Node) -> Set[Term]:
+    """Every Term in an expression"""
+    if isinstance(node, Term):
+        return {node}
+    if isinstance(node, Not):
+        return terms(node.child)
+    return set().union(*(terms(child) for child in node.children))
+
+
+def resolve_terms(conn, node: Node) -> Dict[Term, Set[int]]:
+    """
+    Tag ids each term names, by tag name, synonym or translation
+
+    Args:
+        conn: sqlite3 connection
+        node: Parsed query
+
+    Returns:
+        {term: {tag_id}}; unknown names resolve to an empty set
+    """
+    query_terms = terms(node)
+    names = sorted({term.name for term in query_terms})
+    placeholders = ",".join("?" * len(names))
+    matches: Dict[str, Set[Tuple[int, str]]] = {}
+    for name, tag_id, category in conn.execute(f"""
+        SELECT lower(name), id, category FROM tag_taxonomy WHERE lower(name) IN ({placeholders})
+        UNION SELECT lower(s.synonym), t.id, t.category FROM tag_synonyms s
+            JOIN tag_taxonomy t ON t.id = s.tag_id WHERE lower(s.synonym) IN ({placeholders})
+        UNION SELECT lower(tr.translation), t.id, t.category FROM tag_translations tr
+            JOIN tag_taxonomy t ON t.id = tr.tag_id WHERE lower(tr.translation) IN ({placeholders})
+    """, names * 3):
+        matches.setdefault(name, set()).add((tag_id, (category or "").lower()))
+
+    return {
+        term: {
+            tag_id for tag_id, category in matches.get(term.name, ())
+            if term.category is None or category == term.category
+        }
+        for term in query_terms
+    }
+
+
+def evaluate(node: Node, index: TagBitmapIndex, resolved: Dict[Term, Set[int]]) -> int:
+    """
+    Bitmap of live bhajans matching a parsed query
+
+    AND intersects its positive operands smallest first, stopping once
+    empty, then subtracts the union of its NOT operands; only a bare NOT
+    is complemented against the live set.
+
+    Args:
+        node: Parsed query
+        index: Loaded TagBitmapIndex
+        resolved: resolve_terms() result for the query
+
+    Returns:
+        Bitmap of matching bhajan ids
+    """
+    if isinstance(node, Term):
+        bitmap = 0
+        lookup = index.bhajans if node.exact else index.tag
+        for tag_id in resolved.get(node, ()):
+            bitmap |= lookup(tag_id)
+        return bitmap
+    if isinstance(node, Not):
+        return index.live & ~evaluate(node.child, index, resolved)
+    if isinstance(node, Or):
+        bitmap = 0
+        for child in node.children:
+            bitmap |= evaluate(child, index, resolved)
+        return bitmap
+
+    positives = [evaluate(child, index, resolved) for child in node.children if not isinstance(child, Not)]
+    result = index.live
+    for bitmap in sorted(positives, key=int.bit_count):
+        result &= bitmap
+        if not result:
+            return 0
+    for child in node.children:
+        if isinstance(child, Not):
+            result &= ~evaluate(child.child, index, resolved)
+    return result
@@ -0,0 +1,343 @@
+"""
+API benchmark harness
+
+Runs every route in main.py against synthetic catalogues (see
+bench_catalogue.py) and records p50/p95/p99 latency plus SQL statements
+per request (the X-Query-Count header set by QueryTimingMiddleware).
+Results are compared with api_baseline.json: a route fails
+when its p95 grows past the tolerance or it issues more queries than the
+baseline recorded.
+
+Usage:
+    python tests/benchmarks/bench_api.py                      # 1k catalogue, print report
+    python tests/benchmarks/bench_api.py --sizes 1k 10k 100k  # Several sizes
+    python tests/benchmarks/bench_api.py --check              # Fail on regression
+    python tests/benchmarks/bench_api.py --update-baseline    # Store new baseline
+"""
+import os
+import sys
+import json
+import math
+import time
+import random
+import sqlite3
+import argparse
+import tempfile
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_catalogue import PROJECT_ROOT, SIZES, get_catalogue
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "api_baseline.json")
+
+@dataclass
+class BenchContext:
+    """State shared by scenarios for one catalogue"""
+    client: object
+    size: int
+    rng: random.Random
+    root_tag_id: int
+    leaf_tag_id: int
+    created_tag_ids: List[int]
+    sync_token: str  # Token 100 changes behind the latest
+
+
+@dataclass
+class Scenario:
+    """One benchmarked request shape for a route"""
+    name: str
+    method: str
+    path: str  # Route path as declared in main.py
+    request: Callable[[BenchContext, int], Dict]
+
+
+def _bhajan_id(ctx: BenchContext, i: int) -> int:
+    return ctx.rng.randint(1, ctx.size)
+
+
+def _create_tag(ctx: BenchContext, i: int) -> Dict:
+    return {"url": "/api/tags", "json": {"name": f"Bench Tag {time.time_ns()}", "category": "theme"}}
+
+
+def _update_tag(ctx: BenchContext, i: int) -> Dict:
+    tag_id = ctx.created_tag_ids[i % len(ctx.created_tag_ids)]
+    return {"url": f"/api/tags/{tag_id}", "json": {"synonyms": [f"bench-syn-{time.time_ns()}"]}}
+
+
+def _delete_tag(ctx: BenchContext, i: int) -> Dict:
+    return {"url": f"/api/tags/{ctx.created_tag_ids.pop()}"}
+
+
+# Distinct queries so every request misses the search result cache
+UNCACHED_QUERIES = [
+    "krishna", "hanuman", "shiva", "ganesha", "govinda", "narayana", "vittala", "devi",
+    "sai", "datta", "guru", "raghunatha", "gopala", "shankara", "madhava", "keshava",
+    "raghava", "maruti", "ambe", "pandu",
+]
+
+
+def _search_uncached(ctx: BenchContext, i: int) -> Dict:
+    return {"url": "/api/search", "params": {"q": UNCACHED_QUERIES[i % len(UNCACHED_QUERIES)]}}
+
+
+# Read scenarios first; writes run last so they can't skew reads
+SCENARIOS = [
+    Scenario("health", "GET", "/health", lambda ctx, i: {"url": "/health"}),
+    Scenario("stats", "GET", "/api/stats", lambda ctx, i: {"url": "/api/stats"}),
+    Scenario("list_bhajans", "GET", "/api/bhajans", lambda ctx, i: {"url": "/api/bhajans"}),
+    Scenario("list_bhajans_summary", "GET", "/api/bhajans",
+             lambda ctx, i: {"url": "/api/bhajans", "params": {"fields": "summary"}}),
+    Scenario("list_bhajans_facets", "GET", "/api/bhajans",
+             lambda ctx, i: {"url": "/api/bhajans", "params": {"fields": "summary", "facets": "true"}}),
+    Scenario("list_bhajans_search", "GET", "/api/bhajans",
+             lambda ctx, i: {"url": "/api/bhajans", "params": {"search": "Hanuman"}}),
+    Scenario("list_bhajans_tags", "GET", "/api/bhajans",
+             lambda ctx, i: {"url": "/api/bhajans", "params": [("tag", "Hanuman"), ("tag", "Stotra")]}),
+    Scenario("list_bhajans_tag_query", "GET", "/api/bhajans", lambda ctx, i: {
+        "url": "/api/bhajans", "params": {"tag": "deity:(hanuman OR rama) AND NOT type:stotra", "fields": "summary"}
+    }),
+    Scenario("list_bhajans_popular", "GET", "/api/bhajans",
+             lambda ctx, i: {"url": "/api/bhajans", "params": {"sort": "popular", "fields": "summary"}}),
+    Scenario("get_bhajan", "GET", "/api/bhajans/{bhajan_id}",
+             lambda ctx, i: {"url": f"/api/bhajans/{_bhajan_id(ctx, i)}"}),
+    Scenario("related", "GET", "/api/bhajans/{bhajan_id}/related",
+             lambda ctx, i: {"url": f"/api/bhajans/{_bhajan_id(ctx, i)}/related"}),
+    Scenario("search", "GET", "/api/search", lambda ctx, i: {"url": "/api/search", "params": {"q": "rama"}}),
+    Scenario("search_summary", "GET", "/api/search",
+             lambda ctx, i: {"url": "/api/search", "params": {"q": "rama", "fields": "summary"}}),
+    Scenario("search_uncached", "GET", "/api/search", _search_uncached),
+    Scenario("sync_full", "GET", "/api/sync", lambda ctx, i: {"url": "/api/sync"}),
+    Scenario("sync_delta", "GET", "/api/sync",
+             lambda ctx, i: {"url": "/api/sync", "params": {"since": ctx.sync_token}}),
+    Scenario("playlists", "GET", "/api/playlists", lambda ctx, i: {"url": "/api/playlists"}),
+    Scenario("playlist", "GET", "/api/playlists/{day}", lambda ctx, i: {"url": "/api/playlists/saturday"}),
+    Scenario("suggest", "GET", "/api/suggest", lambda ctx, i: {"url": "/api/suggest", "params": {"q": "han"}}),
+    Scenario("list_tags", "GET", "/api/tags", lambda ctx, i: {"url": "/api/tags"}),
+    Scenario("tags_tree", "GET", "/api/tags/tree", lambda ctx, i: {"url": "/api/tags/tree"}),
+    Scenario("tag_counts", "GET", "/api/tags/counts", lambda ctx, i: {"url": "/api/tags/counts"}),
+    Scenario("tag_details", "GET", "/api/tags/{tag_id}",
+             lambda ctx, i: {"url": f"/api/tags/{ctx.leaf_tag_id}"}),
+    Scenario("tag_bhajans", "GET", "/api/tags/{tag_id}/bhajans",
+             lambda ctx, i: {"url": f"/api/tags/{ctx.root_tag_id}/bhajans"}),
+    Scenario("metrics", "GET", "/metrics", lambda ctx, i: {"url": "/metrics"}),
+    Scenario("admin_tags", "GET", "/admin/tags", lambda ctx, i: {"url": "/admin/tags"}),
+    Scenario("index", "GET", "/", lambda ctx, i: {"url": "/"}),
+    Scenario("static_file", "GET", "/{path:path}", lambda ctx, i: {"url": "/style.css"}),
+    Scenario("beacon", "POST", "/api/beacon", lambda ctx, i: {
+        "url": "/api/beacon", "json": {"bhajan_id": _bhajan_id(ctx, i), "event": "view" if i % 3 else "play"}
+    }),
+    Scenario("find_duplicates", "POST", "/api/bhajans/duplicates", lambda ctx, i: {
+        "url": "/api/bhajans/duplicates", "data": {"lyrics": "ಓಂ ನಮಃ ಶಿವಾಯ " * 4}
+    }),
+    Scenario("create_bhajan", "POST", "/api/bhajans", lambda ctx, i: {
+        "url": "/api/bhajans",
+        "data": {"title": f"Bench Bhajan {i}", "lyrics": "ಓಂ ನಮಃ ಶಿವಾಯ " * 4, "tags": "Hanuman,Stotra"}
+    }),
+    Scenario("update_bhajan", "PUT", "/api/bhajans/{bhajan_id}", lambda ctx, i: {
+        "url": f"/api/bhajans/{_bhajan_id(ctx, i)}", "data": {"title": f"Bench Update {i}"}
+    }),
+    Scenario("delete_bhajan", "DELETE", "/api/bhajans/{bhajan_id}",
+             lambda ctx, i: {"url": f"/api/bhajans/{ctx.size - i}"}),
+    Scenario("create_tag", "POST", "/api/tags", _create_tag),
+    Scenario("update_tag", "PUT", "/api/tags/{tag_id}", _update_tag),
+    Scenario("delete_tag", "DELETE", "/api/tags/{tag_id}", _delete_tag),
+]
+
+
+def uncovered_routes(app) -> List[str]:
+    """Routes in the app that no scenario exercises"""
+    from fastapi.routing import APIRoute
+
+    covered = {(s.method, s.path) for s in SCENARIOS}
+    missing = []
+    for route in app.routes:
+        if isinstance(route, APIRoute):
+            for method in route.methods:
+                if (method, route.path) not in covered:
+                    missing.append(f"{method} {route.path}")
+    return sorted(missing)
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    """Nearest-rank percentile"""
+    ordered = sorted(samples)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def run_scenario(ctx: BenchContext, scenario: Scenario, iterations: int, time_budget: float, min_samples: int = 3) -> Dict:
+    """Run one scenario and summarize latency and queries per request"""
+    latencies = []
+    queries = []
+    started = time.perf_counter()
+
+    for i in range(iterations):
+        kwargs = scenario.request(ctx, i)
+        url = kwargs.pop("url")
+
+        t0 = time.perf_counter()
+        response = ctx.client.request(scenario.method, url, **kwargs)
+        latencies.append((time.perf_counter() - t0) * 1000)
+        queries.append(int(response.headers["X-Query-Count"]))
+
+        if response.status_code >= 400:
+            raise AssertionError(
+                f"{scenario.name}: {scenario.method} {url} returned {response.status_code}"
+            )
+        if scenario.name == "create_tag":
+            ctx.created_tag_ids.append(response.json()["id"])
+
+        if len(latencies) >= min_samples and time.perf_counter() - started > time_budget:
+            break
+
+    return {
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+        "queries": sorted(queries)[len(queries) // 2],
+        "samples": len(latencies)
+    }
+
+
+def run_size(size_label: str, iterations: int = 20, time_budget: float = 5.0,
+             only: Optional[List[str]] = None, seed: int = 42) -> Dict:
+    """Benchmark all scenarios against one catalogue size"""
+    from fastapi.testclient import TestClient
+    from main import create_app
+    from settings import Settings
+    import models
+
+    size = SIZES[size_label]
+    results = {}
+
+    with tempfile.TemporaryDirectory(prefix="belaguru-bench-") as tmp_dir:
+        db_path = get_catalogue(size, seed=seed, dest_dir=tmp_dir)
+
+        with sqlite3.connect(db_path) as conn:
+            root_tag_id = conn.execute("SELECT id FROM tag_taxonomy WHERE name = 'Deity'").fetchone()[0]
+            leaf_tag_id = conn.execute("SELECT id FROM tag_taxonomy WHERE name = 'Hanuman'").fetchone()[0]
+            sync_token = str(conn.execute("SELECT MAX(seq) - 100 FROM sync_log").fetchone()[0])
+
+        app = create_app(Settings(
+            database_path=db_path,
+            static_dir=os.path.join(PROJECT_ROOT, "static"),
+            templates_dir=os.path.join(PROJECT_ROOT, "templates"),
+            audio_dir=os.path.join(tmp_dir, "audio"),
+            log_dir=os.path.join(tmp_dir, "logs"),
+            slow_request_ms=math.inf  # Every large-catalogue request is "slow"
+        ))
+        ctx = BenchContext(
+            client=TestClient(app),
+            size=size,
+            rng=random.Random(seed),
+            root_tag_id=root_tag_id,
+            leaf_tag_id=leaf_tag_id,
+            created_tag_ids=[],
+            sync_token=sync_token
+        )
+
+        for scenario in SCENARIOS:
+            if only and scenario.name not in only:
+                continue
+            if scenario.name in ("update_tag", "delete_tag") and not ctx.created_tag_ids:
+                continue
+            results[scenario.name] = run_scenario(ctx, scenario, iterations, time_budget)
+
+        defaults = Settings.from_env()
+        models.configure_database(defaults.database_path, defaults.database_url)
+
+    return results
+
+
+def compare_with_baseline(results: Dict, baseline: Dict, tolerance: float = 0.5,
+                          noise_ms: float = 5.0) -> List[str]:
+    """
+    Compare benchmark results with a baseline
+
+    Args:
+        results: {size_label: {scenario: summary}}
+        baseline: Same shape as results
+        tolerance: Allowed relative p95 slowdown (0.5 = 50%)
+        noise_ms: Absolute slack added to the p95 budget
+
+    Returns:
+        List of regression messages (empty if within budget)
+    """
+    regressions = []
+
+    for size_label, scenarios in results.items():
+        for name, summary in scenarios.items():
+            base = baseline.get(size_label, {}).get(name)
+            if not base:
+                continue
+
+            budget = base["p95_ms"] * (1 + tolerance) + noise_ms
+            if summary["p95_ms"] > budget:
+                regressions.append(
+                    f"[{size_label}] {name}: p95 {summary['p95_ms']:.1f}ms > {budget:.1f}ms"
+                )
+            if summary["queries"] > base["queries"]:
+                regressions.append(
+                    f"[{size_label}] {name}: {summary['queries']} queries > {base['queries']}"
+                )
+
+    return regressions
+
+
+def print_report(size_label: str, results: Dict):
+    """Pretty print one size's results"""
+    print(f"\n📈 Catalogue {size_label}")
+    print("=" * 72)
+    print(f"  {'route':<22}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'queries':>10}{'n':>6}")
+    for name, s in results.items():
+        print(f"  {name:<22}{s['p50_ms']:>10.2f}{s['p95_ms']:>10.2f}{s['p99_ms']:>10.2f}"
+              f"{s['queries']:>10}{s['samples']:>6}")
+    print("=" * 72)
+
+
+def main():
+    """Main CLI entry point"""
+    parser = argparse.ArgumentParser(description='Benchmark API routes on synthetic catalogues')
+    parser.add_argument('--sizes', nargs='+', default=['1k'], choices=sorted(SIZES), help='Catalogue sizes')
+    parser.add_argument('--iterations', type=int, default=20, help='Requests per route (default: 20)')
+    parser.add_argument('--time-budget', type=float, default=5.0, help='Seconds per route (default: 5)')
+    parser.add_argument('--routes', nargs='+', help='Only run these scenarios')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='Baseline JSON file')
+    parser.add_argument('--check', action='store_true', help='Fail on regression')
+    parser.add_argument('--tolerance', type=float, default=0.5, help='Allowed p95 slowdown (default: 0.5)')
+    parser.add_argument('--update-baseline', action='store_true', help='Merge results into baseline')
+    args = parser.parse_args()
+
+    os.chdir(PROJECT_ROOT)
+    results = {}
+    for size_label in args.sizes:
+        results[size_label] = run_size(size_label, args.iterations, args.time_budget, args.routes)
+        print_report(size_label, results[size_label])
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    if args.update_baseline:
+        for size_label, scenarios in results.items():
+            baseline.setdefault(size_label, {}).update(scenarios)
+        with open(args.baseline, "w") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"✅ Baseline written: {args.baseline}")
+
+    if args.check:
+        regressions = compare_with_baseline(results, baseline, args.tolerance)
+        if regressions:
+            print("❌ Regressions:")
+            for message in regressions:
+                print(f"  • {message}")
+            sys.exit(1)
+        print("✅ Within baseline")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,179 @@
+"""
+Synthetic catalogue generator for benchmarks
+
+Builds a SQLite database with N bhajans from a seed:
+- Lyrics are sampled line-by-line from bhajans_export.json, so text is
+  real Kannada/Devanagari/Latin with realistic line lengths
+- Taxonomy is migrations/002_populate_taxonomy.sql, deepened with
+  generated sub-tags so hierarchy walks have realistic depth
+- Each bhajan gets 1-4 taxonomy tags (bhajan_tags + JSON tags field)
+
+Generated databases are cached per (size, seed, generator and schema
+version) under the temp directory; callers get a fresh copy so write
+benchmarks can't leak into later runs.
+"""
+import os
+import sys
+import json
+import random
+import shutil
+import sqlite3
+import tempfile
+from datetime import datetime, timedelta
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.insert(0, PROJECT_ROOT)
+
+EXPORT_PATH = os.path.join(PROJECT_ROOT, "bhajans_export.json")
+TAXONOMY_SQL = os.path.join(PROJECT_ROOT, "migrations", "002_populate_taxonomy.sql")
+CACHE_DIR = os.path.join(tempfile.gettempdir(), "belaguru-bench")
+
+# Bump when generation changes so stale cached catalogues are rebuilt
+GENERATOR_VERSION = 4
+
+SIZES = {"1k": 1_000, "10k": 10_000, "100k": 100_000}
+
+
+def load_corpus():
+    """
+    Load title fragments and lyric lines from bhajans_export.json
+
+    Returns:
+        Tuple of (title_words, lyric_lines)
+    """
+    with open(EXPORT_PATH, encoding="utf-8") as f:
+        bhajans = json.load(f)
+
+    title_words = sorted({
+        word for b in bhajans for word in (b.get("title") or "").split()
+        if len(word) > 1
+    })
+    lyric_lines = [
+        line.strip()
+        for b in bhajans
+        for line in (b.get("lyrics") or "").replace("\r", "").split("\n")
+        if line.strip()
+    ]
+
+    return title_words, lyric_lines
+
+
+def build_taxonomy(conn: sqlite3.Connection, depth: int = 3, fanout: int = 3):
+    """
+    Load migration 002 and add generated descendants under every deity
+
+    Each level-2 deity gets `fanout` children per level down to `depth`
+    extra levels (e.g. Hanuman → Hanuman 1 → Hanuman 1.2 ...).
+    """
+    with open(TAXONOMY_SQL, encoding="utf-8") as f:
+        conn.executescript(f.read())
+
+    leaves = conn.execute(
+        "SELECT id, name, level FROM tag_taxonomy WHERE category = 'deity' AND level = 2"
+    ).fetchall()
+
+    frontier = leaves
+    for _ in range(depth):
+        next_frontier = []
+        for parent_id, parent_name, level in frontier:
+            for i in range(1, fanout + 1):
+                name = f"{parent_name} {i}" if level == 2 else f"{parent_name}.{i}"
+                cursor = conn.execute(
+                    "INSERT INTO tag_taxonomy (name, parent_id, category, level) VALUES (?, ?, 'deity', ?)",
+                    (name, parent_id, level + 1)
+                )
+                next_frontier.append((cursor.lastrowid, name, level + 1))
+        frontier = next_frontier
+
+    return conn.execute("SELECT id, name FROM tag_taxonomy WHERE category != 'root'").fetchall()
+
+
+def generate_catalogue(db_path: str, size: int, seed: int = 42):
+    """
+    Generate a catalogue of `size` bhajans into a new database at db_path
+    """
+    from sqlalchemy import create_engine
+    from models import Base, SCHEMA_VERSION
+    from previews import make_preview
+    from transliterate import lyric_lines_form, search_form
+
+    rng = random.Random(seed)
+    title_words, lyric_lines = load_corpus()
+
+    engine = create_engine(f"sqlite:///{db_path}")
+    Base.metadata.create_all(bind=engine)
+    engine.dispose()
+
+    conn = sqlite3.connect(db_path)
+    conn.execute("PRAGMA journal_mode = OFF")
+    conn.execute("PRAGMA synchronous = OFF")
+
+    tags = build_taxonomy(conn)
+    start = datetime(2024, 1, 1)
+
+    bhajan_rows = []
+    tag_rows = []
+    for bhajan_id in range(1, size + 1):
+        title = " ".join(rng.sample(title_words, rng.randint(2, 5)))
+        lyrics = "\n".join(rng.choice(lyric_lines) for _ in range(rng.randint(8, 40)))
+        chosen = rng.sample(tags, rng.randint(1, 4))
+        created = (start + timedelta(minutes=bhajan_id * 7)).strftime("%Y-%m-%d %H:%M:%S")
+
+        bhajan_rows.append((
+            bhajan_id, f"{title} {bhajan_id}", lyrics, make_preview(lyrics),
+            search_form(f"{title} {bhajan_id}"), lyric_lines_form(lyrics),
+            json.dumps([name for _, name in chosen], ensure_ascii=False),
+            f"User{rng.randint(1, 200)}", created, created
+        ))
+        tag_rows.extend((bhajan_id, tag_id, "manual", 1.0, created) for tag_id, _ in chosen)
+
+    conn.executemany(
+        """INSERT INTO bhajans (id, title, lyrics, preview, title_roman, lyrics_roman, tags,
+                                uploader_name, created_at, updated_at)
+           VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+        bhajan_rows
+    )
+    conn.executemany(
+        "INSERT INTO bhajan_tags (bhajan_id, tag_id, source, confidence, created_at) VALUES (?, ?, ?, ?, ?)",
+        tag_rows
+    )
+    conn.commit()
+
+    # Related bhajans, as the nightly scripts/build_related.py job would leave them
+    import related
+    related.rebuild(conn)
+
+    # Lyric signatures for near-duplicate checks (upgrade_schema's backfill)
+    import near_duplicates
+    near_duplicates.backfill(conn)
+
+    conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+    conn.commit()
+    conn.close()
+
+
+def get_catalogue(size: int, seed: int = 42, dest_dir: str | None = None) -> str:
+    """
+    Get a fresh copy of a generated catalogue, building it once per cache key
+
+    Returns:
+        Path to a database file the caller owns
+    """
+    from models import SCHEMA_VERSION
+
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    cached = os.path.join(
+        CACHE_DIR, f"catalogue_v{GENERATOR_VERSION}_s{SCHEMA_VERSION}_{size}_{seed}.db"
+    )
+
+    if not os.path.exists(cached):
+        partial = cached + ".partial"
+        if os.path.exists(partial):
+            os.remove(partial)
+        generate_catalogue(partial, size, seed)
+        os.replace(partial, cached)
+
+    dest_dir = dest_dir or tempfile.mkdtemp(prefix="belaguru-bench-")
+    db_path = os.path.join(dest_dir, f"catalogue_{size}.db")
+    shutil.copyfile(cached, db_path)
+    return db_path
@@ -0,0 +1,41 @@
+"""
+API benchmarks against synthetic catalogues
+
+Route coverage is always checked. The timing run is opt-in:
+    RUN_BENCHMARKS=1 BENCH_SIZES=1k,10k pytest tests/benchmarks
+Refresh api_baseline.json with
+`python tests/benchmarks/bench_api.py --sizes 1k 10k 100k --update-baseline`.
+"""
+import os
+import sys
+import json
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from bench_api import DEFAULT_BASELINE, compare_with_baseline, run_size, uncovered_routes
+
+run_benchmarks = pytest.mark.skipif(
+    not os.environ.get("RUN_BENCHMARKS"),
+    reason="benchmarks are opt-in (set RUN_BENCHMARKS=1)"
+)
+
+
+def test_every_route_has_scenario():
+    """New routes in main.py must get a benchmark scenario"""
+    from main import app
+    
+    assert uncovered_routes(app) == []
+
+
+@run_benchmarks
+@pytest.mark.parametrize("size_label", os.environ.get("BENCH_SIZES", "1k").split(","))
+def test_routes_within_baseline(size_label):
+    """p95 latency and queries per request must not regress"""
+    with open(DEFAULT_BASELINE) as f:
+        baseline = json.load(f)
+    
+    results = {size_label: run_size(size_label)}
+    
+    assert compare_with_baseline(results, baseline) == []
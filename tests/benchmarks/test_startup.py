@@ -0,0 +1,30 @@
+"""
+Cold-start benchmark (opt-in: RUN_BENCHMARKS=1)
+
+Compares import, app startup and test collection time with
+startup_baseline.json; refresh it with
+`python scripts/measure_startup.py --update-baseline`.
+"""
+import os
+import sys
+import json
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from scripts.measure_startup import measure_all, compare_with_baseline, DEFAULT_BASELINE
+
+pytestmark = pytest.mark.skipif(
+    not os.environ.get("RUN_BENCHMARKS"),
+    reason="benchmarks are opt-in (set RUN_BENCHMARKS=1)"
+)
+
+
+def test_cold_start_within_baseline():
+    """Cold start must stay within 50% of the stored baseline"""
+    with open(DEFAULT_BASELINE) as f:
+        baseline = json.load(f)
+    
+    results = measure_all(runs=3)
+    
+    assert compare_with_baseline(results, baseline) == []
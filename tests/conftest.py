@@ -26,8 +26,11 @@ def test_db_path():
     """
     Create a temporary SQLite file for tests.
     
-    Sets DATABASE_PATH and DATABASE_URL environment variables.
-    Creates all tables from models.py.
+    Sets DATABASE_PATH and DATABASE_URL environment variables and points
+    models.py at the file via configure_database().
+    Creates all tables from models.py, stamps the current schema version
+    and runs ensure_db() as an app's lifespan would, so requests find an
+    initialized database.
     Returns the path to the database file.
     """
     # Create temporary file
@@ -38,16 +41,8 @@ def test_db_path():
     os.environ["DATABASE_PATH"] = db_path
     os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
     
-    # Now import and set up
-    # Force reimport of models to pick up new env vars
-    if 'models' in sys.modules:
-        del sys.modules['models']
-    if 'main' in sys.modules:
-        del sys.modules['main']
-    if 'dual_write' in sys.modules:
-        del sys.modules['dual_write']
-    
-    from models import Base
+    from models import Base, SCHEMA_VERSION, configure_database, ensure_db
+    configure_database(db_path)
     
     # Create engine and all tables
     engine = create_engine(
@@ -55,7 +50,10 @@ def test_db_path():
         connect_args={"check_same_thread": False}
     )
     Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        conn.exec_driver_sql(f"PRAGMA user_version = {SCHEMA_VERSION}")
     engine.dispose()
+    ensure_db()
     
     yield db_path
     
@@ -71,15 +69,17 @@ def test_db_path():
         del os.environ["DATABASE_PATH"]
     if "DATABASE_URL" in os.environ:
         del os.environ["DATABASE_URL"]
+    
+    from settings import Settings
+    defaults = Settings.from_env()
+    configure_database(defaults.database_path, defaults.database_url)
 
 
 @pytest.fixture(scope="function")
 def test_engine(test_db_path):
-    """Create an engine for the test database"""
-    engine = create_engine(
-        f"sqlite:///{test_db_path}",
-        connect_args={"check_same_thread": False}
-    )
+    """Create an (instrumented) engine for the test database"""
+    from models import create_db_engine
+    engine = create_db_engine(f"sqlite:///{test_db_path}")
     yield engine
     engine.dispose()
 
@@ -101,21 +101,20 @@ def test_db(test_engine):
 
 
 @pytest.fixture(scope="function")
-def client(test_db_path, test_db):
+def client(test_db_path, test_db, tmp_path):
     """
     FastAPI test client with isolated database.
     
-    Overrides the get_db dependency to use the test database.
+    Builds a fresh app with create_app() for the test database and
+    overrides the get_db dependency to use the test session.
     All API calls will use the test database.
     """
     from fastapi.testclient import TestClient
-    
-    # Force reimport of main with new database path
-    if 'main' in sys.modules:
-        del sys.modules['main']
-    
-    from main import app
+    from main import create_app
     from models import get_db
+    from settings import Settings
+    
+    app = create_app(Settings(database_path=test_db_path, log_dir=str(tmp_path / "logs")))
     
     def override_get_db():
         yield test_db
@@ -134,9 +133,6 @@ def sample_bhajan(test_db):
     
     Returns the bhajan object after committing it to the test database.
     """
-    # Force reimport to ensure we use test database
-    if 'models' in sys.modules:
-        del sys.modules['models']
     from models import Bhajan
     
     bhajan = Bhajan(
@@ -159,8 +155,6 @@ def sample_bhajans(test_db):
     
     Returns a list of bhajan objects.
     """
-    if 'models' in sys.modules:
-        del sys.modules['models']
     from models import Bhajan
     
     bhajans_data = [
@@ -205,8 +199,6 @@ def sample_tag_taxonomy(test_db):
     
     Creates a small hierarchy: Deity -> Vishnu -> Krishna, Rama
     """
-    if 'models' in sys.modules:
-        del sys.modules['models']
     from models import TagTaxonomy, TagTranslation, TagSynonym
     
     # Root category
@@ -298,13 +290,36 @@ def sample_tag_taxonomy(test_db):
     }
 
 
+@pytest.fixture
+def create_tagged_bhajans(request, client):
+    """
+    Create bhajans through the API and tag them from sample_tag_taxonomy.
+
+    Call with {title: [taxonomy keys]} and optionally {title: lyrics};
+    lyrics default to "<title> lyrics, sung with devotion". Returns
+    {title: id} in creation order. The taxonomy is only created once a
+    bhajan asks for tags, so untagged catalogues stay tag-free.
+    """
+    def create(tags, lyrics=None):
+        ids = {}
+        for title, names in tags.items():
+            text = (lyrics or {}).get(title, f"{title} lyrics, sung with devotion")
+            bhajan = client.post("/api/bhajans", data={"title": title, "lyrics": text, "tags": ""}).json()
+            if names:
+                taxonomy = request.getfixturevalue("sample_tag_taxonomy")
+                tag_ids = ",".join(str(taxonomy[name].id) for name in names)
+                client.put(f"/api/bhajans/{bhajan['id']}", data={"tags": tag_ids})
+            ids[title] = bhajan["id"]
+        return ids
+
+    return create
+
+
 @pytest.fixture
 def sample_bhajan_with_tags(test_db, sample_tag_taxonomy):
     """
     Create a bhajan with taxonomy tags (bhajan_tags table).
     """
-    if 'models' in sys.modules:
-        del sys.modules['models']
     from models import Bhajan, BhajanTag
     
     bhajan = Bhajan(
@@ -0,0 +1,137 @@
+"""
+Test fingerprinted static assets (assets.py): scripts/fingerprint_static.py,
+rewritten pages and the Cache-Control of fingerprinted files.
+"""
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from assets import IMMUTABLE, MANIFEST_NAME, content_hash, is_fingerprinted, rewrite_references
+from scripts.fingerprint_static import fingerprint_static
+
+INDEX = """<html><head>
+<link rel="stylesheet" href="/style.css?v=86">
+<script src="/app.js?v=1008"></script>
+</head><body><img src="/logo.png"><a href="/about">About</a></body></html>
+"""
+SERVICE_WORKER = "const ASSET_VERSION = '__ASSET_VERSION__';\nconst PRECACHE_URLS = ['/', '/app.js?v=1008'];\n"
+
+
+def write_static(static_dir):
+    static_dir.mkdir(exist_ok=True)
+    (static_dir / "index.html").write_text(INDEX)
+    (static_dir / "app.js").write_text("const logo = '/logo.png';\nconst worker = '/worker.js?v=1';\n")
+    (static_dir / "worker.js").write_text("self.onmessage = () => {};\n")
+    (static_dir / "style.css").write_text("body { background: url(/logo.png); }\n")
+    (static_dir / "logo.png").write_bytes(b"\x89PNG" + b"\0" * 100)
+    (static_dir / "service-worker.js").write_text(SERVICE_WORKER)
+
+
+def manifest_of(static_dir):
+    return json.loads((static_dir / MANIFEST_NAME).read_text())
+
+
+@pytest.fixture
+def asset_client(tmp_path, test_db_path):
+    """Client whose static_dir has been fingerprinted"""
+    from fastapi.testclient import TestClient
+    from main import create_app
+    from settings import Settings
+
+    static_dir = tmp_path / "static"
+    write_static(static_dir)
+    fingerprint_static(str(static_dir))
+    app = create_app(Settings(database_path=test_db_path, static_dir=str(static_dir), log_dir=str(tmp_path / "logs")))
+    with TestClient(app) as client:
+        yield client, static_dir
+
+
+class TestFingerprintScript:
+    def test_copies_and_manifest(self, tmp_path):
+        write_static(tmp_path)
+
+        totals = fingerprint_static(str(tmp_path))
+        manifest = manifest_of(tmp_path)
+
+        assert sorted(manifest) == ["app.js", "logo.png", "style.css", "worker.js"]
+        assert totals == {"assets": 4, "written": 4, "removed": 0}
+        assert manifest["logo.png"] == f"logo.{content_hash((tmp_path / 'logo.png').read_bytes())}.png"
+        assert all(is_fingerprinted(copy) and (tmp_path / copy).exists() for copy in manifest.values())
+
+        # References inside copies point at copies, and the copy is hashed after rewriting
+        script = (tmp_path / manifest["app.js"]).read_text()
+        assert f"'/{manifest['logo.png']}'" in script and f"'/{manifest['worker.js']}'" in script
+        assert manifest["app.js"] == f"app.{content_hash(script.encode())}.js"
+        assert f"url(/{manifest['logo.png']})" in (tmp_path / manifest["style.css"]).read_text()
+
+    def test_rerun_keeps_unchanged_and_drops_old_copies(self, tmp_path):
+        write_static(tmp_path)
+        fingerprint_static(str(tmp_path))
+        first = manifest_of(tmp_path)
+
+        assert fingerprint_static(str(tmp_path)) == {"assets": 4, "written": 0, "removed": 0}
+
+        # A changed image changes its own hash and the hashes of what shows it
+        (tmp_path / "logo.png").write_bytes(b"\x89PNG" + b"\1" * 100)
+        assert fingerprint_static(str(tmp_path)) == {"assets": 4, "written": 3, "removed": 3}
+        second = manifest_of(tmp_path)
+        assert second["worker.js"] == first["worker.js"]
+        assert all(second[name] != first[name] for name in ("logo.png", "app.js", "style.css"))
+        assert not (tmp_path / first["app.js"]).exists()
+
+    def test_rewrite_references(self):
+        manifest = {"app.js": "app.0123abcd.js"}
+
+        assert rewrite_references('<script src="/app.js?v=7">', manifest) == '<script src="/app.0123abcd.js">'
+        # Only whole, absolute references
+        assert rewrite_references('"/static/app.js" "/app.jsx" app.js', manifest) == '"/static/app.js" "/app.jsx" app.js'
+
+
+class TestServing:
+    def test_pages_reference_fingerprinted_assets(self, asset_client):
+        client, static_dir = asset_client
+        manifest = manifest_of(static_dir)
+
+        for url in ("/", "/some/spa/route"):
+            response = client.get(url)
+            assert response.headers["cache-control"] == "no-cache"
+            assert f'src="/{manifest["app.js"]}"' in response.text
+            assert f'href="/{manifest["style.css"]}"' in response.text
+            assert 'href="/about"' in response.text
+
+        etag = client.get("/").headers["etag"]
+        assert client.get("/", headers={"If-None-Match": etag}).status_code == 304
+
+    def test_service_worker_is_versioned(self, asset_client):
+        client, static_dir = asset_client
+
+        script = client.get("/service-worker.js").text
+        assert "__ASSET_VERSION__" not in script
+        assert f"'/{manifest_of(static_dir)['app.js']}'" in script
+
+    def test_fingerprinted_files_are_immutable(self, asset_client):
+        client, static_dir = asset_client
+        copy = manifest_of(static_dir)["app.js"]
+
+        for url in (f"/{copy}", f"/static/{copy}"):
+            response = client.get(url)
+            assert response.status_code == 200
+            assert response.headers["cache-control"] == IMMUTABLE
+
+        original = client.get("/app.js")
+        assert "cache-control" not in original.headers
+        assert client.get("/app.js", headers={"If-None-Match": original.headers["etag"]}).status_code == 304
+
+    def test_manifest_is_reloaded(self, asset_client):
+        client, static_dir = asset_client
+
+        (static_dir / MANIFEST_NAME).unlink()
+
+        response = client.get("/")
+        assert response.text == INDEX
+        assert "cache-control" not in response.headers
+        assert "__ASSET_VERSION__" in client.get("/service-worker.js").text
@@ -0,0 +1,129 @@
+"""
+Test response compression (compression.py): precompressed static files,
+the JSON compression middleware and scripts/precompress_static.py.
+"""
+import gzip
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from compression import accepted_encodings, choose_encoding, compress_file, static_variant
+
+SCRIPT = "const greeting = 'jai shri ram';\n" * 200
+
+
+@pytest.fixture
+def static_client(tmp_path, test_db_path):
+    """Client whose static_dir holds app.js (plus a .gz variant) and index.html"""
+    from fastapi.testclient import TestClient
+    from main import create_app
+    from settings import Settings
+
+    static_dir = tmp_path / "static"
+    static_dir.mkdir()
+    (static_dir / "app.js").write_text(SCRIPT)
+    (static_dir / "index.html").write_text("<html>" + "<p>bhajan</p>" * 200 + "</html>")
+    (static_dir / "logo.png").write_bytes(b"\x89PNG" + b"\0" * 2000)
+    compress_file(str(static_dir / "app.js"))
+    (static_dir / "logo.png.gz").write_bytes(gzip.compress((static_dir / "logo.png").read_bytes()))
+    app = create_app(Settings(database_path=test_db_path, static_dir=str(static_dir), log_dir=str(tmp_path / "logs")))
+    with TestClient(app) as client:
+        yield client, static_dir
+
+
+class TestNegotiation:
+    def test_accepted_encodings(self):
+        assert accepted_encodings("gzip, deflate, br") == {"gzip", "deflate", "br"}
+        assert accepted_encodings("br;q=0, gzip;q=0.5") == {"gzip"}
+        assert accepted_encodings(None) == set()
+
+    def test_choose_encoding(self):
+        assert choose_encoding("gzip, br", ("br", "gzip")) == "br"
+        assert choose_encoding("gzip", ("br", "gzip")) == "gzip"
+        assert choose_encoding("identity", ("gzip",)) is None
+        assert choose_encoding("*", ("gzip",)) == "gzip"
+
+    def test_stale_variant_is_ignored(self, tmp_path):
+        path = tmp_path / "app.js"
+        path.write_text(SCRIPT)
+        compress_file(str(path))
+        assert static_variant(str(path), "gzip") == (str(path) + ".gz", "gzip")
+        assert static_variant(str(path), "identity") == (str(path), None)
+
+        stat = os.stat(path)
+        os.utime(path, (stat.st_atime, stat.st_mtime + 10))
+        assert static_variant(str(path), "gzip") == (str(path), None)
+
+
+class TestStaticFiles:
+    """Test precompressed variants through serve_static and the /static mount"""
+
+    def test_gzip_variant(self, static_client):
+        client, static_dir = static_client
+
+        for url in ("/app.js", "/static/app.js"):
+            response = client.get(url, headers={"Accept-Encoding": "gzip"})
+            assert response.headers["content-encoding"] == "gzip"
+            assert response.headers["content-type"].startswith(("application/javascript", "text/javascript"))
+            assert "Accept-Encoding" in response.headers["vary"]
+            assert int(response.headers["content-length"]) == os.path.getsize(static_dir / "app.js.gz")
+            assert response.text == SCRIPT
+
+    def test_original_without_variant_or_encoding(self, static_client):
+        client, _ = static_client
+
+        plain = client.get("/app.js", headers={"Accept-Encoding": "identity"})
+        assert "content-encoding" not in plain.headers
+        assert plain.text == SCRIPT
+
+        index = client.get("/", headers={"Accept-Encoding": "gzip"})  # no index.html.gz yet
+        assert "content-encoding" not in index.headers
+        assert index.headers["content-type"].startswith("text/html")
+
+    def test_binary_files_are_sent_as_is(self, static_client):
+        client, _ = static_client
+
+        assert "content-encoding" not in client.get("/logo.png", headers={"Accept-Encoding": "gzip"}).headers
+
+
+class TestCompressionMiddleware:
+    """Test on-the-fly compression of JSON responses"""
+
+    def test_large_json_is_gzipped(self, client):
+        for n in range(20):
+            client.post("/api/bhajans", data={"title": f"Bhajan {n}", "lyrics": "Sri rama jaya rama " * 20, "tags": ""})
+
+        response = client.get("/api/bhajans", headers={"Accept-Encoding": "gzip"})
+        assert response.headers["content-encoding"] == "gzip"
+        assert "Accept-Encoding" in response.headers["vary"]
+        assert len(response.json()) == 20  # decoded by the client
+        assert int(response.headers["content-length"]) < len(response.content)
+
+        plain = client.get("/api/bhajans", headers={"Accept-Encoding": "identity"})
+        assert "content-encoding" not in plain.headers
+        assert plain.json() == response.json()
+
+    def test_small_json_is_sent_as_is(self, client):
+        response = client.get("/health", headers={"Accept-Encoding": "gzip"})
+
+        assert response.status_code == 200
+        assert "content-encoding" not in response.headers
+
+
+class TestPrecompressScript:
+    def test_writes_and_cleans_variants(self, tmp_path):
+        from scripts.precompress_static import precompress
+
+        (tmp_path / "app.js").write_text(SCRIPT)
+        (tmp_path / "tiny.css").write_text("body {}")
+        (tmp_path / "gone.js.gz").write_bytes(b"stale")
+
+        totals = precompress(str(tmp_path), min_size=1024)
+
+        assert gzip.decompress((tmp_path / "app.js.gz").read_bytes()).decode() == SCRIPT
+        assert not (tmp_path / "tiny.css.gz").exists()
+        assert not (tmp_path / "gone.js.gz").exists()
+        assert totals["files"] == 1 and totals["removed"] == 1
@@ -0,0 +1,148 @@
+"""
+Test the trigram index behind typo-tolerant search (fuzzy_index.py) and
+its use in /api/search.
+"""
+import os
+import sys
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from fuzzy_index import TrigramIndex, similarity, trigrams
+
+
+class TestTrigrams:
+    """Test trigram helpers"""
+
+    def test_padded_trigrams(self):
+        assert trigrams("ram") == {"  r", " ra", "ram", "am "}
+
+    def test_similarity(self):
+        assert similarity("hanuman", "hanuman") == 1.0
+        assert 0.3 < similarity("calis", "cals") < 1.0
+        assert similarity("hanuman", "ganes") < 0.3
+
+
+class TestTrigramIndex:
+    """Test TrigramIndex lookups and incremental updates"""
+
+    @pytest.fixture
+    def index(self):
+        index = TrigramIndex()
+        index.add_text(("bhajan", 1), ["Hanuman Chalisa"])
+        index.add_text(("bhajan", 2), ["Ganesha Stotra"])
+        index.add_text(("bhajan", 3), ["ಹನುಮಾನ್ ಆರತಿ"])
+        index.add_text(("tag", 10), ["Krishna", "ಕೃಷ್ಣ", "Govinda"])
+        return index
+
+    def test_exact_words_score_one(self, index):
+        assert index.search("hanuman chalisa") == [(("bhajan", 1), 1.0)]
+
+    def test_typos_match(self, index):
+        keys = [key for key, _ in index.search("hanumn chalsa")]
+
+        assert keys == [("bhajan", 1)]
+
+    def test_spelling_variants_across_scripts(self, index):
+        results = index.search("hanumaan")
+
+        assert {key for key, _ in results} == {("bhajan", 1), ("bhajan", 3)}
+        assert all(score == 1.0 for _, score in results)
+
+    def test_every_query_word_must_match(self, index):
+        assert index.search("hanuman stotra") == []
+
+    def test_tag_synonyms_and_kind_filter(self, index):
+        assert index.search("govind", kind="tag")[0][0] == ("tag", 10)
+        assert index.search("govind", kind="bhajan") == []
+
+    def test_short_words_match_exactly(self, index):
+        index.add_text(("bhajan", 4), ["Raj Darbar"])
+
+        assert index.search("ram") == []
+        assert [key for key, _ in index.search("raj")] == [("bhajan", 4)]
+
+    def test_reindex_and_remove(self, index):
+        vocabulary = index.vocabulary_size()
+
+        index.add_text(("bhajan", 1), ["Maruti Stuti"])
+        assert ("bhajan", 1) not in [key for key, _ in index.search("chalisa")]
+        assert index.search("maruti")[0][0] == ("bhajan", 1)
+
+        index.remove(("bhajan", 1))
+        index.remove(("bhajan", 1))
+        assert index.search("maruti") == []
+        # "calis" is gone; "hanuman" is still used by bhajan 3
+        assert index.vocabulary_size() == vocabulary - 1
+        assert len(index) == 3
+
+    def test_load_from_database(self, test_db_path, sample_bhajan_with_tags, sample_tag_taxonomy):
+        from models import get_connection
+
+        index = TrigramIndex()
+        index.ensure_loaded(get_connection)
+
+        assert index.loaded
+        assert ("bhajan", sample_bhajan_with_tags.id) in [key for key, _ in index.search("chaleesa")]
+        hanuman = sample_tag_taxonomy["hanuman"].id
+        assert ("tag", hanuman) in [key for key, _ in index.search("anjaneyaa")]
+
+
+class TestFuzzySearchAPI:
+    """Test fuzzy candidates merged into /api/search"""
+
+    @pytest.fixture
+    def created(self, client):
+        response = client.post("/api/bhajans", data={
+            "title": "Hanuman Chalisa",
+            "lyrics": "Shri guru charan saroj raj nij man mukur sudhari",
+            "tags": ""
+        })
+        assert response.status_code == 200
+        return response.json()
+
+    @pytest.mark.parametrize("query", ["hanumaan", "chaleesa", "hanumn chalsa"])
+    def test_misspelled_title(self, client, created, query):
+        results = client.get("/api/search", params={"q": query}).json()
+
+        assert [r["id"] for r in results] == [created["id"]]
+
+    def test_fuzzy_ranks_below_exact(self, client, created):
+        exact = client.post("/api/bhajans", data={
+            "title": "Hanumn Stuti",
+            "lyrics": "Anjaneya stuti lyrics for the typo test",
+            "tags": ""
+        }).json()
+
+        results = client.get("/api/search", params={"q": "hanumn"}).json()
+
+        assert [r["id"] for r in results] == [exact["id"], created["id"]]
+        # Title match (100) + its BM25 (30); fuzzy matches score at most 60
+        assert results[0]["relevance"] == 130
+        assert results[1]["relevance"] < 60
+
+    def test_fuzzy_tag_synonym(self, client, sample_bhajan_with_tags):
+        results = client.get("/api/search", params={"q": "maaroothi"}).json()
+
+        assert [r["id"] for r in results] == [sample_bhajan_with_tags.id]
+
+    def test_index_follows_writes(self, client, created):
+        client.get("/api/search", params={"q": "hanuman"})  # load the index
+
+        client.put(f"/api/bhajans/{created['id']}", data={"title": "Ganapati Stotra"})
+        assert client.get("/api/search", params={"q": "ganapthi"}).json()[0]["id"] == created["id"]
+
+        client.delete(f"/api/bhajans/{created['id']}")
+        assert client.get("/api/search", params={"q": "ganapthi"}).json() == []
+
+    def test_new_tag_synonym_is_indexed(self, client, created):
+        client.get("/api/search", params={"q": "hanuman"})  # load the index
+        response = client.post("/api/tags", json={
+            "name": "Pavanaputra", "category": "deity", "synonyms": ["Vayuputra"]
+        })
+        tag_id = response.json()["id"]
+        client.put(f"/api/bhajans/{created['id']}", data={"tags": str(tag_id)})
+
+        results = client.get("/api/search", params={"q": "vaayuputhra"}).json()
+
+        assert [r["id"] for r in results] == [created["id"]]
@@ -0,0 +1,117 @@
+"""
+Test query count and SQL timing instrumentation.
+
+Covers the sqlite3 connection/cursor hooks, the per-request middleware
+(Server-Timing / X-Query-Count headers), the debug endpoint and per-route
+query budgets.
+"""
+import os
+import sys
+import sqlite3
+import pytest
+from fastapi.testclient import TestClient
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from instrumentation import InstrumentedConnection, QueryLog, track_queries
+
+
+def query_count(response) -> int:
+    return int(response.headers["X-Query-Count"])
+
+
+class TestConnectionHooks:
+    """Test InstrumentedConnection / InstrumentedCursor"""
+
+    def test_counts_statements_and_rows(self):
+        conn = sqlite3.connect(":memory:", factory=InstrumentedConnection)
+
+        with track_queries() as stats:
+            conn.execute("CREATE TABLE t (x INTEGER)")
+            conn.executemany("INSERT INTO t VALUES (?)", [(1,), (2,), (3,)])
+            rows = conn.execute("SELECT x FROM t").fetchall()
+            cursor = conn.cursor()
+            cursor.execute("SELECT x FROM t WHERE x > 1")
+            iterated = [row for row in cursor]
+
+        assert len(rows) == 3
+        assert len(iterated) == 2
+        assert stats.query_count == 4
+        assert stats.rows == 5
+        assert stats.slowest_statement is not None
+        conn.close()
+
+    def test_no_recording_outside_tracking(self):
+        conn = sqlite3.connect(":memory:", factory=InstrumentedConnection)
+        conn.execute("SELECT 1").fetchall()
+
+        with track_queries() as stats:
+            pass
+
+        assert stats.query_count == 0
+        conn.close()
+
+    def test_query_log_aggregates_routes(self):
+        log = QueryLog(maxlen=2)
+        for count in (1, 5, 3):
+            log.record({"route": "/api/x", "query_count": count, "sql_ms": 1.0})
+
+        snapshot = log.snapshot()
+
+        assert len(snapshot["recent"]) == 2
+        assert snapshot["routes"]["/api/x"]["requests"] == 3
+        assert snapshot["routes"]["/api/x"]["max_queries"] == 5
+
+
+class TestRequestInstrumentation:
+    """Test middleware headers and per-route query budgets"""
+
+    def test_server_timing_header(self, client, sample_bhajans):
+        response = client.get("/api/stats")
+
+        assert response.status_code == 200
+        assert "db;dur=" in response.headers["Server-Timing"]
+        assert "app;dur=" in response.headers["Server-Timing"]
+        assert query_count(response) >= 1
+
+    def test_health_runs_no_queries(self, client):
+        assert query_count(client.get("/health")) == 0
+
+    def test_get_bhajan_budget(self, client, sample_bhajan):
+        response = client.get(f"/api/bhajans/{sample_bhajan.id}")
+
+        assert response.status_code == 200
+        # Existence check + get_bhajan_with_unified_tags (row, tags, fallback)
+        assert query_count(response) <= 4
+
+    def test_tags_tree_budget(self, client, sample_tag_taxonomy):
+        response = client.get("/api/tags/tree")
+
+        assert response.status_code == 200
+        assert query_count(response) <= 1 + len(sample_tag_taxonomy)
+
+
+class TestDebugEndpoint:
+    """Test GET /api/debug/queries"""
+
+    @pytest.fixture
+    def debug_client(self, test_db_path, tmp_path):
+        from main import create_app
+        from settings import Settings
+
+        app = create_app(Settings(database_path=test_db_path, log_dir=str(tmp_path / "logs"), debug=True))
+        return TestClient(app)
+
+    def test_reports_recent_requests(self, debug_client):
+        debug_client.get("/api/tags")
+
+        data = debug_client.get("/api/debug/queries").json()
+
+        assert data["recent"][-1]["route"] == "/api/tags"
+        assert data["recent"][-1]["query_count"] >= 1
+        assert data["routes"]["/api/tags"]["requests"] == 1
+
+    def test_disabled_by_default(self, client):
+        response = client.get("/api/debug/queries")
+
+        assert response.headers["content-type"].startswith("text/html")
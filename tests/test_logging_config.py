@@ -0,0 +1,136 @@
+"""
+Test the queued logging pipeline helpers: JSON formatting, request log
+sampling and rotation settings.
+"""
+import io
+import os
+import sys
+import json
+import queue
+import logging
+from logging.handlers import QueueListener
+import pytest
+from fastapi.testclient import TestClient
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from logging_config import JsonFormatter, RecordQueueHandler, RequestLogSampler
+
+
+class TestJsonFormatter:
+    """Test JsonFormatter output"""
+
+    def test_merges_extra_fields(self):
+        record = logging.makeLogRecord({
+            "name": "instrumentation", "levelname": "INFO", "levelno": logging.INFO,
+            "msg": "GET %s", "args": ("/api/tags",),
+            "request_stats": {"route": "/api/tags", "query_count": 2}
+        })
+
+        entry = json.loads(JsonFormatter().format(record))
+
+        assert entry["message"] == "GET /api/tags"
+        assert entry["logger"] == "instrumentation"
+        assert entry["request_stats"]["query_count"] == 2
+        assert "args" not in entry
+
+    def test_one_line_with_unicode(self):
+        record = logging.makeLogRecord({"msg": "ಹನುಮ\nline two", "levelname": "INFO"})
+
+        output = JsonFormatter().format(record)
+
+        assert "\n" not in output
+        assert "ಹನುಮ" in output
+
+
+class TestRecordQueueHandler:
+    """Test records passed through the queue to the listener's formatter"""
+
+    def test_traceback_reaches_json_output(self):
+        records = queue.Queue()
+        stream = io.StringIO()
+        output = logging.StreamHandler(stream)
+        output.setFormatter(JsonFormatter())
+        listener = QueueListener(records, output)
+        logger = logging.getLogger("test_logging_config.queued")
+        logger.propagate = False
+        handler = RecordQueueHandler(records)
+        logger.addHandler(handler)
+
+        listener.start()
+        try:
+            raise ValueError("bad bhajan %s" % 42)
+        except ValueError:
+            logger.exception("Failed to save %s", "Rama Stuti")
+        finally:
+            listener.stop()
+            logger.removeHandler(handler)
+
+        entry = json.loads(stream.getvalue())
+        assert entry["message"] == "Failed to save Rama Stuti"
+        assert "Traceback (most recent call last)" in entry["exc_info"]
+        assert "ValueError: bad bhajan 42" in entry["exc_info"]
+
+
+class TestRequestLogSampler:
+    """Test per-route sampling of successful request logs"""
+
+    def test_rate_is_exact(self):
+        sampler = RequestLogSampler(default_rate=0.25)
+
+        logged = [sampler.should_log("/api/bhajans", 200) for _ in range(100)]
+
+        assert sum(logged) == 25
+        assert logged[:4] == [True, False, False, False]
+
+    def test_errors_and_slow_requests_always_logged(self):
+        sampler = RequestLogSampler(default_rate=0)
+
+        assert sampler.should_log("/api/bhajans", 200) is False
+        assert sampler.should_log("/api/bhajans", 404) is True
+        assert sampler.should_log("/api/bhajans", 500) is True
+        assert sampler.should_log("/api/bhajans", 200, slow=True) is True
+
+    def test_route_overrides_from_spec(self):
+        sampler = RequestLogSampler.from_spec(1.0, "/health=0, /api/bhajans/{bhajan_id}=0.5")
+
+        assert sampler.route_rates == {"/health": 0.0, "/api/bhajans/{bhajan_id}": 0.5}
+        assert not any(sampler.should_log("/health", 200) for _ in range(10))
+        assert sum(sampler.should_log("/api/bhajans/{bhajan_id}", 200) for _ in range(10)) == 5
+        assert sampler.should_log("/api/tags", 200)
+
+
+class TestRequestLogging:
+    """Test sampled access lines from QueryTimingMiddleware"""
+
+    @pytest.fixture
+    def sampled_client(self, test_db_path, tmp_path):
+        from main import create_app
+        from settings import Settings
+
+        app = create_app(Settings(
+            database_path=test_db_path, log_dir=str(tmp_path / "logs"),
+            log_sample_rate=0.5, log_sample_routes="/health=0"
+        ))
+        return TestClient(app)
+
+    def test_success_logs_sampled(self, sampled_client, caplog):
+        with caplog.at_level(logging.INFO, logger="instrumentation"):
+            for _ in range(4):
+                sampled_client.get("/api/tags")
+                sampled_client.get("/health")
+            sampled_client.get("/api/bhajans/999999")
+
+        records = [r for r in caplog.records if r.name == "instrumentation"]
+        routes = [r.request_stats["route"] for r in records]
+
+        assert routes.count("/api/tags") == 2
+        assert "/health" not in routes
+        assert records[-1].request_stats["status"] == 404
+
+    def test_handlers_do_not_log_at_info(self, sampled_client, caplog):
+        with caplog.at_level(logging.INFO):
+            sampled_client.get("/")
+            sampled_client.get("/api/stats")
+
+        assert not [r for r in caplog.records if r.name == "main"]
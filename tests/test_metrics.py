@@ -0,0 +1,123 @@
+"""
+Test the Prometheus-style metrics registry and GET /metrics.
+"""
+import os
+import sys
+import pytest
+from fastapi.testclient import TestClient
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from metrics import Counter, Gauge, Histogram, PortalMetrics
+
+
+def sample(text: str, line_prefix: str) -> float:
+    """Value of the first exposition line starting with line_prefix"""
+    for line in text.splitlines():
+        if line.startswith(line_prefix):
+            return float(line.rsplit(" ", 1)[1])
+    raise AssertionError(f"no sample {line_prefix!r}")
+
+
+class TestRegistry:
+    """Test metric primitives and exposition format"""
+
+    def test_counter_labels(self):
+        counter = Counter("hits_total", "Hits", ("route",))
+        counter.inc(route="/a")
+        counter.inc(2, route="/a")
+        counter.inc(route='/b"x')
+
+        lines = counter.render()
+
+        assert "# TYPE hits_total counter" in lines
+        assert 'hits_total{route="/a"} 3' in lines
+        assert 'hits_total{route="/b\\"x"} 1' in lines
+
+    def test_histogram_buckets_are_cumulative(self):
+        histogram = Histogram("latency_seconds", "Latency", buckets=(0.1, 1.0))
+        for value in (0.05, 0.5, 0.5, 3.0):
+            histogram.observe(value)
+
+        lines = histogram.render()
+
+        assert 'latency_seconds_bucket{le="0.1"} 1' in lines
+        assert 'latency_seconds_bucket{le="1"} 3' in lines
+        assert 'latency_seconds_bucket{le="+Inf"} 4' in lines
+        assert "latency_seconds_count 4" in lines
+        assert "latency_seconds_sum 4.05" in lines
+
+    def test_gauge_function_evaluated_at_scrape(self):
+        depth = [3]
+        gauge = Gauge("queue_depth", "Depth", ("queue",))
+        gauge.set_function(lambda: depth[0], queue="log")
+        gauge.set_function(lambda: 1 / 0, queue="broken")
+
+        assert 'queue_depth{queue="log"} 3' in gauge.render()
+        depth[0] = 7
+        assert 'queue_depth{queue="log"} 7' in gauge.render()
+        assert not any("broken" in line for line in gauge.render()[2:])
+
+    def test_cache_hit_ratio(self):
+        metrics = PortalMetrics()
+        for hit in (True, True, False, True):
+            metrics.cache_lookup("search", hit)
+
+        text = metrics.render()
+
+        assert sample(text, 'cache_lookups_total{cache="search",result="hit"}') == 3
+        assert sample(text, 'cache_hit_ratio{cache="search"}') == 0.75
+
+
+class TestMetricsEndpoint:
+    """Test GET /metrics"""
+
+    def test_exposition(self, client, sample_bhajan):
+        client.get(f"/api/bhajans/{sample_bhajan.id}")
+        client.get("/api/bhajans/999999")
+
+        response = client.get("/metrics")
+        text = response.text
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+        assert sample(
+            text, 'http_requests_total{method="GET",route="/api/bhajans/{bhajan_id}",status="200"}'
+        ) == 1
+        assert sample(
+            text, 'http_requests_total{method="GET",route="/api/bhajans/{bhajan_id}",status="404"}'
+        ) == 1
+        assert sample(
+            text, 'http_request_duration_seconds_count{method="GET",route="/api/bhajans/{bhajan_id}"}'
+        ) == 2
+        assert sample(text, 'db_queries_per_request_count{route="/api/bhajans/{bhajan_id}"}') == 2
+        # The scrape itself is in flight
+        assert sample(text, "http_requests_in_flight") == 1
+        assert 'db_pool_connections{state="checked_out"}' in text
+
+    def test_static_routes_use_bounded_labels(self, client):
+        client.get("/static/does-not-exist.js")
+
+        text = client.get("/metrics").text
+
+        assert 'route="/static/{path:path}"' in text
+        assert "does-not-exist" not in text
+
+    def test_upload_bytes(self, test_db_path, tmp_path):
+        from main import create_app
+        from settings import Settings
+
+        app = create_app(Settings(database_path=test_db_path, audio_dir=str(tmp_path / "audio"),
+                                    log_dir=str(tmp_path / "logs")))
+        client = TestClient(app)
+
+        response = client.post(
+            "/api/bhajans",
+            data={"title": "Metrics Upload", "lyrics": "ಓಂ ನಮಃ ಶಿವಾಯ ಓಂ ನಮಃ ಶಿವಾಯ"},
+            files={"mp3_file": ("song.mp3", b"\x00" * 2048, "audio/mpeg")}
+        )
+        text = client.get("/metrics").text
+
+        assert response.status_code == 200
+        assert sample(text, 'upload_files_total{kind="mp3"}') == 1
+        assert sample(text, 'upload_bytes_total{kind="mp3"}') == 2048
@@ -17,7 +17,9 @@ from scripts.run_migrations import (
     MigrationRunner,
     calculate_checksum,
     parse_migration_file,
-    get_migration_files
+    get_migration_files,
+    get_schema_version,
+    upgrade_schema
 )
 
 
@@ -319,6 +321,160 @@ class TestHelperFunctions:
         assert all(f.endswith('.sql') for f in files)
 
 
+class TestSchemaUpgrade:
+    """Test in-place schema upgrade of older databases"""
+    
+    def _create_legacy_db(self, path):
+        conn = sqlite3.connect(path)
+        conn.execute("""
+            CREATE TABLE bhajans (
+                id INTEGER PRIMARY KEY,
+                title VARCHAR(255) NOT NULL,
+                lyrics TEXT NOT NULL,
+                manual_tags TEXT
+            )
+        """)
+        conn.execute(
+            "INSERT INTO bhajans (title, lyrics, manual_tags) VALUES (?, ?, ?)",
+            ("Old Bhajan", "Old lyrics", '["Rama"]')
+        )
+        conn.commit()
+        conn.close()
+    
+    def test_upgrade_adds_columns_and_backfills(self, temp_db):
+        """Test that legacy columns are added and backfilled"""
+        self._create_legacy_db(temp_db)
+        
+        result = upgrade_schema(temp_db, 1)
+        
+        assert result['from_version'] == 0
+        assert result['to_version'] == 1
+        assert 'tags' in result['added_columns']
+        assert 'deleted_at' in result['added_columns']
+        
+        conn = sqlite3.connect(temp_db)
+        row = conn.execute(
+            "SELECT tags, uploader_name, created_at FROM bhajans"
+        ).fetchone()
+        conn.close()
+        
+        assert row[0] == '["Rama"]'
+        assert row[1] == 'Unknown'
+        assert row[2] is not None
+        assert get_schema_version(temp_db) == 1
+    
+    def test_upgrade_skips_when_current(self, temp_db):
+        """Test that a current database is not touched again"""
+        self._create_legacy_db(temp_db)
+        upgrade_schema(temp_db, 1)
+        
+        # Rows written after the upgrade must not be backfilled again
+        conn = sqlite3.connect(temp_db)
+        conn.execute(
+            "INSERT INTO bhajans (title, lyrics) VALUES ('New', 'New lyrics')"
+        )
+        conn.commit()
+        conn.close()
+        
+        result = upgrade_schema(temp_db, 1)
+        
+        assert result['from_version'] == 1
+        assert result['added_columns'] == []
+        
+        conn = sqlite3.connect(temp_db)
+        row = conn.execute(
+            "SELECT uploader_name FROM bhajans WHERE title = 'New'"
+        ).fetchone()
+        conn.close()
+        assert row[0] is None
+    
+    def test_upgrade_runs_only_new_steps(self, temp_db):
+        """Test that a version bump does not repeat earlier steps' backfills"""
+        self._create_legacy_db(temp_db)
+        upgrade_schema(temp_db, 1)
+
+        conn = sqlite3.connect(temp_db)
+        conn.execute("INSERT INTO bhajans (title, lyrics) VALUES ('New', 'New lyrics')")
+        conn.commit()
+        conn.close()
+
+        result = upgrade_schema(temp_db, 2)
+
+        assert result['from_version'] == 1
+        assert result['to_version'] == 2
+        assert result['added_columns'] == ['preview']
+
+        conn = sqlite3.connect(temp_db)
+        row = conn.execute("SELECT uploader_name, preview FROM bhajans WHERE title = 'New'").fetchone()
+        conn.close()
+        assert row == (None, 'New lyrics')
+        assert get_schema_version(temp_db) == 2
+
+    def _tables(self, path):
+        conn = sqlite3.connect(path)
+        tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        conn.close()
+        return tables
+
+    def test_upgrade_creates_stats_table(self, temp_db):
+        """Test that the v5 step creates bhajan_stats for popularity counts"""
+        self._create_legacy_db(temp_db)
+
+        upgrade_schema(temp_db, 5)
+
+        assert 'bhajan_stats' in self._tables(temp_db)
+        assert get_schema_version(temp_db) == 5
+
+    def test_upgrade_creates_neighbors_table(self, temp_db):
+        """Test that the v6 step creates bhajan_neighbors for related bhajans"""
+        self._create_legacy_db(temp_db)
+
+        upgrade_schema(temp_db, 6)
+
+        assert 'bhajan_neighbors' in self._tables(temp_db)
+        conn = sqlite3.connect(temp_db)
+        indexes = {row[1] for row in conn.execute("PRAGMA index_list(bhajan_neighbors)")}
+        conn.close()
+        assert 'ix_bhajan_neighbors_neighbor_id' in indexes
+
+    def test_upgrade_creates_and_fills_minhash_tables(self, temp_db):
+        """Test that the v7 step creates the near-duplicate tables and signs existing lyrics"""
+        self._create_legacy_db(temp_db)
+        conn = sqlite3.connect(temp_db)
+        conn.execute("UPDATE bhajans SET lyrics = ?", ("Sri rama jaya rama jaya jaya rama\n" * 4,))
+        conn.commit()
+        conn.close()
+
+        upgrade_schema(temp_db, 7)
+
+        assert {'bhajan_minhash', 'bhajan_lsh'} <= self._tables(temp_db)
+        conn = sqlite3.connect(temp_db)
+        assert conn.execute("SELECT bhajan_id FROM bhajan_minhash").fetchall() == [(1,)]
+        conn.close()
+
+    def test_upgrade_seeds_related_cursor(self, temp_db):
+        """Test that the v9 step starts the related cursor at the newest neighbour list"""
+        self._create_legacy_db(temp_db)
+        upgrade_schema(temp_db, 8)
+        conn = sqlite3.connect(temp_db)
+        conn.execute("INSERT INTO bhajan_neighbors VALUES (1, 0, 1, 0.5, '2026-10-01 00:00:00')")
+        conn.commit()
+        conn.close()
+
+        upgrade_schema(temp_db, 9)
+
+        conn = sqlite3.connect(temp_db)
+        assert conn.execute("SELECT id, ran_at FROM related_runs").fetchall() == [(1, '2026-10-01 00:00:00')]
+        conn.close()
+
+    def test_upgrade_empty_database(self, temp_db):
+        """Test upgrading a database without a bhajans table"""
+        result = upgrade_schema(temp_db, 1)
+        
+        assert result['success'] is True
+        assert get_schema_version(temp_db) == 1
+
+
 class TestErrorHandling:
     """Test error handling"""
     
@@ -0,0 +1,152 @@
+"""
+Test near-duplicate lyric detection (near_duplicates.py), the duplicates
+list on create and /api/bhajans/duplicates.
+"""
+import os
+import sys
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import near_duplicates
+from near_duplicates import BANDS, NUM_HASHES, band_keys, shingles, signature, similarity
+from transliterate import lyric_lines_form
+
+LYRICS = """Sri rama jaya rama jaya jaya rama
+Raghukula tilaka dasharatha nandana
+Sita pati sundara kodanda pani
+Ayodhya vasi ananda rupa
+Hanumat sevita charana kamala
+Bhakta vatsala karuna sagara"""
+
+OTHER_LYRICS = """Om namah shivaya shambho shankara
+Kailasa vasa gauri pate
+Ganga dhara chandra shekhara
+Nila kantha trinetra mahesha"""
+
+
+def jaccard(a, b):
+    return len(a & b) / len(a | b)
+
+
+class TestSignature:
+    """Test shingling, MinHash and banding"""
+
+    def test_shingles(self):
+        assert shingles("sri rama jaya rama") == {"sri rama jaya", "rama jaya rama"}
+        assert shingles("om namah") == {"om namah"}
+        assert shingles("") == set()
+
+    def test_signature(self):
+        sig = signature(lyric_lines_form(LYRICS))
+
+        assert len(sig) == NUM_HASHES
+        assert all(0 <= value < 2 ** 32 for value in sig)
+        assert sig == signature(lyric_lines_form(LYRICS))
+        assert signature("") is None
+        assert len(band_keys(sig)) == BANDS
+
+    def test_similarity_estimates_jaccard(self):
+        lines = LYRICS.split("\n")
+        edited = "\n".join(lines[:-1] + ["Bhakta vatsala daya sagara"])
+        a, b = lyric_lines_form(LYRICS), lyric_lines_form(edited)
+
+        assert similarity(signature(a), signature(a)) == 1.0
+        assert similarity(signature(a), signature(b)) == pytest.approx(jaccard(shingles(a), shingles(b)), abs=0.15)
+        assert similarity(signature(a), signature(lyric_lines_form(OTHER_LYRICS))) < 0.2
+
+    def test_short_lyrics_fill_every_slot(self):
+        sig = signature("om namah shivaya shambho")
+
+        assert len(set(sig)) == NUM_HASHES  # densified slots differ from the one they borrow from
+
+
+class TestStorage:
+    """Test store/find/report against the bhajan_minhash and bhajan_lsh tables"""
+
+    def test_find_matches_across_whitespace_and_case(self, test_db_path, sample_bhajan):
+        from models import get_connection
+
+        conn = get_connection()
+        near_duplicates.store(conn, sample_bhajan.id, signature(lyric_lines_form(LYRICS)))
+        conn.commit()
+
+        copy = lyric_lines_form("  " + LYRICS.upper().replace("\n", "\n   "))
+        assert [m["id"] for m in near_duplicates.find(conn, signature(copy))] == [sample_bhajan.id]
+        assert near_duplicates.find(conn, signature(copy), exclude=sample_bhajan.id) == []
+        assert near_duplicates.find(conn, signature(lyric_lines_form(OTHER_LYRICS))) == []
+        conn.close()
+
+    def test_backfill_and_report(self, test_db_path, sample_bhajans):
+        from models import get_connection
+
+        conn = get_connection()
+        first, second, third = (b.id for b in sample_bhajans)
+        conn.executemany("UPDATE bhajans SET lyrics_roman = ? WHERE id = ?", [
+            (lyric_lines_form(LYRICS), first),
+            (lyric_lines_form(LYRICS + "\nJaya jaya rama"), second),
+            (lyric_lines_form(OTHER_LYRICS), third),
+        ])
+        assert near_duplicates.backfill(conn) == 3
+        assert near_duplicates.backfill(conn) == 0
+        conn.commit()
+
+        groups = near_duplicates.report(conn)
+        assert [[b["id"] for b in group] for group in groups] == [[first, second]]
+        assert groups[0][0]["similarity"] == 1.0
+
+        conn.execute("UPDATE bhajans SET deleted_at = DATETIME('now') WHERE id = ?", (second,))
+        assert near_duplicates.report(conn) == []
+        conn.close()
+
+    def test_upgrade_signs_existing_bhajans(self, tmp_path):
+        import sqlite3
+        from models import Base, create_db_engine
+        from scripts.run_migrations import upgrade_schema
+
+        db_path = str(tmp_path / "v6.db")
+        engine = create_db_engine(f"sqlite:///{db_path}")
+        Base.metadata.create_all(bind=engine)
+        engine.dispose()
+        conn = sqlite3.connect(db_path)
+        conn.execute("INSERT INTO bhajans (title, lyrics, lyrics_roman) VALUES ('Rama Stuti', ?, ?)",
+                     (LYRICS, lyric_lines_form(LYRICS)))
+        conn.execute("PRAGMA user_version = 6")
+        conn.commit()
+        conn.close()
+
+        upgrade_schema(db_path, 7)
+
+        conn = sqlite3.connect(db_path)
+        assert [m["id"] for m in near_duplicates.find(conn, signature(lyric_lines_form(LYRICS)))] == [1]
+        conn.close()
+
+
+class TestDuplicatesAPI:
+    """Test the duplicates list on create/update and /api/bhajans/duplicates"""
+
+    def test_create_lists_duplicates(self, client):
+        original = client.post("/api/bhajans", data={"title": "Rama Stuti", "lyrics": LYRICS, "tags": ""}).json()
+        assert original["duplicates"] == []
+
+        response = client.post("/api/bhajans", data={"title": "Rama Stuti Copy", "lyrics": LYRICS + "\n", "tags": ""})
+        assert response.status_code == 200
+        assert response.json()["duplicates"] == [{"id": original["id"], "title": "Rama Stuti", "similarity": 1.0}]
+
+    def test_check_endpoint(self, client):
+        original = client.post("/api/bhajans", data={"title": "Rama Stuti", "lyrics": LYRICS, "tags": ""}).json()
+
+        response = client.post("/api/bhajans/duplicates", data={"lyrics": LYRICS})
+        assert response.status_code == 200
+        assert [m["id"] for m in response.json()] == [original["id"]]
+        assert client.post("/api/bhajans/duplicates", data={"lyrics": OTHER_LYRICS}).json() == []
+
+        client.delete(f"/api/bhajans/{original['id']}")
+        assert client.post("/api/bhajans/duplicates", data={"lyrics": LYRICS}).json() == []
+
+    def test_update_resigns_lyrics(self, client):
+        bhajan = client.post("/api/bhajans", data={"title": "Shiva Stuti", "lyrics": OTHER_LYRICS, "tags": ""}).json()
+        client.put(f"/api/bhajans/{bhajan['id']}", data={"lyrics": LYRICS})
+
+        assert [m["id"] for m in client.post("/api/bhajans/duplicates", data={"lyrics": LYRICS}).json()] == [bhajan["id"]]
+        assert client.post("/api/bhajans/duplicates", data={"lyrics": OTHER_LYRICS}).json() == []
@@ -0,0 +1,127 @@
+"""
+Test day/occasion playlists (playlists.py) and /api/playlists.
+"""
+import os
+import sys
+from datetime import date
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from playlists import DAYS, SCHEDULES, PlaylistCache
+from tag_query import parse, resolve_terms
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(__file__), '..', 'migrations')
+
+
+@pytest.fixture
+def catalogue(create_tagged_bhajans):
+    """{title: id} for bhajans created and tagged through the API"""
+    return create_tagged_bhajans({"Rama Stuti": ["rama"], "Krishna Stuti": ["krishna"],
+                                  "Shiva Stuti": ["shiva"], "Hanuman Stuti": ["hanuman"]})
+
+
+def playlist_ids(client, day):
+    response = client.get(f"/api/playlists/{day}")
+    assert response.status_code == 200
+    return [b["id"] for b in response.json()["bhajans"]]
+
+
+class TestPlaylistCache:
+    """Test schedules and name resolution"""
+
+    def test_every_weekday_has_a_schedule(self):
+        assert set(DAYS) <= set(SCHEDULES)
+
+    def test_schedules_resolve_against_shipped_taxonomy(self, tmp_path):
+        import sqlite3
+        from scripts.run_migrations import MigrationRunner
+
+        db_path = str(tmp_path / "taxonomy.db")
+        assert MigrationRunner(db_path, migrations_dir=MIGRATIONS_DIR).run_migrations()["success"]
+        conn = sqlite3.connect(db_path)
+        unresolved = {
+            name: [str(term) for term, tag_ids in resolve_terms(conn, parse(query)).items() if not tag_ids]
+            for name, query in SCHEDULES.items()
+        }
+        conn.close()
+
+        assert {name: terms for name, terms in unresolved.items() if terms} == {}
+
+    def test_resolve_name(self):
+        cache = PlaylistCache(index=None, popularity=None)
+
+        assert cache.resolve_name("Saturday") == "saturday"
+        assert cache.resolve_name("today", today=date(2026, 10, 19)) == "monday"
+        assert cache.resolve_name("morning") == "morning"
+        assert cache.resolve_name("someday") is None
+
+
+class TestPlaylistAPI:
+    """Test /api/playlists/{day}: membership, order, caching and refresh"""
+
+    def test_saturday_follows_the_taxonomy(self, client, catalogue):
+        # Rama and Krishna through their Vishnu parent, plus Hanuman
+        ids = playlist_ids(client, "saturday")
+
+        assert set(ids) == {catalogue["Rama Stuti"], catalogue["Krishna Stuti"], catalogue["Hanuman Stuti"]}
+        assert playlist_ids(client, "wednesday") == [catalogue["Krishna Stuti"]]
+        assert client.get("/api/playlists/someday").status_code == 404
+
+    def test_monday_skips_shivas_descendants(self, client, catalogue):
+        # Hanuman is a child of Shiva but has Tuesday and Saturday of its own
+        assert playlist_ids(client, "monday") == [catalogue["Shiva Stuti"]]
+        assert catalogue["Hanuman Stuti"] in playlist_ids(client, "tuesday")
+
+    def test_most_viewed_first(self, client, catalogue):
+        for _ in range(2):
+            client.post("/api/beacon", json={"bhajan_id": catalogue["Rama Stuti"], "event": "view"})
+        client.post("/api/beacon", json={"bhajan_id": catalogue["Hanuman Stuti"], "event": "view"})
+
+        assert playlist_ids(client, "saturday") == [
+            catalogue["Rama Stuti"], catalogue["Hanuman Stuti"], catalogue["Krishna Stuti"]
+        ]
+
+    def test_cached_response_and_etag(self, client, catalogue):
+        from instrumentation import track_queries
+
+        first = client.get("/api/playlists/saturday")
+        with track_queries() as stats:
+            second = client.get("/api/playlists/saturday")
+
+        assert stats.query_count == 0
+        assert second.content == first.content
+        assert first.headers["etag"] == second.headers["etag"]
+        assert "max-age" in first.headers["cache-control"]
+
+        not_modified = client.get("/api/playlists/saturday", headers={"If-None-Match": first.headers["etag"]})
+        assert not_modified.status_code == 304
+
+    def test_tag_and_bhajan_writes_refresh(self, client, catalogue, sample_tag_taxonomy):
+        etag = client.get("/api/playlists/saturday").headers["etag"]
+
+        client.put(f"/api/bhajans/{catalogue['Shiva Stuti']}", data={"tags": str(sample_tag_taxonomy["vishnu"].id)})
+        assert catalogue["Shiva Stuti"] in playlist_ids(client, "saturday")
+
+        client.delete(f"/api/bhajans/{catalogue['Rama Stuti']}")
+        assert catalogue["Rama Stuti"] not in playlist_ids(client, "saturday")
+
+        client.put(f"/api/bhajans/{catalogue['Krishna Stuti']}", data={"title": "Gopala Stuti"})
+        response = client.get("/api/playlists/saturday")
+        assert "Gopala Stuti" in [b["title"] for b in response.json()["bhajans"]]
+        assert response.headers["etag"] != etag
+
+    def test_new_day_tag_is_picked_up(self, client, catalogue):
+        assert playlist_ids(client, "sunday") == []
+
+        sunday = client.post("/api/tags", json={"name": "Sunday", "category": "day"}).json()
+        client.put(f"/api/bhajans/{catalogue['Shiva Stuti']}", data={"tags": str(sunday["id"])})
+
+        assert playlist_ids(client, "sunday") == [catalogue["Shiva Stuti"]]
+
+    def test_list_playlists(self, client):
+        playlists = client.get("/api/playlists").json()
+
+        assert [p["name"] for p in playlists] == list(SCHEDULES)
+        assert playlists[0]["query"] == SCHEDULES["monday"]
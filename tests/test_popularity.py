@@ -0,0 +1,164 @@
+"""
+Test view/play counting (popularity.py), /api/beacon and popularity in
+listings and search ranking.
+"""
+import os
+import sys
+import time
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from popularity import PopularityCounter
+
+
+def stored_counts(conn):
+    return {row[0]: (row[1], row[2]) for row in conn.execute("SELECT bhajan_id, views, plays FROM bhajan_stats")}
+
+
+class TestPopularityCounter:
+    """Test buffering and batched flushes"""
+
+    def test_counts_include_pending(self, test_db_path, sample_bhajans):
+        from models import get_connection
+
+        counter = PopularityCounter()
+        counter.ensure_loaded(get_connection)
+        first, second = sample_bhajans[0].id, sample_bhajans[1].id
+        for event in ("view", "view", "play"):
+            counter.record(first, event)
+        counter.record(second, "view")
+
+        assert counter.counts(first) == {"views": 2, "plays": 1}
+        assert counter.views([first, second, 999]) == {first: 2, second: 1}
+        assert counter.pending() == 2
+
+    def test_flush_is_one_batch(self, test_db_path, sample_bhajans):
+        from instrumentation import track_queries
+        from models import get_connection
+
+        counter = PopularityCounter()
+        counter.ensure_loaded(get_connection)
+        ids = [b.id for b in sample_bhajans]
+        for bhajan_id in ids:
+            counter.record(bhajan_id, "view")
+        counter.record(ids[0], "play")
+
+        conn = get_connection()
+        with track_queries() as stats:
+            assert counter.flush(conn) == 3
+        assert stats.query_count <= 2  # the upsert batch and the re-read of totals
+        assert stored_counts(conn) == {ids[0]: (1, 1), ids[1]: (1, 0), ids[2]: (1, 0)}
+
+        counter.record(ids[0], "view")
+        counter.flush(conn)
+        assert stored_counts(conn)[ids[0]] == (2, 1)
+        assert counter.pending() == 0
+        assert counter.counts(ids[0]) == {"views": 2, "plays": 1}
+        conn.close()
+
+        reloaded = PopularityCounter()
+        reloaded.ensure_loaded(get_connection)
+        assert reloaded.counts(ids[0]) == {"views": 2, "plays": 1}
+
+    def test_unknown_bhajans_are_dropped(self, test_db_path, sample_bhajan):
+        from models import get_connection
+
+        counter = PopularityCounter()
+        counter.record(sample_bhajan.id, "view")
+        counter.record(424242, "view")
+
+        conn = get_connection()
+        counter.flush(conn)
+        assert stored_counts(conn) == {sample_bhajan.id: (1, 0)}
+        conn.close()
+        assert counter.views([424242]) == {}
+
+    def test_failed_flush_keeps_events(self, test_db_path, sample_bhajan):
+        import sqlite3
+        from models import get_connection
+
+        counter = PopularityCounter()
+        counter.record(sample_bhajan.id, "play")
+        broken = sqlite3.connect(":memory:")
+
+        with pytest.raises(sqlite3.OperationalError):
+            counter.flush(broken)
+        assert counter.pending() == 1
+        assert counter.counts(sample_bhajan.id) == {"views": 0, "plays": 1}
+
+        conn = get_connection()
+        counter.flush(conn)
+        assert stored_counts(conn) == {sample_bhajan.id: (0, 1)}
+        conn.close()
+
+    def test_background_flush(self, test_db_path, sample_bhajans):
+        from models import get_connection
+
+        counter = PopularityCounter(flush_interval=60, max_pending=2)
+        counter.start(get_connection)
+        try:
+            counter.record(sample_bhajans[0].id, "view")
+            counter.record(sample_bhajans[1].id, "view")  # reaches max_pending: early flush
+            deadline = time.monotonic() + 5
+            while counter.pending() and time.monotonic() < deadline:
+                time.sleep(0.01)
+            assert counter.pending() == 0
+
+            counter.record(sample_bhajans[2].id, "play")
+        finally:
+            counter.stop(get_connection)
+
+        conn = get_connection()
+        assert len(stored_counts(conn)) == 3
+        conn.close()
+
+
+class TestBeaconAPI:
+    """Test /api/beacon and popularity in listings and search"""
+
+    def test_beacon(self, client, sample_bhajan):
+        response = client.post("/api/beacon", json={"bhajan_id": sample_bhajan.id, "event": "play"})
+
+        assert response.status_code == 204
+        assert client.app.state.popularity.counts(sample_bhajan.id) == {"views": 0, "plays": 1}
+        assert client.app.state.metrics.popularity_events.value(event="play") == 1
+
+    def test_beacon_rejects_unknown_bhajans_and_events(self, client, sample_bhajan):
+        client.delete(f"/api/bhajans/{sample_bhajan.id}")
+
+        assert client.post("/api/beacon", json={"bhajan_id": sample_bhajan.id, "event": "view"}).status_code == 404
+        assert client.post("/api/beacon", json={"bhajan_id": 999, "event": "view"}).status_code == 404
+        assert client.post("/api/beacon", json={"bhajan_id": 1, "event": "like"}).status_code == 422
+        for bhajan_id in (0, -1):
+            assert client.post("/api/beacon", json={"bhajan_id": bhajan_id, "event": "view"}).status_code == 422
+
+    def test_sort_popular(self, client, sample_bhajans):
+        hanuman, krishna, rama = (b.id for b in sample_bhajans)
+        for bhajan_id, event in [(krishna, "view"), (krishna, "view"), (rama, "view"), (rama, "play")]:
+            client.post("/api/beacon", json={"bhajan_id": bhajan_id, "event": event})
+
+        popular = client.get("/api/bhajans", params={"sort": "popular", "fields": "summary"}).json()
+        newest = client.get("/api/bhajans", params={"fields": "summary"}).json()
+
+        assert [b["id"] for b in popular] == [krishna, rama, hanuman]
+        assert [b["id"] for b in newest] != [b["id"] for b in popular]
+        assert client.get("/api/bhajans", params={"sort": "title"}).status_code == 422
+
+    def test_views_boost_search_ranking(self, client):
+        ids = [
+            client.post("/api/bhajans", data={
+                "title": f"Narayana Stuti {n}", "lyrics": "Om namo narayanaya namah", "tags": ""
+            }).json()["id"]
+            for n in (1, 2)
+        ]
+        before = client.get("/api/search", params={"q": "narayana"}).json()
+        assert [b["id"] for b in before] == ids
+
+        for _ in range(3):
+            client.post("/api/beacon", json={"bhajan_id": ids[1], "event": "view"})
+        client.app.state.search_cache.clear()
+        after = client.get("/api/search", params={"q": "narayana"}).json()
+
+        assert [b["id"] for b in after] == ids[::-1]
+        assert after[0]["relevance"] - after[1]["relevance"] == pytest.approx(20)
@@ -0,0 +1,150 @@
+"""
+Test stored lyric previews, search highlight fragments and the compact
+(?fields=summary) list/search responses.
+"""
+import os
+import sys
+import json
+import sqlite3
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from previews import ELLIPSIS, PREVIEW_MAX_CHARS, highlight_fragments, make_preview
+
+LYRICS = """ಶ್ರೀ ಗುರು ಚರಣ   ಸರೋಜ ರಜ
+    ನಿಜಮನ ಮುಕುರ ಸುಧಾರಿ
+
+ವರಣೌ ರಘುವರ ವಿಮಲಯಶ ಜೋ ದಾಯಕ ಫಲಚಾರಿ
+ಬುದ್ಧಿಹೀನ ತನುಜಾನಿಕೈ ಸುಮಿರೌ ಪವನ ಕುಮಾರ
+ಬಲ ಬುದ್ಧಿ ವಿದ್ಯಾ ದೇಹು ಮೋಹಿ ಹರಹು ಕಲೇಶ ವಿಕಾರ"""
+
+
+class TestMakePreview:
+    """Test make_preview()"""
+
+    def test_joins_normalized_first_lines(self):
+        preview = make_preview("Om   Namah Shivaya\n\n   Hara Hara Mahadeva\n")
+
+        assert preview == "Om Namah Shivaya / Hara Hara Mahadeva"
+
+    def test_truncates_on_word_boundary(self):
+        preview = make_preview(LYRICS)
+
+        assert preview.startswith("ಶ್ರೀ ಗುರು ಚರಣ ಸರೋಜ ರಜ / ನಿಜಮನ ಮುಕುರ ಸುಧಾರಿ / ")
+        assert preview.endswith(ELLIPSIS)
+        assert len(preview) <= PREVIEW_MAX_CHARS + 1
+
+    def test_empty_lyrics(self):
+        assert make_preview("") == ""
+        assert make_preview(None) == ""
+
+
+class TestHighlightFragments:
+    """Test highlight_fragments()"""
+
+    def test_offsets_point_at_matches(self):
+        text = "Hanuman chalisa\nhanuman ji ki jai. " + "x " * 100 + "HANUMAN end"
+
+        fragments = highlight_fragments(text, "hanuman")
+
+        assert len(fragments) == 2
+        for fragment in fragments:
+            for start, end in fragment["highlights"]:
+                assert fragment["text"][start:end].lower() == "hanuman"
+        assert fragments[0]["highlights"] == [[0, 7], [16, 23]]
+        assert "\n" not in fragments[0]["text"]
+        assert fragments[1]["text"].startswith(ELLIPSIS)
+
+    def test_centred_on_match(self):
+        fragments = highlight_fragments(LYRICS, "ಪವನ", width=40)
+
+        fragment = fragments[0]
+        start, end = fragment["highlights"][0]
+        assert fragment["text"][start:end] == "ಪವನ"
+        assert fragment["text"].startswith(ELLIPSIS) and fragment["text"].endswith(ELLIPSIS)
+        assert len(fragment["text"]) <= 45
+
+    def test_no_match(self):
+        assert highlight_fragments(LYRICS, "rama") == []
+
+
+class TestPreviewAPI:
+    """Test preview storage and compact responses"""
+
+    @pytest.fixture
+    def created(self, client):
+        response = client.post("/api/bhajans", data={
+            "title": "Hanuman Chalisa Preview",
+            "lyrics": LYRICS,
+            "tags": "hanuman"
+        })
+        assert response.status_code == 200
+        return response.json()
+
+    def test_preview_stored_on_create_and_update(self, client, created):
+        assert created["preview"] == make_preview(LYRICS)
+
+        updated = client.put(f"/api/bhajans/{created['id']}", data={
+            "lyrics": "Jaya Hanumana jnana guna sagara\nJaya kapeesha tihu loka ujagara"
+        }).json()
+
+        assert updated["preview"] == "Jaya Hanumana jnana guna sagara / Jaya kapeesha tihu loka ujagara"
+
+    def test_summary_list_omits_lyrics(self, client, created):
+        full = client.get("/api/bhajans").json()
+        summary = client.get("/api/bhajans", params={"fields": "summary"}).json()
+
+        assert "lyrics" in full[0]
+        assert "lyrics" not in summary[0]
+        assert summary[0]["preview"] == created["preview"]
+        assert summary[0]["tags"] == full[0]["tags"]
+        assert summary[0]["created_at"] == full[0]["created_at"]
+        assert len(json.dumps(summary[0], ensure_ascii=False).encode()) < 600
+
+    def test_summary_with_tag_filter(self, client, sample_tag_taxonomy, created):
+        hanuman = sample_tag_taxonomy["hanuman"]
+        client.put(f"/api/bhajans/{created['id']}", data={"tags": str(hanuman.id)})
+
+        summary = client.get("/api/bhajans", params={"tag": hanuman.name, "fields": "summary"}).json()
+
+        assert [b["id"] for b in summary] == [created["id"]]
+        assert "lyrics" not in summary[0]
+
+    def test_search_highlights(self, client, created):
+        results = client.get("/api/search", params={"q": "ಪವನ", "fields": "summary"}).json()
+
+        assert results[0]["id"] == created["id"]
+        assert "lyrics" not in results[0]
+        fragment = results[0]["highlights"][0]
+        start, end = fragment["highlights"][0]
+        assert fragment["text"][start:end] == "ಪವನ"
+
+    def test_search_title_match_has_no_lyric_highlights(self, client, created):
+        result = client.get("/api/search", params={"q": "Chalisa Preview"}).json()[0]
+
+        assert result["highlights"] == []
+        assert result["lyrics"] == LYRICS.replace("    ", "")
+
+
+class TestPreviewBackfill:
+    """Test the schema v2 upgrade backfills previews"""
+
+    def test_upgrade_backfills_preview(self, tmp_path):
+        from scripts.run_migrations import upgrade_schema
+
+        db_path = str(tmp_path / "v1.db")
+        conn = sqlite3.connect(db_path)
+        conn.execute("CREATE TABLE bhajans (id INTEGER PRIMARY KEY, title TEXT, lyrics TEXT)")
+        conn.execute("INSERT INTO bhajans (title, lyrics) VALUES ('t', ?)", (LYRICS,))
+        conn.execute("PRAGMA user_version = 1")
+        conn.commit()
+        conn.close()
+
+        result = upgrade_schema(db_path, 2)
+
+        conn = sqlite3.connect(db_path)
+        preview = conn.execute("SELECT preview FROM bhajans").fetchone()[0]
+        conn.close()
+        assert "preview" in result["added_columns"]
+        assert preview == make_preview(LYRICS)
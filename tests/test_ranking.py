@@ -0,0 +1,207 @@
+"""
+Test search ranking and result caching (ranking.py) and the BM25 index
+behind /api/search.
+"""
+import os
+import sys
+import sqlite3
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from ranking import ScoringWeights, SearchCache, SearchSignals, normalize_query, rank
+
+
+class TestScoringWeights:
+    """Test weight configuration"""
+
+    def test_from_spec(self):
+        weights = ScoringWeights.from_spec(" bm25=0.5, popularity=0 ,")
+
+        assert weights.bm25 == 0.5
+        assert weights.popularity == 0
+        assert weights.match == ScoringWeights().match
+
+    def test_unknown_weight(self):
+        with pytest.raises(ValueError, match="recency"):
+            ScoringWeights.from_spec("recency=1")
+
+
+class TestRank:
+    """Test rank() signal combination"""
+
+    def test_signals_add_up(self):
+        signals = SearchSignals()
+        signals.add_match(1, 0.8)
+        signals.add_bm25(1, 2.0)
+        signals.add_match(2, 0.8)
+        signals.add_bm25(2, 4.0)
+        signals.add_tag(3, 0.9, confidence=0.5)
+
+        assert rank(signals, ScoringWeights(bm25=0.5)) == [(2, 130.0), (1, 105.0), (3, 45.0)]
+
+    def test_best_source_counts_once(self):
+        signals = SearchSignals()
+        signals.add_match(1, 0.7)
+        signals.add_match(1, 1.0)
+        signals.add_match(1, 0.8)
+        signals.add_tag(1, 0.9, confidence=None)
+
+        assert rank(signals, ScoringWeights()) == [(1, 190.0)]
+
+    def test_popularity_is_log_scaled(self):
+        signals = SearchSignals()
+        for bhajan_id in (1, 2, 3):
+            signals.add_match(bhajan_id, 1.0)
+
+        ranked = rank(signals, ScoringWeights(popularity=1.0), popularity={1: 9, 2: 99})
+
+        assert [bhajan_id for bhajan_id, _ in ranked] == [2, 1, 3]
+        assert ranked[0][1] == 200.0
+        assert ranked[1][1] == 150.0  # log(10) / log(100)
+        assert ranked[2][1] == 100.0
+
+    def test_ties_go_to_older_bhajan(self):
+        signals = SearchSignals()
+        signals.add_match(7, 0.8)
+        signals.add_match(3, 0.8)
+
+        assert [bhajan_id for bhajan_id, _ in rank(signals, ScoringWeights())] == [3, 7]
+
+
+class TestSearchCache:
+    """Test the TTL/LRU result cache"""
+
+    def test_ttl(self, monkeypatch):
+        now = [1000.0]
+        monkeypatch.setattr("ranking.time.monotonic", lambda: now[0])
+        cache = SearchCache(ttl=60)
+
+        cache.put("rama", [1])
+        now[0] += 59
+        assert cache.get("rama") == [1]
+        now[0] += 1
+        assert cache.get("rama") is None
+        assert len(cache) == 0
+
+    def test_lru_eviction_and_clear(self):
+        cache = SearchCache(max_entries=2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.get("a")
+        cache.put("c", 3)
+
+        assert (cache.get("a"), cache.get("b"), cache.get("c")) == (1, None, 3)
+        cache.clear()
+        assert cache.get("a") is None
+
+    def test_disabled(self):
+        cache = SearchCache(ttl=0)
+        cache.put("a", 1)
+
+        assert cache.get("a") is None
+
+    def test_normalize_query(self):
+        assert normalize_query("  Hanuman   Chalisa ") == "hanuman chalisa"
+
+
+def search(client, q, **params):
+    return client.get("/api/search", params={"q": q, **params}).json()
+
+
+class TestRankedSearchAPI:
+    """Test BM25, tag confidence and caching in /api/search"""
+
+    def test_term_frequency_ranks_lyrics(self, client):
+        once = client.post("/api/bhajans", data={
+            "title": "Morning Prayer", "lyrics": "Govinda is remembered here once among many other words", "tags": ""
+        }).json()
+        often = client.post("/api/bhajans", data={
+            "title": "Evening Prayer", "lyrics": "Govinda Govinda Govinda\\nGovinda gopala", "tags": ""
+        }).json()
+
+        results = search(client, "govinda")
+
+        assert [r["id"] for r in results] == [often["id"], once["id"]]
+        assert results[0]["relevance"] > results[1]["relevance"]
+
+    def test_tag_confidence(self, client, test_db, sample_tag_taxonomy):
+        from models import Bhajan, BhajanTag
+
+        ids = []
+        for title, confidence in [("Low Confidence", 0.4), ("High Confidence", 1.0)]:
+            bhajan = Bhajan(title=title, lyrics="Lyrics that do not name the deity", tags="[]")
+            test_db.add(bhajan)
+            test_db.flush()
+            test_db.add(BhajanTag(bhajan_id=bhajan.id, tag_id=sample_tag_taxonomy["krishna"].id,
+                                  source="ai", confidence=confidence))
+            ids.append(bhajan.id)
+        test_db.commit()
+
+        results = search(client, "Krishna")
+
+        assert [r["id"] for r in results] == [ids[1], ids[0]]
+        assert [r["relevance"] for r in results] == [90, 36]
+
+    def test_soft_deleted_bhajans_are_not_ranked(self, client):
+        created = client.post("/api/bhajans", data={
+            "title": "Vittala Stuti", "lyrics": "Vittala vittala panduranga vittala", "tags": ""
+        }).json()
+        client.delete(f"/api/bhajans/{created['id']}")
+
+        assert search(client, "panduranga") == []
+
+    def test_results_are_cached_per_normalized_query(self, client):
+        client.post("/api/bhajans", data={
+            "title": "Ganapati Stotra", "lyrics": "Vakratunda mahakaya surya koti samaprabha", "tags": ""
+        })
+        metrics = client.app.state.metrics
+
+        first = search(client, "vakratunda")
+        again = search(client, "  VAKRATUNDA ")
+
+        assert again == first
+        assert metrics.cache_lookups.value(cache="search", result="miss") == 1
+        assert metrics.cache_lookups.value(cache="search", result="hit") == 1
+
+        # One ranking serves full and summary results; rows are not cached
+        summary = search(client, "vakratunda", fields="summary")
+        assert metrics.cache_lookups.value(cache="search", result="hit") == 2
+        assert "lyrics" not in summary[0] and summary[0]["highlights"] == first[0]["highlights"]
+        cached = client.app.state.search_cache.get("vakratunda")
+        assert cached == [(first[0]["id"], first[0]["relevance"], first[0]["highlights"])]
+
+    def test_writes_invalidate_cache(self, client):
+        assert search(client, "shankara") == []
+
+        created = client.post("/api/bhajans", data={
+            "title": "Shankara Stuti", "lyrics": "Shankara shiva shambho sadashiva", "tags": ""
+        }).json()
+
+        assert [r["id"] for r in search(client, "shankara")] == [created["id"]]
+
+
+class TestFullTextIndex:
+    """Test the bhajans_fts index kept by triggers and the schema upgrade"""
+
+    def test_upgrade_builds_index(self, tmp_path):
+        from scripts.run_migrations import upgrade_schema
+
+        db_path = str(tmp_path / "v3.db")
+        conn = sqlite3.connect(db_path)
+        conn.execute("""CREATE TABLE bhajans (id INTEGER PRIMARY KEY, title TEXT, lyrics TEXT, preview TEXT,
+                        title_roman TEXT, lyrics_roman TEXT)""")
+        conn.execute("""INSERT INTO bhajans (title, lyrics, title_roman, lyrics_roman)
+                        VALUES ('ಆಂಜನೇಯ', 'Pavanasuta naama', 'anjaney', 'pavanasuta naama')""")
+        conn.execute("PRAGMA user_version = 3")
+        conn.commit()
+        conn.close()
+
+        upgrade_schema(db_path, 4)
+
+        conn = sqlite3.connect(db_path)
+        assert conn.execute("SELECT rowid FROM bhajans_fts WHERE bhajans_fts MATCH 'anjaney'").fetchall() == [(1,)]
+        conn.execute("UPDATE bhajans SET title_roman = 'maruti' WHERE id = 1")
+        assert conn.execute("SELECT rowid FROM bhajans_fts WHERE bhajans_fts MATCH 'anjaney'").fetchall() == []
+        assert conn.execute("SELECT rowid FROM bhajans_fts WHERE bhajans_fts MATCH 'maruti'").fetchall() == [(1,)]
+        conn.close()
@@ -0,0 +1,155 @@
+"""
+Test related-bhajan similarity (related.py) and /api/bhajans/{id}/related.
+"""
+import os
+import sys
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import related
+from related import SimilarityModel, cosine, weighted_jaccard
+
+
+class TestSimilarity:
+    """Test the vector similarity functions"""
+
+    def test_weighted_jaccard(self):
+        assert weighted_jaccard({"a": 1.0, "b": 1.0}, {"a": 1.0, "b": 1.0}) == 1.0
+        assert weighted_jaccard({"a": 1.0, "b": 0.5}, {"a": 0.5, "c": 1.0}) == pytest.approx(0.5 / 2.5)
+        assert weighted_jaccard({}, {"a": 1.0}) == 0.0
+
+    def test_cosine(self):
+        assert cosine({"a": 0.6, "b": 0.8}, {"a": 0.6, "b": 0.8}) == pytest.approx(1.0)
+        assert cosine({"a": 1.0}, {"b": 1.0}) == 0.0
+
+
+LYRICS = {
+    "Rama One": "Sri rama jaya rama jaya jaya rama raghukula",
+    "Rama Two": "Raghukula tilaka sri rama jaya rama dasharatha",
+    "Krishna One": "Gopala govinda murali manohara yamuna",
+    "Shiva One": "Om namah shivaya shambho shankara kailasa",
+}
+TAGS = {
+    "Rama One": ["rama"],
+    "Rama Two": ["rama"],
+    "Krishna One": ["krishna"],
+    "Shiva One": ["shiva"],
+}
+
+
+@pytest.fixture
+def catalogue(create_tagged_bhajans):
+    """{title: id} for bhajans created and tagged through the API"""
+    return create_tagged_bhajans(TAGS, LYRICS)
+
+
+def neighbors_table(conn):
+    table = {}
+    for bhajan_id, neighbor_id in conn.execute(
+        "SELECT bhajan_id, neighbor_id FROM bhajan_neighbors ORDER BY bhajan_id, rank"
+    ):
+        table.setdefault(bhajan_id, []).append(neighbor_id)
+    return table
+
+
+class TestSimilarityModel:
+    """Test tag hierarchy and lyric similarity on a small catalogue"""
+
+    def test_neighbors(self, catalogue):
+        from models import get_connection
+
+        conn = get_connection()
+        model = SimilarityModel.load(conn)
+        conn.close()
+        rama_one, rama_two = catalogue["Rama One"], catalogue["Rama Two"]
+
+        assert [n for n, _ in model.neighbors(rama_one)][:2] == [rama_two, catalogue["Krishna One"]]
+        # Rama and Krishna share the Vishnu parent; Shiva only shares the root category
+        assert model.similarity(rama_one, catalogue["Krishna One"]) > model.similarity(rama_one, catalogue["Shiva One"])
+        assert model.similarity(rama_one, rama_two) == model.similarity(rama_two, rama_one)
+
+    def test_deleted_bhajans_are_excluded(self, client, catalogue):
+        from models import get_connection
+
+        client.delete(f"/api/bhajans/{catalogue['Rama Two']}")
+        conn = get_connection()
+        model = SimilarityModel.load(conn)
+        conn.close()
+
+        assert catalogue["Rama Two"] not in model.ids
+        assert catalogue["Rama Two"] not in dict(model.neighbors(catalogue["Rama One"]))
+
+
+class TestNeighborsTable:
+    """Test rebuild()/refresh() and the related endpoint"""
+
+    def test_rebuild_and_endpoint(self, client, catalogue):
+        from models import get_connection
+
+        conn = get_connection()
+        assert related.rebuild(conn) == 4
+        conn.close()
+
+        response = client.get(f"/api/bhajans/{catalogue['Rama One']}/related")
+        assert response.status_code == 200
+        results = response.json()
+        assert results[0]["id"] == catalogue["Rama Two"]
+        assert results[0]["tags"] == ["Rama"]
+        assert results[0]["score"] >= results[-1]["score"] >= related.MIN_SCORE
+
+        limited = client.get(f"/api/bhajans/{catalogue['Rama One']}/related", params={"limit": 1}).json()
+        assert [r["id"] for r in limited] == [catalogue["Rama Two"]]
+
+    def test_endpoint_hides_deleted_and_404s(self, client, catalogue):
+        from models import get_connection
+
+        conn = get_connection()
+        related.rebuild(conn)
+        conn.close()
+        client.delete(f"/api/bhajans/{catalogue['Rama Two']}")
+
+        ids = [r["id"] for r in client.get(f"/api/bhajans/{catalogue['Rama One']}/related").json()]
+        assert catalogue["Rama Two"] not in ids
+        assert client.get(f"/api/bhajans/{catalogue['Rama Two']}/related").status_code == 404
+        assert client.get("/api/bhajans/999/related").status_code == 404
+
+    def test_new_bhajan_has_no_neighbors_until_refresh(self, client, catalogue):
+        assert client.get(f"/api/bhajans/{catalogue['Rama One']}/related").json() == []
+
+    def test_refresh(self, client, catalogue, sample_tag_taxonomy):
+        from models import get_connection
+
+        conn = get_connection()
+        related.rebuild(conn)
+        since = related.last_computed(conn)
+
+        created = client.post("/api/bhajans", data={
+            "title": "Rama Three", "lyrics": "Jaya rama sri rama raghukula dasharatha nandana", "tags": ""
+        }).json()
+        client.put(f"/api/bhajans/{created['id']}", data={"tags": str(sample_tag_taxonomy["rama"].id)})
+        client.delete(f"/api/bhajans/{catalogue['Shiva One']}")
+
+        changed = related.changed_since(conn, since)
+        assert changed == {created["id"], catalogue["Shiva One"]}
+        related.refresh(conn, changed)
+        refreshed = neighbors_table(conn)
+
+        related.rebuild(conn)
+        assert refreshed == neighbors_table(conn)
+        assert created["id"] in refreshed[catalogue["Rama One"]]
+        assert catalogue["Shiva One"] not in refreshed
+        conn.close()
+
+    def test_refresh_advances_cursor_without_rewrites(self, catalogue):
+        from models import get_connection
+
+        conn = get_connection()
+        assert related.last_computed(conn) is None
+        related.rebuild(conn)
+        since = related.last_computed(conn)
+
+        # Nothing changed, so no neighbour row is rewritten, but the run still counts
+        assert related.refresh(conn, related.changed_since(conn, since)) == 0
+        assert related.last_computed(conn) > since
+        conn.close()
@@ -0,0 +1,167 @@
+"""
+Test the prefix-trie suggestion index (suggest.py) and /api/suggest.
+"""
+import os
+import sys
+import time
+import heapq
+import random
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from suggest import MAX_SUGGESTIONS, SuggestIndex
+
+
+@pytest.fixture
+def index(test_db_path, sample_bhajan_with_tags, sample_tag_taxonomy):
+    from models import get_connection
+
+    index = SuggestIndex()
+    index.ensure_loaded(get_connection)
+    return index
+
+
+class TestSuggestIndex:
+    """Test SuggestIndex lookups and incremental updates"""
+
+    def test_prefix_of_any_word(self, index, sample_bhajan_with_tags):
+        texts = [s["text"] for s in index.suggest("chal")]
+
+        assert texts == [sample_bhajan_with_tags.title]
+
+    def test_tags_rank_by_usage(self, index, sample_tag_taxonomy):
+        suggestions = index.suggest("h")
+
+        assert suggestions[0] == {
+            "kind": "tag", "id": sample_tag_taxonomy["hanuman"].id,
+            "text": "Hanuman", "category": "deity", "count": 1
+        }
+        assert suggestions[1]["kind"] == "bhajan"
+
+    def test_synonyms_translations_and_scripts(self, index, sample_tag_taxonomy):
+        hanuman = sample_tag_taxonomy["hanuman"].id
+
+        for query in ("anjan", "maaru", "ಹನು", "hanumaa"):
+            assert ("tag", hanuman) in [(s["kind"], s["id"]) for s in index.suggest(query)], query
+
+    def test_multi_word_prefix(self, index, sample_bhajan_with_tags):
+        assert [s["id"] for s in index.suggest("hanuman chali")] == [sample_bhajan_with_tags.id]
+        assert index.suggest("hanuman rama") == []
+
+    def test_no_match(self, index):
+        assert index.suggest("zzz") == []
+        assert index.suggest("  ") == []
+
+    def test_usage_follows_bhajan_tags(self, index, sample_tag_taxonomy, sample_bhajan_with_tags):
+        rama = sample_tag_taxonomy["rama"].id
+        hanuman = sample_tag_taxonomy["hanuman"].id
+
+        index.set_bhajan_tags(sample_bhajan_with_tags.id, [rama])
+
+        assert index.suggest("rama")[0]["count"] == 1
+        assert index.suggest("hanuman")[0] == {
+            "kind": "tag", "id": hanuman, "text": "Hanuman", "category": "deity", "count": 0
+        }
+
+        index.remove_bhajan(sample_bhajan_with_tags.id)
+        assert index.suggest("rama")[0]["count"] == 0
+        assert index.suggest("chal") == []
+
+    def test_limit_and_cached_lookup_is_fast(self, index):
+        for i in range(200):
+            index.add_bhajan(10_000 + i, f"Hari Bhajan {i}")
+
+        assert len(index.suggest("hari", limit=100)) == MAX_SUGGESTIONS
+        index.suggest("ha")
+
+        start = time.perf_counter()
+        for _ in range(100):
+            index.suggest("ha")
+        assert (time.perf_counter() - start) / 100 < 0.001
+
+
+def stale_caches(index):
+    """Prefixes whose cached top entries differ from a recomputation"""
+    stale = []
+
+    def subtree_keys(node):
+        keys = set(node.keys)
+        for child in node.children.values():
+            keys |= subtree_keys(child)
+        return keys
+
+    def walk(node, prefix):
+        if node.top is not None:
+            if node.top != heapq.nsmallest(MAX_SUGGESTIONS, subtree_keys(node), key=index._rank):
+                stale.append(prefix)
+        for ch, child in node.children.items():
+            walk(child, prefix + ch)
+
+    walk(index._root, "")
+    return stale
+
+
+class TestTopCaches:
+    """Test that writes update the per-node caches instead of dropping them"""
+
+    def test_add_merges_into_cached_lists(self, index):
+        index.suggest("h")
+        index.add_bhajan(10_000, "Hari Bhajan")
+
+        assert index._root.children["h"].top is not None
+        assert ("bhajan", 10_000) in index._root.children["h"].top
+        assert stale_caches(index) == []
+
+    def test_caches_stay_exact_through_writes(self, index, sample_tag_taxonomy):
+        rng = random.Random(7)
+        tag_ids = [tag.id for tag in sample_tag_taxonomy.values()]
+        words = ["hari", "hara", "harini", "rama", "raghu", "krishna", "keshava"]
+
+        for step in range(300):
+            bhajan_id = 10_000 + rng.randrange(40)
+            action = rng.random()
+            if action < 0.5:
+                index.add_bhajan(bhajan_id, " ".join(rng.sample(words, 2)),
+                                 tag_ids=rng.sample(tag_ids, rng.randrange(3)))
+            elif action < 0.8:
+                index.set_bhajan_tags(bhajan_id, rng.sample(tag_ids, rng.randrange(3)))
+            else:
+                index.remove_bhajan(bhajan_id)
+            index.suggest(rng.choice(["h", "har", "r", "k", "ra", "hari"]))
+            assert stale_caches(index) == [], step
+
+
+class TestSuggestAPI:
+    """Test /api/suggest"""
+
+    def test_suggest_endpoint(self, client, sample_bhajan_with_tags, sample_tag_taxonomy):
+        response = client.get("/api/suggest", params={"q": "hanu", "limit": 5})
+
+        assert response.status_code == 200
+        assert [s["kind"] for s in response.json()] == ["tag", "bhajan"]
+
+    def test_limit_validated(self, client):
+        assert client.get("/api/suggest", params={"q": "h", "limit": 0}).status_code == 422
+        assert client.get("/api/suggest", params={"q": "h", "limit": MAX_SUGGESTIONS + 1}).status_code == 422
+
+    def test_writes_update_suggestions(self, client, sample_tag_taxonomy):
+        client.get("/api/suggest", params={"q": "x"})  # load the index
+        rama = sample_tag_taxonomy["rama"]
+
+        created = client.post("/api/bhajans", data={
+            "title": "Raghupati Raghava",
+            "lyrics": "Raghupati raghava raja ram patita pavana sita ram",
+            "tags": ""
+        }).json()
+        client.put(f"/api/bhajans/{created['id']}", data={"tags": str(rama.id)})
+        assert client.get("/api/suggest", params={"q": "raghu"}).json()[0]["id"] == created["id"]
+        assert client.get("/api/suggest", params={"q": "rama"}).json()[0]["count"] == 1
+
+        client.put(f"/api/tags/{rama.id}", json={"synonyms": ["Raghunatha"]})
+        tag = client.get("/api/suggest", params={"q": "raghun"}).json()[0]
+        assert (tag["kind"], tag["id"], tag["count"]) == ("tag", rama.id, 1)
+
+        client.delete(f"/api/bhajans/{created['id']}")
+        assert client.get("/api/suggest", params={"q": "raghupati"}).json() == []
+        assert client.get("/api/suggest", params={"q": "rama"}).json()[0]["count"] == 0
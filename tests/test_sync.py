@@ -0,0 +1,151 @@
+"""
+Test delta sync: the sync_log triggers, sync.py and /api/sync.
+"""
+import os
+import sys
+import sqlite3
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sync import SyncTokenError, parse_token
+
+
+def sync(client, since=None, **params):
+    if since is not None:
+        params["since"] = since
+    response = client.get("/api/sync", params=params)
+    assert response.status_code == 200
+    return response.json()
+
+
+class TestSyncToken:
+    def test_parse_token(self):
+        assert parse_token(None) == 0
+        assert parse_token("42") == 42
+        with pytest.raises(SyncTokenError):
+            parse_token("-1")
+
+
+class TestSyncAPI:
+    """Test full and delta syncs"""
+
+    def test_full_sync(self, client, sample_tag_taxonomy, create_tagged_bhajans):
+        ids = list(create_tagged_bhajans({f"Bhajan {n}": [] for n in range(3)}).values())
+        client.delete(f"/api/bhajans/{ids[1]}")
+
+        full = sync(client)
+
+        assert [b["id"] for b in full["bhajans"]] == [ids[0], ids[2]]
+        assert full["bhajans"][0]["lyrics"].startswith("Bhajan 0")
+        assert full["deleted_bhajans"] == [] and full["deleted_tags"] == []
+        hanuman = next(t for t in full["tags"] if t["name"] == "Hanuman")
+        assert hanuman["translations"] == {"kn": "ಹನುಮಾನ್"}
+        assert hanuman["synonyms"] == ["Anjaneya", "Maruti"]
+        assert not full["more"] and not full["reset"]
+
+    def test_delta_sync(self, client, sample_tag_taxonomy, create_tagged_bhajans):
+        kept, edited, removed = create_tagged_bhajans({f"Bhajan {n}": [] for n in range(3)}).values()
+        token = sync(client)["token"]
+        assert sync(client, token)["bhajans"] == []
+
+        client.put(f"/api/bhajans/{edited}", data={"title": "Bhajan Edited"})
+        client.delete(f"/api/bhajans/{removed}")
+        added = create_tagged_bhajans({"Bhajan New": []})["Bhajan New"]
+        delta = sync(client, token)
+
+        assert [b["id"] for b in delta["bhajans"]] == [edited, added]
+        assert delta["bhajans"][0]["title"] == "Bhajan Edited"
+        assert delta["deleted_bhajans"] == [removed]
+        assert delta["tags"] == []
+        assert int(delta["token"]) > int(token)
+        assert sync(client, delta["token"])["bhajans"] == []
+
+    def test_tag_changes(self, client, sample_tag_taxonomy, create_tagged_bhajans):
+        bhajan_id = create_tagged_bhajans({"Rama Stuti": ["rama"]})["Rama Stuti"]
+        token = sync(client)["token"]
+
+        client.put(f"/api/tags/{sample_tag_taxonomy['rama'].id}", json={"name": "Sri Rama"})
+        delta = sync(client, token)
+
+        assert [t["name"] for t in delta["tags"]] == ["Sri Rama"]
+        assert [(b["id"], b["tags"]) for b in delta["bhajans"]] == [(bhajan_id, ["Sri Rama"])]
+
+        tag = client.post("/api/tags", json={"name": "Temporary", "category": "theme"}).json()
+        client.delete(f"/api/tags/{tag['id']}")
+        assert sync(client, delta["token"])["deleted_tags"] == [tag["id"]]
+
+    def test_paging(self, client, create_tagged_bhajans):
+        ids = list(create_tagged_bhajans({f"Bhajan {n}": [] for n in range(5)}).values())
+
+        pages, token, more = [], None, True
+        while more:
+            page = sync(client, token, limit=2)
+            pages.append([b["id"] for b in page["bhajans"]])
+            token, more = page["token"], page["more"]
+
+        assert pages == [ids[:2], ids[2:4], ids[4:]]
+
+    def test_unknown_and_invalid_tokens(self, client, create_tagged_bhajans):
+        bhajan_id = create_tagged_bhajans({"Bhajan One": []})["Bhajan One"]
+
+        ahead = sync(client, "999999")
+        assert ahead["reset"] and [b["id"] for b in ahead["bhajans"]] == [bhajan_id]
+        assert client.get("/api/sync", params={"since": "abc"}).status_code == 400
+
+
+class TestSyncLogUpgrade:
+    def test_upgrade_seeds_log(self, tmp_path):
+        from models import Base, create_db_engine
+        from scripts.run_migrations import upgrade_schema
+
+        db_path = str(tmp_path / "v7.db")
+        engine = create_db_engine(f"sqlite:///{db_path}")
+        Base.metadata.create_all(bind=engine)
+        engine.dispose()
+        conn = sqlite3.connect(db_path)
+        conn.execute("INSERT INTO bhajans (title, lyrics) VALUES ('Live', 'Lyrics of the live bhajan')")
+        conn.execute("INSERT INTO bhajans (title, lyrics, deleted_at) VALUES ('Gone', 'Lyrics', DATETIME('now'))")
+        conn.execute("INSERT INTO tag_taxonomy (name, category, level) VALUES ('Rama', 'deity', 0)")
+        # An older database: no triggers ran, so the log starts empty
+        conn.execute("DELETE FROM sync_log")
+        conn.execute("PRAGMA user_version = 7")
+        conn.commit()
+        conn.close()
+
+        upgrade_schema(db_path, 8)
+
+        conn = sqlite3.connect(db_path)
+        assert conn.execute("SELECT entity, entity_id, deleted FROM sync_log ORDER BY entity, entity_id").fetchall() == [
+            ("bhajan", 1, 0), ("bhajan", 2, 1), ("tag", 1, 0)
+        ]
+        conn.close()
+
+    def test_cli_upgrade_of_baseline_database(self, tmp_path):
+        """A database with only the original bhajans table serves /api/sync once upgraded"""
+        from fastapi.testclient import TestClient
+        from main import create_app
+        from models import SCHEMA_VERSION
+        from scripts.run_migrations import upgrade_schema
+        from settings import Settings
+
+        db_path = str(tmp_path / "baseline.db")
+        conn = sqlite3.connect(db_path)
+        # bhajans as the original models.py created it
+        conn.execute("""CREATE TABLE bhajans (id INTEGER PRIMARY KEY, title VARCHAR(255) NOT NULL,
+                        lyrics TEXT NOT NULL, manual_tags TEXT, auto_tags TEXT, language VARCHAR(50),
+                        tone VARCHAR(255), detected_raga VARCHAR(255), related_deities TEXT,
+                        pdf_filename VARCHAR(255), uploaded_at DATETIME, tags TEXT, uploader_name VARCHAR(100),
+                        created_at DATETIME, updated_at DATETIME, deleted_at DATETIME,
+                        youtube_url VARCHAR(500), mp3_file TEXT)""")
+        conn.execute("INSERT INTO bhajans (title, lyrics) VALUES ('Old', 'Lyrics of an old bhajan')")
+        conn.commit()
+        conn.close()
+
+        assert upgrade_schema(db_path, SCHEMA_VERSION)["to_version"] == SCHEMA_VERSION
+
+        # The app trusts the stamped version and creates nothing itself
+        with TestClient(create_app(Settings(database_path=db_path, log_dir=str(tmp_path / "logs")))) as client:
+            page = sync(client)
+            assert [b["title"] for b in page["bhajans"]] == ["Old"]
+            assert client.get("/api/bhajans/1/related").status_code == 200
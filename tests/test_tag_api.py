@@ -159,6 +159,36 @@ class TestTagBhajansAPI:
         assert len(data) <= 2
 
 
+class TestBhajanTagFilterAPI:
+    """Test GET /api/bhajans?tag= filtering"""
+    
+    def test_filter_by_tag_query_param(self, client, sample_bhajans, sample_bhajan_with_tags):
+        """Should return only bhajans tagged in the taxonomy"""
+        response = client.get("/api/bhajans?tag=Hanuman")
+        assert response.status_code == 200
+        
+        data = response.json()
+        assert [b["id"] for b in data] == [sample_bhajan_with_tags.id]
+    
+    def test_filter_by_synonym(self, client, sample_bhajan_with_tags):
+        """Synonyms resolve to the canonical tag"""
+        response = client.get("/api/bhajans?tag=Anjaneya")
+        assert response.status_code == 200
+        assert len(response.json()) == 1
+    
+    def test_filter_includes_descendants(self, client, sample_bhajan_with_tags):
+        """Parent tag matches bhajans tagged with a child tag"""
+        response = client.get("/api/bhajans?tag=Shiva")
+        assert response.status_code == 200
+        assert len(response.json()) == 1
+    
+    def test_filter_multiple_tags_and(self, client, sample_bhajan_with_tags):
+        """Repeated tag params are ANDed"""
+        response = client.get("/api/bhajans?tag=Hanuman&tag=Krishna")
+        assert response.status_code == 200
+        assert response.json() == []
+
+
 class TestEnhancedSearchAPI:
     """Test GET /api/search?q={query} endpoint"""
     
@@ -0,0 +1,218 @@
+"""
+Test tag membership bitmaps (tag_bitmaps.py) and facet counts in
+/api/bhajans and /api/search.
+"""
+import os
+import random
+import sqlite3
+import sys
+import time
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from tag_bitmaps import TagBitmapIndex, from_bitmap, to_bitmap
+
+
+class TestBitmaps:
+    """Test bitset helpers"""
+
+    def test_round_trip(self):
+        ids = [0, 1, 7, 8, 63, 64, 1000, 99_999]
+
+        assert from_bitmap(to_bitmap(ids)) == ids
+        assert to_bitmap([3, 3, 5]) == 0b101000
+
+    def test_empty(self):
+        assert to_bitmap([]) == 0
+        assert from_bitmap(0) == []
+
+
+@pytest.fixture
+def tagged(client, sample_tag_taxonomy):
+    """Three bhajans tagged through the API: {name: (bhajan id, [tag ids])}"""
+    tags = {name: sample_tag_taxonomy[name].id for name in ("rama", "krishna", "hanuman")}
+    tagged = {}
+    for title, names in [
+        ("Rama Bhajan One", ["rama"]),
+        ("Rama Hanuman Bhajan", ["rama", "hanuman"]),
+        ("Krishna Bhajan One", ["krishna"]),
+    ]:
+        bhajan = client.post("/api/bhajans", data={
+            "title": title, "lyrics": f"{title} lyrics for facet counting", "tags": ""
+        }).json()
+        tag_ids = [tags[name] for name in names]
+        client.put(f"/api/bhajans/{bhajan['id']}", data={"tags": ",".join(map(str, tag_ids))})
+        tagged[title] = (bhajan["id"], tag_ids)
+    return tagged
+
+
+class TestTagBitmapIndex:
+    """Test TagBitmapIndex loading, updates and facet counts"""
+
+    def test_load_and_facets(self, test_db_path, sample_bhajan_with_tags, sample_tag_taxonomy):
+        from models import get_connection
+
+        index = TagBitmapIndex()
+        index.ensure_loaded(get_connection)
+        hanuman = sample_tag_taxonomy["hanuman"].id
+
+        assert from_bitmap(index.bhajans(hanuman)) == [sample_bhajan_with_tags.id]
+        assert index.facets([sample_bhajan_with_tags.id]) == {
+            "deity": [{"id": hanuman, "name": "Hanuman", "count": 1}]
+        }
+        assert index.facets([]) == {}
+
+    def test_updates(self, test_db_path, sample_bhajan_with_tags, sample_tag_taxonomy):
+        from models import get_connection
+
+        index = TagBitmapIndex()
+        index.ensure_loaded(get_connection)
+        bhajan_id = sample_bhajan_with_tags.id
+        rama, hanuman = sample_tag_taxonomy["rama"].id, sample_tag_taxonomy["hanuman"].id
+
+        index.set_bhajan_tags(bhajan_id, [rama, hanuman])
+        index.set_bhajan_tags(bhajan_id + 1, [rama])
+        counts = {c["name"]: c["count"] for c in index.facets([bhajan_id, bhajan_id + 1])["deity"]}
+        assert counts == {"Rama": 2, "Hanuman": 1}
+
+        index.remove_bhajan(bhajan_id)
+        assert from_bitmap(index.bhajans(rama)) == [bhajan_id + 1]
+        assert index.bhajans(hanuman) == 0
+
+    def test_rollup_and_boolean_select(self, test_db_path, sample_bhajan_with_tags, sample_tag_taxonomy):
+        from models import get_connection
+
+        index = TagBitmapIndex()
+        index.ensure_loaded(get_connection)
+        tags = {name: tag.id for name, tag in sample_tag_taxonomy.items()}
+        hanuman_bhajan = sample_bhajan_with_tags.id
+        index.add_bhajan(101, [tags["rama"]])
+        index.add_bhajan(102, [tags["krishna"], tags["rama"]])
+        index.add_bhajan(103)
+
+        assert from_bitmap(index.tag(tags["vishnu"])) == [101, 102]
+        assert from_bitmap(index.tag(tags["deity_root"])) == [hanuman_bhajan, 101, 102]
+        assert from_bitmap(index.select(all_of=[tags["rama"], tags["krishna"]])) == [102]
+        assert from_bitmap(index.select(any_of=[tags["krishna"], tags["hanuman"]])) == [hanuman_bhajan, 102]
+        assert from_bitmap(index.select(none_of=[tags["vishnu"]])) == [hanuman_bhajan, 103]
+        assert from_bitmap(index.select(all_of=[tags["vishnu"]], none_of=[tags["krishna"]])) == [101]
+        assert index.select() == index.live
+
+        # Rolled-up bitmaps follow membership changes and soft delete
+        index.add_bhajan(103, [tags["krishna"]])
+        index.remove_bhajan(101)
+        assert from_bitmap(index.tag(tags["vishnu"])) == [102, 103]
+        assert from_bitmap(index.select(none_of=[tags["deity_root"]])) == []
+
+    def test_reparenting(self, test_db_path, test_db, sample_bhajan_with_tags, sample_tag_taxonomy):
+        from models import get_connection
+
+        index = TagBitmapIndex()
+        index.ensure_loaded(get_connection)
+        hanuman, vishnu = sample_tag_taxonomy["hanuman"], sample_tag_taxonomy["vishnu"]
+        assert index.tag(vishnu.id) == 0
+
+        hanuman.parent_id = vishnu.id
+        test_db.commit()
+        conn = get_connection()
+        index.refresh_tag(conn, hanuman.id)
+        conn.close()
+
+        assert from_bitmap(index.tag(vishnu.id)) == [sample_bhajan_with_tags.id]
+        assert index.tag(sample_tag_taxonomy["shiva"].id) == 0
+
+    def test_select_is_fast_at_scale(self):
+        rng = random.Random(7)
+        conn = sqlite3.connect(":memory:")
+        conn.executescript("""
+            CREATE TABLE tag_taxonomy (id INTEGER PRIMARY KEY, name TEXT, category TEXT, parent_id INTEGER);
+            CREATE TABLE bhajans (id INTEGER PRIMARY KEY, deleted_at TEXT);
+            CREATE TABLE bhajan_tags (bhajan_id INTEGER, tag_id INTEGER);
+        """)
+        conn.executemany("INSERT INTO tag_taxonomy VALUES (?, ?, 'deity', NULL)",
+                         [(t, f"tag{t}") for t in range(1, 41)])
+        conn.executemany("INSERT INTO bhajans VALUES (?, NULL)", [(b,) for b in range(1, 100_001)])
+        conn.executemany("INSERT INTO bhajan_tags VALUES (?, ?)", [
+            (b, t) for b in range(1, 100_001) for t in rng.sample(range(1, 41), 3)
+        ])
+        index = TagBitmapIndex()
+        index.load(conn)
+        conn.close()
+
+        index.select(all_of=[1, 2], any_of=[3, 4, 5], none_of=[6])  # warm rolled-up cache
+        start = time.perf_counter()
+        for _ in range(100):
+            index.select(all_of=[1, 2], any_of=[3, 4, 5], none_of=[6])
+        assert (time.perf_counter() - start) / 100 < 0.001
+
+
+class TestFacetsAPI:
+    """Test ?facets=true on the list and search endpoints"""
+
+    def test_list_without_facets_is_unchanged(self, client, tagged):
+        assert isinstance(client.get("/api/bhajans").json(), list)
+
+    def test_list_facets(self, client, tagged, sample_tag_taxonomy):
+        data = client.get("/api/bhajans", params={"facets": "true", "fields": "summary"}).json()
+
+        assert len(data["results"]) == 3
+        assert data["facets"] == {"deity": [
+            {"id": sample_tag_taxonomy["rama"].id, "name": "Rama", "count": 2},
+            {"id": sample_tag_taxonomy["hanuman"].id, "name": "Hanuman", "count": 1},
+            {"id": sample_tag_taxonomy["krishna"].id, "name": "Krishna", "count": 1},
+        ]}
+
+    def test_facets_follow_tag_filter(self, client, tagged):
+        data = client.get("/api/bhajans", params={"facets": "true", "tag": "Hanuman"}).json()
+
+        assert [b["title"] for b in data["results"]] == ["Rama Hanuman Bhajan"]
+        assert {c["name"]: c["count"] for c in data["facets"]["deity"]} == {"Rama": 1, "Hanuman": 1}
+
+    def test_search_facets(self, client, tagged):
+        data = client.get("/api/search", params={"q": "krishna", "facets": "true"}).json()
+
+        assert [b["title"] for b in data["results"]] == ["Krishna Bhajan One"]
+        assert [c["name"] for c in data["facets"]["deity"]] == ["Krishna"]
+        assert client.get("/api/search", params={"q": "x", "facets": "true"}).json() == {
+            "results": [], "facets": {}
+        }
+
+    def test_facets_follow_writes(self, client, tagged, sample_tag_taxonomy):
+        client.get("/api/bhajans", params={"facets": "true"})  # load the index
+        krishna_bhajan, _ = tagged["Krishna Bhajan One"]
+        rama_bhajan, _ = tagged["Rama Bhajan One"]
+
+        client.delete(f"/api/bhajans/{krishna_bhajan}")
+        client.put(f"/api/bhajans/{rama_bhajan}", data={"tags": str(sample_tag_taxonomy["hanuman"].id)})
+        client.put(f"/api/tags/{sample_tag_taxonomy['hanuman'].id}", json={"name": "Maruti"})
+
+        facets = client.get("/api/bhajans", params={"facets": "true"}).json()["facets"]
+        assert {c["name"]: c["count"] for c in facets["deity"]} == {"Maruti": 2, "Rama": 1}
+
+
+class TestTagFilterAPI:
+    """Test ?tag= filtering through the bitmap index"""
+
+    def test_parent_tag_includes_descendants(self, client, tagged):
+        results = client.get("/api/bhajans", params={"tag": "Vishnu"}).json()
+
+        assert sorted(b["title"] for b in results) == [
+            "Krishna Bhajan One", "Rama Bhajan One", "Rama Hanuman Bhajan"
+        ]
+
+    def test_and_across_tags_and_synonyms(self, client, tagged):
+        results = client.get("/api/bhajans", params=[("tag", "Vishnu"), ("tag", "Maruti")]).json()
+
+        assert [b["title"] for b in results] == ["Rama Hanuman Bhajan"]
+
+    def test_filter_follows_writes(self, client, tagged, sample_tag_taxonomy):
+        assert len(client.get("/api/bhajans", params={"tag": "Rama"}).json()) == 2  # load the index
+        rama_bhajan, _ = tagged["Rama Bhajan One"]
+        krishna_bhajan, _ = tagged["Krishna Bhajan One"]
+
+        client.put(f"/api/bhajans/{krishna_bhajan}", data={"tags": str(sample_tag_taxonomy["rama"].id)})
+        client.delete(f"/api/bhajans/{rama_bhajan}")
+
+        titles = {b["title"] for b in client.get("/api/bhajans", params={"tag": "Rama"}).json()}
+        assert titles == {"Krishna Bhajan One", "Rama Hanuman Bhajan"}
@@ -0,0 +1,135 @@
+"""
+Test the boolean tag query language (tag_query.py) and its use in
+/api/bhajans?tag=.
+"""
+import os
+import sys
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from tag_query import And, Not, Or, TagQueryError, Term, parse, parse_all
+
+
+class TestParse:
+    """Test parsing and normalization"""
+
+    def test_plain_tag_name(self):
+        assert parse("Hanuman") == Term("hanuman")
+        assert parse("Sri  Rama") == Term("sri rama")
+        assert parse('"Sri Rama"') == Term("sri rama")
+
+    def test_precedence(self):
+        # NOT binds tightest, then AND, then OR
+        assert parse("a OR b AND NOT c") == Or((Term("a"), And((Term("b"), Not(Term("c"))))))
+        assert parse("(a OR b) AND c") == And((Term("c"), Or((Term("a"), Term("b")))))
+
+    def test_category_scoping(self):
+        node = parse("deity:(hanuman OR rama) AND type:stotra AND NOT day:saturday")
+
+        assert node == And((
+            Term("stotra", "type"),
+            Or((Term("hanuman", "deity"), Term("rama", "deity"))),
+            Not(Term("saturday", "day")),
+        ))
+        assert parse("deity:(hanuman OR type:stotra)") == Or((Term("hanuman", "deity"), Term("stotra", "type")))
+
+    def test_exact_terms(self):
+        assert parse("=deity:Shiva") == Term("shiva", "deity", exact=True)
+        assert parse("=(shiva OR deity:vishnu) AND rama") == And((
+            Term("rama"), Or((Term("vishnu", "deity", exact=True), Term("shiva", exact=True)))
+        ))
+        assert str(parse("=deity:shiva OR hanuman")) == "=deity:shiva OR hanuman"
+
+    def test_normalized_forms_are_equal(self):
+        variants = [
+            "Rama and Hanuman",
+            "hanuman AND rama AND hanuman",
+            "(hanuman) and (rama)",
+            "NOT NOT hanuman AND rama",
+        ]
+
+        assert {parse(v) for v in variants} == {And((Term("hanuman"), Term("rama")))}
+        assert str(parse("deity:(Rama or Hanuman) and not day:Saturday")) == \
+            "(deity:hanuman OR deity:rama) AND NOT day:saturday"
+
+    def test_parse_is_cached(self):
+        assert parse("deity:rama") is parse("deity:rama")
+
+    def test_repeated_params_are_anded(self):
+        assert parse_all(["Hanuman", "type:stotra"]) == And((Term("hanuman"), Term("stotra", "type")))
+
+    @pytest.mark.parametrize("query", [
+        "", "   ", "hanuman AND", "(hanuman", "hanuman)", "OR rama",
+        "deity:", "hanuman deity:rama", 'a "b', "=", "deity:=shiva", "x" * 501,
+    ])
+    def test_malformed(self, query):
+        with pytest.raises(TagQueryError):
+            parse(query)
+
+
+@pytest.fixture
+def catalogue(client, sample_tag_taxonomy):
+    """Bhajans tagged with deities, a type and a day, via the API"""
+    tags = {name: tag.id for name, tag in sample_tag_taxonomy.items()}
+    for name, category in [("Stotra", "type"), ("Saturday", "day")]:
+        tags[name.lower()] = client.post("/api/tags", json={"name": name, "category": category}).json()["id"]
+
+    ids = {}
+    for title, names in [
+        ("Hanuman Stotra", ["hanuman", "stotra"]),
+        ("Hanuman Saturday Stotra", ["hanuman", "stotra", "saturday"]),
+        ("Rama Stotra", ["rama", "stotra"]),
+        ("Krishna Bhajan", ["krishna"]),
+    ]:
+        bhajan = client.post("/api/bhajans", data={
+            "title": title, "lyrics": f"{title} lyrics for tag queries", "tags": ""
+        }).json()
+        client.put(f"/api/bhajans/{bhajan['id']}", data={"tags": ",".join(str(tags[n]) for n in names)})
+        ids[title] = bhajan["id"]
+    return ids
+
+
+def titles(client, *queries):
+    response = client.get("/api/bhajans", params=[("tag", q) for q in queries])
+    assert response.status_code == 200, response.text
+    return sorted(b["title"] for b in response.json())
+
+
+class TestTagQueryAPI:
+    """Test ?tag= boolean queries"""
+
+    def test_example_query(self, client, catalogue):
+        assert titles(client, "deity:(hanuman OR rama) AND type:stotra AND NOT day:saturday") == [
+            "Hanuman Stotra", "Rama Stotra"
+        ]
+
+    def test_hierarchy_synonyms_and_translations(self, client, catalogue):
+        assert titles(client, "deity:vishnu AND NOT type:stotra") == ["Krishna Bhajan"]
+        assert titles(client, "maruti AND saturday") == ["Hanuman Saturday Stotra"]
+        assert titles(client, "ಹನುಮಾನ್ AND NOT saturday") == ["Hanuman Stotra"]
+
+    def test_category_scope_filters_matches(self, client, catalogue):
+        assert titles(client, "type:hanuman") == []
+        assert titles(client, "NOT deity:shiva") == ["Krishna Bhajan", "Rama Stotra"]
+
+    def test_exact_term_skips_descendants(self, client, catalogue):
+        assert titles(client, "deity:vishnu") == ["Krishna Bhajan", "Rama Stotra"]
+        assert titles(client, "=deity:vishnu") == []
+        assert titles(client, "=maruti AND NOT saturday") == ["Hanuman Stotra"]
+
+    def test_unknown_tag_matches_nothing(self, client, catalogue):
+        assert titles(client, "hanuman AND nosuchtag") == []
+        assert titles(client, "hanuman OR nosuchtag") == ["Hanuman Saturday Stotra", "Hanuman Stotra"]
+
+    def test_repeated_params_and_search(self, client, catalogue):
+        assert titles(client, "deity:hanuman", "NOT saturday") == ["Hanuman Stotra"]
+
+        response = client.get("/api/bhajans", params={"tag": "stotra", "search": "Rama"})
+        assert [b["title"] for b in response.json()] == ["Rama Stotra"]
+
+    def test_malformed_query_is_400(self, client, catalogue):
+        response = client.get("/api/bhajans", params={"tag": "deity:(hanuman OR"})
+
+        assert response.status_code == 400
+        assert "Invalid tag query" in response.json()["error"]
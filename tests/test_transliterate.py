@@ -0,0 +1,141 @@
+"""
+Test script-independent search forms (transliterate.py) and the
+transliterated title/lyric lookup in /api/search.
+"""
+import os
+import sys
+import sqlite3
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from transliterate import lyric_lines_form, normalize_roman, romanize, search_form
+
+LYRICS = """ಜಯ ಹನುಮಾನ ಜ್ಞಾನ ಗುಣ ಸಾಗರ
+ಜಯ ಕಪೀಶ ತಿಹು ಲೋಕ ಉಜಾಗರ
+
+ರಾಮದೂತ ಅತುಲಿತ ಬಲಧಾಮಾ
+ಅಂಜನಿಪುತ್ರ ಪವನಸುತ ನಾಮಾ"""
+
+
+class TestRomanize:
+    """Test romanize()"""
+
+    def test_kannada(self):
+        assert romanize("ಆಂಜನೇಯ") == "aamjaneya"
+        assert romanize("ಹನುಮಾನ್") == "hanumaan"
+        assert romanize("ಕೃಷ್ಣ") == "krishna"
+
+    def test_devanagari(self):
+        assert romanize("हनुमान") == "hanumaana"
+        assert romanize("ॐ नमः") == "om namah"
+
+    def test_latin_passes_through(self):
+        assert romanize("Hanuman Chalisa!") == "Hanuman Chalisa!"
+        assert romanize("") == ""
+
+
+class TestSearchForm:
+    """Test that spellings in every script meet in one form"""
+
+    @pytest.mark.parametrize("variants", [
+        ["anjaneya", "ಆಂಜನೇಯ", "Anjaneyaa"],
+        ["hanuman", "Hanumaan", "hanumān", "ಹನುಮಾನ್", "हनुमान"],
+        ["chalisa", "Chaaleesa", "ಚಾಲೀಸಾ", "चालीसा"],
+        ["shankara", "Sankar", "ಶಂಕರ"],
+        ["lakshmi", "laxmi", "ಲಕ್ಷ್ಮಿ"],
+        ["vittala", "vithala", "ವಿಠಲ"],
+        ["rama", "raam", "ರಾಮ", "राम"],
+    ])
+    def test_variants_match(self, variants):
+        forms = {search_form(v) for v in variants}
+
+        assert len(forms) == 1, forms
+
+    def test_mixed_script_title(self):
+        assert search_form("ಹನುಮಾನ್ ಚಾಲೀಸಾ Hanuman Chalisa") == "hanuman calis hanuman calis"
+
+    def test_punctuation_and_case(self):
+        assert normalize_roman("Om, NAMAH  Shivaya!!") == "om nam sivay"
+        assert search_form("") == ""
+        assert search_form(None) == ""
+
+    def test_lyric_lines_form_keeps_lines(self):
+        lines = lyric_lines_form(LYRICS).split("\n")
+
+        assert len(lines) == 4
+        assert lines[0] == search_form("ಜಯ ಹನುಮಾನ ಜ್ಞಾನ ಗುಣ ಸಾಗರ")
+        assert search_form("anjaniputra") in lines[3]
+
+
+class TestTransliteratedSearch:
+    """Test /api/search across scripts"""
+
+    @pytest.fixture
+    def created(self, client):
+        response = client.post("/api/bhajans", data={
+            "title": "ಆಂಜನೇಯ ಸ್ತುತಿ",
+            "lyrics": LYRICS,
+            "tags": "stuti"
+        })
+        assert response.status_code == 200
+        return response.json()
+
+    def test_latin_query_finds_kannada_title(self, client, created):
+        results = client.get("/api/search", params={"q": "anjaneya"}).json()
+
+        assert [r["id"] for r in results] == [created["id"]]
+        # Transliterated title (95) + the only BM25 hit (30)
+        assert results[0]["relevance"] == 125
+
+    def test_latin_query_finds_kannada_lyric_line(self, client, created):
+        results = client.get("/api/search", params={"q": "pavanasuta"}).json()
+
+        assert [r["id"] for r in results] == [created["id"]]
+        # Transliterated lyric line (70) + the only BM25 hit (30)
+        assert results[0]["relevance"] == 100
+
+    def test_matches_start_at_a_word(self, client, created):
+        assert client.get("/api/search", params={"q": "dhaama"}).json() == []
+        assert client.get("/api/search", params={"q": "ramaduta"}).json()[0]["id"] == created["id"]
+
+    def test_exact_match_outranks_transliterated(self, client, created):
+        other = client.post("/api/bhajans", data={
+            "title": "Anjaneya Dandakam",
+            "lyrics": "Sri Anjaneyam prasanna anjaneyam prabhadivyakayam",
+            "tags": ""
+        }).json()
+
+        results = client.get("/api/search", params={"q": "Anjaneya"}).json()
+
+        assert [r["id"] for r in results] == [other["id"], created["id"]]
+
+    def test_update_refreshes_roman_forms(self, client, created):
+        client.put(f"/api/bhajans/{created['id']}", data={"title": "ಮಾರುತಿ ಸ್ತುತಿ"})
+
+        assert client.get("/api/search", params={"q": "anjaneya"}).json() == []
+        assert client.get("/api/search", params={"q": "maaruti"}).json()[0]["id"] == created["id"]
+
+
+class TestRomanBackfill:
+    """Test the schema v3 upgrade backfills transliterated columns"""
+
+    def test_upgrade_backfills_roman_forms(self, tmp_path):
+        from scripts.run_migrations import upgrade_schema
+
+        db_path = str(tmp_path / "v2.db")
+        conn = sqlite3.connect(db_path)
+        conn.execute("CREATE TABLE bhajans (id INTEGER PRIMARY KEY, title TEXT, lyrics TEXT, preview TEXT)")
+        conn.execute("INSERT INTO bhajans (title, lyrics) VALUES ('ಆಂಜನೇಯ', ?)", (LYRICS,))
+        conn.execute("PRAGMA user_version = 2")
+        conn.commit()
+        conn.close()
+
+        result = upgrade_schema(db_path, 3)
+
+        conn = sqlite3.connect(db_path)
+        title_roman, lyrics_roman = conn.execute("SELECT title_roman, lyrics_roman FROM bhajans").fetchone()
+        conn.close()
+        assert {"title_roman", "lyrics_roman"} <= set(result["added_columns"])
+        assert title_roman == "anjaney"
+        assert lyrics_roman == lyric_lines_form(LYRICS)
@@ -0,0 +1,97 @@
+"""Unit tests for the create_app() factory and lazy startup"""
+import os
+import sys
+import sqlite3
+import subprocess
+import pytest
+from fastapi.testclient import TestClient
+
+PROJECT_ROOT = os.path.join(os.path.dirname(__file__), '..', '..')
+sys.path.insert(0, PROJECT_ROOT)
+
+from main import create_app
+from settings import Settings
+import models
+
+
+@pytest.fixture
+def settings(tmp_path):
+    """Settings pointing at a throwaway database and log dir"""
+    yield Settings(
+        database_path=str(tmp_path / "app.db"),
+        log_dir=str(tmp_path / "logs"),
+        audio_dir=str(tmp_path / "audio")
+    )
+    
+    defaults = Settings.from_env()
+    models.configure_database(defaults.database_path, defaults.database_url)
+
+
+def test_import_main_has_no_side_effects(tmp_path):
+    """Importing main must not create the database or log files"""
+    env = dict(os.environ)
+    env["DATABASE_PATH"] = str(tmp_path / "import.db")
+    env.pop("DATABASE_URL", None)
+    env["LOG_DIR"] = str(tmp_path / "logs")
+    
+    subprocess.run(
+        [sys.executable, "-c", "import main"],
+        cwd=PROJECT_ROOT, env=env, check=True
+    )
+    
+    assert not (tmp_path / "import.db").exists()
+    assert not (tmp_path / "logs").exists()
+
+
+def test_create_app_does_not_touch_database(settings):
+    """Building an app only configures the engine"""
+    create_app(settings)
+    
+    assert models.get_database_path() == settings.database_path
+    assert not os.path.exists(settings.database_path)
+
+
+def test_lifespan_initializes_database(settings):
+    """Lifespan startup creates tables and stamps the schema version"""
+    app = create_app(settings)
+    
+    with TestClient(app) as client:
+        response = client.get("/api/bhajans")
+        assert response.status_code == 200
+    
+    conn = sqlite3.connect(settings.database_path)
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    conn.close()
+    assert version == models.SCHEMA_VERSION
+
+
+def test_database_initialized_lazily_without_lifespan(settings):
+    """get_db initializes the schema when no lifespan ran"""
+    client = TestClient(create_app(settings))
+    
+    response = client.get("/api/stats")
+    
+    assert response.status_code == 200
+    assert response.json()["total_bhajans"] == 0
+
+
+@pytest.mark.parametrize("method, url, body, status", [
+    ("post", "/api/beacon", {"bhajan_id": 1, "event": "view"}, 404),
+    ("get", "/api/suggest?q=hanu", None, 200),
+    ("get", "/api/playlists/monday", None, 200),
+])
+def test_direct_connection_routes_initialize_lazily(settings, method, url, body, status):
+    """Routes using get_connection() also initialize the schema when no lifespan ran"""
+    client = TestClient(create_app(settings))
+    
+    response = client.request(method, url, json=body)
+    
+    assert response.status_code == status
+
+
+def test_startup_runs_once_per_process(settings):
+    """ensure_db only initializes the database on its first call"""
+    create_app(settings)
+    
+    assert models.ensure_db() is True
+    assert models.ensure_db() is False
@@ -0,0 +1,169 @@
+"""
+Script-independent search forms for bhajan text
+
+Titles and lyrics mix Kannada, Devanagari and Latin ("ಹನುಮಾನ್ ಚಾಲೀಸಾ
+Hanuman Chalisa") and users type in whichever script their keyboard has.
+search_form() maps all three to one loose Latin spelling:
+
+- romanize(): Kannada/Devanagari letters -> Latin (inherent vowel,
+  virama, vowel signs, anusvara/visarga)
+- normalize_roman(): folds the spelling variants people actually type
+  (aa/a, ee/i, oo/u, sh/s, th/t, w/v, doubled letters, final "a")
+
+bhajans.title_roman / lyrics_roman hold search_form() of the title and of
+each lyric line, so "anjaneya" and "ಆಂಜನೇಯ" meet in one LIKE lookup.
+"""
+import re
+import unicodedata
+from typing import List
+
+# Kannada (U+0C80) and Devanagari (U+0900) share one block layout, so both
+# are romanized from offsets into the block.
+SCRIPT_BLOCKS = (0x0900, 0x0C80)
+
+_VOWELS = {
+    0x05: "a", 0x06: "aa", 0x07: "i", 0x08: "ii", 0x09: "u", 0x0A: "uu",
+    0x0B: "ri", 0x0C: "li", 0x0D: "e", 0x0E: "e", 0x0F: "e", 0x10: "ai",
+    0x11: "o", 0x12: "o", 0x13: "o", 0x14: "au", 0x60: "rii", 0x61: "lii",
+}
+
+_VOWEL_SIGNS = {
+    0x3E: "aa", 0x3F: "i", 0x40: "ii", 0x41: "u", 0x42: "uu", 0x43: "ri",
+    0x44: "rii", 0x45: "e", 0x46: "e", 0x47: "e", 0x48: "ai", 0x49: "o",
+    0x4A: "o", 0x4B: "o", 0x4C: "au", 0x62: "li", 0x63: "lii",
+}
+
+_CONSONANTS = {
+    0x15: "k", 0x16: "kh", 0x17: "g", 0x18: "gh", 0x19: "n",
+    0x1A: "ch", 0x1B: "ch", 0x1C: "j", 0x1D: "jh", 0x1E: "n",
+    0x1F: "t", 0x20: "th", 0x21: "d", 0x22: "dh", 0x23: "n",
+    0x24: "t", 0x25: "th", 0x26: "d", 0x27: "dh", 0x28: "n", 0x29: "n",
+    0x2A: "p", 0x2B: "ph", 0x2C: "b", 0x2D: "bh", 0x2E: "m",
+    0x2F: "y", 0x30: "r", 0x31: "r", 0x32: "l", 0x33: "l", 0x34: "l",
+    0x35: "v", 0x36: "sh", 0x37: "sh", 0x38: "s", 0x39: "h",
+    0x58: "k", 0x59: "kh", 0x5A: "g", 0x5B: "j", 0x5C: "d", 0x5D: "dh",
+    0x5E: "l", 0x5F: "y",
+}
+
+_SIGNS = {
+    0x01: "n",   # candrabindu
+    0x02: "m",   # anusvara (normalize_roman turns it into "n" before consonants)
+    0x03: "h",   # visarga
+    0x50: "om",
+    0x64: " ", 0x65: " ",  # danda, double danda
+}
+
+_VIRAMA = 0x4D
+
+_NON_WORD = re.compile(r"[^a-z0-9]+")
+_ASPIRATE = re.compile(r"([bcdgjkpst])h")
+_NASAL = re.compile(r"m(?=[cdgjklnrstvyz])")
+_REPEATS = re.compile(r"([a-z])\1+")
+
+
+def _offset(ch: str):
+    """Offset of ch into an Indic block, or None for other characters"""
+    code = ord(ch)
+    for base in SCRIPT_BLOCKS:
+        if base <= code < base + 0x80:
+            return code - base
+    return None
+
+
+def romanize(text: str) -> str:
+    """
+    Transliterate Kannada and Devanagari letters to Latin
+
+    Latin and other characters pass through unchanged.
+
+    Args:
+        text: Text in any mix of scripts
+
+    Returns:
+        Text with Indic letters spelled in Latin
+    """
+    if not text:
+        return ""
+
+    text = unicodedata.normalize("NFC", text)
+    out = []
+    length = len(text)
+    i = 0
+    while i < length:
+        ch = text[i]
+        offset = _offset(ch)
+        i += 1
+
+        if offset is None:
+            out.append(ch)
+        elif offset in _CONSONANTS:
+            out.append(_CONSONANTS[offset])
+            # Skip nukta; the consonant table already folds those letters
+            if i < length and _offset(text[i]) == 0x3C:
+                i += 1
+            following = _offset(text[i]) if i < length else None
+            if following == _VIRAMA:
+                i += 1
+            elif following in _VOWEL_SIGNS:
+                out.append(_VOWEL_SIGNS[following])
+                i += 1
+            else:
+                out.append("a")
+        elif offset in _VOWELS:
+            out.append(_VOWELS[offset])
+        elif offset in _SIGNS:
+            out.append(_SIGNS[offset])
+        elif 0x66 <= offset <= 0x6F:
+            out.append(str(offset - 0x66))
+        # Anything else (nukta, length marks, avagraha) carries no sound
+
+    return "".join(out)
+
+
+def _normalize_word(word: str) -> str:
+    word = word.replace("ee", "i").replace("oo", "u").replace("x", "ks")
+    word = word.replace("w", "v").replace("q", "k").replace("f", "p").replace("z", "j")
+    word = _ASPIRATE.sub(r"\1", word)
+    word = _NASAL.sub("n", word)
+    word = _REPEATS.sub(r"\1", word)
+    if len(word) > 2 and word.endswith("h"):
+        word = word[:-1]
+    if len(word) > 2 and word.endswith("a"):
+        word = word[:-1]
+    return word
+
+
+def normalize_roman(text: str) -> str:
+    """
+    Fold Latin spelling variants to one loose form
+
+    Lowercases, strips diacritics (hanumān -> hanuman), drops punctuation
+    and applies the same spelling folds to every word, so that "Hanumaan",
+    "hanuman" and "ಹನುಮಾನ್" all become "hanuman".
+
+    Args:
+        text: Latin text (e.g. romanize() output or a user query)
+
+    Returns:
+        Space-separated normalized words
+    """
+    decomposed = unicodedata.normalize("NFKD", text.lower())
+    stripped = "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return " ".join(_normalize_word(word) for word in _NON_WORD.split(stripped) if word)
+
+
+def search_form(text: str) -> str:
+    """Script-independent form of text for indexing and queries"""
+    if not text:
+        return ""
+    return normalize_roman(romanize(text))
+
+
+def lyric_lines_form(lyrics: str) -> str:
+    """search_form() of each lyric line, one per line (blank lines dropped)"""
+    lines: List[str] = []
+    for line in (lyrics or "").splitlines():
+        form = search_form(line)
+        if form:
+            lines.append(form)
+    return "\n".join(lines)